@@ -57,6 +57,14 @@ def inject_csrf_token():
 from models import db
 from flask_migrate import Migrate
 
+# Pool bekleme süresi /metrics için ölçülür (sadece QueuePool ayarlı veritabanlarında)
+if 'pool_size' in app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}):
+    from utils.monitoring.prometheus_exporter import OlculenQueuePool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **app.config['SQLALCHEMY_ENGINE_OPTIONS'],
+        'poolclass': OlculenQueuePool
+    }
+
 db.init_app(app)
 migrate = Migrate(app, db)
 
@@ -247,6 +255,20 @@ if limiter:
         logger.warning("⚠️ login endpoint'i bulunamadı, rate limit uygulanamadı")
 
 
+# ============================================
+# CLI KOMUTLARI
+# ============================================
+@app.cli.command('minibar-durum-yeniden-olustur')
+def minibar_durum_yeniden_olustur_komutu():
+    """oda_minibar_durumlari tablosunu minibar işlem geçmişinden yeniden oluşturur"""
+    from utils.minibar_durum_servisleri import MinibarDurumServisi
+
+    sonuc = MinibarDurumServisi.yeniden_olustur()
+    if not sonuc.get('success'):
+        raise SystemExit(f"❌ Minibar durumları oluşturulamadı: {sonuc.get('message')}")
+    print(f"✅ Minibar durumları yeniden oluşturuldu: {sonuc['hucre_sayisi']} oda/ürün")
+
+
 def init_database():
     """Veritabanı ve tabloları otomatik kontrol et - GÜVENLİ MOD"""
     try:
@@ -276,20 +298,34 @@ def init_database():
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from utils.file_management_service import FileManagementService
+from utils.scheduler_lideri import scheduler_lideri, lider_gorevi
+
+_scheduler = None
+_scheduler_pid = None
 
 def start_scheduler():
-    """Zamanlanmış görevleri başlat"""
+    """
+    Zamanlanmış görevleri başlat (process başına bir kez)
+    
+    Scheduler her worker'da çalışır ama görevler lider_gorevi ile sarılıdır;
+    Redis kirasını tutan tek lider process dışındakiler görevi atlar.
+    """
+    global _scheduler, _scheduler_pid
+    
     # Debug modunda sadece child process'te (gerçek uygulama) çalıştır
     # WERKZEUG_RUN_MAIN='true' sadece child process'te set edilir
     is_reloader_process = os.environ.get('WERKZEUG_RUN_MAIN') is None
     if is_reloader_process and app.debug:
         return  # Ana reloader process'inde scheduler başlatma
     
+    if _scheduler_pid == os.getpid() and _scheduler is not None and _scheduler.running:
+        return
+    
     scheduler = BackgroundScheduler()
     
     # Her gün saat 02:00'de eski dosyaları temizle
     scheduler.add_job(
-        func=lambda: FileManagementService.cleanup_old_files(),
+        func=lider_gorevi(FileManagementService.cleanup_old_files),
         trigger=CronTrigger(hour=2, minute=0),
         id='cleanup_old_files',
         name='Eski doluluk dosyalarını temizle',
@@ -302,7 +338,7 @@ def start_scheduler():
     if ml_enabled:
         # Sabah 08:00 - Akşam 20:00 arası her saat başı veri toplama
         scheduler.add_job(
-            func=lambda: collect_ml_data(),
+            func=lider_gorevi(collect_ml_data),
             trigger='cron',
             hour='8-20',  # 08:00, 09:00, ..., 20:00
             minute=0,
@@ -313,7 +349,7 @@ def start_scheduler():
         
         # Sabah 08:00 - Akşam 20:00 arası her saat başı anomali tespiti (30. dakikada)
         scheduler.add_job(
-            func=lambda: detect_anomalies(),
+            func=lider_gorevi(detect_anomalies),
             trigger='cron',
             hour='8-20',  # 08:00, 09:00, ..., 20:00
             minute=30,    # Veri toplamadan 30 dk sonra
@@ -325,7 +361,7 @@ def start_scheduler():
         # Her gece yarısı model eğitimi
         ml_training_schedule = os.getenv('ML_TRAINING_SCHEDULE', '0 0 * * *')  # Cron format
         scheduler.add_job(
-            func=lambda: train_ml_models(),
+            func=lider_gorevi(train_ml_models),
             trigger=CronTrigger.from_crontab(ml_training_schedule),
             id='ml_model_training',
             name='ML Model Eğitimi',
@@ -334,7 +370,7 @@ def start_scheduler():
         
         # Günde 2 kez stok bitiş kontrolü (sabah 9 ve akşam 6)
         scheduler.add_job(
-            func=lambda: check_stock_depletion(),
+            func=lider_gorevi(check_stock_depletion),
             trigger='cron',
             hour='9,18',
             id='ml_stock_depletion_check',
@@ -344,7 +380,7 @@ def start_scheduler():
         
         # Her gece 03:00'te eski alertleri temizle
         scheduler.add_job(
-            func=lambda: cleanup_old_alerts(),
+            func=lider_gorevi(cleanup_old_alerts),
             trigger='cron',
             hour=3,
             minute=0,
@@ -355,7 +391,7 @@ def start_scheduler():
         
         # Her gece 04:00'te eski model versiyonlarını temizle
         scheduler.add_job(
-            func=lambda: cleanup_old_models(),
+            func=lider_gorevi(cleanup_old_models),
             trigger='cron',
             hour=4,
             minute=0,
@@ -372,8 +408,11 @@ def start_scheduler():
         print("   - Alert temizleme: Her gece 03:00")
         print("   - Model cleanup: Her gece 04:00")
     
+    scheduler_lideri.baslat()
     scheduler.start()
-    print("✅ Scheduler başlatıldı (Günlük dosya temizleme: 02:00)")
+    _scheduler = scheduler
+    _scheduler_pid = os.getpid()
+    print(f"✅ Scheduler başlatıldı (pid: {os.getpid()}, Günlük dosya temizleme: 02:00)")
 
 def collect_ml_data():
     """ML veri toplama job'u"""
@@ -474,14 +513,16 @@ def cleanup_old_models():
     except Exception as e:
         logger.error(f"❌ Model cleanup hatası: {str(e)}")
 
-# Scheduler'ı sadece env ile açıkken başlat (web worker duplicate riskini önler)
+# Scheduler'ı sadece env ile açıkken başlat (Celery beat kullanılıyorsa kapalı kalır)
 ENABLE_WEB_SCHEDULER = os.getenv('ENABLE_WEB_SCHEDULER', 'false').lower() == 'true'
-if ENABLE_WEB_SCHEDULER:
+# Gunicorn (preload_app) altında master'da thread açılmaz; her worker post_fork'ta başlatır
+WEB_SCHEDULER_POST_FORK = os.getenv('WEB_SCHEDULER_POST_FORK', 'false').lower() == 'true'
+if ENABLE_WEB_SCHEDULER and not WEB_SCHEDULER_POST_FORK:
     try:
         start_scheduler()
     except Exception as e:
         print(f"⚠️  Scheduler başlatılamadı: {str(e)}")
-else:
+elif not ENABLE_WEB_SCHEDULER:
     print("ℹ️ Web scheduler devre dışı (ENABLE_WEB_SCHEDULER=false)")
 
 # Session kontrolü - Her istekte
@@ -5,10 +5,12 @@ Fiyatlandırma ve Karlılık Sistemi için ağır hesaplamaları arka planda ça
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown, task_prerun, task_postrun
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import logging
 import os
+import time
 import pytz
 
 # KKTC Timezone (Kıbrıs - Europe/Nicosia)
@@ -121,6 +123,38 @@ def make_celery(app=None):
 celery = make_celery()
 
 
+# Görev başlangıç zamanları (task_id -> perf_counter), /metrics süre histogramı için
+_gorev_baslangiclari = {}
+
+
+@task_prerun.connect
+def gorev_suresi_baslat(task_id=None, **kwargs):
+    _gorev_baslangiclari[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def gorev_suresi_kaydet(task_id=None, task=None, state=None, **kwargs):
+    """Biten görevin süresini Redis'teki Celery metriklerine yazar"""
+    baslangic = _gorev_baslangiclari.pop(task_id, None)
+    if baslangic is None or task is None:
+        return
+    try:
+        from utils.monitoring.prometheus_exporter import CeleryMetrics
+        CeleryMetrics.gorev_kaydet(task.name, time.perf_counter() - baslangic, state)
+    except Exception as e:
+        logger.debug(f"Celery görev metriği atlandı: {e}")
+
+
+@worker_process_shutdown.connect
+def log_tamponu_flush(**kwargs):
+    """Worker child kapanırken tampondaki SistemLog/AuditLog kayıtlarını yaz"""
+    try:
+        from utils.log_tamponu import log_tamponu
+        log_tamponu.flush()
+    except Exception as e:
+        logger.warning(f"Log tamponu flush atlandı: {e}")
+
+
 # ============================================
 # ASENKRON TASK'LAR
 # ============================================
@@ -521,6 +555,95 @@ def doluluk_yukleme_uyari_kontrolu_task():
         return {'status': 'error', 'message': str(e)}
 
 
+@celery.task(
+    bind=True,
+    name='doluluk.excel_isle',
+    acks_late=True,  # Worker ölürse mesaj tekrar teslim edilir
+    reject_on_worker_lost=True
+)
+def doluluk_excel_isle_task(self, islem_kodu):
+    """
+    Doluluk Excel yüklemesini arka planda işler
+    Parça parça commit eder, ilerlemeyi BackgroundJob'a yazar; yarıda
+    kalırsa son commit edilen parçadan devam eder
+    
+    Args:
+        islem_kodu: DosyaYukleme işlem kodu
+    """
+    try:
+        app, db = get_flask_app()
+        
+        with app.app_context():
+            from utils.doluluk_import_servisi import DolulukImportServisi
+            
+            logger.info(f"📥 Doluluk import başladı: {islem_kodu}")
+            sonuc = DolulukImportServisi.isle(islem_kodu)
+            logger.info(f"✅ Doluluk import bitti: {islem_kodu} - {sonuc.get('message')}")
+            
+            return {
+                'status': 'success' if sonuc.get('success') else 'error',
+                'islem_kodu': islem_kodu,
+                'message': sonuc.get('message')
+            }
+            
+    except Exception as e:
+        logger.error(f"Doluluk import hatası ({islem_kodu}): {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@celery.task(name='qr.toplu_olustur')
+def qr_toplu_olustur_task(job_id):
+    """
+    Odalar için toplu QR kodunu arka planda oluşturur
+    SVG'ler process pool ile render edilir, parça parça commit edilir
+    
+    Args:
+        job_id: BackgroundJob job_id
+    """
+    try:
+        app, db = get_flask_app()
+        
+        with app.app_context():
+            from utils.qr_toplu_servisi import QRTopluServisi
+            
+            logger.info(f"🔳 Toplu QR oluşturma başladı: {job_id}")
+            sonuc = QRTopluServisi.isle(job_id)
+            logger.info(f"✅ Toplu QR oluşturma bitti: {job_id} - {sonuc.get('message')}")
+            
+            return {
+                'status': 'success' if sonuc.get('success') else 'error',
+                'job_id': job_id,
+                'message': sonuc.get('message')
+            }
+            
+    except Exception as e:
+        logger.error(f"Toplu QR oluşturma hatası ({job_id}): {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@celery.task(name='doluluk.yarim_kalan_importlar')
+def doluluk_yarim_kalan_importlar_task():
+    """
+    Sahipsiz kalmış doluluk import job'larını yeniden kuyruğa alır
+    Her 10 dakikada bir çalışır
+    """
+    try:
+        app, db = get_flask_app()
+        
+        with app.app_context():
+            from utils.doluluk_import_servisi import DolulukImportServisi
+            
+            sayi = DolulukImportServisi.yarim_kalanlari_devam_ettir()
+            if sayi:
+                logger.info(f"🔁 {sayi} yarım kalan doluluk import'u yeniden kuyruğa alındı")
+            
+            return {'status': 'success', 'yeniden_kuyruga_alinan': sayi}
+            
+    except Exception as e:
+        logger.error(f"Yarım kalan import kontrolü hatası: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
 @celery.task(name='gorevlendirme.dnd_tamamlanmayan_kontrol')
 def dnd_tamamlanmayan_kontrol_task():
     """
@@ -942,6 +1065,44 @@ def ml_stok_bitis_kontrolu_task():
         return {'status': 'error', 'message': str(e)}
 
 
+@celery.task(name='ml.eski_modelleri_temizle')
+def ml_eski_modelleri_temizle_task(keep_versions=3):
+    """
+    Eski ML model versiyonlarını temizle - Her gece 04:00'te çalışır
+    (Web scheduler'daki ml_model_cleanup görevinin beat karşılığı)
+    """
+    try:
+        app, db = get_flask_app()
+        from utils.ml.model_manager import ModelManager
+        
+        with app.app_context():
+            model_manager = ModelManager(db)
+            sonuc = model_manager.cleanup_old_models(keep_versions=keep_versions)
+            disk_info = model_manager._check_disk_space()
+            
+            if disk_info['percent'] > 90:
+                logger.warning(
+                    f"⚠️  DISK KULLANIMI YÜKSEK: {disk_info['percent']:.1f}% "
+                    f"({disk_info['used_gb']:.2f}GB / {disk_info['total_gb']:.2f}GB)"
+                )
+            
+            logger.info(
+                f"✅ Model cleanup tamamlandı: {sonuc['deleted_count']} model silindi, "
+                f"{sonuc['freed_space_mb']:.2f}MB alan boşaltıldı"
+            )
+            
+            return {
+                'status': 'success',
+                'deleted_count': sonuc['deleted_count'],
+                'freed_space_mb': sonuc['freed_space_mb'],
+                'disk_percent': disk_info['percent']
+            }
+            
+    except Exception as e:
+        logger.error(f"ML model cleanup task hatası: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
 # ============================================
 # VERİTABANI YEDEKLEME TASK'LARI
 # ============================================
@@ -1037,51 +1198,45 @@ def eski_yedekleri_temizle_task():
 # VERİTABANI TEMİZLİK TASK'LARI
 # ============================================
 
+def _tablo_boyutu(db, tablo):
+    """Tablonun partition'ları dahil toplam boyutu (okunabilir)"""
+    from sqlalchemy import text
+    return db.session.execute(text(
+        "SELECT pg_size_pretty(COALESCE(SUM(pg_total_relation_size(relid)), 0)) "
+        "FROM pg_partition_tree(:tablo)"
+    ), {'tablo': tablo}).scalar()
+
+
 @celery.task(name='maintenance.query_logs_temizle')
 def query_logs_temizle_task():
     """
     query_logs tablosundan 7 günden eski kayıtları temizle
     Her hafta Pazar gecesi 02:00'de çalışır
+
+    query_logs günlük partition'lı olduğu için süresi dolan günlerin
+    partition'ları düşürülür (bkz. utils/partition_yoneticisi.py).
     """
     try:
         app, db = get_flask_app()
         
         with app.app_context():
-            from sqlalchemy import text
+            from utils.partition_yoneticisi import PartitionYoneticisi
             
             retention_days = _retention_days(app, 'QUERY_LOGS_RETENTION_DAYS', 30)
             logger.info(f"🗑️ query_logs tablosu temizleniyor ({retention_days} günden eski kayıtlar)...")
             
-            # Silinecek kayıt sayısını öğren
-            count_result = db.session.execute(text(
-                "SELECT COUNT(*) FROM query_logs WHERE timestamp < NOW() - make_interval(days => :days)"
-            ), {'days': retention_days}).scalar()
-            
-            if count_result == 0:
-                logger.info("✅ Silinecek eski query_logs kaydı yok")
-                return {
-                    'status': 'success',
-                    'deleted_count': 0,
-                    'message': 'Silinecek kayıt yok'
-                }
-            
-            # Kayıtları sil
-            db.session.execute(text(
-                "DELETE FROM query_logs WHERE timestamp < NOW() - make_interval(days => :days)"
-            ), {'days': retention_days})
-            db.session.commit()
+            sonuc = PartitionYoneticisi.temizle('query_logs', gun=retention_days)
             
-            logger.info(f"✅ {count_result} eski query_logs kaydı silindi")
+            logger.info(f"✅ {sonuc['silinen']} eski query_logs kaydı silindi")
             
             # Tablo boyutunu logla
-            size_result = db.session.execute(text(
-                "SELECT pg_size_pretty(pg_total_relation_size('query_logs'))"
-            )).scalar()
+            size_result = _tablo_boyutu(db, 'query_logs')
             logger.info(f"📊 query_logs tablo boyutu: {size_result}")
             
             return {
                 'status': 'success',
-                'deleted_count': count_result,
+                'deleted_count': sonuc['silinen'],
+                'dropped_partitions': sonuc['dusurulen_partitionlar'],
                 'table_size': size_result
             }
             
@@ -1096,14 +1251,14 @@ def query_logs_gunluk_temizle_task():
     query_logs tablosundan 3 günden eski kayıtları temizle
     Her gün gece 03:00'de çalışır (KKTC saati)
     
-    Bu tablo günde ~250K kayıt ürettiği için günlük temizlik gerekli.
-    Performans için batch delete kullanılır.
+    Bu tablo günde ~250K kayıt ürettiği için günlük partition'lıdır;
+    retention satır silmek yerine süresi dolan partition'ı düşürür.
     """
     try:
         app, db = get_flask_app()
         
         with app.app_context():
-            from sqlalchemy import text
+            from utils.partition_yoneticisi import PartitionYoneticisi
             
             retention_days = _retention_days(app, 'QUERY_LOGS_DAILY_RETENTION_DAYS', 7)
             logger.info(
@@ -1111,62 +1266,20 @@ def query_logs_gunluk_temizle_task():
                 f"({retention_days} günden eski kayıtlar)..."
             )
             
-            # Önce tablo boyutunu al
-            size_before = db.session.execute(text(
-                "SELECT pg_size_pretty(pg_total_relation_size('query_logs'))"
-            )).scalar()
-            
-            # Silinecek kayıt sayısını öğren
-            count_result = db.session.execute(text(
-                "SELECT COUNT(*) FROM query_logs WHERE timestamp < NOW() - make_interval(days => :days)"
-            ), {'days': retention_days}).scalar()
-            
-            if count_result == 0:
-                logger.info("✅ Silinecek eski query_logs kaydı yok")
-                return {
-                    'status': 'success',
-                    'deleted_count': 0,
-                    'message': 'Silinecek kayıt yok',
-                    'table_size': size_before
-                }
+            size_before = _tablo_boyutu(db, 'query_logs')
+            sonuc = PartitionYoneticisi.temizle('query_logs', gun=retention_days)
+            size_after = _tablo_boyutu(db, 'query_logs')
             
-            # Batch delete - Performans için 50K'lık parçalar halinde sil
-            total_deleted = 0
-            batch_size = 50000
-            
-            while True:
-                result = db.session.execute(text(f"""
-                    DELETE FROM query_logs 
-                    WHERE id IN (
-                        SELECT id FROM query_logs 
-                        WHERE timestamp < NOW() - make_interval(days => :days)
-                        LIMIT {batch_size}
-                    )
-                """), {'days': retention_days})
-                deleted = result.rowcount
-                db.session.commit()
-                
-                if deleted == 0:
-                    break
-                    
-                total_deleted += deleted
-                logger.info(f"  🔄 {total_deleted} kayıt silindi...")
-                
-                # Her batch sonrası kısa bekleme (DB yükünü azaltmak için)
-                import time
-                time.sleep(0.5)
-            
-            # Sonra tablo boyutunu al
-            size_after = db.session.execute(text(
-                "SELECT pg_size_pretty(pg_total_relation_size('query_logs'))"
-            )).scalar()
-            
-            logger.info(f"✅ [GÜNLÜK] {total_deleted} eski query_logs kaydı silindi")
+            logger.info(
+                f"✅ [GÜNLÜK] {sonuc['silinen']} eski query_logs kaydı silindi "
+                f"({len(sonuc['dusurulen_partitionlar'])} partition düşürüldü)"
+            )
             logger.info(f"📊 Tablo boyutu: {size_before} → {size_after}")
             
             return {
                 'status': 'success',
-                'deleted_count': total_deleted,
+                'deleted_count': sonuc['silinen'],
+                'dropped_partitions': sonuc['dusurulen_partitionlar'],
                 'table_size_before': size_before,
                 'table_size_after': size_after
             }
@@ -1182,53 +1295,28 @@ def ml_metrics_temizle_task():
     ml_metrics tablosundan 60 günden eski kayıtları temizle
     Her hafta Pazartesi gece 03:30'da çalışır (KKTC saati)
     
-    Bu tablo 130 MB civarında ve büyümeye devam ediyor.
+    Tablo aylık partition'lıdır; süresi tamamen dolan aylar düşürülür.
     """
     try:
         app, db = get_flask_app()
         
         with app.app_context():
-            from sqlalchemy import text
+            from utils.partition_yoneticisi import PartitionYoneticisi
             
             retention_days = _retention_days(app, 'ML_METRICS_RETENTION_DAYS', 90)
             logger.info(f"🗑️ ml_metrics tablosu temizleniyor ({retention_days} günden eski kayıtlar)...")
             
-            # Önce tablo boyutunu al
-            size_before = db.session.execute(text(
-                "SELECT pg_size_pretty(pg_total_relation_size('ml_metrics'))"
-            )).scalar()
-            
-            # Silinecek kayıt sayısını öğren
-            count_result = db.session.execute(text(
-                "SELECT COUNT(*) FROM ml_metrics WHERE timestamp < NOW() - make_interval(days => :days)"
-            ), {'days': retention_days}).scalar()
-            
-            if count_result == 0:
-                logger.info("✅ Silinecek eski ml_metrics kaydı yok")
-                return {
-                    'status': 'success',
-                    'deleted_count': 0,
-                    'message': 'Silinecek kayıt yok',
-                    'table_size': size_before
-                }
-            
-            # Kayıtları sil
-            db.session.execute(text(
-                "DELETE FROM ml_metrics WHERE timestamp < NOW() - make_interval(days => :days)"
-            ), {'days': retention_days})
-            db.session.commit()
-            
-            # Sonra tablo boyutunu al
-            size_after = db.session.execute(text(
-                "SELECT pg_size_pretty(pg_total_relation_size('ml_metrics'))"
-            )).scalar()
+            size_before = _tablo_boyutu(db, 'ml_metrics')
+            sonuc = PartitionYoneticisi.temizle('ml_metrics', gun=retention_days)
+            size_after = _tablo_boyutu(db, 'ml_metrics')
             
-            logger.info(f"✅ {count_result} eski ml_metrics kaydı silindi")
+            logger.info(f"✅ {sonuc['silinen']} eski ml_metrics kaydı silindi")
             logger.info(f"📊 Tablo boyutu: {size_before} → {size_after}")
             
             return {
                 'status': 'success',
-                'deleted_count': count_result,
+                'deleted_count': sonuc['silinen'],
+                'dropped_partitions': sonuc['dusurulen_partitionlar'],
                 'table_size_before': size_before,
                 'table_size_after': size_after
             }
@@ -1243,27 +1331,38 @@ def eski_loglari_temizle_task():
     """
     Eski log tablolarını temizle (hata_loglari, audit_logs vb.)
     Her hafta Pazar gecesi 02:30'da çalışır
+
+    Partition'lı log tabloları (sistem_loglari, hata_loglari, audit_logs)
+    partition düşürülerek, diğerleri DELETE ile temizlenir.
     """
     try:
         app, db = get_flask_app()
         
         with app.app_context():
             from sqlalchemy import text
+            from utils.partition_yoneticisi import PartitionYoneticisi
             
             logger.info("🗑️ Eski log tabloları temizleniyor...")
             
             temizlik_sonuclari = {}
             
-            # Temizlenecek tablolar, tarih sütunları ve saklama süreleri (gün)
+            # Partition'lı tablolar - saklama süreleri config'den (0 = sınırsız)
+            for tablo in ('sistem_loglari', 'hata_loglari', 'audit_logs'):
+                try:
+                    sonuc = PartitionYoneticisi.temizle(tablo)
+                    temizlik_sonuclari[tablo] = sonuc['silinen']
+                    if sonuc['silinen']:
+                        logger.info(
+                            f"  ✅ {tablo}: {sonuc['silinen']} kayıt silindi "
+                            f"({len(sonuc['dusurulen_partitionlar'])} partition düşürüldü)"
+                        )
+                except Exception as table_error:
+                    db.session.rollback()
+                    logger.warning(f"  ⚠️ {tablo} temizlenemedi: {str(table_error)}")
+                    temizlik_sonuclari[tablo] = f"Hata: {str(table_error)}"
+            
+            # Partition'sız tablolar, tarih sütunları ve saklama süreleri (gün)
             tablolar = {
-                'hata_loglari': {
-                    'days': _retention_days(app, 'HATA_LOGLARI_RETENTION_DAYS', 30),
-                    'date_column': 'tarih'
-                },
-                'audit_logs': {
-                    'days': _retention_days(app, 'AUDIT_LOGS_RETENTION_DAYS', 180),
-                    'date_column': 'islem_tarihi'
-                },
                 'email_loglari': {
                     'days': _retention_days(app, 'EMAIL_LOGLARI_RETENTION_DAYS', 30),
                     'date_column': 'gonderim_tarihi'
@@ -1272,6 +1371,10 @@ def eski_loglari_temizle_task():
                     'days': _retention_days(app, 'BACKGROUND_JOBS_RETENTION_DAYS', 14),
                     'date_column': 'created_at'
                 },
+                'query_istatistikleri': {
+                    'days': _retention_days(app, 'QUERY_ISTATISTIK_RETENTION_DAYS', 30),
+                    'date_column': 'zaman_dilimi'
+                },
             }
             
             for tablo, cfg in tablolar.items():
@@ -1317,6 +1420,129 @@ def eski_loglari_temizle_task():
         return {'status': 'error', 'message': str(e)}
 
 
+@celery.task(name='maintenance.partition_bakimi')
+def partition_bakimi_task():
+    """
+    Log/metrik tabloları için ileri tarihli partition'ları hazırla
+    Her gece 00:30'da çalışır (KKTC saati)
+    """
+    try:
+        app, db = get_flask_app()
+        
+        with app.app_context():
+            from utils.partition_yoneticisi import PartitionYoneticisi
+            
+            sonuc = PartitionYoneticisi.ileri_partitionlari_olustur()
+            olusturulan = sum(len(v) for v in sonuc.values() if isinstance(v, list))
+            logger.info(f"🧩 Partition bakımı tamamlandı: {olusturulan} yeni partition")
+            
+            return {
+                'status': 'success',
+                'created_count': olusturulan,
+                'details': sonuc
+            }
+            
+    except Exception as e:
+        logger.error(f"Partition bakımı task hatası: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@celery.task(name='maintenance.eski_dosyalari_temizle')
+def eski_dosyalari_temizle_task():
+    """
+    Eski doluluk yükleme dosyalarını temizle - Her gece 02:00'de çalışır
+    (Web scheduler'daki cleanup_old_files görevinin beat karşılığı)
+    """
+    try:
+        app, db = get_flask_app()
+        from utils.file_management_service import FileManagementService
+        
+        with app.app_context():
+            sonuc = FileManagementService.cleanup_old_files()
+            logger.info(f"🗑️ Eski dosya temizliği: {sonuc.get('message')}")
+            return {
+                'status': 'success' if sonuc.get('success') else 'error',
+                'deleted_count': sonuc.get('deleted_count', 0),
+                'message': sonuc.get('message')
+            }
+            
+    except Exception as e:
+        logger.error(f"Eski dosya temizliği task hatası: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@celery.task(name='maintenance.stok_bakiye_mutabakat')
+def stok_bakiye_mutabakat_task(duzelt=True):
+    """
+    urun_stok_bakiyeleri tablosunu stok_hareketleri defteri ile karşılaştır
+    Sapma varsa defterdeki değere göre düzelt
+    Her gece 04:00'te çalışır (KKTC saati)
+    """
+    try:
+        app, db = get_flask_app()
+        
+        with app.app_context():
+            from utils.stok_bakiye_servisleri import StokBakiyeServisi
+            
+            logger.info("🔍 Stok bakiye mutabakatı başlıyor...")
+            sonuc = StokBakiyeServisi.mutabakat(duzelt=duzelt)
+            
+            if sonuc.get('success'):
+                logger.info(
+                    f"✅ Stok bakiye mutabakatı tamamlandı: "
+                    f"{sonuc['kontrol_edilen']} ürün, {sonuc['sapma_sayisi']} sapma"
+                )
+                return {
+                    'status': 'success',
+                    'kontrol_edilen': sonuc['kontrol_edilen'],
+                    'sapma_sayisi': sonuc['sapma_sayisi'],
+                    'sapmalar': sonuc['sapmalar'][:100],
+                    'duzeltildi': sonuc['duzeltildi']
+                }
+            
+            return {'status': 'error', 'message': sonuc.get('message')}
+            
+    except Exception as e:
+        logger.error(f"Stok bakiye mutabakat task hatası: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@celery.task(name='maintenance.minibar_durum_mutabakat')
+def minibar_durum_mutabakat_task(duzelt=True):
+    """
+    oda_minibar_durumlari tablosunu minibar işlem geçmişi ile karşılaştır
+    Sapma varsa geçmişten yeniden hesapla
+    Her gece 04:15'te çalışır (KKTC saati)
+    """
+    try:
+        app, db = get_flask_app()
+        
+        with app.app_context():
+            from utils.minibar_durum_servisleri import MinibarDurumServisi
+            
+            logger.info("🔍 Minibar durum mutabakatı başlıyor...")
+            sonuc = MinibarDurumServisi.mutabakat(duzelt=duzelt)
+            
+            if sonuc.get('success'):
+                logger.info(
+                    f"✅ Minibar durum mutabakatı tamamlandı: "
+                    f"{sonuc['kontrol_edilen']} hücre, {sonuc['sapma_sayisi']} sapma"
+                )
+                return {
+                    'status': 'success',
+                    'kontrol_edilen': sonuc['kontrol_edilen'],
+                    'sapma_sayisi': sonuc['sapma_sayisi'],
+                    'sapmalar': sonuc['sapmalar'][:100],
+                    'duzeltildi': sonuc['duzeltildi']
+                }
+            
+            return {'status': 'error', 'message': sonuc.get('message')}
+            
+    except Exception as e:
+        logger.error(f"Minibar durum mutabakat task hatası: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+
 @celery.task(name='bildirim.gorev_tamamlandi_bildirimi')
 def send_gorev_tamamlandi_bildirimi_task(otel_id, oda_no, personel_adi, gorev_id=None, oda_id=None, gonderen_id=None):
     """Görev tamamlandı bildirimi gönder - Asenkron"""
@@ -1374,6 +1600,11 @@ celery.conf.beat_schedule = {
         'task': 'ml.stok_bitis_kontrolu',
         'schedule': 21600.0,  # 6 saat
     },
+    # ML Eski Model Versiyonları - Her gece 04:00'te (son 3 versiyon saklanır)
+    'ml-eski-modelleri-temizle': {
+        'task': 'ml.eski_modelleri_temizle',
+        'schedule': crontab(hour=2, minute=0),  # UTC 02:00 = KKTC 04:00
+    },
     
     # ============================================
     # FİYATLANDIRMA SİSTEMİ SCHEDULE
@@ -1414,6 +1645,16 @@ celery.conf.beat_schedule = {
         'task': 'gorevlendirme.doluluk_yukleme_uyari_kontrolu',
         'schedule': crontab(hour=8, minute=0),  # UTC 08:00 = KKTC 10:00
     },
+    # Her 10 dakikada yarım kalan doluluk import'larını devam ettir
+    'doluluk-yarim-kalan-importlar': {
+        'task': 'doluluk.yarim_kalan_importlar',
+        'schedule': crontab(minute='*/10'),
+    },
+    # Her gece 02:00'de (KKTC) eski doluluk dosyalarını temizle
+    'eski-dosyalari-temizle': {
+        'task': 'maintenance.eski_dosyalari_temizle',
+        'schedule': crontab(hour=0, minute=0),  # UTC 00:00 = KKTC 02:00
+    },
     
     # ============================================
     # YEDEKLEME SİSTEMİ SCHEDULE
@@ -1464,11 +1705,26 @@ celery.conf.beat_schedule = {
         'task': 'maintenance.ml_metrics_temizle',
         'schedule': crontab(day_of_week=1, hour=1, minute=30),  # UTC 01:30 Pazartesi = KKTC 03:30 Pazartesi
     },
+    # Her gece 00:30'da (KKTC) ileri tarihli log/metrik partition'larını hazırla
+    'partition-bakimi': {
+        'task': 'maintenance.partition_bakimi',
+        'schedule': crontab(hour=22, minute=30),  # UTC 22:30 = KKTC 00:30
+    },
     # Her Pazar gecesi 02:30'da eski logları temizle
     'eski-loglari-temizle': {
         'task': 'maintenance.eski_loglari_temizle',
         'schedule': crontab(day_of_week=0, hour=0, minute=30),  # UTC 00:30 Pazar = KKTC 02:30 Pazar
     },
+    # Her gece 04:00'te (KKTC) stok bakiye mutabakatı
+    'stok-bakiye-mutabakat': {
+        'task': 'maintenance.stok_bakiye_mutabakat',
+        'schedule': crontab(hour=2, minute=0),  # UTC 02:00 = KKTC 04:00
+    },
+    # Her gece 04:15'te (KKTC) oda minibar durum mutabakatı
+    'minibar-durum-mutabakat': {
+        'task': 'maintenance.minibar_durum_mutabakat',
+        'schedule': crontab(hour=2, minute=15),  # UTC 02:15 = KKTC 04:15
+    },
 }
 
 
@@ -145,6 +145,12 @@ class Config:
     CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
     # REDIS_URL yukarıda tanımlandı, cache ve rate limiter de aynı URL'i kullanır
     
+    # L1: worker başına process içi cache (Redis önünde), invalidation pub/sub ile
+    CACHE_L1_ENABLED = os.getenv('CACHE_L1_ENABLED', 'true').lower() == 'true'
+    CACHE_L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', '2000'))  # Cache başına kayıt sınırı
+    CACHE_L1_MAX_BYTES = int(os.getenv('CACHE_L1_MAX_BYTES', str(32 * 1024 * 1024)))  # Cache başına payload sınırı
+    CACHE_L1_TTL = int(os.getenv('CACHE_L1_TTL', '60'))  # Saniye, L2 TTL'inden uzun olamaz
+    
     # ============================================
     # RATE LIMITING CONFIGURATION
     # ============================================
@@ -154,6 +160,100 @@ class Config:
     RATE_LIMIT_API = os.getenv('RATE_LIMIT_API', '300 per minute')
     RATE_LIMIT_POLLING = os.getenv('RATE_LIMIT_POLLING', '600 per minute')
 
+    # ============================================
+    # LOG TAMPONU (SistemLog / AuditLog toplu yazım)
+    # ============================================
+    LOG_TAMPON_ENABLED = os.getenv('LOG_TAMPON_ENABLED', 'true').lower() == 'true'
+    LOG_TAMPON_BATCH_SIZE = int(os.getenv('LOG_TAMPON_BATCH_SIZE', '100'))  # Bu kadar kayıt birikince flush
+    LOG_TAMPON_FLUSH_INTERVAL = float(os.getenv('LOG_TAMPON_FLUSH_INTERVAL', '2.0'))  # Saniye
+    LOG_TAMPON_MAX_SIZE = int(os.getenv('LOG_TAMPON_MAX_SIZE', '5000'))  # Kuyruk üst sınırı
+    LOG_TAMPON_DOLU_POLITIKASI = os.getenv('LOG_TAMPON_DOLU_POLITIKASI', 'senkron')  # senkron | dusur
+
+    # ============================================
+    # DOLULUK IMPORT (Arka plan Excel işleme)
+    # ============================================
+    DOLULUK_IMPORT_CHUNK_SIZE = int(os.getenv('DOLULUK_IMPORT_CHUNK_SIZE', '200'))  # Parça başına satır
+    DOLULUK_IMPORT_STALE_SECONDS = int(os.getenv('DOLULUK_IMPORT_STALE_SECONDS', '600'))  # Sahipsiz job eşiği
+
+    # ============================================
+    # TOPLU QR OLUŞTURMA (Arka plan render)
+    # ============================================
+    QR_TOPLU_ISLEM_SAYISI = int(os.getenv('QR_TOPLU_ISLEM_SAYISI', str(min(4, os.cpu_count() or 1))))  # SVG render process sayısı
+    QR_TOPLU_PARCA = int(os.getenv('QR_TOPLU_PARCA', '200'))  # Parça başına oda (commit + ilerleme)
+    QR_TOPLU_STALE_SECONDS = int(os.getenv('QR_TOPLU_STALE_SECONDS', '600'))  # Bu süre ilerlemeyen job yeni işi engellemez
+
+    # ============================================
+    # BİLDİRİM YAYINI (Redis pub/sub + SSE)
+    # ============================================
+    BILDIRIM_REDIS_ENABLED = os.getenv('BILDIRIM_REDIS_ENABLED', 'true').lower() == 'true'
+    BILDIRIM_SSE_MAX_BAGLANTI = int(os.getenv('BILDIRIM_SSE_MAX_BAGLANTI', '2'))  # Worker başına açık stream
+    BILDIRIM_SSE_MAX_SURE = int(os.getenv('BILDIRIM_SSE_MAX_SURE', '300'))  # Saniye, sonra istemci yeniden bağlanır
+    BILDIRIM_SSE_KEEPALIVE = int(os.getenv('BILDIRIM_SSE_KEEPALIVE', '20'))  # Saniye
+    BILDIRIM_SAYAC_YENILEME = int(os.getenv('BILDIRIM_SAYAC_YENILEME', '3600'))  # Okunmamış set'leri DB'den yeniden kurma aralığı
+
+    # ============================================
+    # WEB SCHEDULER (APScheduler, ENABLE_WEB_SCHEDULER=true ise)
+    # ============================================
+    # Görevler her worker'da zamanlanır ama sadece Redis kirasını tutan lider process'te çalışır.
+    # Celery beat kullanılıyorsa ENABLE_WEB_SCHEDULER=false bırakılır (tüm görevler beat'te tanımlı).
+    SCHEDULER_LIDER_ENABLED = os.getenv('SCHEDULER_LIDER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_LIDER_LEASE = int(os.getenv('SCHEDULER_LIDER_LEASE', '30'))  # Saniye, failover üst sınırı
+
+    # ============================================
+    # API METRICS (system monitor endpoint istatistikleri)
+    # ============================================
+    # Her worker kümülatif histogram özetini aralıklarla Redis'e yazar;
+    # monitor tüm worker'ların birleşimini gösterir (key TTL = 3 x aralık).
+    API_METRICS_REDIS_ENABLED = os.getenv('API_METRICS_REDIS_ENABLED', 'true').lower() == 'true'
+    API_METRICS_YAYIN_ARALIGI = int(os.getenv('API_METRICS_YAYIN_ARALIGI', '15'))  # Saniye
+
+    # ============================================
+    # SQL SORGU BÜTÇESİ (request başına sorgu sayımı / N+1 tespiti)
+    # ============================================
+    # Bir request SQL_BUTCE_MAX_SORGU'dan fazla sorgu çalıştırırsa veya aynı
+    # sorgu parmak izini SQL_BUTCE_MAX_TEKRAR'dan fazla tekrarlarsa uyarı
+    # loglanır ve endpoint system monitor'da bütçe aşımıyla işaretlenir.
+    SQL_BUTCE_ENABLED = os.getenv('SQL_BUTCE_ENABLED', 'true').lower() == 'true'
+    SQL_BUTCE_MAX_SORGU = int(os.getenv('SQL_BUTCE_MAX_SORGU', '50'))
+    SQL_BUTCE_MAX_TEKRAR = int(os.getenv('SQL_BUTCE_MAX_TEKRAR', '10'))
+    SQL_BUTCE_SERVER_TIMING = os.getenv('SQL_BUTCE_SERVER_TIMING', 'true').lower() == 'true'
+
+    # ============================================
+    # SORGU İSTATİSTİKLERİ (parmak izi bazında query_istatistikleri)
+    # ============================================
+    # Tüm sorgular worker belleğinde toplanır, FLUSH_ARALIGI saniyede bir
+    # DILIM_DAKIKA'lık zaman dilimi satırlarına upsert edilir.
+    QUERY_ISTATISTIK_ENABLED = os.getenv('QUERY_ISTATISTIK_ENABLED', 'true').lower() == 'true'
+    QUERY_ISTATISTIK_DILIM_DAKIKA = int(os.getenv('QUERY_ISTATISTIK_DILIM_DAKIKA', '60'))
+    QUERY_ISTATISTIK_FLUSH_ARALIGI = int(os.getenv('QUERY_ISTATISTIK_FLUSH_ARALIGI', '60'))  # Saniye
+
+    # ============================================
+    # SAMPLING PROFILER (request thread'lerinin stack örneklemesi)
+    # ============================================
+    # System monitor'dan çalışma anında açılıp kapatılır; durum Redis üzerinden
+    # tüm worker'lara yayılır. VARSAYILAN_AKTIF sadece Redis'te durum yokken geçerlidir.
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'true').lower() == 'true'
+    PROFILER_VARSAYILAN_AKTIF = os.getenv('PROFILER_VARSAYILAN_AKTIF', 'false').lower() == 'true'
+    PROFILER_HZ = int(os.getenv('PROFILER_HZ', '20'))  # Saniyedeki örnek sayısı
+    PROFILER_MAX_OVERHEAD = float(os.getenv('PROFILER_MAX_OVERHEAD', '2'))  # Worker CPU yüzdesi
+    PROFILER_YAYIN_ARALIGI = int(os.getenv('PROFILER_YAYIN_ARALIGI', '10'))  # Saniye
+
+    # ============================================
+    # PROMETHEUS /metrics (OpenMetrics scrape endpoint'i)
+    # ============================================
+    # METRICS_TOKEN verilirse 'Authorization: Bearer <token>' zorunludur;
+    # verilmezse sadece loopback/özel ağ adreslerinden erişilebilir.
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+    # ============================================
+    # ML MODEL REGISTRY (process içi model önbelleği)
+    # ============================================
+    # Aktif model sürümü (MLModel.id) en fazla TTL saniyede bir kontrol edilir;
+    # yeni eğitilen model diğer process'lere bu süre içinde yansır.
+    ML_MODEL_REGISTRY_ENABLED = os.getenv('ML_MODEL_REGISTRY_ENABLED', 'true').lower() == 'true'
+    ML_MODEL_REGISTRY_TTL = int(os.getenv('ML_MODEL_REGISTRY_TTL', '60'))  # Saniye
+
     # ============================================
     # DB RETENTION CONFIGURATION (GÜN)
     # ============================================
@@ -165,3 +265,13 @@ class Config:
     HATA_LOGLARI_RETENTION_DAYS = int(os.getenv('HATA_LOGLARI_RETENTION_DAYS', '30'))
     EMAIL_LOGLARI_RETENTION_DAYS = int(os.getenv('EMAIL_LOGLARI_RETENTION_DAYS', '30'))
     BACKGROUND_JOBS_RETENTION_DAYS = int(os.getenv('BACKGROUND_JOBS_RETENTION_DAYS', '14'))
+    SISTEM_LOGLARI_RETENTION_DAYS = int(os.getenv('SISTEM_LOGLARI_RETENTION_DAYS', '0'))  # 0 = sınırsız
+    QUERY_ISTATISTIK_RETENTION_DAYS = int(os.getenv('QUERY_ISTATISTIK_RETENTION_DAYS', '30'))
+
+    # ============================================
+    # LOG/METRİK PARTITION'LARI
+    # ============================================
+    # query_logs günlük, diğer log/metrik tabloları aylık partition'lıdır.
+    # Gece bakımı bugünden itibaren bu kadar ileri dönemin partition'ını hazırlar.
+    PARTITION_ILERI_GUN = int(os.getenv('PARTITION_ILERI_GUN', '7'))
+    PARTITION_ILERI_AY = int(os.getenv('PARTITION_ILERI_AY', '2'))
@@ -4,6 +4,10 @@ Gunicorn Configuration - Memory Optimized for Minibar Takip
 import multiprocessing
 import os
 
+# Web scheduler (ENABLE_WEB_SCHEDULER=true) master'da değil worker'larda post_fork ile başlar;
+# görevleri sadece Redis kirasını tutan lider worker çalıştırır (utils/scheduler_lideri.py)
+os.environ.setdefault('WEB_SCHEDULER_POST_FORK', 'true')
+
 # Server Socket
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 backlog = 2048
@@ -70,6 +74,13 @@ def post_fork(server, worker):
     except Exception as e:
         server.log.warning(f"Worker DB pool reset atlandı: {e}")
 
+    if os.getenv('ENABLE_WEB_SCHEDULER', 'false').lower() == 'true':
+        try:
+            from app import start_scheduler
+            start_scheduler()
+        except Exception as e:
+            server.log.warning(f"Worker scheduler başlatılamadı: {e}")
+
 def pre_exec(server):
     """Called just before a new master process is forked."""
     server.log.info("Forked child, re-executing.")
@@ -81,6 +92,20 @@ def when_ready(server):
 def worker_int(worker):
     """Called just after a worker exited on SIGINT or SIGQUIT."""
     worker.log.info(f"Worker received INT or QUIT signal (pid: {worker.pid})")
+    # Tampondaki SistemLog/AuditLog kayıtlarını kaybetmeden yaz
+    try:
+        from utils.log_tamponu import log_tamponu
+        yazilan = log_tamponu.flush()
+        if yazilan:
+            worker.log.info(f"Log tamponu flush edildi: {yazilan} kayıt")
+    except Exception as e:
+        worker.log.warning(f"Log tamponu flush atlandı: {e}")
+    # Lider bu worker ise kirayı bırak, başka worker beklemeden devralsın
+    try:
+        from utils.scheduler_lideri import scheduler_lideri
+        scheduler_lideri.birak()
+    except Exception as e:
+        worker.log.warning(f"Scheduler liderliği bırakılamadı: {e}")
 
 def worker_abort(worker):
     """Called when a worker received the SIGABRT signal."""
@@ -7,6 +7,10 @@ import logging
 from flask import g, request
 from functools import wraps
 
+from config import Config
+from utils.monitoring.sorgu_butcesi import SorguButcesi
+from utils.monitoring.profiler import SamplingProfiler
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +28,10 @@ def init_metrics_middleware(app):
         try:
             g.start_time = time.time()
             g.request_tracked = False
+            if SorguButcesi.aktif_mi():
+                SorguButcesi.istek_baslat(g)
+            if Config.PROFILER_ENABLED:
+                SamplingProfiler.istek_basladi(request.endpoint)
         except Exception as e:
             logger.error(f"Before request hatası: {str(e)}")
     
@@ -43,6 +51,9 @@ def init_metrics_middleware(app):
             method = request.method
             status_code = response.status_code
             
+            # Request'in SQL özeti (sorgu sayısı, DB süresi, bütçe aşımı)
+            sorgu = SorguButcesi.istek_bitir(g, endpoint)
+            
             # User ID (session'dan)
             user_id = None
             if hasattr(request, 'user_id'):
@@ -56,18 +67,26 @@ def init_metrics_middleware(app):
                     duration=duration,
                     status_code=status_code,
                     method=method,
-                    user_id=user_id
+                    user_id=user_id,
+                    sorgu=sorgu
                 )
                 g.request_tracked = True
             
             # Response header'a duration ekle
             response.headers['X-Response-Time'] = f"{duration:.4f}s"
+            if sorgu and Config.SQL_BUTCE_SERVER_TIMING:
+                response.headers['Server-Timing'] = SorguButcesi.server_timing(sorgu, duration)
             
         except Exception as e:
             logger.error(f"After request hatası: {str(e)}")
         
         return response
     
+    @app.teardown_request
+    def teardown_request(exception=None):
+        """Request thread'i profiler örneklemesinden çıkar"""
+        SamplingProfiler.istek_bitti()
+    
     logger.info("✅ Metrics middleware başlatıldı")
 
 
@@ -0,0 +1,185 @@
+"""Log ve metrik tablolarını zaman bazlı RANGE partition'a çevir
+
+Revision ID: 20261017_log_partitions
+Revises: 20261017_minibar_durum
+Create Date: 2026-10-17
+
+Sorun: query_logs, ml_metrics, sistem_loglari, hata_loglari ve audit_logs
+retention'ı gece COUNT(*) + DELETE ile yapılıyordu; büyük WAL, bloat ve
+vacuum yükü üretiyordu.
+Çözüm: Tablolar native RANGE partition'lı tablolarla değiştirilir (query_logs
+günlük, diğerleri aylık). Retention artık partition DROP ile yapılır
+(utils/partition_yoneticisi.py).
+
+- Primary key (id, tarih kolonu) olur; ORM tarafında kimlik yine id'dir.
+- Mevcut veri, en eski kaydın döneminden ileri dönemlere kadar oluşturulan
+  partition'lara kopyalanır; her tabloya bir DEFAULT partition eklenir.
+- id sequence'i, index'ler ve foreign key'ler aynı adlarla korunur.
+
+Not: Kopyalama sırasında tablolar kilitlidir; bakım penceresinde uygulanmalıdır.
+"""
+from datetime import datetime, timedelta
+
+import pytz
+from alembic import op
+from sqlalchemy import text
+
+
+revision = '20261017_log_partitions'
+down_revision = '20261017_minibar_durum'
+branch_labels = None
+depends_on = None
+
+
+SAAT_DILIMI = 'Europe/Nicosia'
+
+# tablo -> (tarih kolonu, aralık); utils/partition_yoneticisi.PARTITION_TABLOLARI ile aynı
+TABLOLAR = {
+    'query_logs': ('timestamp', 'gun'),
+    'ml_metrics': ('timestamp', 'ay'),
+    'sistem_loglari': ('islem_tarihi', 'ay'),
+    'hata_loglari': ('olusturma_tarihi', 'ay'),
+    'audit_logs': ('islem_tarihi', 'ay'),
+}
+
+# Bugünden sonra hazır oluşturulacak dönem sayısı
+ILERI = {'gun': 7, 'ay': 2}
+
+
+def _donem_baslangici(aralik, gun):
+    return gun if aralik == 'gun' else gun.replace(day=1)
+
+
+def _sonraki_donem(aralik, baslangic):
+    if aralik == 'gun':
+        return baslangic + timedelta(days=1)
+    return (baslangic.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partition_adi(tablo, aralik, baslangic):
+    return f"{tablo}_p{baslangic.strftime('%Y%m%d' if aralik == 'gun' else '%Y%m')}"
+
+
+def _sinir(gun):
+    return f"'{gun.isoformat()} 00:00:00 {SAAT_DILIMI}'"
+
+
+def _partitionli_mi(conn, tablo):
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tablo))"
+    ), {'tablo': tablo}).scalar()
+
+
+def _tablo_bilgisi(conn, tablo):
+    """Yeniden oluşturulacak index, foreign key ve sequence bilgileri"""
+    pk_adi = conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:tablo) AND contype = 'p'"
+    ), {'tablo': tablo}).scalar()
+    indeksler = conn.execute(text(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = :tablo"
+    ), {'tablo': tablo}).fetchall()
+    fkler = conn.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:tablo) AND contype = 'f'"
+    ), {'tablo': tablo}).fetchall()
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:tablo, 'id')"), {'tablo': tablo}).scalar()
+    return pk_adi, [i for i in indeksler if i[0] != pk_adi], fkler, sequence
+
+
+def _indeks_ve_fkleri_olustur(tablo, indeksler, fkler):
+    for indeks_adi, tanim in indeksler:
+        if tanim.startswith('CREATE UNIQUE'):
+            # Partition anahtarını içermeyen unique index partition'lı tabloda kurulamaz
+            print(f"⚠️ {indeks_adi} unique olduğu için atlandı")
+            continue
+        op.execute(text(tanim))
+    for fk_adi, tanim in fkler:
+        op.execute(text(f'ALTER TABLE {tablo} ADD CONSTRAINT {fk_adi} {tanim}'))
+
+
+def upgrade():
+    """Tabloları partition'lı tablolarla değiştir ve veriyi taşı"""
+    conn = op.get_bind()
+    bugun = datetime.now(pytz.timezone(SAAT_DILIMI)).date()
+
+    for tablo, (kolon, aralik) in TABLOLAR.items():
+        if conn.execute(text("SELECT to_regclass(:tablo)"), {'tablo': tablo}).scalar() is None:
+            continue
+        if _partitionli_mi(conn, tablo):
+            continue
+
+        eski = f'{tablo}_eski'
+        pk_adi, indeksler, fkler, sequence = _tablo_bilgisi(conn, tablo)
+
+        op.execute(text(f'ALTER TABLE {tablo} RENAME TO {eski}'))
+        if pk_adi:
+            op.execute(text(f'ALTER TABLE {eski} RENAME CONSTRAINT {pk_adi} TO {eski}_pkey'))
+
+        op.execute(text(f"""
+            CREATE TABLE {tablo} (
+                LIKE {eski} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY,
+                PRIMARY KEY (id, "{kolon}")
+            ) PARTITION BY RANGE ("{kolon}")
+        """))
+
+        # Mevcut verinin en eski döneminden ileri dönemlere kadar partition'lar
+        ilk = conn.execute(text(f'SELECT min("{kolon}") FROM {eski}')).scalar()
+        ilk_gun = ilk.astimezone(pytz.timezone(SAAT_DILIMI)).date() if ilk else bugun
+        son = _donem_baslangici(aralik, bugun)
+        for _ in range(ILERI[aralik]):
+            son = _sonraki_donem(aralik, son)
+
+        baslangic = _donem_baslangici(aralik, min(ilk_gun, bugun))
+        while baslangic <= son:
+            sonraki = _sonraki_donem(aralik, baslangic)
+            op.execute(text(
+                f'CREATE TABLE {_partition_adi(tablo, aralik, baslangic)} PARTITION OF {tablo} '
+                f'FOR VALUES FROM ({_sinir(baslangic)}) TO ({_sinir(sonraki)})'
+            ))
+            baslangic = sonraki
+        op.execute(text(f'CREATE TABLE {tablo}_default PARTITION OF {tablo} DEFAULT'))
+
+        op.execute(text(f'INSERT INTO {tablo} SELECT * FROM {eski}'))
+
+        # Serial sequence eski tabloyla birlikte silinmesin
+        if sequence:
+            op.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY NONE'))
+        op.execute(text(f'DROP TABLE {eski}'))
+        if sequence:
+            op.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY {tablo}.id'))
+        op.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tablo}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {tablo}"
+        ))
+
+        _indeks_ve_fkleri_olustur(tablo, indeksler, fkler)
+
+
+def downgrade():
+    """Partition'lı tabloları tekrar düz tabloya çevir"""
+    conn = op.get_bind()
+
+    for tablo in TABLOLAR:
+        if not _partitionli_mi(conn, tablo):
+            continue
+
+        duz = f'{tablo}_duz'
+        pk_adi, indeksler, fkler, sequence = _tablo_bilgisi(conn, tablo)
+
+        op.execute(text(
+            f'CREATE TABLE {duz} (LIKE {tablo} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY)'
+        ))
+        op.execute(text(f'INSERT INTO {duz} SELECT * FROM {tablo}'))
+
+        if sequence:
+            op.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY NONE'))
+        op.execute(text(f'DROP TABLE {tablo} CASCADE'))
+        op.execute(text(f'ALTER TABLE {duz} RENAME TO {tablo}'))
+        op.execute(text(f'ALTER TABLE {tablo} ADD CONSTRAINT {tablo}_pkey PRIMARY KEY (id)'))
+        if sequence:
+            op.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY {tablo}.id'))
+        op.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tablo}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {tablo}"
+        ))
+
+        _indeks_ve_fkleri_olustur(tablo, indeksler, fkler)
@@ -0,0 +1,75 @@
+"""Oda minibar durumları tablosu (materyalize minibar anlık durumu)
+
+Revision ID: 20261017_minibar_durum
+Revises: 20261017_stok_bakiye
+Create Date: 2026-10-17
+
+Sorun: Oda/kat minibar ekranları ve tüketim hesapları odanın mevcut durumunu
+bulmak için minibar_islem_detay geçmişini (son detay / tüm işlemler) tarıyordu.
+Çözüm: (oda, ürün) başına tek satırlık durum tablosu, mevcut geçmişten doldurulur.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = '20261017_minibar_durum'
+down_revision = '20261017_stok_bakiye'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Durum tablosunu oluştur ve mevcut işlemlerden doldur"""
+    op.create_table(
+        'oda_minibar_durumlari',
+        sa.Column('oda_id', sa.Integer(), sa.ForeignKey('odalar.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('urun_id', sa.Integer(), sa.ForeignKey('urunler.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('mevcut_miktar', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('ekstra_miktar', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('setup_miktari', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('son_islem_id', sa.Integer(), nullable=True),
+        sa.Column('son_detay_id', sa.Integer(), nullable=True),
+        sa.Column('son_islem_tipi', sa.String(50), nullable=True),
+        sa.Column('son_islem_tarihi', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('son_setup_kontrol_tarihi', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('ilk_baslangic_stok', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('toplam_ilk_dolum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('toplam_doldurma', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('ilk_dolum_yapildi', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('son_guncelleme', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('idx_oda_minibar_durum_urun', 'oda_minibar_durumlari', ['urun_id'])
+
+    op.execute(text("""
+        INSERT INTO oda_minibar_durumlari (
+            oda_id, urun_id, mevcut_miktar, ekstra_miktar, setup_miktari,
+            son_islem_id, son_detay_id, son_islem_tipi, son_islem_tarihi, son_setup_kontrol_tarihi,
+            ilk_baslangic_stok, toplam_ilk_dolum, toplam_doldurma, ilk_dolum_yapildi, son_guncelleme
+        )
+        SELECT i.oda_id,
+               d.urun_id,
+               COALESCE((array_agg(d.bitis_stok ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1], 0),
+               COALESCE((array_agg(d.ekstra_miktar ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1], 0),
+               COALESCE((array_agg(d.setup_miktari ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1], 0),
+               (array_agg(i.id ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1],
+               (array_agg(d.id ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1],
+               (array_agg(i.islem_tipi ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1],
+               MAX(i.islem_tarihi),
+               MAX(i.islem_tarihi) FILTER (WHERE i.islem_tipi = 'setup_kontrol'),
+               COALESCE((array_agg(d.baslangic_stok ORDER BY i.islem_tarihi ASC NULLS FIRST, d.id ASC))[1], 0),
+               COALESCE((array_agg(d.eklenen_miktar ORDER BY i.islem_tarihi ASC NULLS FIRST, d.id ASC)
+                         FILTER (WHERE i.islem_tipi = 'ilk_dolum'))[1], 0),
+               COALESCE(SUM(d.eklenen_miktar) FILTER (WHERE i.islem_tipi IN ('doldurma', 'kontrol')), 0),
+               COALESCE(bool_or(i.islem_tipi = 'ilk_dolum'), false),
+               NOW()
+        FROM minibar_islem_detay d
+        JOIN minibar_islemleri i ON i.id = d.islem_id
+        GROUP BY i.oda_id, d.urun_id
+    """))
+
+
+def downgrade():
+    """Tabloyu kaldır"""
+    op.drop_index('idx_oda_minibar_durum_urun', table_name='oda_minibar_durumlari')
+    op.drop_table('oda_minibar_durumlari')
@@ -0,0 +1,48 @@
+"""Sorgu parmak izi istatistik tablosu
+
+Revision ID: 20261017_query_istatistik
+Revises: 20261017_log_partitions
+Create Date: 2026-10-17
+
+Sorun: Sorgu istatistikleri query_logs'taki ham sorgu metinleri üzerinde
+ayrı ayrı COUNT/AVG taramalarıyla hesaplanıyordu ve sadece >2s sorguları
+görüyordu.
+Çözüm: Worker'lar tüm sorguları parmak izi bazında bellekte toplar ve
+(zaman dilimi, parmak izi, endpoint) başına tek satıra upsert eder.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+revision = '20261017_query_istatistik'
+down_revision = '20261017_log_partitions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """query_istatistikleri tablosunu oluştur"""
+    op.create_table(
+        'query_istatistikleri',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('zaman_dilimi', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('parmak_izi', sa.String(16), nullable=False),
+        sa.Column('endpoint', sa.String(255), nullable=False, server_default=''),
+        sa.Column('sorgu_metni', sa.Text(), nullable=False),
+        sa.Column('sayi', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('toplam_sure', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('max_sure', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('yavas_sayi', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cok_yavas_sayi', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('kovalar', JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column('son_gorulme', sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint('zaman_dilimi', 'parmak_izi', 'endpoint', name='uq_query_istatistik_dilim'),
+    )
+    op.create_index('idx_query_istatistik_parmak_izi', 'query_istatistikleri', ['parmak_izi', 'zaman_dilimi'])
+
+
+def downgrade():
+    """query_istatistikleri tablosunu kaldır"""
+    op.drop_index('idx_query_istatistik_parmak_izi', table_name='query_istatistikleri')
+    op.drop_table('query_istatistikleri')
@@ -0,0 +1,48 @@
+"""Ürün stok bakiyeleri tablosu (materyalize stok toplamı)
+
+Revision ID: 20261017_stok_bakiye
+Revises: 20260319_performance_indexes
+Create Date: 2026-10-17
+
+Sorun: get_stok_toplamlari her çağrıda stok_hareketleri tablosunun tamamını
+SUM(CASE ...) GROUP BY ile topluyordu; gecikme hareket geçmişiyle doğrusal büyüyordu.
+Çözüm: Ürün başına tek satırlık bakiye tablosu, mevcut geçmişten doldurulur.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = '20261017_stok_bakiye'
+down_revision = '20260319_performance_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Bakiye tablosunu oluştur ve mevcut hareketlerden doldur"""
+    op.create_table(
+        'urun_stok_bakiyeleri',
+        sa.Column('urun_id', sa.Integer(), sa.ForeignKey('urunler.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('bakiye', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('son_hareket_id', sa.Integer(), nullable=True),
+        sa.Column('son_guncelleme', sa.DateTime(timezone=True), nullable=True),
+    )
+
+    op.execute(text("""
+        INSERT INTO urun_stok_bakiyeleri (urun_id, bakiye, son_hareket_id, son_guncelleme)
+        SELECT urun_id,
+               COALESCE(SUM(CASE
+                   WHEN hareket_tipi IN ('giris', 'devir', 'sayim') THEN miktar
+                   WHEN hareket_tipi = 'cikis' THEN -miktar
+                   ELSE 0 END), 0),
+               MAX(id),
+               NOW()
+        FROM stok_hareketleri
+        GROUP BY urun_id
+    """))
+
+
+def downgrade():
+    """Tabloyu kaldır"""
+    op.drop_table('urun_stok_bakiyeleri')
@@ -17,10 +17,10 @@ from ._models import (
     MLMetricType, MLAlertType, MLAlertSeverity,
     Otel, Kat, Oda, OdaTipi, Setup, SetupIcerik, oda_tipi_setup,
     Kullanici, KullaniciOtel,
-    UrunGrup, Urun, StokHareket, StokFifoKayit, StokFifoKullanim,
+    UrunGrup, Urun, StokHareket, UrunStokBakiye, StokFifoKayit, StokFifoKullanim,
     AnaDepoTedarik, AnaDepoTedarikDetay, OtelZimmetStok, UrunStok,
     PersonelZimmet, PersonelZimmetDetay, ZimmetSablon, ZimmetSablonDetay, PersonelZimmetKullanim,
-    MinibarIslem, MinibarIslemDetay, MinibarDolumTalebi,
+    MinibarIslem, MinibarIslemDetay, OdaMinibarDurum, MinibarDolumTalebi,
     GunlukGorev, GorevDetay, GorevDurumLog, YuklemeGorev,
     DNDKontrol, OdaDNDKayit, OdaDNDKontrol, OdaKontrolKaydi,
     MisafirKayit, DosyaYukleme, QRKodOkutmaLog,
@@ -28,7 +28,7 @@ from ._models import (
     EmailAyarlari, EmailLog, DolulukUyariLog,
     KatSorumlusuSiparisTalebi, KatSorumlusuSiparisTalepDetay,
     MLModel, MLMetric, MLAlert, MLTrainingLog, MLFeature, MLPerformanceLog,
-    QueryLog, BackupHistory, ConfigAudit, BackgroundJob
+    QueryLog, QueryIstatistik, BackupHistory, ConfigAudit, BackgroundJob
 )
 
 # Tüm modelleri __all__ ile export et
@@ -45,12 +45,12 @@ __all__ = [
     # Kullanıcı
     'Kullanici', 'KullaniciOtel',
     # Stok
-    'UrunGrup', 'Urun', 'StokHareket', 'StokFifoKayit', 'StokFifoKullanim',
+    'UrunGrup', 'Urun', 'StokHareket', 'UrunStokBakiye', 'StokFifoKayit', 'StokFifoKullanim',
     'AnaDepoTedarik', 'AnaDepoTedarikDetay', 'OtelZimmetStok', 'UrunStok',
     # Zimmet
     'PersonelZimmet', 'PersonelZimmetDetay', 'ZimmetSablon', 'ZimmetSablonDetay', 'PersonelZimmetKullanim',
     # Minibar
-    'MinibarIslem', 'MinibarIslemDetay', 'MinibarDolumTalebi',
+    'MinibarIslem', 'MinibarIslemDetay', 'OdaMinibarDurum', 'MinibarDolumTalebi',
     # Görev
     'GunlukGorev', 'GorevDetay', 'GorevDurumLog', 'YuklemeGorev',
     'DNDKontrol', 'OdaDNDKayit', 'OdaDNDKontrol', 'OdaKontrolKaydi',
@@ -65,5 +65,5 @@ __all__ = [
     # ML
     'MLModel', 'MLMetric', 'MLAlert', 'MLTrainingLog', 'MLFeature', 'MLPerformanceLog',
     # Developer/Sistem
-    'QueryLog', 'BackupHistory', 'ConfigAudit', 'BackgroundJob',
+    'QueryLog', 'QueryIstatistik', 'BackupHistory', 'ConfigAudit', 'BackgroundJob',
 ]
@@ -1,8 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timezone
-from sqlalchemy import Numeric
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Numeric, event, inspect as sa_inspect, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 import enum
 import pytz
 
@@ -313,7 +313,9 @@ class Oda(db.Model):
     
     # QR Kod Alanları
     qr_kod_token = db.Column(db.String(64), unique=True, nullable=True)
-    qr_kod_gorsel = db.Column(db.Text, nullable=True)  # Base64 encoded PNG
+    # SVG görsel (oda başına birkaç KB) - varsayılan oda sorgularında yüklenmez,
+    # gereken yerde undefer(Oda.qr_kod_gorsel) ile veya erişimde ayrı sorguyla gelir
+    qr_kod_gorsel = db.deferred(db.Column(db.Text, nullable=True))
     qr_kod_olusturma_tarihi = db.Column(db.DateTime(timezone=True), nullable=True)
     misafir_mesaji = db.Column(db.String(500), nullable=True)
     
@@ -405,6 +407,109 @@ class StokHareket(db.Model):
         return f'<StokHareket {self.hareket_tipi} - {self.miktar}>'
 
 
+class UrunStokBakiye(db.Model):
+    """
+    Ürün bazlı stok bakiyesi - stok_hareketleri defterinin anlık özeti
+
+    Her StokHareket ekleme/güncelleme/silme işleminde aynı transaction içinde
+    güncellenir. Böylece stok sorguları tüm hareket geçmişini toplamak yerine
+    ürün başına tek satır okur.
+    """
+    __tablename__ = 'urun_stok_bakiyeleri'
+
+    urun_id = db.Column(db.Integer, db.ForeignKey('urunler.id', ondelete='CASCADE'), primary_key=True)
+    bakiye = db.Column(db.Integer, nullable=False, default=0)
+    son_hareket_id = db.Column(db.Integer, nullable=True)
+    son_guncelleme = db.Column(db.DateTime(timezone=True), default=lambda: get_kktc_now())
+
+    def __repr__(self):
+        return f'<UrunStokBakiye urun_id={self.urun_id} bakiye={self.bakiye}>'
+
+
+# Stok bakiyesine etkisi olan hareket tipleri (get_stok_toplamlari ile aynı kural)
+STOK_ARTIRAN_HAREKETLER = ('giris', 'devir', 'sayim')
+STOK_AZALTAN_HAREKETLER = ('cikis',)
+
+
+def stok_hareket_net_etkisi(hareket_tipi, miktar):
+    """Bir stok hareketinin ürün bakiyesine net etkisini döndürür."""
+    if hareket_tipi in STOK_ARTIRAN_HAREKETLER:
+        return miktar or 0
+    if hareket_tipi in STOK_AZALTAN_HAREKETLER:
+        return -(miktar or 0)
+    return 0
+
+
+def stok_bakiye_uygula(connection, urun_id, fark, hareket_id=None):
+    """
+    Ürün bakiyesine farkı atomik olarak ekler (INSERT ... ON CONFLICT).
+
+    Flush sırasında mapper event'lerinden çağrıldığı için aynı connection ve
+    transaction kullanılır; rollback durumunda bakiye de geri alınır.
+    """
+    if not urun_id or not fark:
+        return
+
+    tablo = UrunStokBakiye.__table__
+    stmt = pg_insert(tablo).values(
+        urun_id=urun_id,
+        bakiye=fark,
+        son_hareket_id=hareket_id,
+        son_guncelleme=get_kktc_now()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tablo.c.urun_id],
+        set_={
+            'bakiye': tablo.c.bakiye + stmt.excluded.bakiye,
+            'son_hareket_id': db.func.coalesce(stmt.excluded.son_hareket_id, tablo.c.son_hareket_id),
+            'son_guncelleme': stmt.excluded.son_guncelleme,
+        }
+    )
+    connection.execute(stmt)
+
+
+def _onceki_deger(state, attr):
+    """Flush sırasında bir attribute'un değişmeden önceki değerini döndürür."""
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attr)
+
+
+@event.listens_for(StokHareket, 'after_insert')
+def _stok_hareket_eklendi(mapper, connection, target):
+    stok_bakiye_uygula(
+        connection, target.urun_id,
+        stok_hareket_net_etkisi(target.hareket_tipi, target.miktar),
+        target.id
+    )
+
+
+@event.listens_for(StokHareket, 'after_update')
+def _stok_hareket_guncellendi(mapper, connection, target):
+    state = sa_inspect(target)
+    eski_urun_id = _onceki_deger(state, 'urun_id')
+    eski_etki = stok_hareket_net_etkisi(
+        _onceki_deger(state, 'hareket_tipi'), _onceki_deger(state, 'miktar')
+    )
+    yeni_etki = stok_hareket_net_etkisi(target.hareket_tipi, target.miktar)
+
+    if eski_urun_id == target.urun_id:
+        stok_bakiye_uygula(connection, target.urun_id, yeni_etki - eski_etki, target.id)
+    else:
+        stok_bakiye_uygula(connection, eski_urun_id, -eski_etki, target.id)
+        stok_bakiye_uygula(connection, target.urun_id, yeni_etki, target.id)
+
+
+@event.listens_for(StokHareket, 'after_delete')
+def _stok_hareket_silindi(mapper, connection, target):
+    state = sa_inspect(target)
+    eski_etki = stok_hareket_net_etkisi(
+        _onceki_deger(state, 'hareket_tipi'), _onceki_deger(state, 'miktar')
+    )
+    stok_bakiye_uygula(connection, _onceki_deger(state, 'urun_id'), -eski_etki)
+
+
 class PersonelZimmet(db.Model):
     """Personel zimmet tablosu - Kat sorumlusu zimmet başlık"""
     __tablename__ = 'personel_zimmet'
@@ -505,6 +610,230 @@ class MinibarIslemDetay(db.Model):
         return f'<MinibarIslemDetay #{self.id}>'
 
 
+class OdaMinibarDurum(db.Model):
+    """
+    Oda minibar anlık durumu - (oda, ürün) başına minibar_islem_detay geçmişinin özeti
+
+    Her MinibarIslemDetay ekleme/güncelleme/silme işleminde aynı transaction
+    içinde güncellenir. Oda/kat minibar ekranları tüm işlem geçmişini
+    dolaşmak yerine oda başına bu tablodan indeksli tek okuma yapar.
+    """
+    __tablename__ = 'oda_minibar_durumlari'
+    __table_args__ = (
+        db.Index('idx_oda_minibar_durum_urun', 'urun_id'),
+    )
+
+    oda_id = db.Column(db.Integer, db.ForeignKey('odalar.id', ondelete='CASCADE'), primary_key=True)
+    urun_id = db.Column(db.Integer, db.ForeignKey('urunler.id', ondelete='CASCADE'), primary_key=True)
+
+    # Son işlemdeki değerler
+    mevcut_miktar = db.Column(db.Integer, nullable=False, default=0)  # Son bitis_stok
+    ekstra_miktar = db.Column(db.Integer, nullable=False, default=0)
+    setup_miktari = db.Column(db.Integer, nullable=False, default=0)
+    son_islem_id = db.Column(db.Integer, nullable=True)
+    son_detay_id = db.Column(db.Integer, nullable=True)
+    son_islem_tipi = db.Column(db.String(50), nullable=True)
+    son_islem_tarihi = db.Column(db.DateTime(timezone=True), nullable=True)
+    son_setup_kontrol_tarihi = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    # Geçmiş toplamları (depo minibar durumları ekranı)
+    ilk_baslangic_stok = db.Column(db.Integer, nullable=False, default=0)
+    toplam_ilk_dolum = db.Column(db.Integer, nullable=False, default=0)  # Sadece ilk 'ilk_dolum' işlemi
+    toplam_doldurma = db.Column(db.Integer, nullable=False, default=0)  # 'doldurma' ve 'kontrol' işlemleri
+    ilk_dolum_yapildi = db.Column(db.Boolean, nullable=False, default=False)
+    son_guncelleme = db.Column(db.DateTime(timezone=True), default=lambda: get_kktc_now())
+
+    # İlişkiler
+    urun = db.relationship('Urun', lazy=True)
+
+    def __repr__(self):
+        return f'<OdaMinibarDurum oda_id={self.oda_id} urun_id={self.urun_id} miktar={self.mevcut_miktar}>'
+
+
+# Yeni detay satırını (oda, ürün) durumuna uygular. Son işlem alanları sadece
+# detay mevcut kayıttan yeniyse (islem_tarihi, detay id) değişir; toplamlar
+# her zaman eklenir. Satır kilidi eşzamanlı yazımları sıraya sokar.
+_MINIBAR_DURUM_UYGULA_SQL = text("""
+    INSERT INTO oda_minibar_durumlari AS t (
+        oda_id, urun_id, mevcut_miktar, ekstra_miktar, setup_miktari,
+        son_islem_id, son_detay_id, son_islem_tipi, son_islem_tarihi, son_setup_kontrol_tarihi,
+        ilk_baslangic_stok, toplam_ilk_dolum, toplam_doldurma, ilk_dolum_yapildi, son_guncelleme
+    )
+    SELECT i.oda_id, :urun_id, :bitis_stok, :ekstra_miktar, :setup_miktari,
+           i.id, :detay_id, i.islem_tipi, i.islem_tarihi,
+           CASE WHEN i.islem_tipi = 'setup_kontrol' THEN i.islem_tarihi END,
+           :baslangic_stok,
+           CASE WHEN i.islem_tipi = 'ilk_dolum' THEN :eklenen_miktar ELSE 0 END,
+           CASE WHEN i.islem_tipi IN ('doldurma', 'kontrol') THEN :eklenen_miktar ELSE 0 END,
+           i.islem_tipi = 'ilk_dolum',
+           :simdi
+    FROM minibar_islemleri i
+    WHERE i.id = :islem_id
+    ON CONFLICT (oda_id, urun_id) DO UPDATE SET
+        mevcut_miktar = CASE WHEN (COALESCE(EXCLUDED.son_islem_tarihi, '-infinity'), EXCLUDED.son_detay_id)
+                                  >= (COALESCE(t.son_islem_tarihi, '-infinity'), COALESCE(t.son_detay_id, 0))
+                             THEN EXCLUDED.mevcut_miktar ELSE t.mevcut_miktar END,
+        ekstra_miktar = CASE WHEN (COALESCE(EXCLUDED.son_islem_tarihi, '-infinity'), EXCLUDED.son_detay_id)
+                                  >= (COALESCE(t.son_islem_tarihi, '-infinity'), COALESCE(t.son_detay_id, 0))
+                             THEN EXCLUDED.ekstra_miktar ELSE t.ekstra_miktar END,
+        setup_miktari = CASE WHEN (COALESCE(EXCLUDED.son_islem_tarihi, '-infinity'), EXCLUDED.son_detay_id)
+                                  >= (COALESCE(t.son_islem_tarihi, '-infinity'), COALESCE(t.son_detay_id, 0))
+                             THEN EXCLUDED.setup_miktari ELSE t.setup_miktari END,
+        son_islem_id = CASE WHEN (COALESCE(EXCLUDED.son_islem_tarihi, '-infinity'), EXCLUDED.son_detay_id)
+                                 >= (COALESCE(t.son_islem_tarihi, '-infinity'), COALESCE(t.son_detay_id, 0))
+                            THEN EXCLUDED.son_islem_id ELSE t.son_islem_id END,
+        son_islem_tipi = CASE WHEN (COALESCE(EXCLUDED.son_islem_tarihi, '-infinity'), EXCLUDED.son_detay_id)
+                                   >= (COALESCE(t.son_islem_tarihi, '-infinity'), COALESCE(t.son_detay_id, 0))
+                              THEN EXCLUDED.son_islem_tipi ELSE t.son_islem_tipi END,
+        son_detay_id = CASE WHEN (COALESCE(EXCLUDED.son_islem_tarihi, '-infinity'), EXCLUDED.son_detay_id)
+                                 >= (COALESCE(t.son_islem_tarihi, '-infinity'), COALESCE(t.son_detay_id, 0))
+                            THEN EXCLUDED.son_detay_id ELSE t.son_detay_id END,
+        son_islem_tarihi = GREATEST(t.son_islem_tarihi, EXCLUDED.son_islem_tarihi),
+        son_setup_kontrol_tarihi = GREATEST(t.son_setup_kontrol_tarihi, EXCLUDED.son_setup_kontrol_tarihi),
+        toplam_ilk_dolum = t.toplam_ilk_dolum
+            + CASE WHEN t.ilk_dolum_yapildi THEN 0 ELSE EXCLUDED.toplam_ilk_dolum END,
+        toplam_doldurma = t.toplam_doldurma + EXCLUDED.toplam_doldurma,
+        ilk_dolum_yapildi = t.ilk_dolum_yapildi OR EXCLUDED.ilk_dolum_yapildi,
+        son_guncelleme = EXCLUDED.son_guncelleme
+""")
+
+# (oda, ürün) durumlarını minibar_islem_detay geçmişinden hesaplar.
+# {filtre} yerine WHERE koşulu gelir; hücre yeniden hesaplama, mutabakat,
+# yeniden oluşturma ve migration backfill aynı kuralı kullanır.
+MINIBAR_DURUM_GECMIS_SQL = """
+    SELECT i.oda_id,
+           d.urun_id,
+           COALESCE((array_agg(d.bitis_stok ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1], 0) AS mevcut_miktar,
+           COALESCE((array_agg(d.ekstra_miktar ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1], 0) AS ekstra_miktar,
+           COALESCE((array_agg(d.setup_miktari ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1], 0) AS setup_miktari,
+           (array_agg(i.id ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1] AS son_islem_id,
+           (array_agg(d.id ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1] AS son_detay_id,
+           (array_agg(i.islem_tipi ORDER BY i.islem_tarihi DESC NULLS LAST, d.id DESC))[1] AS son_islem_tipi,
+           MAX(i.islem_tarihi) AS son_islem_tarihi,
+           MAX(i.islem_tarihi) FILTER (WHERE i.islem_tipi = 'setup_kontrol') AS son_setup_kontrol_tarihi,
+           COALESCE((array_agg(d.baslangic_stok ORDER BY i.islem_tarihi ASC NULLS FIRST, d.id ASC))[1], 0) AS ilk_baslangic_stok,
+           COALESCE((array_agg(d.eklenen_miktar ORDER BY i.islem_tarihi ASC NULLS FIRST, d.id ASC)
+                     FILTER (WHERE i.islem_tipi = 'ilk_dolum'))[1], 0) AS toplam_ilk_dolum,
+           COALESCE(SUM(d.eklenen_miktar) FILTER (WHERE i.islem_tipi IN ('doldurma', 'kontrol')), 0) AS toplam_doldurma,
+           COALESCE(bool_or(i.islem_tipi = 'ilk_dolum'), false) AS ilk_dolum_yapildi,
+           NOW() AS son_guncelleme
+    FROM minibar_islem_detay d
+    JOIN minibar_islemleri i ON i.id = d.islem_id
+    {filtre}
+    GROUP BY i.oda_id, d.urun_id
+"""
+
+MINIBAR_DURUM_KOLONLARI = (
+    'oda_id, urun_id, mevcut_miktar, ekstra_miktar, setup_miktari, '
+    'son_islem_id, son_detay_id, son_islem_tipi, son_islem_tarihi, son_setup_kontrol_tarihi, '
+    'ilk_baslangic_stok, toplam_ilk_dolum, toplam_doldurma, ilk_dolum_yapildi, son_guncelleme'
+)
+
+
+def minibar_durum_uygula(connection, detay):
+    """
+    Yeni eklenen detay satırını oda minibar durumuna uygular (INSERT ... ON CONFLICT).
+
+    Flush sırasında mapper event'inden çağrılır; aynı connection ve transaction
+    kullanıldığı için rollback durumunda durum da geri alınır.
+    """
+    if not detay.islem_id or not detay.urun_id:
+        return
+
+    connection.execute(_MINIBAR_DURUM_UYGULA_SQL, {
+        'islem_id': detay.islem_id,
+        'urun_id': detay.urun_id,
+        'detay_id': detay.id,
+        'bitis_stok': int(detay.bitis_stok or 0),
+        'ekstra_miktar': int(detay.ekstra_miktar or 0),
+        'setup_miktari': int(detay.setup_miktari or 0),
+        'baslangic_stok': int(detay.baslangic_stok or 0),
+        'eklenen_miktar': int(detay.eklenen_miktar or 0),
+        'simdi': get_kktc_now()
+    })
+
+
+def minibar_durum_hucre_hesapla(connection, oda_id, urun_id=None):
+    """
+    Bir odanın (veya tek bir oda/ürün hücresinin) durumunu geçmişten yeniden hesaplar.
+
+    Güncelleme/silme gibi artımlı uygulanamayan değişikliklerde kullanılır;
+    geçmişi kalmayan hücre silinir.
+    """
+    if not oda_id:
+        return
+
+    params = {'oda_id': oda_id}
+    silme_filtre = 'oda_id = :oda_id'
+    filtre = 'WHERE i.oda_id = :oda_id'
+    if urun_id is not None:
+        params['urun_id'] = urun_id
+        silme_filtre += ' AND urun_id = :urun_id'
+        filtre += ' AND d.urun_id = :urun_id'
+
+    connection.execute(text(f'DELETE FROM oda_minibar_durumlari WHERE {silme_filtre}'), params)
+    connection.execute(
+        text(
+            f"INSERT INTO oda_minibar_durumlari ({MINIBAR_DURUM_KOLONLARI}) "
+            + MINIBAR_DURUM_GECMIS_SQL.format(filtre=filtre)
+        ),
+        params
+    )
+
+
+@event.listens_for(MinibarIslemDetay, 'after_insert')
+def _minibar_detay_eklendi(mapper, connection, target):
+    minibar_durum_uygula(connection, target)
+
+
+# Durumu etkileyen detay kolonları (fiyat/kar güncellemeleri yeniden hesaplatmaz)
+_MINIBAR_DURUM_DETAY_KOLONLARI = (
+    'islem_id', 'urun_id', 'baslangic_stok', 'bitis_stok',
+    'eklenen_miktar', 'ekstra_miktar', 'setup_miktari'
+)
+
+
+@event.listens_for(MinibarIslemDetay, 'after_update')
+def _minibar_detay_guncellendi(mapper, connection, target):
+    state = sa_inspect(target)
+    if not any(state.attrs[attr].history.has_changes() for attr in _MINIBAR_DURUM_DETAY_KOLONLARI):
+        return
+
+    eski_islem_id = _onceki_deger(state, 'islem_id')
+    eski_urun_id = _onceki_deger(state, 'urun_id')
+
+    hucreler = set()
+    for islem_id, urun_id in ((eski_islem_id, eski_urun_id), (target.islem_id, target.urun_id)):
+        oda_id = connection.execute(
+            text('SELECT oda_id FROM minibar_islemleri WHERE id = :id'), {'id': islem_id}
+        ).scalar()
+        hucreler.add((oda_id, urun_id))
+
+    for oda_id, urun_id in hucreler:
+        minibar_durum_hucre_hesapla(connection, oda_id, urun_id)
+
+
+@event.listens_for(MinibarIslemDetay, 'after_delete')
+def _minibar_detay_silindi(mapper, connection, target):
+    state = sa_inspect(target)
+    oda_id = connection.execute(
+        text('SELECT oda_id FROM minibar_islemleri WHERE id = :id'),
+        {'id': _onceki_deger(state, 'islem_id')}
+    ).scalar()
+    minibar_durum_hucre_hesapla(connection, oda_id, _onceki_deger(state, 'urun_id'))
+
+
+@event.listens_for(MinibarIslem, 'after_update')
+def _minibar_islem_guncellendi(mapper, connection, target):
+    """Oda, tarih veya işlem tipi değişirse ilgili odaların durumu yeniden hesaplanır"""
+    state = sa_inspect(target)
+    if not any(state.attrs[attr].history.has_changes() for attr in ('oda_id', 'islem_tarihi', 'islem_tipi')):
+        return
+
+    for oda_id in {_onceki_deger(state, 'oda_id'), target.oda_id}:
+        minibar_durum_hucre_hesapla(connection, oda_id)
+
+
 class SistemAyar(db.Model):
     """Sistem ayarları tablosu"""
     __tablename__ = 'sistem_ayarlari'
@@ -828,6 +1157,7 @@ class MLAlertSeverity(str, enum.Enum):
 
 class MLMetric(db.Model):
     """ML metrik kayıtları - zaman serisi verileri"""
+    # DB'de timestamp'e göre aylık partition'lı, PK (id, timestamp); bkz. utils/partition_yoneticisi.py
     __tablename__ = 'ml_metrics'
     __table_args__ = (
         db.Index('idx_ml_metrics_type_time', 'metric_type', 'timestamp'),
@@ -1032,6 +1362,7 @@ class MLPerformanceLog(db.Model):
 
 class QueryLog(db.Model):
     """Database query performance log"""
+    # DB'de timestamp'e göre günlük partition'lı, PK (id, timestamp); bkz. utils/partition_yoneticisi.py
     __tablename__ = 'query_logs'
     __table_args__ = (
         db.Index('idx_query_logs_time', 'execution_time'),
@@ -1054,6 +1385,35 @@ class QueryLog(db.Model):
         return f'<QueryLog #{self.id} - {self.execution_time:.3f}s>'
 
 
+class QueryIstatistik(db.Model):
+    """
+    Sorgu parmak izi istatistikleri (pg_stat_statements benzeri, endpoint bazında).
+    Worker'lar sorguları bellekte toplar, zaman dilimi başına tek satıra upsert eder;
+    bkz. utils/monitoring/sorgu_istatistikleri.py
+    """
+    __tablename__ = 'query_istatistikleri'
+    __table_args__ = (
+        db.UniqueConstraint('zaman_dilimi', 'parmak_izi', 'endpoint', name='uq_query_istatistik_dilim'),
+        db.Index('idx_query_istatistik_parmak_izi', 'parmak_izi', 'zaman_dilimi'),
+    )
+
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    zaman_dilimi = db.Column(db.DateTime(timezone=True), nullable=False)  # Dilim başlangıcı
+    parmak_izi = db.Column(db.String(16), nullable=False)
+    endpoint = db.Column(db.String(255), nullable=False, default='')  # '' = request dışı (Celery, scheduler)
+    sorgu_metni = db.Column(db.Text, nullable=False)  # Normalize edilmiş sorgu
+    sayi = db.Column(db.BigInteger, nullable=False, default=0)
+    toplam_sure = db.Column(db.Float, nullable=False, default=0)  # Saniye
+    max_sure = db.Column(db.Float, nullable=False, default=0)
+    yavas_sayi = db.Column(db.Integer, nullable=False, default=0)  # >= 1s
+    cok_yavas_sayi = db.Column(db.Integer, nullable=False, default=0)  # >= 5s
+    kovalar = db.Column(JSONB, nullable=False, default=dict)  # Log ölçekli süre histogramı (api_metrics kovaları)
+    son_gorulme = db.Column(db.DateTime(timezone=True), default=lambda: get_kktc_now())
+
+    def __repr__(self):
+        return f'<QueryIstatistik {self.parmak_izi} {self.endpoint or "-"} x{self.sayi}>'
+
+
 class BackgroundJob(db.Model):
     """Background job tracking"""
     __tablename__ = 'background_jobs'
@@ -124,7 +124,7 @@ class Oda(db.Model):
     
     # QR Kod Alanları
     qr_kod_token = db.Column(db.String(64), unique=True, nullable=True)
-    qr_kod_gorsel = db.Column(db.Text, nullable=True)
+    qr_kod_gorsel = db.deferred(db.Column(db.Text, nullable=True))  # SVG, varsayılan sorgularda yüklenmez
     qr_kod_olusturma_tarihi = db.Column(db.DateTime(timezone=True), nullable=True)
     misafir_mesaji = db.Column(db.String(500), nullable=True)
     
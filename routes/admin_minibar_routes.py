@@ -627,17 +627,14 @@ def register_admin_minibar_routes(app):
             
             odalar = query.order_by(Oda.oda_no).all()
             
-            # Her oda için son minibar işlemini getir
-            oda_durumlari = []
-            for oda in odalar:
-                son_islem = MinibarIslem.query.filter_by(oda_id=oda.id).order_by(
-                    MinibarIslem.islem_tarihi.desc()
-                ).first()
-                
-                oda_durumlari.append({
-                    'oda': oda,
-                    'son_islem': son_islem
-                })
+            # Odaların son minibar işlemlerini tek sorguda getir
+            from utils.minibar_durum_servisleri import MinibarDurumServisi
+            son_islemler = MinibarDurumServisi.son_islemleri_getir([oda.id for oda in odalar])
+            
+            oda_durumlari = [
+                {'oda': oda, 'son_islem': son_islemler.get(oda.id)}
+                for oda in odalar
+            ]
             
             # Katlar (filtre için)
             katlar = Kat.query.filter_by(aktif=True).order_by(Kat.kat_no).all()
@@ -776,76 +773,10 @@ def register_admin_minibar_routes(app):
         
         # Seçili oda varsa minibar bilgilerini al
         minibar_bilgisi = None
-        son_islem = None
-        minibar_urunler = []
-        
         if oda_id:
-            oda = db.session.get(Oda, oda_id)
-            
-            # Son minibar işlemini bul
-            son_islem = MinibarIslem.query.filter_by(oda_id=oda_id).order_by(
-                MinibarIslem.islem_tarihi.desc()
-            ).first()
-            
-            if son_islem:
-                # Bu oda için tüm minibar işlemlerini al
-                tum_islemler = MinibarIslem.query.filter_by(oda_id=oda_id).order_by(
-                    MinibarIslem.islem_tarihi.asc()
-                ).all()
-                
-                # Her ürün için toplam hesaplama yap
-                urun_toplam = {}
-                ilk_dolum_yapildi = set()
-                
-                for islem in tum_islemler:
-                    for detay in islem.detaylar:
-                        urun_id = detay.urun_id
-                        if urun_id not in urun_toplam:
-                            urun_toplam[urun_id] = {
-                                'urun': detay.urun,
-                                'toplam_eklenen_ilk_dolum': 0,
-                                'toplam_eklenen_doldurma': 0,
-                                'toplam_tuketim': 0,
-                                'ilk_baslangic': detay.baslangic_stok,
-                                'son_bitis': detay.bitis_stok
-                            }
-                        
-                        if islem.islem_tipi == 'ilk_dolum' and urun_id not in ilk_dolum_yapildi:
-                            urun_toplam[urun_id]['toplam_eklenen_ilk_dolum'] += detay.eklenen_miktar
-                            ilk_dolum_yapildi.add(urun_id)
-                        elif islem.islem_tipi in ['doldurma', 'kontrol']:
-                            urun_toplam[urun_id]['toplam_eklenen_doldurma'] += detay.eklenen_miktar
-                            urun_toplam[urun_id]['toplam_tuketim'] += detay.eklenen_miktar
-                        
-                        urun_toplam[urun_id]['son_bitis'] = detay.bitis_stok
-                
-                for detay in son_islem.detaylar:
-                    urun_id = detay.urun_id
-                    urun_data = urun_toplam.get(urun_id, {})
-                    
-                    ilk_dolum_eklenen = urun_data.get('toplam_eklenen_ilk_dolum', 0)
-                    doldurma_eklenen = urun_data.get('toplam_eklenen_doldurma', 0)
-                    toplam_eklenen = ilk_dolum_eklenen + doldurma_eklenen
-                    toplam_tuketim = urun_data.get('toplam_tuketim', 0)
-                    
-                    mevcut_miktar = urun_data.get('son_bitis', 0)
-                    
-                    minibar_urunler.append({
-                        'urun': detay.urun,
-                        'baslangic_stok': urun_data.get('ilk_baslangic', 0),
-                        'bitis_stok': urun_data.get('son_bitis', 0),
-                        'eklenen_miktar': toplam_eklenen,
-                        'tuketim': toplam_tuketim,
-                        'mevcut_miktar': mevcut_miktar
-                    })
-                
-                minibar_bilgisi = {
-                    'oda': oda,
-                    'son_islem': son_islem,
-                    'urunler': minibar_urunler,
-                    'toplam_urun': len(minibar_urunler),
-                    'toplam_miktar': sum(u['mevcut_miktar'] for u in minibar_urunler)
-                }
+            # Son işlem + ürün durumları (oda_minibar_durumlari - işlem geçmişi dolaşılmaz)
+            from utils.minibar_durum_servisleri import MinibarDurumServisi
+            minibar_bilgisi = MinibarDurumServisi.oda_minibar_bilgisi(oda_id)
         
         return render_template('depo_sorumlusu/minibar_durumlari.html',
                              katlar=katlar,
@@ -2,15 +2,16 @@
 Admin QR Kod Yönetimi Route'ları
 """
 
-from flask import jsonify, request, send_file, session
-from models import db, Oda, Kat
-from utils.qr_service import QRKodService
+from flask import jsonify, request, send_file, session, Response, stream_with_context
+from models import db, Oda, Kat, Otel
+from utils.qr_service import QRKodService, TURKCE_ASCII
+from utils.qr_toplu_servisi import QRTopluServisi
+from utils.zip_akisi import ZipAkisi
 from utils.rate_limiter import QRRateLimiter
 from utils.helpers import log_islem, log_hata
 from utils.audit import audit_create, audit_update, serialize_model
 from utils.decorators import login_required, role_required
 import bleach
-import zipfile
 import io
 from datetime import datetime
 import pytz
@@ -22,6 +23,9 @@ def get_kktc_now():
     """Kıbrıs saat diliminde şu anki zamanı döndürür."""
     return datetime.now(KKTC_TZ)
 
+# Toplu QR ZIP'inde server-side cursor parti boyutu
+QR_ZIP_PARTI = 100
+
 
 def register_admin_qr_routes(app):
     """Admin QR route'larını kaydet"""
@@ -109,56 +113,36 @@ def register_admin_qr_routes(app):
                     'message': 'Çok fazla QR oluşturma denemesi. Lütfen 1 dakika bekleyin.'
                 }), 429
             
-            # Odaları getir
-            if mod == 'tumu':
-                odalar = Oda.query.filter_by(aktif=True).all()
-            else:  # qrsiz
-                odalar = Oda.query.filter_by(aktif=True, qr_kod_token=None).all()
+            # Hedef oda var mı (üretim worker'da yapılır)
+            sorgu = Oda.query.filter_by(aktif=True)
+            if mod != 'tumu':  # qrsiz
+                sorgu = sorgu.filter_by(qr_kod_token=None)
+            toplam = sorgu.count()
             
-            if not odalar:
+            if not toplam:
                 return jsonify({
                     'success': False,
                     'message': 'İşlem yapılacak oda bulunamadı'
                 }), 404
             
-            # Toplu QR oluştur
-            basarili = 0
-            basarisiz = 0
-            
-            for oda in odalar:
-                try:
-                    result = QRKodService.create_qr_for_oda(oda)
-                    if result['success']:
-                        basarili += 1
-                    else:
-                        basarisiz += 1
-                    
-                    # Her 50 odada bir commit
-                    if (basarili + basarisiz) % 50 == 0:
-                        db.session.commit()
-                        
-                except Exception as e:
-                    basarisiz += 1
-                    log_hata(e, modul='admin_qr_toplu', extra_info={'oda_id': oda.id})
-            
-            # Final commit
-            db.session.commit()
+            sonuc = QRTopluServisi.kuyruga_al(mod, session.get('kullanici_id'), request.url_root)
             
             # Log kaydı
             log_islem('ekleme', 'qr_kod_toplu', {
                 'mod': mod,
-                'basarili': basarili,
-                'basarisiz': basarisiz,
-                'toplam': len(odalar)
+                'job_id': sonuc['job_id'],
+                'toplam': toplam
             })
             
             return jsonify({
-                'success': True,
-                'message': f'Toplu QR oluşturma tamamlandı',
+                'success': sonuc['success'],
+                'message': sonuc['message'],
                 'data': {
-                    'basarili': basarili,
-                    'basarisiz': basarisiz,
-                    'toplam': len(odalar)
+                    'job_id': sonuc['job_id'],
+                    'kuyrukta': sonuc['kuyrukta'],
+                    'toplam': sonuc.get('toplam', toplam),
+                    'basarili': sonuc.get('basarili', 0),
+                    'basarisiz': sonuc.get('basarisiz', 0)
                 }
             })
             
@@ -171,13 +155,31 @@ def register_admin_qr_routes(app):
             }), 500
     
     
+    @app.route('/admin/toplu-qr-durum/<job_id>')
+    @login_required
+    @role_required('sistem_yoneticisi', 'admin')
+    def admin_toplu_qr_durum(job_id):
+        """Toplu QR oluşturma job ilerlemesi (JSON)"""
+        ilerleme = QRTopluServisi.ilerleme_getir(job_id)
+        if not ilerleme:
+            return jsonify({
+                'success': False,
+                'message': 'İş bulunamadı'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': ilerleme
+        })
+    
+    
     @app.route('/admin/oda-qr-goruntule/<int:oda_id>')
     @login_required
     @role_required('sistem_yoneticisi', 'admin')
     def admin_oda_qr_goruntule(oda_id):
         """QR kodu görüntüle (JSON)"""
         try:
-            oda = db.session.get(Oda, oda_id)
+            oda = db.session.get(Oda, oda_id, options=[db.undefer(Oda.qr_kod_gorsel)])
             if not oda:
                 return jsonify({
                     'success': False,
@@ -221,7 +223,7 @@ def register_admin_qr_routes(app):
     def admin_oda_qr_indir(oda_id):
         """QR kodu SVG olarak indir"""
         try:
-            oda = db.session.get(Oda, oda_id)
+            oda = db.session.get(Oda, oda_id, options=[db.undefer(Oda.qr_kod_gorsel)])
             if not oda or not oda.qr_kod_gorsel:
                 return jsonify({
                     'success': False,
@@ -259,70 +261,117 @@ def register_admin_qr_routes(app):
     @login_required
     @role_required('sistem_yoneticisi', 'admin')
     def admin_toplu_qr_indir():
-        """Tüm QR kodları ZIP olarak indir"""
+        """
+        Tüm QR kodları ZIP olarak indir (akış halinde)
+        
+        Odalar server-side cursor ile QR_ZIP_PARTI'lık partiler halinde okunur,
+        her SVG sıkıştırılıp hemen istemciye gönderilir; bellek kullanımı oda
+        sayısından bağımsızdır. ?pdf=1 ile her kat için baskıya hazır PDF
+        sayfası da arşive eklenir.
+        """
         try:
-            # QR'ı olan odaları getir
-            odalar = Oda.query.filter(
+            qr_filtre = (
                 Oda.aktif == True,
-                Oda.qr_kod_token.isnot(None)
-            ).all()
+                Oda.qr_kod_token.isnot(None),
+                Oda.qr_kod_gorsel.isnot(None)
+            )
             
-            if not odalar:
+            # Akış başladıktan sonra hata yanıtı dönülemeyeceği için önce kontrol
+            if db.session.query(Oda.id).filter(*qr_filtre).first() is None:
                 return jsonify({
                     'success': False,
                     'message': 'QR kodu olan oda bulunamadı'
                 }), 404
             
-            # ZIP dosyası oluştur
-            zip_buffer = io.BytesIO()
-            basarili_sayisi = 0
+            kat_sayfalari = request.args.get('pdf', '').lower() in ('1', 'true', 'evet')
             
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for oda in odalar:
-                    try:
-                        if not oda.qr_kod_gorsel:
-                            continue
+            def kat_sayfasi(dosya_adi, baslik, kat_odalari, zip_akisi):
+                try:
+                    return zip_akisi.dosya_ekle(dosya_adi, QRKodService.kat_qr_sayfasi_pdf(baslik, kat_odalari))
+                except Exception as e:
+                    log_hata(e, modul='admin_qr_zip', extra_info={'dosya': dosya_adi})
+                    return b''
+            
+            def zip_uret():
+                zip_akisi = ZipAkisi()
+                toplam_oda = 0
+                basarili_sayisi = 0
+                kat_anahtari = None
+                kat_odalari = []
+                kat_dosyasi = kat_basligi = None
+                
+                try:
+                    # Sadece gereken kolonlar, otel/kat sırasıyla (kat sayfaları için gruplama)
+                    satirlar = db.session.query(
+                        Oda.id, Oda.oda_no, Oda.qr_kod_token, Oda.qr_kod_gorsel,
+                        Kat.id.label('kat_id'), Kat.kat_adi, Otel.ad.label('otel_adi')
+                    ).outerjoin(
+                        Kat, Kat.id == Oda.kat_id
+                    ).outerjoin(
+                        Otel, Otel.id == Kat.otel_id
+                    ).filter(*qr_filtre).order_by(
+                        Otel.ad, Kat.kat_no, Kat.id, Oda.oda_no
+                    ).execution_options(yield_per=QR_ZIP_PARTI)
+                    
+                    for oda in satirlar:
+                        toplam_oda += 1
                         
                         # Kat ve otel bilgisini al (Oda -> Kat -> Otel ilişkisi)
-                        kat_adi = oda.kat.kat_adi if oda.kat else 'BilinmeyenKat'
-                        otel_adi = oda.kat.otel.ad if (oda.kat and oda.kat.otel) else 'BilinmeyenOtel'
+                        kat_adi = oda.kat_adi or 'BilinmeyenKat'
+                        otel_adi = oda.otel_adi or 'BilinmeyenOtel'
                         
                         # Dosya adı için güvenli karakterler (Türkçe karakter temizle)
-                        otel_safe = otel_adi.replace(' ', '_').replace('ı', 'i').replace('ğ', 'g').replace('ü', 'u').replace('ş', 's').replace('ö', 'o').replace('ç', 'c').replace('İ', 'I').replace('Ğ', 'G').replace('Ü', 'U').replace('Ş', 'S').replace('Ö', 'O').replace('Ç', 'C')
-                        kat_safe = kat_adi.replace(' ', '_').replace('ı', 'i').replace('ğ', 'g').replace('ü', 'u').replace('ş', 's').replace('ö', 'o').replace('ç', 'c').replace('İ', 'I').replace('Ğ', 'G').replace('Ü', 'U').replace('Ş', 'S').replace('Ö', 'O').replace('Ç', 'C')
+                        otel_safe = otel_adi.replace(' ', '_').translate(TURKCE_ASCII)
+                        kat_safe = kat_adi.replace(' ', '_').translate(TURKCE_ASCII)
                         
-                        # SVG formatında kaydet: OtelAdi_KatAdi_OdaNo_QR.svg
-                        filename = f'{otel_safe}_{kat_safe}_Oda{oda.oda_no}_QR.svg'
-                        zip_file.writestr(filename, oda.qr_kod_gorsel.encode('utf-8'))
-                        basarili_sayisi += 1
+                        if kat_sayfalari and oda.kat_id != kat_anahtari:
+                            # Önceki katın sayfası tamamlandı
+                            if kat_odalari:
+                                yield kat_sayfasi(kat_dosyasi, kat_basligi, kat_odalari, zip_akisi)
+                            kat_anahtari = oda.kat_id
+                            kat_odalari = []
+                            kat_dosyasi = f'{otel_safe}_{kat_safe}_QR_Sayfasi.pdf'
+                            kat_basligi = f'{otel_adi} - {kat_adi}'
                         
-                    except Exception as e:
-                        log_hata(e, modul='admin_qr_zip', extra_info={'oda_id': oda.id})
-                        continue
-            
-            # Hiç dosya eklenemediyse hata döndür
-            if basarili_sayisi == 0:
-                return jsonify({
-                    'success': False,
-                    'message': 'QR kodları ZIP dosyasına eklenemedi'
-                }), 500
-            
-            zip_buffer.seek(0)
-            
-            # Log kaydı
-            log_islem('export', 'qr_kod_toplu', {
-                'toplam_oda': len(odalar),
-                'basarili': basarili_sayisi
-            })
+                        try:
+                            # SVG formatında kaydet: OtelAdi_KatAdi_OdaNo_QR.svg
+                            filename = f'{otel_safe}_{kat_safe}_Oda{oda.oda_no}_QR.svg'
+                            yield zip_akisi.dosya_ekle(filename, oda.qr_kod_gorsel)
+                            basarili_sayisi += 1
+                            
+                            if kat_sayfalari:
+                                kat_odalari.append((oda.oda_no, QRKodService.generate_qr_url(oda.qr_kod_token)))
+                            
+                        except Exception as e:
+                            log_hata(e, modul='admin_qr_zip', extra_info={'oda_id': oda.id})
+                            continue
+                    
+                    if kat_odalari:
+                        yield kat_sayfasi(kat_dosyasi, kat_basligi, kat_odalari, zip_akisi)
+                    
+                    yield zip_akisi.kapat()
+                    
+                    # Log kaydı
+                    log_islem('export', 'qr_kod_toplu', {
+                        'toplam_oda': toplam_oda,
+                        'basarili': basarili_sayisi,
+                        'kat_sayfalari': kat_sayfalari
+                    })
+                    
+                except Exception as e:
+                    # Yanıt başlıkları gönderildi; arşiv yarım kalır, hata loglanır
+                    log_hata(e, modul='admin_qr_zip', extra_info={'toplam_oda': toplam_oda})
             
             # Dosya adı
             filename = f'QR_Kodlari_{get_kktc_now().strftime("%Y%m%d_%H%M%S")}.zip'
             
-            return send_file(
-                zip_buffer,
+            return Response(
+                stream_with_context(zip_uret()),
                 mimetype='application/zip',
-                as_attachment=True,
-                download_name=filename
+                headers={
+                    'Content-Disposition': f'attachment; filename="{filename}"',
+                    'X-Accel-Buffering': 'no'
+                }
             )
             
         except Exception as e:
@@ -414,18 +463,15 @@ def register_admin_qr_routes(app):
     def admin_tum_qr_temizle():
         """Tüm odaların QR kodlarını temizle"""
         try:
-            # Tüm aktif odaları getir
-            odalar = Oda.query.filter_by(aktif=True).all()
-            
-            temizlenen_adet = 0
-            
-            for oda in odalar:
-                if oda.qr_kod_token or oda.qr_kod_gorsel:
-                    # QR bilgilerini temizle
-                    oda.qr_kod_token = None
-                    oda.qr_kod_gorsel = None
-                    oda.qr_kod_olusturma_tarihi = None
-                    temizlenen_adet += 1
+            # QR bilgisi olan aktif odaları tek UPDATE ile temizle (görseller yüklenmez)
+            temizlenen_adet = Oda.query.filter(
+                Oda.aktif == True,
+                db.or_(Oda.qr_kod_token.isnot(None), Oda.qr_kod_gorsel.isnot(None))
+            ).update({
+                Oda.qr_kod_token: None,
+                Oda.qr_kod_gorsel: None,
+                Oda.qr_kod_olusturma_tarihi: None
+            }, synchronize_session='fetch')
             
             db.session.commit()
             
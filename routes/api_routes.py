@@ -817,23 +817,20 @@ def register_api_routes(app):
             except (ValueError, TypeError) as e:
                 return jsonify({'success': False, 'error': f'Geçersiz parametre tipi: {str(e)}'}), 400
             
+            # Odalar ve ürün durumları tek sorguda (oda_minibar_durumlari)
+            from utils.minibar_durum_servisleri import MinibarDurumServisi
+            odalar = {oda.id: oda for oda in Oda.query.filter(Oda.id.in_(oda_ids))}
+            urun_durumlari = MinibarDurumServisi.odalar_durumlari_getir(oda_ids, urun_id=urun_id)
+            
             durum_listesi = []
             
             for oda_id in oda_ids:
-                oda = db.session.get(Oda, oda_id)
+                oda = odalar.get(oda_id)
                 if not oda:
                     continue
                 
-                # Son işlemi bul
-                son_islem = MinibarIslem.query.filter_by(oda_id=oda_id).order_by(
-                    MinibarIslem.id.desc()
-                ).first()
-                
-                mevcut_stok = 0
-                if son_islem:
-                    son_detay = next((d for d in son_islem.detaylar if d.urun_id == urun_id), None)
-                    if son_detay:
-                        mevcut_stok = son_detay.bitis_stok if son_detay.bitis_stok is not None else 0
+                urun_durumu = urun_durumlari.get(oda_id, {}).get(urun_id)
+                mevcut_stok = urun_durumu.mevcut_miktar if urun_durumu else 0
                 
                 durum_listesi.append({
                     'oda_id': oda_id,
@@ -912,28 +909,39 @@ def register_api_routes(app):
                     'error': f'Otel zimmet deposunda yeterli ürün yok! Gereken: {toplam_gerekli} {urun.birim}, Mevcut: {otel_stok.kalan_miktar} {urun.birim}'
                 })
 
+            # Odaları ve son işlemlerini döngüden önce toplu getir
+            from utils.minibar_durum_servisleri import MinibarDurumServisi
+            odalar = {oda.id: oda for oda in Oda.query.filter(Oda.id.in_(oda_ids))}
+            son_islemler = {}
+            for islem in MinibarIslem.query.options(
+                db.selectinload(MinibarIslem.detaylar)
+            ).filter(
+                MinibarIslem.oda_id.in_(oda_ids)
+            ).distinct(MinibarIslem.oda_id).order_by(
+                MinibarIslem.oda_id, MinibarIslem.id.desc()
+            ):
+                son_islemler[islem.oda_id] = islem
+
+            # Ürünün oda durumları tek sorguda (oda_minibar_durumlari - son işlemde ürün olmasa da doğru değer)
+            mevcut_stoklar = {
+                oda_id: durumlar[urun_id].mevcut_miktar if urun_id in durumlar else 0
+                for oda_id, durumlar in MinibarDurumServisi.odalar_durumlari_getir(oda_ids, urun_id=urun_id).items()
+            }
+
             # Her oda için işlem oluştur
             basarili_odalar = []
             hatali_odalar = []
 
             for oda_id in oda_ids:
                 try:
-                    oda = db.session.get(Oda, oda_id)
+                    oda = odalar.get(oda_id)
                     if not oda:
                         hatali_odalar.append({'oda_id': oda_id, 'hata': 'Oda bulunamadı'})
                         continue
 
-                    # Son işlemi bul
-                    son_islem = MinibarIslem.query.filter_by(oda_id=oda_id).order_by(
-                        MinibarIslem.id.desc()
-                    ).first()
+                    son_islem = son_islemler.get(oda_id)
 
-                    # Mevcut stok
-                    mevcut_stok = 0
-                    if son_islem:
-                        son_detay = next((d for d in son_islem.detaylar if d.urun_id == urun_id), None)
-                        if son_detay:
-                            mevcut_stok = son_detay.bitis_stok if son_detay.bitis_stok is not None else 0
+                    mevcut_stok = mevcut_stoklar.get(oda_id, 0)
 
                     # Yeni stok
                     yeni_stok = mevcut_stok + eklenen_miktar
@@ -986,6 +994,8 @@ def register_api_routes(app):
                     )
                     db.session.add(doldurma_detay)
 
+                    # Aynı oda listede tekrar ederse güncel stoktan devam edilir
+                    mevcut_stoklar[oda_id] = yeni_stok
                     basarili_odalar.append({'oda_id': oda_id, 'oda_no': oda.oda_no})
 
                 except Exception as oda_hata:
@@ -2615,7 +2625,8 @@ def register_api_routes(app):
                 miktar=miktar,
                 islem_tipi='zimmet_transfer',
                 referans_id=None,
-                kullanici_id=session.get('kullanici_id')
+                kullanici_id=session.get('kullanici_id'),
+                commit=False
             )
             
             if not fifo_sonuc['success']:
@@ -2645,6 +2656,7 @@ def register_api_routes(app):
                 db.session.add(stok)
             
             db.session.commit()
+            log_islem('guncelleme', 'fifo_stok_cikis', fifo_sonuc['log_kaydi'])
             
             # Güncel ana depo stoğunu al
             ana_depo_stok = UrunStok.query.filter_by(otel_id=otel_id, urun_id=urun_id).first()
@@ -2943,6 +2955,7 @@ def register_api_routes(app):
                 return jsonify({'success': False, 'error': f"Stok yetersiz: {', '.join(yetersiz)}"}), 400
             
             # Ürünleri ekle
+            fifo_kalemleri = []
             for u in urunler:
                 # Mevcut zimmet varsa, aynı ürün var mı kontrol et
                 mevcut_detay = None
@@ -2969,20 +2982,22 @@ def register_api_routes(app):
                     db.session.flush()
                     detay_id = detay.id
                 
-                # FIFO stok çıkışı (FIFO kaydı yoksa otomatik oluşturur)
-                fifo_sonuc = FifoStokServisi.fifo_stok_cikis(
-                    otel_id=otel_id,
-                    urun_id=u['urun_id'],
-                    miktar=u['miktar'],
-                    islem_tipi='zimmet',
-                    referans_id=detay_id,
-                    kullanici_id=session['kullanici_id']
-                )
-                
-                if not fifo_sonuc['success']:
-                    raise Exception(f"Stok hatası: {fifo_sonuc['message']}")
+                fifo_kalemleri.append({'urun_id': u['urun_id'], 'miktar': u['miktar'], 'referans_id': detay_id})
+            
+            # FIFO stok çıkışı - tüm ürünler tek seferde (FIFO kaydı yoksa otomatik oluşturur)
+            fifo_sonuc = FifoStokServisi.fifo_toplu_cikis(
+                otel_id=otel_id,
+                kalemler=fifo_kalemleri,
+                islem_tipi='zimmet',
+                kullanici_id=session['kullanici_id'],
+                commit=False
+            )
+            
+            if not fifo_sonuc['success']:
+                raise Exception(f"Stok hatası: {fifo_sonuc['message']}")
             
             db.session.commit()
+            log_islem('guncelleme', 'fifo_stok_cikis', fifo_sonuc['log_kaydi'])
             
             mesaj = 'Zimmet başarıyla atandı!' if yeni_kayit else 'Mevcut zimmete eklendi!'
             
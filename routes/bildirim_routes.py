@@ -7,10 +7,14 @@ Endpoint'ler:
 - POST /api/bildirimler/{id}/okundu  - Bildirimi okundu işaretle
 - POST /api/bildirimler/tumunu-oku   - Tümünü okundu işaretle
 - GET  /api/bildirimler/poll         - Yeni bildirimleri kontrol et (polling)
+- GET  /api/bildirimler/stream       - SSE stream (Redis pub/sub)
 """
 
-from flask import jsonify, request, session
+from flask import jsonify, request, session, Response, stream_with_context, current_app
 from datetime import datetime
+import json
+import threading
+import time
 import pytz
 
 from models import db
@@ -19,6 +23,27 @@ from utils.bildirim_service import BildirimService
 
 KKTC_TZ = pytz.timezone('Europe/Nicosia')
 
+# gthread worker'da her açık stream bir thread tutar; worker başına sınırlanır,
+# limit aşılınca istemci poll'a düşer
+_sse_semafor = None
+_sse_semafor_lock = threading.Lock()
+
+
+def _sse_semaforu():
+    global _sse_semafor
+    if _sse_semafor is None:
+        with _sse_semafor_lock:
+            if _sse_semafor is None:
+                _sse_semafor = threading.BoundedSemaphore(
+                    int(current_app.config.get('BILDIRIM_SSE_MAX_BAGLANTI', 2))
+                )
+    return _sse_semafor
+
+
+def _sse_olay(bildirim):
+    veri = json.dumps(bildirim, ensure_ascii=False)
+    return f"id: {bildirim['id']}\nevent: bildirim\ndata: {veri}\n\n"
+
 
 def register_bildirim_routes(app):
     """Bildirim route'larını kaydet"""
@@ -149,6 +174,12 @@ def register_bildirim_routes(app):
             kullanici_rol = session.get('rol')
             otel_id = session.get('otel_id')
             
+            # Son görülen bildirim ID'si (varsa Redis üzerinden cevaplanır)
+            son_id = request.args.get('son_id', type=int)
+            if son_id is not None and son_id <= 0:
+                # İmleç yok: geçmiş okunmamışlar tekrar dönmesin, son_kontrol'e bakılır
+                son_id = None
+            
             # Son kontrol zamanı (ISO format)
             son_kontrol_str = request.args.get('son_kontrol')
             son_kontrol = None
@@ -163,7 +194,8 @@ def register_bildirim_routes(app):
                 kullanici_id=kullanici_id,
                 kullanici_rol=kullanici_rol,
                 otel_id=otel_id,
-                son_kontrol=son_kontrol
+                son_kontrol=son_kontrol,
+                son_id=son_id
             )
             
             okunmamis_sayisi = BildirimService.okunmamis_sayisi(
@@ -185,6 +217,100 @@ def register_bildirim_routes(app):
                 'success': False,
                 'error': str(e)
             }), 500
+    
+    @app.route('/api/bildirimler/stream', methods=['GET'])
+    @login_required
+    def api_bildirim_stream():
+        """
+        Server-Sent Events ile bildirim push'u.
+        
+        Yeni bildirimler Redis pub/sub'dan gelir, DB sorgulanmaz. Sadece
+        yeniden bağlanmada (Last-Event-ID / ?son_id) aradaki kaçan
+        bildirimler DB'den tamamlanır. Redis yoksa veya worker'daki stream
+        limiti doluysa 503 döner; istemci poll'a düşer.
+        """
+        kullanici_id = session.get('kullanici_id')
+        kullanici_rol = session.get('rol')
+        otel_id = session.get('otel_id')
+        
+        semafor = _sse_semaforu()
+        if not semafor.acquire(blocking=False):
+            return jsonify({'success': False, 'error': 'Stream kapasitesi dolu'}), 503
+        
+        try:
+            # Önce abone ol, sonra kaçanları oku: arada gelen bildirim kaybolmaz
+            pubsub = BildirimService.abone_ol(kullanici_id, kullanici_rol, otel_id)
+            if pubsub is None:
+                semafor.release()
+                return jsonify({'success': False, 'error': 'Bildirim yayını aktif değil'}), 503
+            
+            son_id_str = request.headers.get('Last-Event-ID') or request.args.get('son_id')
+            try:
+                son_id = int(son_id_str) if son_id_str else None
+            except ValueError:
+                son_id = None
+            
+            # son_id yoksa (veya 0) istemcinin bir imleci yok: geçmiş bildirimler
+            # zaten ilk yüklemede alındı, tekrar gönderilmez
+            kacanlar = []
+            if son_id is not None and son_id > 0:
+                kacanlar = BildirimService.idden_sonraki_bildirimler(
+                    kullanici_id=kullanici_id,
+                    kullanici_rol=kullanici_rol,
+                    otel_id=otel_id,
+                    son_id=son_id
+                )
+            # Stream boyunca DB bağlantısı tutulmasın
+            db.session.close()
+        except Exception:
+            semafor.release()
+            raise
+        
+        max_sure = int(current_app.config.get('BILDIRIM_SSE_MAX_SURE', 300))
+        keepalive = int(current_app.config.get('BILDIRIM_SSE_KEEPALIVE', 20))
+        
+        def olaylar():
+            gonderilen_son_id = son_id or 0
+            try:
+                yield "retry: 5000\n\n"
+                for bildirim in kacanlar:
+                    gonderilen_son_id = max(gonderilen_son_id, bildirim['id'])
+                    yield _sse_olay(bildirim)
+                
+                bitis = time.monotonic() + max_sure
+                son_yazma = time.monotonic()
+                while time.monotonic() < bitis:
+                    mesaj = pubsub.get_message(timeout=1.0)
+                    if mesaj and mesaj.get('type') in ('message', 'pmessage'):
+                        try:
+                            bildirim = json.loads(mesaj['data'])
+                        except (TypeError, ValueError):
+                            continue
+                        if bildirim.get('id', 0) <= gonderilen_son_id:
+                            continue
+                        if not BildirimService.bildirim_kullaniciya_ait_mi(bildirim, otel_id):
+                            continue
+                        gonderilen_son_id = bildirim['id']
+                        son_yazma = time.monotonic()
+                        yield _sse_olay(bildirim)
+                    elif time.monotonic() - son_yazma >= keepalive:
+                        son_yazma = time.monotonic()
+                        yield ": ping\n\n"
+            finally:
+                try:
+                    pubsub.close()
+                finally:
+                    semafor.release()
+        
+        return Response(
+            stream_with_context(olaylar()),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+    
     @login_required
     def api_gorev_ozet():
         """
@@ -279,29 +279,35 @@ def register_depo_routes(app):
                 db.session.add(zimmet)
                 db.session.flush()
 
-                for uid, miktar in urun_miktarlari.items():
-                    detay = PersonelZimmetDetay(
+                detaylar = [
+                    PersonelZimmetDetay(
                         zimmet_id=zimmet.id,
                         urun_id=uid,
                         miktar=miktar,
                         kalan_miktar=miktar
                     )
-                    db.session.add(detay)
-                    db.session.flush()
+                    for uid, miktar in urun_miktarlari.items()
+                ]
+                db.session.add_all(detaylar)
+                db.session.flush()
 
-                    fifo_sonuc = FifoStokServisi.fifo_stok_cikis(
-                        otel_id=otel_id,
-                        urun_id=uid,
-                        miktar=miktar,
-                        islem_tipi='zimmet',
-                        referans_id=detay.id,
-                        kullanici_id=session.get('kullanici_id')
-                    )
-                    
-                    if not fifo_sonuc['success']:
-                        raise Exception(f"FIFO stok çıkışı hatası: {fifo_sonuc['message']}")
+                # Tüm ürünler için tek seferde FIFO stok çıkışı (tek transaction)
+                fifo_sonuc = FifoStokServisi.fifo_toplu_cikis(
+                    otel_id=otel_id,
+                    kalemler=[
+                        {'urun_id': detay.urun_id, 'miktar': detay.miktar, 'referans_id': detay.id}
+                        for detay in detaylar
+                    ],
+                    islem_tipi='zimmet',
+                    kullanici_id=session.get('kullanici_id'),
+                    commit=False
+                )
+                
+                if not fifo_sonuc['success']:
+                    raise Exception(f"FIFO stok çıkışı hatası: {fifo_sonuc['message']}")
                 
                 db.session.commit()
+                log_islem('guncelleme', 'fifo_stok_cikis', fifo_sonuc['log_kaydi'])
                 
                 audit_create('personel_zimmet', zimmet.id, zimmet)
                 
@@ -992,7 +998,7 @@ def register_depo_routes(app):
     def ana_depo_tedarik_tamamla():
         """Ana depodan tedarik işlemini tamamla - FIFO ile"""
         from utils.authorization import get_kullanici_otelleri
-        from sqlalchemy import func
+        from utils.fifo_servisler import FifoStokServisi
         
         try:
             data = request.get_json()
@@ -1082,9 +1088,8 @@ def register_depo_routes(app):
                 if not tedarik:
                     return jsonify({'success': False, 'error': 'Tedarik kaydı oluşturulamadı'}), 500
             
-            eklenen_urun_sayisi = 0
-            eklenen_miktar = 0
-            
+            # Aynı ürün birden fazla satırda gelebilir, ürün bazında birleştir
+            urun_miktarlari = {}
             for urun_data in urunler:
                 urun_id = urun_data.get('urun_id')
                 miktar = urun_data.get('miktar', 0)
@@ -1092,72 +1097,63 @@ def register_depo_routes(app):
                 if not urun_id or miktar <= 0:
                     continue
                 
-                mevcut_detay = AnaDepoTedarikDetay.query.filter_by(
-                    tedarik_id=tedarik.id,
-                    urun_id=urun_id
-                ).first()
-                
-                if mevcut_detay:
-                    mevcut_detay.miktar += miktar
-                    detay = mevcut_detay
-                    
-                    mevcut_fifo = StokFifoKayit.query.filter_by(tedarik_detay_id=detay.id).first()
-                    if mevcut_fifo:
-                        mevcut_fifo.giris_miktari += miktar
-                        mevcut_fifo.kalan_miktar += miktar
+                urun_miktarlari[urun_id] = urun_miktarlari.get(urun_id, 0) + miktar
+            
+            if not urun_miktarlari:
+                db.session.rollback()
+                return jsonify({'success': False, 'error': 'Geçerli miktarda ürün bulunamadı'}), 400
+            
+            # Tedarikin mevcut detayları tek sorguda
+            detaylar = {
+                d.urun_id: d for d in AnaDepoTedarikDetay.query.filter_by(tedarik_id=tedarik.id).all()
+            }
+            
+            yeni_detaylar = []
+            for urun_id, miktar in urun_miktarlari.items():
+                if urun_id in detaylar:
+                    detaylar[urun_id].miktar += miktar
                 else:
                     detay = AnaDepoTedarikDetay(
                         tedarik_id=tedarik.id,
                         urun_id=urun_id,
                         miktar=miktar
                     )
-                    db.session.add(detay)
-                    db.session.flush()
-                    
-                    fifo_kayit = StokFifoKayit(
-                        otel_id=otel_id,
-                        urun_id=urun_id,
-                        tedarik_detay_id=detay.id,
-                        giris_miktari=miktar,
-                        kalan_miktar=miktar,
-                        kullanilan_miktar=0,
-                        tukendi=False
-                    )
-                    db.session.add(fifo_kayit)
-                    eklenen_urun_sayisi += 1
-                
-                stok_hareket = StokHareket(
-                    urun_id=urun_id,
-                    hareket_tipi='giris',
-                    miktar=miktar,
-                    aciklama=f'Ana Depo Tedarik - {tedarik_no}',
-                    islem_yapan_id=session.get('kullanici_id')
-                )
-                db.session.add(stok_hareket)
-                
-                urun_stok = UrunStok.query.filter_by(otel_id=otel_id, urun_id=urun_id).first()
-                if urun_stok:
-                    urun_stok.mevcut_stok += miktar
-                    urun_stok.son_giris_tarihi = get_kktc_now()
-                    urun_stok.son_guncelleme_tarihi = get_kktc_now()
-                    urun_stok.son_guncelleyen_id = session.get('kullanici_id')
-                else:
-                    urun_stok = UrunStok(
-                        otel_id=otel_id,
-                        urun_id=urun_id,
-                        mevcut_stok=miktar,
-                        son_giris_tarihi=get_kktc_now(),
-                        son_guncelleme_tarihi=get_kktc_now(),
-                        son_guncelleyen_id=session.get('kullanici_id')
-                    )
-                    db.session.add(urun_stok)
-                
-                eklenen_miktar += miktar
+                    detaylar[urun_id] = detay
+                    yeni_detaylar.append(detay)
+            
+            if yeni_detaylar:
+                db.session.add_all(yeni_detaylar)
+            db.session.flush()  # Yeni detay ID'leri için tek flush
+            
+            eklenen_urun_sayisi = len(yeni_detaylar)
+            eklenen_miktar = sum(urun_miktarlari.values())
+            
+            # FIFO partileri, stok hareketleri ve UrunStok tek seferde
+            fifo_sonuc = FifoStokServisi.fifo_toplu_giris(
+                otel_id=otel_id,
+                kalemler=[
+                    {'urun_id': urun_id, 'miktar': miktar, 'tedarik_detay_id': detaylar[urun_id].id}
+                    for urun_id, miktar in urun_miktarlari.items()
+                ],
+                kaynak_tipi='tedarik',
+                kullanici_id=session.get('kullanici_id'),
+                aciklama=f'Ana Depo Tedarik - {tedarik_no}',
+                commit=False
+            )
+            
+            if not fifo_sonuc['success'] or not all(s['success'] for s in fifo_sonuc['sonuclar']):
+                db.session.rollback()
+                return jsonify({
+                    'success': False,
+                    'error': fifo_sonuc['message'],
+                    'sonuclar': fifo_sonuc['sonuclar']
+                }), 400
             
-            tedarik.toplam_urun_sayisi = AnaDepoTedarikDetay.query.filter_by(tedarik_id=tedarik.id).count()
-            tedarik.toplam_miktar = db.session.query(func.sum(AnaDepoTedarikDetay.miktar)).filter_by(tedarik_id=tedarik.id).scalar() or 0
+            tedarik.toplam_urun_sayisi = len(detaylar)
+            tedarik.toplam_miktar = sum(d.miktar for d in detaylar.values())
             
             db.session.commit()
+            log_islem('ekleme', 'fifo_stok_giris', fifo_sonuc['log_kaydi'])
             
             if yeni_kayit:
                 audit_create('ana_depo_tedarik', tedarik.id, tedarik)
@@ -1179,7 +1175,8 @@ def register_depo_routes(app):
                 'message': mesaj,
                 'tedarik_no': tedarik_no,
                 'tedarik_id': tedarik.id,
-                'mevcut_tedarike_eklendi': not yeni_kayit
+                'mevcut_tedarike_eklendi': not yeni_kayit,
+                'sonuclar': fifo_sonuc['sonuclar']
             })
             
         except Exception as e:
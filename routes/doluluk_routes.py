@@ -742,10 +742,9 @@ def doluluk_onizle():
 def doluluk_yukle():
     """Excel dosyası yükleme endpoint'i - Kullanıcı onaylı dosya tipi desteği"""
     try:
-        from utils.excel_service import ExcelProcessingService
         from utils.file_management_service import FileManagementService
         from utils.authorization import get_kullanici_otelleri
-        import json
+        from utils.doluluk_import_servisi import DolulukImportServisi
 
         if 'excel_file' not in request.files:
             flash("Dosya bulunamadı", "danger")
@@ -781,113 +780,15 @@ def doluluk_yukle():
             flash(f"Dosya kaydedilemedi: {error}", "danger")
             return redirect(url_for("doluluk.doluluk_yonetimi"))
 
-        # 2. Excel'i işle (override_dosya_tipi varsa kullan)
-        result = ExcelProcessingService.process_excel_file(file_path, islem_kodu, user_id, otel_id, override_dosya_tipi)
-
-        # 3. Durumu güncelle
-        if result['success']:
-            FileManagementService.update_dosya_yukleme_status(
-                islem_kodu,
-                'tamamlandi',
-                dosya_tipi=result['dosya_tipi'],
-                toplam_satir=result['toplam_satir'],
-                basarili_satir=result['basarili_satir'],
-                hatali_satir=result['hatali_satir'],
-                hata_detaylari=json.dumps(result['hatalar'], ensure_ascii=False) if result['hatalar'] else None
-            )
-            
-            # YuklemeGorev tablosunu güncelle (dashboard için)
-            try:
-                from models import YuklemeGorev
-                from datetime import date, datetime, timezone
-                
-                # Dosya tipini YuklemeGorev formatına çevir
-                dosya_tipi_map = {
-                    'in_house': 'inhouse',
-                    'arrivals': 'arrivals', 
-                    'departures': 'departures'
-                }
-                yukleme_dosya_tipi = dosya_tipi_map.get(result['dosya_tipi'], result['dosya_tipi'])
-                dosya_yukleme = DosyaYukleme.query.filter_by(islem_kodu=islem_kodu).first()
-                
-                # Bugünkü görevi bul ve güncelle - otel_id ile ara
-                yukleme_gorev = YuklemeGorev.query.filter(
-                    YuklemeGorev.otel_id == otel_id,
-                    YuklemeGorev.gorev_tarihi == date.today(),
-                    YuklemeGorev.dosya_tipi == yukleme_dosya_tipi
-                ).first()
-                
-                if yukleme_gorev:
-                    # Mevcut görevi güncelle
-                    yukleme_gorev.durum = 'completed'
-                    yukleme_gorev.yukleme_zamani = get_kktc_now()
-                    yukleme_gorev.dosya_yukleme_id = dosya_yukleme.id if dosya_yukleme else None
-                else:
-                    # Görev yoksa yeni oluştur
-                    yukleme_gorev = YuklemeGorev(
-                        otel_id=otel_id,
-                        depo_sorumlusu_id=user_id,
-                        gorev_tarihi=date.today(),
-                        dosya_tipi=yukleme_dosya_tipi,
-                        durum='completed',
-                        yukleme_zamani=get_kktc_now(),
-                        dosya_yukleme_id=dosya_yukleme.id if dosya_yukleme else None
-                    )
-                    db.session.add(yukleme_gorev)
-                
-                db.session.commit()
-                
-                # 🔥 KRİTİK: YuklemeGorev güncellendikten SONRA görev oluşturma kontrolü yap
-                # 3 dosya da yüklendiyse günlük görevleri oluştur
-                try:
-                    from utils.gorev_service import GorevService
-                    
-                    # 3 dosya tipi için yükleme durumlarını kontrol et
-                    yukleme_durumlari = {}
-                    for tip in ['inhouse', 'arrivals', 'departures']:
-                        yukleme = YuklemeGorev.query.filter(
-                            YuklemeGorev.otel_id == otel_id,
-                            YuklemeGorev.gorev_tarihi == date.today(),
-                            YuklemeGorev.dosya_tipi == tip
-                        ).first()
-                        yukleme_durumlari[tip] = yukleme.durum if yukleme else 'pending'
-                    
-                    print(f"📊 Otel {otel_id} - Yükleme durumları: {yukleme_durumlari}")
-                    
-                    # 3 dosya da yüklendi mi kontrol et
-                    tum_dosyalar_yuklendi = all(
-                        durum == 'completed' for durum in yukleme_durumlari.values()
-                    )
-                    
-                    if tum_dosyalar_yuklendi:
-                        print(f"✅ Otel {otel_id} - 3 dosya da yüklendi! Görevler oluşturuluyor...")
-                        gorev_result = GorevService.create_daily_tasks(otel_id, date.today())
-                        print(f"✅ Görevler oluşturuldu: {gorev_result}")
-                        
-                        # Kat sorumlularına bildirim gönder (gorev_service içinde zaten yapılıyor)
-                        # Ek bildirim gerekirse burada yapılabilir
-                        pass
-                    else:
-                        eksik_dosyalar = [tip for tip, durum in yukleme_durumlari.items() if durum != 'completed']
-                        print(f"⏳ Otel {otel_id} - Eksik dosyalar: {eksik_dosyalar}. Görevler henüz oluşturulmayacak.")
-                        
-                except Exception as gorev_olusturma_err:
-                    print(f"⚠️ Görev oluşturma hatası: {gorev_olusturma_err}")
-                    import traceback
-                    traceback.print_exc()
-                    
-            except Exception as gorev_err:
-                print(f"YuklemeGorev güncelleme hatası: {gorev_err}")
-            
-            flash(f"✓ Dosya başarıyla işlendi! İşlem Kodu: {islem_kodu} | "
-                  f"Başarılı: {result['basarili_satir']}, Hatalı: {result['hatali_satir']}", "success")
+        # 2. İşlemeyi arka plana bırak (parse, upsert ve görev oluşturma worker'da)
+        sonuc = DolulukImportServisi.kuyruga_al(file_path, islem_kodu, user_id, otel_id, override_dosya_tipi)
+
+        if sonuc['kuyrukta']:
+            flash(f"✓ Dosya yüklendi, arka planda işleniyor. İşlem Kodu: {islem_kodu}", "success")
+        elif sonuc['success']:
+            flash(f"✓ Dosya başarıyla işlendi! İşlem Kodu: {islem_kodu} | {sonuc['message']}", "success")
         else:
-            FileManagementService.update_dosya_yukleme_status(
-                islem_kodu,
-                'hata',
-                hata_detaylari=json.dumps(result.get('hatalar', [result.get('error', 'Bilinmeyen hata')]), ensure_ascii=False)
-            )
-            flash(f"Dosya işlenirken hata oluştu: {result.get('error', 'Bilinmeyen hata')}", "danger")
+            flash(f"Dosya işlenirken hata oluştu: {sonuc['message']}", "danger")
 
         return redirect(url_for("doluluk.doluluk_yonetimi"))
     except Exception as e:
@@ -963,13 +864,18 @@ def doluluk_durum(islem_kodu):
                 print(f"Hata detayları parse hatası: {parse_err}")
                 hata_detaylari = [yukleme.hata_detaylari]
 
+        # Arka plan işleme ilerlemesi (job yoksa eski senkron yükleme)
+        from utils.doluluk_import_servisi import DolulukImportServisi
+        ilerleme = DolulukImportServisi.ilerleme_getir(islem_kodu)
+
         return jsonify({
             "success": True,
             "durum": yukleme.durum,
             "hata_detaylari": hata_detaylari,
             "basarili_satir": yukleme.basarili_satir,
             "hatali_satir": yukleme.hatali_satir,
-            "toplam_satir": yukleme.toplam_satir
+            "toplam_satir": yukleme.toplam_satir,
+            "ilerleme": ilerleme
         })
     except Exception as e:
         log_hata("doluluk_durum", str(e), session.get("kullanici_id"))
@@ -294,3 +294,45 @@ def list_routes():
             'error': str(e),
             'timestamp': get_kktc_now().isoformat()
         }), 500
+
+
+def _metrics_erisimi_var():
+    """METRICS_TOKEN varsa Bearer token, yoksa loopback/özel ağ adresi"""
+    from flask import current_app
+    import hmac
+    import ipaddress
+
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        yetki = request.headers.get('Authorization', '')
+        return hmac.compare_digest(yetki, f'Bearer {token}')
+
+    try:
+        adres = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return adres.is_loopback or adres.is_private
+
+
+@health_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus / OpenMetrics scrape endpoint'i
+    İstek süresi histogramları, DB pool, cache ve Celery görev metrikleri
+    (tüm gunicorn worker'ları birleşik)
+    """
+    from flask import Response, current_app, abort
+    from utils.monitoring.prometheus_exporter import (
+        metrics_metni, OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE
+    )
+
+    if not current_app.config.get('METRICS_ENABLED', True):
+        abort(404)
+    if not _metrics_erisimi_var():
+        abort(403)
+
+    openmetrics = 'application/openmetrics-text' in request.headers.get('Accept', '')
+    return Response(
+        metrics_metni(openmetrics=openmetrics),
+        content_type=OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+    )
@@ -18,8 +18,6 @@ Roller:
 from flask import render_template, request, make_response, flash, redirect, url_for
 from datetime import datetime, timedelta
 import io
-import openpyxl
-from openpyxl.styles import Font, PatternFill
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
@@ -35,9 +33,13 @@ from utils.decorators import login_required, role_required
 from utils.helpers import (
     get_current_user, get_kritik_stok_urunler, get_stok_toplamlari
 )
+from utils.excel_akisi import ExcelAkisi, excel_yaniti
 
 KKTC_TZ = pytz.timezone('Europe/Nicosia')
 
+# Excel export'larında server-side cursor'dan tek seferde okunan satır sayısı
+EXCEL_PARTI = 1000
+
 def get_kktc_now():
     """Kıbrıs saat diliminde şu anki zamanı döndürür."""
     return datetime.now(KKTC_TZ)
@@ -357,9 +359,6 @@ def register_rapor_export_routes(app):
             personel_id = request.args.get('personel_id')
             hareket_tipi = request.args.get('hareket_tipi')
             
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            
             rapor_basliklari = {
                 'stok_durum': 'Stok Durum Raporu',
                 'stok_hareket': 'Stok Hareket Raporu',
@@ -370,55 +369,63 @@ def register_rapor_export_routes(app):
             }
             
             baslik = rapor_basliklari.get(rapor_tipi, 'Rapor')
-            ws.title = baslik[:31]
-            
-            ws['A1'] = baslik
-            ws['A1'].font = Font(size=16, bold=True)
             
-            ws['A2'] = f"Rapor Tarihi: {get_kktc_now().strftime('%d.%m.%Y %H:%M')}"
-            ws['A2'].font = Font(size=10)
+            def excel_akisi(sutunlar, genislikler, renk):
+                return ExcelAkisi(
+                    baslik, baslik, sutunlar, genislikler=genislikler,
+                    alt_baslik=f"Rapor Tarihi: {get_kktc_now().strftime('%d.%m.%Y %H:%M')}",
+                    renk=renk, baslik_yazi_rengi=None, ortala=False
+                )
             
-            row_num = 4
+            # Varsayılan: veri satırı olmayan rapor (ozet vb.)
+            akis = excel_akisi([], [], '4472C4')
+            satirlar = iter(())
             
             if rapor_tipi == 'stok_durum':
-                headers = ['Ürün Adı', 'Ürün Grubu', 'Birim', 'Mevcut Stok', 'Kritik Seviye', 'Durum']
-                ws.merge_cells('A1:F1')
-                
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=row_num, column=col, value=header)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+                akis = excel_akisi(
+                    ['Ürün Adı', 'Ürün Grubu', 'Birim', 'Mevcut Stok', 'Kritik Seviye', 'Durum'],
+                    [35, 25, 10, 13, 14, 10], '4472C4'
+                )
                 
-                query = Urun.query.filter_by(aktif=True)
+                query = db.session.query(
+                    Urun.id, Urun.urun_adi, Urun.birim, Urun.kritik_stok_seviyesi, UrunGrup.grup_adi
+                ).outerjoin(UrunGrup, Urun.grup_id == UrunGrup.id).filter(Urun.aktif.is_(True))
                 if urun_grup_id:
-                    query = query.filter_by(grup_id=urun_grup_id)
+                    query = query.filter(Urun.grup_id == urun_grup_id)
                 
+                # Aktif ürün listesi küçüktür; stok toplamları tek sorguda alınır
                 urunler_liste = query.order_by(Urun.urun_adi).all()
                 stok_map = get_stok_toplamlari([urun.id for urun in urunler_liste])
                 
-                for urun in urunler_liste:
-                    row_num += 1
-                    mevcut_stok = stok_map.get(urun.id, 0)
-                    kritik_seviye = urun.kritik_stok_seviyesi or 0
-                    durum = 'KRİTİK' if mevcut_stok <= kritik_seviye else 'NORMAL'
-                    
-                    ws.cell(row=row_num, column=1, value=urun.urun_adi)
-                    ws.cell(row=row_num, column=2, value=urun.grup.grup_adi)
-                    ws.cell(row=row_num, column=3, value=urun.birim)
-                    ws.cell(row=row_num, column=4, value=mevcut_stok)
-                    ws.cell(row=row_num, column=5, value=urun.kritik_stok_seviyesi)
-                    ws.cell(row=row_num, column=6, value=durum)
+                def satirlar_uret():
+                    for urun in urunler_liste:
+                        mevcut_stok = stok_map.get(urun.id, 0)
+                        kritik_seviye = urun.kritik_stok_seviyesi or 0
+                        durum = 'KRİTİK' if mevcut_stok <= kritik_seviye else 'NORMAL'
+                        yield (urun.urun_adi, urun.grup_adi, urun.birim, mevcut_stok,
+                               urun.kritik_stok_seviyesi, durum)
+                
+                satirlar = satirlar_uret()
             
             elif rapor_tipi == 'stok_hareket':
-                headers = ['Tarih', 'Ürün Adı', 'Hareket Tipi', 'Miktar', 'Açıklama', 'İşlem Yapan']
-                ws.merge_cells('A1:F1')
-                
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=row_num, column=col, value=header)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")
+                akis = excel_akisi(
+                    ['Tarih', 'Ürün Adı', 'Hareket Tipi', 'Miktar', 'Açıklama', 'İşlem Yapan'],
+                    [18, 35, 14, 10, 50, 25], '70AD47'
+                )
                 
-                query = StokHareket.query
+                query = db.session.query(
+                    StokHareket.islem_tarihi,
+                    StokHareket.hareket_tipi,
+                    StokHareket.miktar,
+                    StokHareket.aciklama,
+                    Urun.urun_adi,
+                    Kullanici.ad.label('islem_yapan_ad'),
+                    Kullanici.soyad.label('islem_yapan_soyad')
+                ).join(
+                    Urun, StokHareket.urun_id == Urun.id
+                ).outerjoin(
+                    Kullanici, StokHareket.islem_yapan_id == Kullanici.id
+                )
                 
                 if baslangic_tarihi:
                     baslangic = datetime.strptime(baslangic_tarihi, '%Y-%m-%d')
@@ -429,47 +436,80 @@ def register_rapor_export_routes(app):
                     query = query.filter(StokHareket.islem_tarihi < bitis)
                 
                 if urun_id:
-                    query = query.filter_by(urun_id=urun_id)
+                    query = query.filter(StokHareket.urun_id == urun_id)
                 elif urun_grup_id:
-                    query = query.join(Urun).filter(Urun.grup_id == urun_grup_id)
+                    query = query.filter(Urun.grup_id == urun_grup_id)
                 
                 if hareket_tipi:
-                    query = query.filter_by(hareket_tipi=hareket_tipi)
-                
-                hareketler = query.order_by(StokHareket.islem_tarihi.desc()).all()
-                
-                for hareket in hareketler:
-                    row_num += 1
-                    islem_yapan = f"{hareket.islem_yapan.ad} {hareket.islem_yapan.soyad}" if hareket.islem_yapan else '-'
-                    
-                    aciklama = hareket.aciklama or '-'
-                    if hareket.aciklama and 'Zimmet' in hareket.aciklama:
-                        try:
-                            if '#' in hareket.aciklama:
-                                zimmet_id = int(hareket.aciklama.split('#')[1].split()[0])
-                                zimmet = db.session.get(PersonelZimmet, zimmet_id)
-                                if zimmet and zimmet.personel:
-                                    aciklama += f" → {zimmet.personel.ad} {zimmet.personel.soyad}"
-                        except Exception:
-                            pass
-                    
-                    ws.cell(row=row_num, column=1, value=hareket.islem_tarihi.strftime('%d.%m.%Y %H:%M'))
-                    ws.cell(row=row_num, column=2, value=hareket.urun.urun_adi)
-                    ws.cell(row=row_num, column=3, value=hareket.hareket_tipi.upper())
-                    ws.cell(row=row_num, column=4, value=hareket.miktar)
-                    ws.cell(row=row_num, column=5, value=aciklama)
-                    ws.cell(row=row_num, column=6, value=islem_yapan)
+                    query = query.filter(StokHareket.hareket_tipi == hareket_tipi)
+                
+                query = query.order_by(StokHareket.islem_tarihi.desc()).execution_options(yield_per=EXCEL_PARTI)
+                
+                # Açıklamadaki zimmet numarasından personel adı; zimmet başına tek sorgu
+                zimmet_personelleri = {}
+                
+                def zimmet_personeli(zimmet_id):
+                    if zimmet_id not in zimmet_personelleri:
+                        personel = db.session.query(Kullanici.ad, Kullanici.soyad).join(
+                            PersonelZimmet, PersonelZimmet.personel_id == Kullanici.id
+                        ).filter(PersonelZimmet.id == zimmet_id).first()
+                        zimmet_personelleri[zimmet_id] = f"{personel.ad} {personel.soyad}" if personel else None
+                    return zimmet_personelleri[zimmet_id]
+                
+                def satirlar_uret():
+                    for hareket in query:
+                        islem_yapan = (
+                            f"{hareket.islem_yapan_ad} {hareket.islem_yapan_soyad}"
+                            if hareket.islem_yapan_ad is not None else '-'
+                        )
+                        
+                        aciklama = hareket.aciklama or '-'
+                        if hareket.aciklama and 'Zimmet' in hareket.aciklama:
+                            try:
+                                if '#' in hareket.aciklama:
+                                    personel_adi = zimmet_personeli(int(hareket.aciklama.split('#')[1].split()[0]))
+                                    if personel_adi:
+                                        aciklama += f" → {personel_adi}"
+                            except Exception:
+                                pass
+                        
+                        yield (
+                            hareket.islem_tarihi.strftime('%d.%m.%Y %H:%M'),
+                            hareket.urun_adi,
+                            hareket.hareket_tipi.upper(),
+                            hareket.miktar,
+                            aciklama,
+                            islem_yapan
+                        )
+                
+                satirlar = satirlar_uret()
             
             elif rapor_tipi == 'zimmet':
-                headers = ['Zimmet No', 'Personel', 'Zimmet Tarihi', 'Ürün Sayısı', 'Toplam Miktar', 'Durum']
-                ws.merge_cells('A1:F1')
+                akis = excel_akisi(
+                    ['Zimmet No', 'Personel', 'Zimmet Tarihi', 'Ürün Sayısı', 'Toplam Miktar', 'Durum'],
+                    [12, 25, 18, 12, 14, 14], 'FFC000'
+                )
                 
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=row_num, column=col, value=header)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid")
+                # Ürün sayısı ve toplam miktar zimmet başına tek seferde toplanır
+                detay_ozeti = db.session.query(
+                    PersonelZimmetDetay.zimmet_id,
+                    func.count(PersonelZimmetDetay.id).label('urun_sayisi'),
+                    func.sum(PersonelZimmetDetay.miktar).label('toplam_miktar')
+                ).group_by(PersonelZimmetDetay.zimmet_id).subquery()
                 
-                query = PersonelZimmet.query
+                query = db.session.query(
+                    PersonelZimmet.id,
+                    PersonelZimmet.zimmet_tarihi,
+                    PersonelZimmet.durum,
+                    Kullanici.ad,
+                    Kullanici.soyad,
+                    func.coalesce(detay_ozeti.c.urun_sayisi, 0).label('urun_sayisi'),
+                    func.coalesce(detay_ozeti.c.toplam_miktar, 0).label('toplam_miktar')
+                ).join(
+                    Kullanici, PersonelZimmet.personel_id == Kullanici.id
+                ).outerjoin(
+                    detay_ozeti, detay_ozeti.c.zimmet_id == PersonelZimmet.id
+                )
                 
                 if baslangic_tarihi:
                     baslangic = datetime.strptime(baslangic_tarihi, '%Y-%m-%d')
@@ -480,41 +520,45 @@ def register_rapor_export_routes(app):
                     query = query.filter(PersonelZimmet.zimmet_tarihi < bitis)
                 
                 if personel_id:
-                    query = query.filter_by(personel_id=personel_id)
+                    query = query.filter(PersonelZimmet.personel_id == personel_id)
                 
-                zimmetler = query.order_by(PersonelZimmet.zimmet_tarihi.desc()).all()
+                query = query.order_by(PersonelZimmet.zimmet_tarihi.desc()).execution_options(yield_per=EXCEL_PARTI)
                 
-                for zimmet in zimmetler:
-                    row_num += 1
-                    toplam_miktar = sum(d.miktar for d in zimmet.detaylar)
-                    
-                    ws.cell(row=row_num, column=1, value=f"#{zimmet.id}")
-                    ws.cell(row=row_num, column=2, value=f"{zimmet.personel.ad} {zimmet.personel.soyad}")
-                    ws.cell(row=row_num, column=3, value=zimmet.zimmet_tarihi.strftime('%d.%m.%Y %H:%M'))
-                    ws.cell(row=row_num, column=4, value=len(zimmet.detaylar))
-                    ws.cell(row=row_num, column=5, value=toplam_miktar)
-                    ws.cell(row=row_num, column=6, value=zimmet.durum.upper())
+                satirlar = (
+                    (
+                        f"#{zimmet.id}",
+                        f"{zimmet.ad} {zimmet.soyad}",
+                        zimmet.zimmet_tarihi.strftime('%d.%m.%Y %H:%M'),
+                        zimmet.urun_sayisi,
+                        zimmet.toplam_miktar,
+                        zimmet.durum.upper()
+                    )
+                    for zimmet in query
+                )
             
             elif rapor_tipi == 'zimmet_detay':
-                headers = ['Zimmet No', 'Personel', 'Zimmet Tarihi', 'Ürün Adı', 'Grup', 'Miktar', 'Durum']
-                ws.merge_cells('A1:G1')
-                
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=row_num, column=col, value=header)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="C55A11", end_color="C55A11", fill_type="solid")
+                akis = excel_akisi(
+                    ['Zimmet No', 'Personel', 'Zimmet Tarihi', 'Ürün Adı', 'Grup', 'Miktar', 'Durum'],
+                    [12, 25, 18, 35, 25, 10, 14], 'C55A11'
+                )
                 
                 query = db.session.query(
-                    PersonelZimmetDetay,
-                    PersonelZimmet,
-                    Kullanici,
-                    Urun
-                ).join(
+                    PersonelZimmet.id.label('zimmet_id'),
+                    PersonelZimmet.zimmet_tarihi,
+                    PersonelZimmet.durum,
+                    Kullanici.ad,
+                    Kullanici.soyad,
+                    Urun.urun_adi,
+                    UrunGrup.grup_adi,
+                    PersonelZimmetDetay.miktar
+                ).select_from(PersonelZimmetDetay).join(
                     PersonelZimmet, PersonelZimmetDetay.zimmet_id == PersonelZimmet.id
                 ).join(
                     Kullanici, PersonelZimmet.personel_id == Kullanici.id
                 ).join(
                     Urun, PersonelZimmetDetay.urun_id == Urun.id
+                ).outerjoin(
+                    UrunGrup, Urun.grup_id == UrunGrup.id
                 )
                 
                 if baslangic_tarihi:
@@ -533,27 +577,26 @@ def register_rapor_export_routes(app):
                 elif urun_grup_id:
                     query = query.filter(Urun.grup_id == urun_grup_id)
                 
-                detaylar = query.order_by(PersonelZimmet.zimmet_tarihi.desc()).all()
-                
-                for detay, zimmet, kullanici, urun in detaylar:
-                    row_num += 1
-                    
-                    ws.cell(row=row_num, column=1, value=f"#{zimmet.id}")
-                    ws.cell(row=row_num, column=2, value=f"{kullanici.ad} {kullanici.soyad}")
-                    ws.cell(row=row_num, column=3, value=zimmet.zimmet_tarihi.strftime('%d.%m.%Y %H:%M'))
-                    ws.cell(row=row_num, column=4, value=urun.urun_adi)
-                    ws.cell(row=row_num, column=5, value=urun.grup.grup_adi)
-                    ws.cell(row=row_num, column=6, value=detay.miktar)
-                    ws.cell(row=row_num, column=7, value=zimmet.durum.upper())
+                query = query.order_by(PersonelZimmet.zimmet_tarihi.desc()).execution_options(yield_per=EXCEL_PARTI)
+                
+                satirlar = (
+                    (
+                        f"#{detay.zimmet_id}",
+                        f"{detay.ad} {detay.soyad}",
+                        detay.zimmet_tarihi.strftime('%d.%m.%Y %H:%M'),
+                        detay.urun_adi,
+                        detay.grup_adi,
+                        detay.miktar,
+                        detay.durum.upper()
+                    )
+                    for detay in query
+                )
             
             elif rapor_tipi == 'urun_grup':
-                headers = ['Ürün Grubu', 'Toplam Ürün', 'Kritik Stoklu Ürün']
-                ws.merge_cells('A1:C1')
-                
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=row_num, column=col, value=header)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="5B9BD5", end_color="5B9BD5", fill_type="solid")
+                akis = excel_akisi(
+                    ['Ürün Grubu', 'Toplam Ürün', 'Kritik Stoklu Ürün'],
+                    [30, 13, 20], '5B9BD5'
+                )
                 
                 gruplar = UrunGrup.query.filter_by(aktif=True).all()
                 aktif_urunler = Urun.query.filter_by(aktif=True).all()
@@ -562,43 +605,23 @@ def register_rapor_export_routes(app):
                 for urun in aktif_urunler:
                     urun_gruplari_map.setdefault(urun.grup_id, []).append(urun)
                 
-                for grup in gruplar:
-                    row_num += 1
-                    grup_urunleri = urun_gruplari_map.get(grup.id, [])
-                    toplam_urun_sayisi = len(grup_urunleri)
-                    kritik_urun_sayisi = 0
-                    
-                    for urun in grup_urunleri:
-                        mevcut_stok = stok_map.get(urun.id, 0)
-                        kritik_seviye = urun.kritik_stok_seviyesi or 0
-                        if mevcut_stok <= kritik_seviye:
-                            kritik_urun_sayisi += 1
-                    
-                    ws.cell(row=row_num, column=1, value=grup.grup_adi)
-                    ws.cell(row=row_num, column=2, value=toplam_urun_sayisi)
-                    ws.cell(row=row_num, column=3, value=kritik_urun_sayisi)
-            
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except Exception:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
-            response = make_response(output.getvalue())
-            response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            response.headers['Content-Disposition'] = f'attachment; filename={rapor_tipi}_raporu_{get_kktc_now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-            
-            return response
+                def satirlar_uret():
+                    for grup in gruplar:
+                        grup_urunleri = urun_gruplari_map.get(grup.id, [])
+                        kritik_urun_sayisi = 0
+                        
+                        for urun in grup_urunleri:
+                            mevcut_stok = stok_map.get(urun.id, 0)
+                            kritik_seviye = urun.kritik_stok_seviyesi or 0
+                            if mevcut_stok <= kritik_seviye:
+                                kritik_urun_sayisi += 1
+                        
+                        yield (grup.grup_adi, len(grup_urunleri), kritik_urun_sayisi)
+                
+                satirlar = satirlar_uret()
+            
+            dosya_adi = f'{rapor_tipi}_raporu_{get_kktc_now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+            return excel_yaniti(akis, satirlar, dosya_adi, modul='excel_export')
             
         except Exception as e:
             flash(f'Excel export hatası: {str(e)}', 'danger')
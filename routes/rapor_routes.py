@@ -25,11 +25,15 @@ from models import db, Otel, Kat, Oda, Urun, StokHareket, MinibarIslem, MinibarI
 from utils.decorators import login_required, role_required
 from utils.helpers import log_islem, log_hata, get_excluded_user_ids, EXCLUDED_USERNAMES
 from utils.authorization import get_kullanici_otelleri
+from utils.excel_akisi import ExcelAkisi, excel_yaniti
 import pytz
 
 # KKTC Timezone
 KKTC_TZ = pytz.timezone('Europe/Nicosia')
 
+# Excel export'larında server-side cursor'dan tek seferde okunan satır sayısı
+EXCEL_PARTI = 1000
+
 def get_kktc_now():
     """Kıbrıs saat diliminde şu anki zamanı döndürür."""
     return datetime.now(KKTC_TZ)
@@ -493,39 +497,19 @@ def stok_hareketleri_raporu_olustur():
 @login_required
 @role_required('sistem_yoneticisi', 'admin')
 def stok_excel():
-    """Stok raporu Excel export"""
+    """Stok raporu Excel export (satırlar server-side cursor'dan akıtılır)"""
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill
-        
         tip = request.args.get('tip', 'mevcut')
         otel_id = request.args.get('otel_id', type=int)
         
-        wb = Workbook()
-        ws = wb.active
-        
         if tip == 'mevcut':
             # Mevcut stok durumu
-            ws.title = "Mevcut Stok"
-            
-            # Başlık
-            ws.merge_cells('A1:F1')
-            ws['A1'] = 'Mevcut Stok Durumu'
-            ws['A1'].font = Font(size=16, bold=True)
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            ws.merge_cells('A2:F2')
-            ws['A2'] = f'Rapor Tarihi: {get_kktc_now().strftime("%d.%m.%Y %H:%M")}'
-            ws['A2'].alignment = Alignment(horizontal='center')
-            
-            # Tablo başlıkları
-            headers = ['Otel', 'Ürün Adı', 'Barkod', 'Mevcut Stok', 'Birim', 'Durum']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=4, column=col)
-                cell.value = header
-                cell.font = Font(bold=True, color='FFFFFF')
-                cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-                cell.alignment = Alignment(horizontal='center')
+            akis = ExcelAkisi(
+                'Mevcut Stok', 'Mevcut Stok Durumu',
+                ['Otel', 'Ürün Adı', 'Barkod', 'Mevcut Stok', 'Birim', 'Durum'],
+                genislikler=[15, 20, 25, 12, 10, 30],
+                alt_baslik=f'Rapor Tarihi: {get_kktc_now().strftime("%d.%m.%Y %H:%M")}'
+            )
             
             # Veriler - Kat sorumlusunun zimmetindeki kalan stoklar
             query = db.session.query(
@@ -546,36 +530,27 @@ def stok_excel():
             if otel_id:
                 query = query.filter(Kullanici.otel_id == otel_id)
             
-            urunler = query.group_by(Otel.ad, Urun.urun_adi, Urun.barkod, Urun.birim)\
-                          .order_by(Otel.ad, Urun.urun_adi).all()
+            query = query.group_by(Otel.ad, Urun.urun_adi, Urun.barkod, Urun.birim)\
+                         .order_by(Otel.ad, Urun.urun_adi)\
+                         .execution_options(yield_per=EXCEL_PARTI)
             
-            row = 5
-            for urun in urunler:
-                ws.cell(row=row, column=1, value=urun.otel_ad)
-                ws.cell(row=row, column=2, value=urun.urun_ad)
-                ws.cell(row=row, column=3, value=urun.barkod)
-                ws.cell(row=row, column=4, value=urun.stok_miktari)
-                ws.cell(row=row, column=5, value=urun.birim)
-                
-                # Durum
-                if urun.stok_miktari <= 0:
-                    durum = 'Tükendi'
-                elif urun.stok_miktari < 10:
-                    durum = 'Kritik'
-                elif urun.stok_miktari < 50:
-                    durum = 'Düşük'
-                else:
-                    durum = 'Normal'
-                ws.cell(row=row, column=6, value=durum)
-                
-                row += 1
+            def satirlar():
+                for urun in query:
+                    # Durum
+                    if urun.stok_miktari <= 0:
+                        durum = 'Tükendi'
+                    elif urun.stok_miktari < 10:
+                        durum = 'Kritik'
+                    elif urun.stok_miktari < 50:
+                        durum = 'Düşük'
+                    else:
+                        durum = 'Normal'
+                    yield (urun.otel_ad, urun.urun_ad, urun.barkod, urun.stok_miktari, urun.birim, durum)
             
             filename = f'mevcut_stok_{get_kktc_now().strftime("%Y%m%d_%H%M")}.xlsx'
             
         else:
             # Stok hareketleri
-            ws.title = "Stok Hareketleri"
-            
             baslangic = request.args.get('baslangic')
             bitis = request.args.get('bitis')
             
@@ -586,24 +561,12 @@ def stok_excel():
             baslangic_tarih = datetime.strptime(baslangic, '%Y-%m-%d')
             bitis_tarih = datetime.strptime(bitis, '%Y-%m-%d')
             
-            # Başlık
-            ws.merge_cells('A1:G1')
-            ws['A1'] = 'Stok Hareketleri Raporu'
-            ws['A1'].font = Font(size=16, bold=True)
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            ws.merge_cells('A2:G2')
-            ws['A2'] = f'{baslangic_tarih.strftime("%d.%m.%Y")} - {bitis_tarih.strftime("%d.%m.%Y")}'
-            ws['A2'].alignment = Alignment(horizontal='center')
-            
-            # Tablo başlıkları
-            headers = ['Tarih', 'Otel', 'Ürün', 'İşlem Tipi', 'Miktar', 'Açıklama', 'Kullanıcı']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=4, column=col)
-                cell.value = header
-                cell.font = Font(bold=True, color='FFFFFF')
-                cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-                cell.alignment = Alignment(horizontal='center')
+            akis = ExcelAkisi(
+                'Stok Hareketleri', 'Stok Hareketleri Raporu',
+                ['Tarih', 'Otel', 'Ürün', 'İşlem Tipi', 'Miktar', 'Açıklama', 'Kullanıcı'],
+                genislikler=[15, 20, 25, 12, 10, 30, 20],
+                alt_baslik=f'{baslangic_tarih.strftime("%d.%m.%Y")} - {bitis_tarih.strftime("%d.%m.%Y")}'
+            )
             
             # Veriler
             query = db.session.query(
@@ -627,44 +590,25 @@ def stok_excel():
             if otel_id:
                 query = query.filter(Kullanici.otel_id == otel_id)
             
-            hareketler = query.order_by(StokHareket.islem_tarihi.desc()).all()
+            query = query.order_by(StokHareket.islem_tarihi.desc()).execution_options(yield_per=EXCEL_PARTI)
             
-            row = 5
-            for hareket in hareketler:
-                ws.cell(row=row, column=1, value=hareket.islem_tarihi.strftime('%d.%m.%Y %H:%M'))
-                ws.cell(row=row, column=2, value=hareket.otel_ad)
-                ws.cell(row=row, column=3, value=hareket.urun_ad)
-                ws.cell(row=row, column=4, value=hareket.hareket_tipi.upper())
-                ws.cell(row=row, column=5, value=hareket.miktar)
-                ws.cell(row=row, column=6, value=hareket.aciklama or '')
-                ws.cell(row=row, column=7, value=f'{hareket.kullanici_ad} {hareket.kullanici_soyad}')
-                row += 1
+            def satirlar():
+                for hareket in query:
+                    yield (
+                        hareket.islem_tarihi.strftime('%d.%m.%Y %H:%M'),
+                        hareket.otel_ad,
+                        hareket.urun_ad,
+                        hareket.hareket_tipi.upper(),
+                        hareket.miktar,
+                        hareket.aciklama or '',
+                        f'{hareket.kullanici_ad} {hareket.kullanici_soyad}'
+                    )
             
             filename = f'stok_hareketleri_{baslangic}_{bitis}.xlsx'
         
-        # Sütun genişlikleri
-        ws.column_dimensions['A'].width = 15
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 25
-        ws.column_dimensions['D'].width = 12
-        ws.column_dimensions['E'].width = 10
-        ws.column_dimensions['F'].width = 30
-        if tip == 'hareketler':
-            ws.column_dimensions['G'].width = 20
-        
-        # Excel'i memory'ye kaydet
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
-        
         log_islem('export', 'stok_raporu', {'tip': tip, 'otel_id': otel_id})
         
-        return send_file(
-            excel_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        return excel_yaniti(akis, satirlar(), filename, modul='stok_excel')
         
     except Exception as e:
         log_hata(e, modul='stok_excel')
@@ -834,9 +778,6 @@ def minibar_ozet_raporu_olustur():
 @role_required('sistem_yoneticisi', 'admin')
 def minibar_excel():
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill
-        
         otel_id = request.args.get('otel_id', type=int)
         baslangic = request.args.get('baslangic')
         bitis = request.args.get('bitis')
@@ -854,28 +795,14 @@ def minibar_excel():
             flash('Otel bulunamadı.', 'danger')
             return redirect(url_for('raporlar.minibar_raporlari'))
         
-        wb = Workbook()
-        ws = wb.active
+        tarih_str = f'{baslangic_tarih.strftime("%d.%m.%Y")} - {bitis_tarih.strftime("%d.%m.%Y")}'
         
         if tip == 'detayli':
-            ws.title = 'Minibar Detay'
-            ws.merge_cells('A1:H1')
-            ws['A1'] = f'{otel.ad} - Minibar İşlemleri Detay Raporu'
-            ws['A1'].font = Font(size=16, bold=True)
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            ws.merge_cells('A2:H2')
-            tarih_str = f'{baslangic_tarih.strftime("%d.%m.%Y")} - {bitis_tarih.strftime("%d.%m.%Y")}'
-            ws['A2'] = tarih_str
-            ws['A2'].alignment = Alignment(horizontal='center')
-            
-            headers = ['Tarih', 'Oda', 'Ürün', 'Tüketim', 'Personel']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=4, column=col)
-                cell.value = header
-                cell.font = Font(bold=True, color='FFFFFF')
-                cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-                cell.alignment = Alignment(horizontal='center')
+            akis = ExcelAkisi(
+                'Minibar Detay', f'{otel.ad} - Minibar İşlemleri Detay Raporu',
+                ['Tarih', 'Oda', 'Ürün', 'Tüketim', 'Personel'],
+                genislikler=[15] * 5, alt_baslik=tarih_str
+            )
             
             query = db.session.query(
                 MinibarIslem.islem_tarihi,
@@ -894,40 +821,27 @@ def minibar_excel():
                 MinibarIslem.islem_tarihi >= baslangic_tarih,
                 MinibarIslem.islem_tarihi <= bitis_tarih,
                 ~MinibarIslem.personel_id.in_(get_excluded_user_ids())
-            ).order_by(MinibarIslem.islem_tarihi.desc())
-            
-            islemler = query.all()
+            ).order_by(MinibarIslem.islem_tarihi.desc())\
+             .execution_options(yield_per=EXCEL_PARTI)
             
-            row = 5
-            for islem in islemler:
-                ws.cell(row=row, column=1, value=islem.islem_tarihi.strftime('%d.%m.%Y %H:%M'))
-                ws.cell(row=row, column=2, value=islem.oda_no)
-                ws.cell(row=row, column=3, value=islem.urun_ad)
-                ws.cell(row=row, column=4, value=islem.tuketim)
-                ws.cell(row=row, column=5, value=f'{islem.personel_ad} {islem.personel_soyad}')
-                row += 1
+            def satirlar():
+                for islem in query:
+                    yield (
+                        islem.islem_tarihi.strftime('%d.%m.%Y %H:%M'),
+                        islem.oda_no,
+                        islem.urun_ad,
+                        islem.tuketim,
+                        f'{islem.personel_ad} {islem.personel_soyad}'
+                    )
             
             filename = f'minibar_detay_{otel.ad}_{baslangic}_{bitis}.xlsx'
             
         else:
-            ws.title = 'Minibar Özet'
-            ws.merge_cells('A1:E1')
-            ws['A1'] = f'{otel.ad} - Minibar Özet Raporu'
-            ws['A1'].font = Font(size=16, bold=True)
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            ws.merge_cells('A2:E2')
-            tarih_str = f'{baslangic_tarih.strftime("%d.%m.%Y")} - {bitis_tarih.strftime("%d.%m.%Y")}'
-            ws['A2'] = tarih_str
-            ws['A2'].alignment = Alignment(horizontal='center')
-            
-            headers = ['Ürün', 'Toplam Tüketim', 'Birim']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=4, column=col)
-                cell.value = header
-                cell.font = Font(bold=True, color='FFFFFF')
-                cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-                cell.alignment = Alignment(horizontal='center')
+            akis = ExcelAkisi(
+                'Minibar Özet', f'{otel.ad} - Minibar Özet Raporu',
+                ['Ürün', 'Toplam Tüketim', 'Birim'],
+                genislikler=[15] * 3, alt_baslik=tarih_str
+            )
             
             query = db.session.query(
                 Urun.urun_adi.label('urun_ad'),
@@ -943,30 +857,18 @@ def minibar_excel():
                 MinibarIslem.islem_tarihi <= bitis_tarih,
                 ~MinibarIslem.personel_id.in_(get_excluded_user_ids())
             ).group_by(Urun.urun_adi, Urun.birim)\
-             .order_by(func.sum(MinibarIslemDetay.tuketim).desc())
+             .order_by(func.sum(MinibarIslemDetay.tuketim).desc())\
+             .execution_options(yield_per=EXCEL_PARTI)
             
-            urunler = query.all()
-            
-            row = 5
-            for urun in urunler:
-                ws.cell(row=row, column=1, value=urun.urun_ad)
-                ws.cell(row=row, column=2, value=urun.toplam_miktar)
-                ws.cell(row=row, column=3, value=urun.birim)
-                row += 1
+            def satirlar():
+                for urun in query:
+                    yield (urun.urun_ad, urun.toplam_miktar, urun.birim)
             
             filename = f'minibar_ozet_{otel.ad}_{baslangic}_{bitis}.xlsx'
         
-        for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']:
-            ws.column_dimensions[col].width = 15
-        
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
-        
         log_islem('export', 'minibar_raporu', {'otel_id': otel_id, 'tip': tip})
         
-        return send_file(excel_buffer, as_attachment=True, download_name=filename,
-                        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        return excel_yaniti(akis, satirlar(), filename, modul='minibar_excel')
         
     except Exception as e:
         log_hata(e, modul='minibar_excel')
@@ -1058,36 +960,17 @@ def zimmet_raporu_olustur():
 @login_required
 @role_required('sistem_yoneticisi', 'admin')
 def zimmet_excel():
-    """Zimmet raporu Excel export"""
+    """Zimmet raporu Excel export (satırlar server-side cursor'dan akıtılır)"""
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill
-        
         personel_id = request.args.get('personel_id', type=int)
         durum = request.args.get('durum', 'aktif')
         
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Zimmet Raporu"
-        
-        # Başlık
-        ws.merge_cells('A1:G1')
-        ws['A1'] = 'Personel Zimmet Raporu'
-        ws['A1'].font = Font(size=16, bold=True)
-        ws['A1'].alignment = Alignment(horizontal='center')
-        
-        ws.merge_cells('A2:G2')
-        ws['A2'] = f'Rapor Tarihi: {datetime.now().strftime("%d.%m.%Y %H:%M")}'
-        ws['A2'].alignment = Alignment(horizontal='center')
-        
-        # Tablo başlıkları
-        headers = ['Personel', 'Otel', 'Ürün', 'Miktar', 'Zimmet Tarihi', 'İade Tarihi', 'Durum']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=4, column=col)
-            cell.value = header
-            cell.font = Font(bold=True, color='FFFFFF')
-            cell.fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center')
+        akis = ExcelAkisi(
+            'Zimmet Raporu', 'Personel Zimmet Raporu',
+            ['Personel', 'Otel', 'Ürün', 'Miktar', 'Zimmet Tarihi', 'İade Tarihi', 'Durum'],
+            genislikler=[20, 20, 25, 10, 15, 15, 15],
+            alt_baslik=f'Rapor Tarihi: {datetime.now().strftime("%d.%m.%Y %H:%M")}'
+        )
         
         # Veriler
         query = db.session.query(
@@ -1113,43 +996,25 @@ def zimmet_excel():
         elif durum == 'iade':
             query = query.filter(PersonelZimmet.durum == 'iade_edildi')
         
-        zimmetler = query.order_by(PersonelZimmet.zimmet_tarihi.desc()).all()
+        query = query.order_by(PersonelZimmet.zimmet_tarihi.desc()).execution_options(yield_per=EXCEL_PARTI)
         
-        row = 5
-        for zimmet in zimmetler:
-            ws.cell(row=row, column=1, value=f'{zimmet.personel_ad} {zimmet.personel_soyad}')
-            ws.cell(row=row, column=2, value=zimmet.otel_ad)
-            ws.cell(row=row, column=3, value=zimmet.urun_ad)
-            ws.cell(row=row, column=4, value=zimmet.miktar)
-            ws.cell(row=row, column=5, value=zimmet.zimmet_tarihi.strftime('%d.%m.%Y'))
-            ws.cell(row=row, column=6, value=zimmet.iade_tarihi.strftime('%d.%m.%Y') if zimmet.iade_tarihi else '-')
-            ws.cell(row=row, column=7, value=zimmet.durum.upper())
-            row += 1
-        
-        # Sütun genişlikleri
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 25
-        ws.column_dimensions['D'].width = 10
-        ws.column_dimensions['E'].width = 15
-        ws.column_dimensions['F'].width = 15
-        ws.column_dimensions['G'].width = 15
-        
-        # Excel'i memory'ye kaydet
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
+        def satirlar():
+            for zimmet in query:
+                yield (
+                    f'{zimmet.personel_ad} {zimmet.personel_soyad}',
+                    zimmet.otel_ad,
+                    zimmet.urun_ad,
+                    zimmet.miktar,
+                    zimmet.zimmet_tarihi.strftime('%d.%m.%Y'),
+                    zimmet.iade_tarihi.strftime('%d.%m.%Y') if zimmet.iade_tarihi else '-',
+                    zimmet.durum.upper()
+                )
         
         filename = f'zimmet_raporu_{get_kktc_now().strftime("%Y%m%d_%H%M")}.xlsx'
         
         log_islem('export', 'zimmet_raporu', {'personel_id': personel_id, 'durum': durum})
         
-        return send_file(
-            excel_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        return excel_yaniti(akis, satirlar(), filename, modul='zimmet_excel')
         
     except Exception as e:
         log_hata(e, modul='zimmet_excel')
@@ -9,7 +9,7 @@ import time
 import logging
 import psutil
 from datetime import datetime, timedelta
-from flask import render_template, jsonify, request
+from flask import render_template, jsonify, request, current_app, Response
 from models import db
 from sqlalchemy import text
 from utils.decorators import login_required, role_required
@@ -141,6 +141,87 @@ def register_system_monitor_routes(app):
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 500
 
+    @app.route('/api/system-monitor/query-budget')
+    @login_required
+    @role_required('superadmin')
+    def api_system_query_budget():
+        """SQL bütçesini aşan endpoint'ler ve tekrar eden (N+1) sorguları"""
+        try:
+            limit = min(int(request.args.get('limit', 20)), 100)
+            return jsonify({
+                'success': True,
+                'data': APIMetrics.get_query_budget_report(limit=limit),
+                'budget': {
+                    'max_queries': current_app.config.get('SQL_BUTCE_MAX_SORGU'),
+                    'max_repeat': current_app.config.get('SQL_BUTCE_MAX_TEKRAR')
+                }
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/api/system-monitor/query-stats')
+    @login_required
+    @role_required('superadmin')
+    def api_system_query_stats():
+        """Parmak izi bazında sorgu istatistikleri ve yavaş sorgular"""
+        try:
+            from utils.monitoring.query_analyzer import QueryAnalyzer
+
+            hours = min(int(request.args.get('hours', 24)), 24 * 30)
+            threshold = float(request.args.get('threshold', 1.0))
+            analyzer = QueryAnalyzer()
+            return jsonify({
+                'success': True,
+                'data': {
+                    'stats': analyzer.get_query_stats(hours=hours),
+                    'slow_queries': analyzer.get_slow_queries(threshold=threshold, limit=20, hours=hours)
+                }
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/api/system-monitor/profiler', methods=['GET', 'POST'])
+    @login_required
+    @role_required('superadmin')
+    def api_system_profiler():
+        """Sampling profiler durumu / açma-kapama (tüm worker'lar)"""
+        try:
+            from utils.monitoring.profiler import SamplingProfiler
+
+            if request.method == 'POST':
+                data = request.get_json(silent=True) or {}
+                hz = data.get('hz')
+                durum = SamplingProfiler.ayarla(
+                    aktif=bool(data.get('active')),
+                    hz=int(hz) if hz else None,
+                    sifirla=bool(data.get('reset'))
+                )
+            else:
+                durum = SamplingProfiler.durum()
+
+            limit = min(int(request.args.get('limit', 20)), 100)
+            return jsonify({'success': True, 'data': {**durum, 'summary': SamplingProfiler.ozet(limit=limit)}})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/api/system-monitor/profiler/folded')
+    @login_required
+    @role_required('superadmin')
+    def api_system_profiler_folded():
+        """Folded stack çıktısı (flamegraph.pl / speedscope)"""
+        try:
+            from utils.monitoring.profiler import SamplingProfiler
+
+            metin = SamplingProfiler.folded_metin(endpoint=request.args.get('endpoint') or None)
+            dosya_adi = f"profil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+            return Response(
+                metin,
+                mimetype='text/plain',
+                headers={'Content-Disposition': f'attachment; filename={dosya_adi}'}
+            )
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
     @app.route('/api/system-monitor/db-stats')
     @login_required
     @role_required('superadmin')
@@ -195,11 +195,11 @@ function topluQrOlustur(mod) {
     success: function (response) {
       if (response.success) {
         const data = response.data;
-        toastr.success(`${data.basarili} oda için QR kod oluşturuldu!`);
-        if (data.basarisiz > 0) {
-          toastr.warning(`${data.basarisiz} oda için hata oluştu`);
+        if (data.kuyrukta) {
+          topluQrDurumTakip(data.job_id);
+        } else {
+          topluQrSonucGoster(data);
         }
-        setTimeout(() => location.reload(), 2000);
       } else {
         toastr.error(response.message);
       }
@@ -214,6 +214,36 @@ function topluQrOlustur(mod) {
   });
 }
 
+// Toplu QR sonucu
+function topluQrSonucGoster(data) {
+  toastr.success(`${data.basarili} oda için QR kod oluşturuldu!`);
+  if (data.basarisiz > 0) {
+    toastr.warning(`${data.basarisiz} oda için hata oluştu`);
+  }
+  setTimeout(() => location.reload(), 2000);
+}
+
+// Arka plandaki toplu QR işini tamamlanana kadar takip et
+function topluQrDurumTakip(jobId) {
+  $.ajax({
+    url: `/admin/toplu-qr-durum/${jobId}`,
+    method: "GET",
+    success: function (response) {
+      const data = response.data;
+      if (data.job_durum === "completed") {
+        topluQrSonucGoster(data);
+      } else if (data.job_durum === "failed") {
+        toastr.error(data.hata || "Toplu QR oluşturma başarısız");
+      } else {
+        setTimeout(() => topluQrDurumTakip(jobId), 1500);
+      }
+    },
+    error: function () {
+      toastr.error("Toplu QR durumu alınamadı");
+    },
+  });
+}
+
 // Toplu QR İndir
 function topluQrIndir() {
   window.location.href = "/admin/toplu-qr-indir";
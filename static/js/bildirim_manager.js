@@ -2,7 +2,7 @@
  * Bildirim Manager - Real-time bildirim yönetimi
  *
  * Özellikler:
- * - Polling ile yeni bildirimleri kontrol et
+ * - SSE (EventSource) ile push bildirimleri al, olmazsa polling'e düş
  * - Toast bildirimleri göster
  * - Bildirim sayacını güncelle
  * - Bildirim dropdown/panel yönetimi
@@ -14,36 +14,42 @@ class BildirimManager {
     this.maxToasts = options.maxToasts || 3;
     this.toastDuration = options.toastDuration || 5000;
 
+    this.sseYenidenDeneme = options.sseYenidenDeneme || 300000; // 5 dakika
+
     this.sonKontrol = null;
+    this.sonId = 0;
     this.pollTimer = null;
+    this.eventSource = null;
+    this.sseTimer = null;
     this.bildirimler = [];
     this.okunmamisSayisi = 0;
 
     this.init();
   }
 
-  init() {
-    // İlk yükleme
-    this.bildirimleriYukle();
-
-    // Polling başlat
-    this.pollBaslat();
-
+  async init() {
     // Event listener'ları ekle
     this.eventListenerEkle();
 
+    // İlk yükleme bitmeden bağlanılmaz: stream en yüksek yüklenen id'den başlar,
+    // yüklenmiş bildirimler tekrar toast'lanıp sayılmaz
+    await this.bildirimleriYukle();
+
+    // Stream (yoksa polling) başlat
+    this.baglan();
+
     document.addEventListener('visibilitychange', () => {
       if (document.hidden) {
-        this.pollDurdur();
+        this.baglantiKes();
       } else {
-        this.pollBaslat();
+        this.baglan();
       }
     });
 
     console.log("🔔 Bildirim Manager başlatıldı");
 
     window.addEventListener('beforeunload', () => {
-      this.pollDurdur();
+      this.baglantiKes();
       if (this._audioContext) {
         this._audioContext.close();
       }
@@ -80,6 +86,9 @@ class BildirimManager {
 
       if (data.success) {
         this.bildirimler = data.bildirimler;
+        this.bildirimler.forEach((b) => {
+          this.sonId = Math.max(this.sonId, b.id);
+        });
         this.okunmamisSayisi = data.okunmamis_sayisi;
         this.sayacGuncelle();
         this.panelGuncelle();
@@ -89,7 +98,60 @@ class BildirimManager {
     }
   }
 
+  baglan() {
+    this.baglantiKes();
+    if (window.EventSource) {
+      this.streamBaslat();
+    } else {
+      this.pollBaslat();
+    }
+  }
+
+  baglantiKes() {
+    this.streamDurdur();
+    this.pollDurdur();
+    if (this.sseTimer) {
+      clearTimeout(this.sseTimer);
+      this.sseTimer = null;
+    }
+  }
+
+  streamBaslat() {
+    // Yeniden bağlanmada tarayıcı Last-Event-ID gönderir, sunucu kaçanları tamamlar
+    this.eventSource = new EventSource(
+      `/api/bildirimler/stream?son_id=${this.sonId}`,
+    );
+
+    this.eventSource.addEventListener("bildirim", (e) => {
+      try {
+        this.yeniBildirimleriIsle([JSON.parse(e.data)], true);
+      } catch (error) {
+        console.error("Bildirim stream parse hatası:", error);
+      }
+    });
+
+    this.eventSource.onerror = () => {
+      // CLOSED: sunucu stream'i reddetti (503 vb.) → polling'e düş, sonra tekrar dene
+      if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+        this.streamDurdur();
+        this.pollBaslat();
+        this.sseTimer = setTimeout(() => {
+          this.sseTimer = null;
+          if (!document.hidden) this.baglan();
+        }, this.sseYenidenDeneme);
+      }
+    };
+  }
+
+  streamDurdur() {
+    if (this.eventSource) {
+      this.eventSource.close();
+      this.eventSource = null;
+    }
+  }
+
   pollBaslat() {
+    if (this.pollTimer) return;
     this.sonKontrol = new Date().toISOString();
 
     this.pollTimer = setInterval(async () => {
@@ -108,7 +170,7 @@ class BildirimManager {
     try {
       const url = `/api/bildirimler/poll?son_kontrol=${encodeURIComponent(
         this.sonKontrol,
-      )}`;
+      )}&son_id=${this.sonId}`;
       const response = await fetch(url);
       const data = await response.json();
 
@@ -117,19 +179,9 @@ class BildirimManager {
         this.okunmamisSayisi = data.okunmamis_sayisi;
         this.sayacGuncelle();
 
-        // Yeni bildirimler varsa toast göster
         if (data.yeni_bildirimler && data.yeni_bildirimler.length > 0) {
-          data.yeni_bildirimler.forEach((bildirim) => {
-            this.toastGoster(bildirim);
-            // Listeye ekle
-            this.bildirimler.unshift(bildirim);
-          });
-          this.panelGuncelle();
-
-          // Görev özeti güncelle (depo sorumlusu için)
-          if (typeof gorevOzetiGuncelle === "function") {
-            gorevOzetiGuncelle();
-          }
+          // Poll yeniden eskiye döner, eskiden yeniye işle
+          this.yeniBildirimleriIsle(data.yeni_bildirimler.slice().reverse(), false);
         }
       }
     } catch (error) {
@@ -137,6 +189,31 @@ class BildirimManager {
     }
   }
 
+  yeniBildirimleriIsle(bildirimler, sayacArtir) {
+    let eklenen = 0;
+    bildirimler.forEach((bildirim) => {
+      if (this.bildirimler.some((b) => b.id === bildirim.id)) return;
+      this.sonId = Math.max(this.sonId, bildirim.id);
+      // Toast göster ve listeye ekle
+      this.toastGoster(bildirim);
+      this.bildirimler.unshift(bildirim);
+      eklenen++;
+    });
+
+    if (eklenen === 0) return;
+
+    if (sayacArtir) {
+      this.okunmamisSayisi += eklenen;
+      this.sayacGuncelle();
+    }
+    this.panelGuncelle();
+
+    // Görev özeti güncelle (depo sorumlusu için)
+    if (typeof gorevOzetiGuncelle === "function") {
+      gorevOzetiGuncelle();
+    }
+  }
+
   sayacGuncelle() {
     const badge = document.getElementById("bildirim-sayac");
     if (badge) {
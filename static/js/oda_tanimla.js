@@ -686,24 +686,30 @@ function topluQrOlusturOnay(tip) {
     .then((response) => response.json())
     .then((data) => {
       if (data.success) {
-        // Başarı mesajı
-        if (typeof toastr !== "undefined") {
-          toastr.success(
-            `${data.olusturulan_adet} odaya QR kodu oluşturuldu!`,
-            "Başarılı",
-          );
-        }
-
-        // Sayfayı yenile
-        setTimeout(() => {
-          location.reload();
-        }, 1500);
+        // Üretim arka planda yapılır, bitene kadar durum takip edilir
+        return data.data.kuyrukta
+          ? topluQrTamamlanmasiniBekle(data.data.job_id)
+          : data.data;
       } else {
         throw new Error(
           data.message || "QR kodları oluşturulurken hata oluştu",
         );
       }
     })
+    .then((sonuc) => {
+      // Başarı mesajı
+      if (typeof toastr !== "undefined") {
+        toastr.success(
+          `${sonuc.basarili} odaya QR kodu oluşturuldu!`,
+          "Başarılı",
+        );
+      }
+
+      // Sayfayı yenile
+      setTimeout(() => {
+        location.reload();
+      }, 1500);
+    })
     .catch((error) => {
       console.error("Hata:", error);
       if (typeof toastr !== "undefined") {
@@ -714,6 +720,28 @@ function topluQrOlusturOnay(tip) {
     });
 }
 
+/**
+ * Toplu QR job'ı tamamlanana kadar durum endpoint'ini yokla
+ */
+function topluQrTamamlanmasiniBekle(jobId) {
+  return fetch(`/admin/toplu-qr-durum/${jobId}`)
+    .then((response) => response.json())
+    .then((data) => {
+      if (!data.success) {
+        throw new Error(data.message || "Toplu QR durumu alınamadı");
+      }
+      if (data.data.job_durum === "completed") {
+        return data.data;
+      }
+      if (data.data.job_durum === "failed") {
+        throw new Error(data.data.hata || "QR kodları oluşturulurken hata oluştu");
+      }
+      return new Promise((resolve) => setTimeout(resolve, 1500)).then(() =>
+        topluQrTamamlanmasiniBekle(jobId),
+      );
+    });
+}
+
 /**
  * Toplu QR indir
  */
@@ -43,7 +43,7 @@ async function refreshAll() {
   const icon = document.getElementById("refresh-icon");
   icon.classList.add("fa-spin");
   try {
-    await Promise.all([loadOverview(), loadEndpoints(), loadErrorLog(), loadDbStats()]);
+    await Promise.all([loadOverview(), loadEndpoints(), loadErrorLog(), loadDbStats(), loadProfiler()]);
   } catch (e) {
     console.error("Refresh error:", e);
   }
@@ -350,7 +350,7 @@ async function loadEndpoints() {
     const tbody = document.getElementById("ep-tbody");
     if (!json.data || json.data.length === 0) {
       tbody.innerHTML =
-        '<tr><td colspan="6" class="text-center text-slate-500 py-4">Henüz veri yok</td></tr>';
+        '<tr><td colspan="8" class="text-center text-slate-500 py-4">Henüz veri yok</td></tr>';
       return;
     }
 
@@ -376,12 +376,20 @@ async function loadEndpoints() {
                 : "#ef4444";
         const errColor =
           errRate > 5 ? "color:#ef4444" : errRate > 1 ? "color:#eab308" : "";
+        const dbMs = ((ep.avg_db_time || 0) * 1000).toFixed(0);
+        // SQL bütçesini aşan endpoint (çok sorgu veya olası N+1)
+        const budgetTitle = ep.budget_violations
+          ? `title="${ep.budget_violations} istek SQL bütçesini aştı (max ${ep.max_queries} sorgu)"`
+          : "";
+        const queryColor = ep.budget_violations ? "color:#f97316" : "";
         return `<tr>
         <td class="text-xs">${ep.endpoint || "-"}</td>
         <td>${ep.request_count || 0}</td>
         <td style="color:${barColor}">${avgMs}</td>
         <td>${p95Ms}</td>
         <td style="${errColor}">${errRate}%</td>
+        <td style="${queryColor}" ${budgetTitle}>${ep.avg_queries ?? 0}${ep.budget_violations ? " ⚠" : ""}</td>
+        <td>${dbMs}</td>
         <td><div class="ep-bar"><div class="ep-bar-fill" style="width:${barPct}%;background:${barColor}"></div></div></td>
       </tr>`;
       })
@@ -391,6 +399,69 @@ async function loadEndpoints() {
   }
 }
 
+// ---- Sampling Profiler ----
+let profilerActive = false;
+
+function renderProfiler(data) {
+  profilerActive = !!data.active;
+  const workers = Object.values(data.workers || {});
+  const overhead = workers.length
+    ? Math.max(...workers.map((w) => w.overhead_yuzde || 0))
+    : 0;
+  document.getElementById("prof-status").textContent = profilerActive
+    ? `Açık · ${data.hz} Hz · ${workers.length} worker · maks. %${overhead.toFixed(2)} yük`
+    : "Kapalı";
+  const btn = document.getElementById("prof-toggle");
+  btn.textContent = profilerActive ? "Durdur" : "Başlat";
+
+  const tbody = document.getElementById("prof-tbody");
+  const rows = (data.summary && data.summary.self) || [];
+  if (rows.length === 0) {
+    tbody.innerHTML =
+      '<tr><td colspan="3" class="text-center text-slate-500 py-4">Örnek yok</td></tr>';
+    return;
+  }
+  tbody.innerHTML = rows
+    .map(
+      (f) => `<tr>
+        <td class="text-xs">${escapeHtml(f.name)}</td>
+        <td>${f.samples}</td>
+        <td>${f.percent.toFixed(1)}%</td>
+      </tr>`,
+    )
+    .join("");
+}
+
+async function loadProfiler() {
+  try {
+    const res = await fetch("/api/system-monitor/profiler?limit=15");
+    const json = await res.json();
+    if (json.success) renderProfiler(json.data);
+  } catch (e) {
+    console.error("Profiler error:", e);
+  }
+}
+
+async function toggleProfiler() {
+  try {
+    const res = await fetch("/api/system-monitor/profiler?limit=15", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-CSRFToken": document.querySelector('meta[name="csrf-token"]')?.content || "",
+      },
+      body: JSON.stringify({
+        active: !profilerActive,
+        hz: parseInt(document.getElementById("prof-hz").value),
+      }),
+    });
+    const json = await res.json();
+    if (json.success) renderProfiler(json.data);
+  } catch (e) {
+    console.error("Profiler toggle error:", e);
+  }
+}
+
 // ---- Error Log ----
 async function loadErrorLog() {
   try {
@@ -0,0 +1,49 @@
+"""
+Excel İşleme Servisi - Standart format doğrulama testleri
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from utils.excel_service import ExcelProcessingService
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def _oku(dosya_adi):
+    df = pd.read_excel(os.path.join(DATA_DIR, dosya_adi), header=0, dtype=object)
+    headers = [
+        None if str(col).startswith('Unnamed:') else col
+        for col in df.columns
+    ]
+    return df, ExcelProcessingService._get_column_indices(headers)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('dosya_adi, dosya_tipi', [
+    ('test_inhouse_02012026.xlsx', 'in_house'),
+    ('test_arrivals_02012026.xlsx', 'arrivals'),
+    ('test_departures_02012026.xlsx', 'departures'),
+])
+def test_temiz_dosya_hata_uretmez(dosya_adi, dosya_tipi):
+    """Geçerli satırlar hata listesine ('Satır N: nan') düşmemeli"""
+    df, col_indices = _oku(dosya_adi)
+
+    gecerli, hatalar = ExcelProcessingService._prepare_standard_rows(df, col_indices, dosya_tipi)
+
+    assert hatalar == []
+    assert len(gecerli) == len(df)
+
+
+@pytest.mark.unit
+def test_hatali_satir_mesaji():
+    """Hatalı satır kendi mesajıyla, geçerli satırlar hatasız döner"""
+    df, col_indices = _oku('test_inhouse_02012026.xlsx')
+    df.iloc[0, col_indices['oda_no']] = None
+
+    gecerli, hatalar = ExcelProcessingService._prepare_standard_rows(df, col_indices, 'in_house')
+
+    assert hatalar == ['Satır 2: Oda numarası boş']
+    assert len(gecerli) == len(df) - 1
@@ -7,7 +7,9 @@ import json
 import logging
 from datetime import datetime
 from flask import request, session
-from models import db, AuditLog
+from sqlalchemy import inspect as sa_inspect
+from models import AuditLog, get_kktc_now
+from utils.log_tamponu import log_tamponu
 from functools import wraps
 
 logger = logging.getLogger(__name__)
@@ -65,8 +67,17 @@ def serialize_model(model_instance):
     if isinstance(model_instance, dict):
         return model_instance
     
+    # Yüklenmemiş deferred kolonlar (ör. Oda.qr_kod_gorsel) audit için sorgulanmaz
+    state = sa_inspect(model_instance)
+    atlanacak = {
+        prop.key for prop in state.mapper.column_attrs
+        if prop.deferred and prop.key in state.unloaded
+    }
+    
     result = {}
     for column in model_instance.__table__.columns:
+        if column.name in atlanacak:
+            continue
         value = getattr(model_instance, column.name)
         
         # DateTime objelerini string'e çevir
@@ -111,6 +122,40 @@ def create_change_summary(eski_deger, yeni_deger, tablo_adi):
     return "Değişiklik yok"
 
 
+def _audit_kaydet(kullanici_id, kullanici_adi, kullanici_rol, islem_tipi, tablo_adi,
+                  kayit_id=None, eski_deger=None, yeni_deger=None, degisiklik_ozeti=None,
+                  aciklama=None, basarili=True, hata_mesaji=None):
+    """
+    Audit kaydını log tamponuna ekler (arka planda toplu yazılır).
+    Tüm kolonlar her kayıtta verilir; toplu INSERT aynı anahtar setini bekler.
+    """
+    client_info = get_client_info()
+    
+    kayit = {
+        'kullanici_id': kullanici_id,
+        'kullanici_adi': kullanici_adi,
+        'kullanici_rol': kullanici_rol,
+        'islem_tipi': islem_tipi,
+        'tablo_adi': tablo_adi,
+        'kayit_id': kayit_id,
+        'eski_deger': eski_deger,
+        'yeni_deger': yeni_deger,
+        'degisiklik_ozeti': degisiklik_ozeti,
+        'http_method': client_info['method'],
+        'url': client_info['url'][:500] if client_info['url'] else None,
+        'endpoint': client_info['endpoint'],
+        'ip_adresi': client_info['ip'],
+        'user_agent': client_info['user_agent'][:500] if client_info['user_agent'] else None,
+        'islem_tarihi': get_kktc_now(),
+        'aciklama': aciklama,
+        'basarili': basarili,
+        'hata_mesaji': hata_mesaji
+    }
+    
+    log_tamponu.ekle(AuditLog.__table__, kayit)
+    return kayit
+
+
 def log_audit(
     islem_tipi,
     tablo_adi,
@@ -155,39 +200,21 @@ def log_audit(
         # Değişiklik özetini oluştur
         degisiklik_ozeti = create_change_summary(eski_deger_json, yeni_deger_json, tablo_adi)
         
-        # Audit log kaydı oluştur
-        audit = AuditLog(
-            kullanici_id=kullanici_id,
-            kullanici_adi=kullanici_adi,
-            kullanici_rol=kullanici_rol,
-            islem_tipi=islem_tipi,
-            tablo_adi=tablo_adi,
+        # Audit log kaydı tampona alınır (çağıranın session'ı commit edilmez)
+        return _audit_kaydet(
+            kullanici_id, kullanici_adi, kullanici_rol, islem_tipi, tablo_adi,
             kayit_id=kayit_id,
             eski_deger=eski_deger_json,
             yeni_deger=yeni_deger_json,
             degisiklik_ozeti=degisiklik_ozeti,
-            http_method=client_info['method'],
-            url=client_info['url'],
-            endpoint=client_info['endpoint'],
-            ip_adresi=client_info['ip'],
-            user_agent=client_info['user_agent'],
             aciklama=aciklama,
             basarili=basarili,
             hata_mesaji=hata_mesaji
         )
         
-        db.session.add(audit)
-        db.session.commit()
-        
-        return audit
-        
     except Exception as e:
         # Audit log hatası ana işlemi etkilememeli
         print(f"⚠️ Audit log hatası: {str(e)}")
-        try:
-            db.session.rollback()
-        except Exception:
-            pass
         return None
 
 
@@ -239,52 +266,24 @@ def audit_trail(islem_tipi, tablo_adi):
 
 def audit_login(kullanici_id, kullanici_adi, kullanici_rol, basarili=True, hata_mesaji=None):
     """Login işlemini logla"""
-    client_info = get_client_info()
-    
-    audit = AuditLog(
-        kullanici_id=kullanici_id,
-        kullanici_adi=kullanici_adi,
-        kullanici_rol=kullanici_rol,
-        islem_tipi='login',
-        tablo_adi='kullanicilar',
+    _audit_kaydet(
+        kullanici_id, kullanici_adi, kullanici_rol, 'login', 'kullanicilar',
         kayit_id=kullanici_id,
         degisiklik_ozeti='Kullanıcı sisteme giriş yaptı',
-        http_method=client_info['method'],
-        url=client_info['url'],
-        endpoint=client_info['endpoint'],
-        ip_adresi=client_info['ip'],
-        user_agent=client_info['user_agent'],
         basarili=basarili,
         hata_mesaji=hata_mesaji
     )
-    
-    db.session.add(audit)
-    db.session.commit()
 
 
 def audit_logout():
     """Logout işlemini logla"""
     kullanici_id, kullanici_adi, kullanici_rol = get_user_info()
-    client_info = get_client_info()
     
-    audit = AuditLog(
-        kullanici_id=kullanici_id,
-        kullanici_adi=kullanici_adi,
-        kullanici_rol=kullanici_rol,
-        islem_tipi='logout',
-        tablo_adi='kullanicilar',
+    _audit_kaydet(
+        kullanici_id, kullanici_adi, kullanici_rol, 'logout', 'kullanicilar',
         kayit_id=kullanici_id,
-        degisiklik_ozeti='Kullanıcı sistemden çıkış yaptı',
-        http_method=client_info['method'],
-        url=client_info['url'],
-        endpoint=client_info['endpoint'],
-        ip_adresi=client_info['ip'],
-        user_agent=client_info['user_agent'],
-        basarili=True
+        degisiklik_ozeti='Kullanıcı sistemden çıkış yaptı'
     )
-    
-    db.session.add(audit)
-    db.session.commit()
 
 
 def audit_create(tablo_adi, kayit_id, yeni_deger, aciklama=None):
@@ -6,13 +6,26 @@ Bu modül uygulama içi bildirimleri yönetir:
 - Bildirim okuma
 - Okundu işaretleme
 - SSE stream desteği
+
+Redis yayını:
+- bildirim_olustur commit sonrası bildirimi rol/otel/kullanıcı kanallarına
+  publish eder; SSE stream'i bu kanallara abone olur (DB polling yok)
+- Okunmamış bildirimler rol/otel/kullanıcı bazlı sorted set'lerde
+  (skor = oluşturma zamanı) tutulur; okunmamis_sayisi ve poll bu set'lerden
+  cevaplanır, DB sadece gerçekten yeni bildirim varsa okunur
+- Redis yoksa veya sayaçlar henüz kurulmadıysa eski SQL yoluna düşülür
 """
 
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
+import json
+import os
+import time
 import pytz
 import logging
 
+from flask import current_app, has_app_context
+
 from models import db
 
 KKTC_TZ = pytz.timezone('Europe/Nicosia')
@@ -22,6 +35,118 @@ def get_kktc_now():
     return datetime.now(KKTC_TZ)
 
 
+# Okunmamış set'lerinin tuttuğu pencere (SQL'deki INTERVAL '24 hours' ile aynı)
+OKUNMAMIS_PENCERE_SANIYE = 24 * 3600
+
+_KANAL_PREFIX = 'bildirim:kanal:'
+_OKUNMAMIS_PREFIX = 'bildirim:okunmamis:'
+_HAZIR_KEY = 'bildirim:okunmamis:hazir'
+_KURULUM_KILIT_KEY = 'bildirim:okunmamis:kurulum_kilidi'
+
+# Yeniden kurulumda DB okumasından bu kadar önce oluşturulan üyeler korunur:
+# okuma ile set'lerin değiştirilmesi arasında commit edilip ZADD'lenen
+# bildirimler snapshot'ta olmasa da kaybolmaz (saniye)
+_KURULUM_KORUMA_PAYI = 60
+
+_redis_client = None
+_redis_pid = None
+_redis_hata_zamani = 0.0
+
+
+def _ayar(anahtar, varsayilan):
+    if has_app_context():
+        return current_app.config.get(anahtar, varsayilan)
+    return varsayilan
+
+
+def bildirim_redis():
+    """
+    Bildirim yayını için process başına Redis client'ı döndürür.
+
+    Redis kapalıysa/ulaşılamıyorsa None döner; bağlantı hatasından sonra
+    30 sn boyunca tekrar denenmez (her istekte connect timeout ödememek için).
+    """
+    global _redis_client, _redis_pid, _redis_hata_zamani
+
+    if not _ayar('BILDIRIM_REDIS_ENABLED', True) or _ayar('TESTING', False):
+        return None
+
+    if _redis_client is not None and _redis_pid == os.getpid():
+        return _redis_client
+
+    if time.time() - _redis_hata_zamani < 30:
+        return None
+
+    try:
+        import redis
+
+        redis_url = _ayar('REDIS_URL', None) or _ayar('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+        client = redis.from_url(
+            redis_url,
+            socket_connect_timeout=2,
+            socket_timeout=5,
+            decode_responses=True
+        )
+        client.ping()
+        _redis_client = client
+        _redis_pid = os.getpid()
+        return _redis_client
+    except Exception as e:
+        _redis_hata_zamani = time.time()
+        logger.warning(f"⚠️ Bildirim Redis bağlantısı kurulamadı, DB moduna düşülüyor: {str(e)}")
+        return None
+
+
+def _redis_hatasi(e):
+    """Komut hatasında client'ı bırak; sonraki çağrı yeniden bağlanmayı dener"""
+    global _redis_client, _redis_hata_zamani
+    _redis_client = None
+    _redis_hata_zamani = time.time()
+    logger.warning(f"⚠️ Bildirim Redis hatası: {str(e)}")
+
+
+def _hedef_anahtarlari(hedef_rol, hedef_otel_id, hedef_kullanici_id):
+    """Bir bildirimin yer aldığı okunmamış set'leri"""
+    otel = hedef_otel_id or 0
+    anahtarlar = [
+        f"{_OKUNMAMIS_PREFIX}rol:{hedef_rol}:otel:{otel}",
+        f"{_OKUNMAMIS_PREFIX}rol:{hedef_rol}:tum",
+    ]
+    if hedef_kullanici_id:
+        anahtarlar += [
+            f"{_OKUNMAMIS_PREFIX}kullanici:{hedef_kullanici_id}:otel:{otel}",
+            f"{_OKUNMAMIS_PREFIX}kullanici:{hedef_kullanici_id}:tum",
+        ]
+    return anahtarlar
+
+
+def _kullanici_anahtarlari(kullanici_id, kullanici_rol, otel_id):
+    """
+    Bir kullanıcının gördüğü okunmamış set'leri.
+    SQL'deki (hedef_rol = rol OR hedef_kullanici_id = id)
+    AND (hedef_otel_id = otel OR hedef_otel_id IS NULL) filtresinin karşılığı.
+    """
+    if otel_id:
+        return [
+            f"{_OKUNMAMIS_PREFIX}rol:{kullanici_rol}:otel:{otel_id}",
+            f"{_OKUNMAMIS_PREFIX}rol:{kullanici_rol}:otel:0",
+            f"{_OKUNMAMIS_PREFIX}kullanici:{kullanici_id}:otel:{otel_id}",
+            f"{_OKUNMAMIS_PREFIX}kullanici:{kullanici_id}:otel:0",
+        ]
+    return [
+        f"{_OKUNMAMIS_PREFIX}rol:{kullanici_rol}:tum",
+        f"{_OKUNMAMIS_PREFIX}kullanici:{kullanici_id}:tum",
+    ]
+
+
+def _yayin_kanallari(hedef_rol, hedef_otel_id, hedef_kullanici_id):
+    """Bir bildirimin publish edildiği kanallar"""
+    kanallar = [f"{_KANAL_PREFIX}rol:{hedef_rol}:otel:{hedef_otel_id or 0}"]
+    if hedef_kullanici_id:
+        kanallar.append(f"{_KANAL_PREFIX}kullanici:{hedef_kullanici_id}")
+    return kanallar
+
+
 class BildirimTipi:
     """Bildirim tipleri"""
     GOREV_OLUSTURULDU = 'gorev_olusturuldu'
@@ -110,6 +235,7 @@ class BildirimService:
                 RETURNING id
             """
             
+            olusturma_tarihi = get_kktc_now()
             result = db.session.execute(
                 db.text(sql),
                 {
@@ -122,18 +248,158 @@ class BildirimService:
                     'oda_id': oda_id,
                     'gorev_id': gorev_id,
                     'gonderen_id': gonderen_id,
-                    'olusturma_tarihi': get_kktc_now()
+                    'olusturma_tarihi': olusturma_tarihi
                 }
             )
-            db.session.commit()
-            
             row = result.fetchone()
-            return row[0] if row else None
+            db.session.commit()
             
         except Exception as e:
             db.session.rollback()
             print(f"Bildirim oluşturma hatası: {e}")
             return None
+        
+        bildirim_id = row[0] if row else None
+        if bildirim_id:
+            # Commit sonrası: abonelere push + okunmamış set'lerine ekle
+            BildirimService._yayinla({
+                'id': bildirim_id,
+                'hedef_rol': hedef_rol,
+                'bildirim_tipi': bildirim_tipi,
+                'baslik': baslik,
+                'mesaj': mesaj,
+                'okundu': False,
+                'olusturma_tarihi': olusturma_tarihi.isoformat(),
+                'oda_id': oda_id,
+                'gorev_id': gorev_id,
+                'hedef_otel_id': hedef_otel_id,
+                'hedef_kullanici_id': hedef_kullanici_id
+            }, olusturma_tarihi.timestamp())
+        return bildirim_id
+    
+    @staticmethod
+    def _yayinla(bildirim: Dict[str, Any], skor: float) -> None:
+        """Bildirimi Redis kanallarına publish eder ve okunmamış set'lerine ekler"""
+        r = bildirim_redis()
+        if r is None:
+            return
+        
+        try:
+            hedef = (bildirim['hedef_rol'], bildirim['hedef_otel_id'], bildirim['hedef_kullanici_id'])
+            payload = json.dumps(bildirim, ensure_ascii=False)
+            
+            pipe = r.pipeline(transaction=False)
+            for anahtar in _hedef_anahtarlari(*hedef):
+                pipe.zadd(anahtar, {str(bildirim['id']): skor})
+                pipe.expire(anahtar, OKUNMAMIS_PENCERE_SANIYE + 3600)
+            for kanal in _yayin_kanallari(*hedef):
+                pipe.publish(kanal, payload)
+            pipe.execute()
+        except Exception as e:
+            _redis_hatasi(e)
+    
+    @staticmethod
+    def _okunmamislari_kaldir(satirlar) -> None:
+        """Okundu işaretlenen bildirimleri okunmamış set'lerinden çıkarır"""
+        if not satirlar:
+            return
+        r = bildirim_redis()
+        if r is None:
+            return
+        
+        try:
+            pipe = r.pipeline(transaction=False)
+            for row in satirlar:
+                for anahtar in _hedef_anahtarlari(row.hedef_rol, row.hedef_otel_id, row.hedef_kullanici_id):
+                    pipe.zrem(anahtar, str(row.id))
+            pipe.execute()
+        except Exception as e:
+            _redis_hatasi(e)
+    
+    @staticmethod
+    def _okunmamis_setlerini_kur(r) -> bool:
+        """
+        Okunmamış set'lerini DB'den yeniden kurar.
+        
+        İlk açılışta, Redis flush'ından sonra ve hazır işaretinin süresi
+        dolduğunda (BILDIRIM_SAYAC_YENILEME) çalışır; kaçan bir ZREM/ZADD
+        varsa bu şekilde kendiliğinden düzelir. Aynı anda tek process kurar.
+        
+        Set'ler silinip yeniden yazılmaz: snapshot başlangıcından
+        _KURULUM_KORUMA_PAYI öncesine kadarki üyeler budanır, snapshot eklenir.
+        Kurulum sırasında canlı ZADD ile gelen bildirimler korunur.
+        """
+        if not r.set(_KURULUM_KILIT_KEY, os.getpid(), nx=True, ex=60):
+            return False
+        
+        try:
+            budama_siniri = time.time() - _KURULUM_KORUMA_PAYI
+            result = db.session.execute(db.text("""
+                SELECT id, hedef_rol, hedef_otel_id, hedef_kullanici_id, olusturma_tarihi
+                FROM bildirimler
+                WHERE okundu = FALSE
+                AND olusturma_tarihi > NOW() - INTERVAL '24 hours'
+            """))
+            setler = {}
+            for row in result:
+                skor = row.olusturma_tarihi.timestamp()
+                for anahtar in _hedef_anahtarlari(row.hedef_rol, row.hedef_otel_id, row.hedef_kullanici_id):
+                    setler.setdefault(anahtar, {})[str(row.id)] = skor
+            
+            eski_anahtarlar = [
+                k for k in r.scan_iter(match=f"{_OKUNMAMIS_PREFIX}*", count=500)
+                if k not in (_HAZIR_KEY, _KURULUM_KILIT_KEY)
+            ]
+            
+            pipe = r.pipeline(transaction=True)
+            for anahtar in eski_anahtarlar:
+                pipe.zremrangebyscore(anahtar, '-inf', budama_siniri)
+            for anahtar, uyeler in setler.items():
+                pipe.zadd(anahtar, uyeler)
+                pipe.expire(anahtar, OKUNMAMIS_PENCERE_SANIYE + 3600)
+            pipe.set(_HAZIR_KEY, '1', ex=int(_ayar('BILDIRIM_SAYAC_YENILEME', 3600)))
+            pipe.execute()
+            
+            logger.info(f"🔔 Okunmamış bildirim set'leri kuruldu ({len(setler)} set)")
+            return True
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            r.delete(_KURULUM_KILIT_KEY)
+    
+    @staticmethod
+    def _okunmamis_idler(kullanici_id: int, kullanici_rol: str, otel_id: int = None) -> Optional[set]:
+        """
+        Kullanıcının son 24 saatteki okunmamış bildirim ID'leri (Redis'ten).
+        
+        Returns:
+            set[int] veya None (Redis yok / set'ler kurulamadı → SQL'e düş)
+        """
+        r = bildirim_redis()
+        if r is None:
+            return None
+        
+        try:
+            if not r.exists(_HAZIR_KEY) and not BildirimService._okunmamis_setlerini_kur(r):
+                return None
+            
+            anahtarlar = _kullanici_anahtarlari(kullanici_id, kullanici_rol, otel_id)
+            gecici = f"{_OKUNMAMIS_PREFIX}gecici:{kullanici_id}:{os.getpid()}"
+            baslangic = time.time() - OKUNMAMIS_PENCERE_SANIYE
+            
+            pipe = r.pipeline(transaction=True)
+            for anahtar in anahtarlar:
+                pipe.zremrangebyscore(anahtar, '-inf', f"({baslangic}")
+            pipe.zunionstore(gecici, anahtarlar, aggregate='MAX')
+            pipe.zrangebyscore(gecici, baslangic, '+inf')
+            pipe.delete(gecici)
+            sonuc = pipe.execute()
+            
+            return {int(uye) for uye in sonuc[-2]}
+        except Exception as e:
+            _redis_hatasi(e)
+            return None
     
     @staticmethod
     def kullanici_bildirimlerini_getir(
@@ -198,7 +464,11 @@ class BildirimService:
     
     @staticmethod
     def okunmamis_sayisi(kullanici_id: int, kullanici_rol: str, otel_id: int = None) -> int:
-        """Okunmamış bildirim sayısını döndürür"""
+        """Okunmamış bildirim sayısını döndürür (Redis set'lerinden, yoksa SQL)"""
+        idler = BildirimService._okunmamis_idler(kullanici_id, kullanici_rol, otel_id)
+        if idler is not None:
+            return len(idler)
+        
         try:
             sql = """
                 SELECT COUNT(*) FROM bildirimler
@@ -232,9 +502,14 @@ class BildirimService:
     def okundu_isaretle(bildirim_id: int) -> bool:
         """Bildirimi okundu olarak işaretler"""
         try:
-            sql = "UPDATE bildirimler SET okundu = TRUE WHERE id = :id"
-            db.session.execute(db.text(sql), {'id': bildirim_id})
+            sql = """
+                UPDATE bildirimler SET okundu = TRUE
+                WHERE id = :id AND okundu = FALSE
+                RETURNING id, hedef_rol, hedef_otel_id, hedef_kullanici_id
+            """
+            satirlar = db.session.execute(db.text(sql), {'id': bildirim_id}).fetchall()
             db.session.commit()
+            BildirimService._okunmamislari_kaldir(satirlar)
             return True
         except Exception as e:
             db.session.rollback()
@@ -263,8 +538,11 @@ class BildirimService:
                 )
                 params['otel_id'] = otel_id
             
-            db.session.execute(db.text(sql), params)
+            sql += " RETURNING id, hedef_rol, hedef_otel_id, hedef_kullanici_id"
+            
+            satirlar = db.session.execute(db.text(sql), params).fetchall()
             db.session.commit()
+            BildirimService._okunmamislari_kaldir(satirlar)
             return True
         except Exception as e:
             db.session.rollback()
@@ -276,11 +554,21 @@ class BildirimService:
         kullanici_id: int,
         kullanici_rol: str,
         otel_id: int = None,
-        son_kontrol: datetime = None
+        son_kontrol: datetime = None,
+        son_id: int = None
     ) -> List[Dict[str, Any]]:
         """
-        Son kontrolden sonra gelen yeni bildirimleri getirir (SSE için)
+        Son kontrolden sonra gelen yeni bildirimleri getirir (poll için)
+        
+        son_id verilirse önce Redis'teki okunmamış set'lerine bakılır; bu
+        ID'den büyük okunmamış bildirim yoksa DB'ye hiç gidilmez.
         """
+        if son_id is not None:
+            idler = BildirimService._okunmamis_idler(kullanici_id, kullanici_rol, otel_id)
+            if idler is not None:
+                yeni_idler = sorted((i for i in idler if i > son_id), reverse=True)[:10]
+                return BildirimService.bildirimleri_getir(yeni_idler) if yeni_idler else []
+        
         try:
             sql = """
                 SELECT id, hedef_rol, bildirim_tipi, baslik, mesaj, 
@@ -319,6 +607,120 @@ class BildirimService:
             db.session.rollback()
             print(f"Yeni bildirim kontrolü hatası: {e}")
             return []
+    
+    @staticmethod
+    def bildirimleri_getir(bildirim_idler: List[int]) -> List[Dict[str, Any]]:
+        """Verilen ID'lerdeki bildirimleri yeniden eskiye getirir"""
+        try:
+            sql = """
+                SELECT id, hedef_rol, bildirim_tipi, baslik, mesaj, 
+                       okundu, olusturma_tarihi, oda_id, gorev_id
+                FROM bildirimler
+                WHERE id = ANY(:idler)
+                ORDER BY id DESC
+            """
+            result = db.session.execute(db.text(sql), {'idler': list(bildirim_idler)})
+            
+            bildirimler = []
+            for row in result:
+                bildirim = BildirimService._row_to_bildirim_dict(row)
+                if bildirim:
+                    bildirimler.append(bildirim)
+            
+            return bildirimler
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"Bildirim getirme hatası: {e}")
+            return []
+    
+    @staticmethod
+    def idden_sonraki_bildirimler(
+        kullanici_id: int,
+        kullanici_rol: str,
+        otel_id: int = None,
+        son_id: int = 0,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Son görülen ID'den sonraki bildirimleri eskiden yeniye getirir
+        (SSE yeniden bağlanmasında Last-Event-ID ile kaçanları tamamlamak için)
+        """
+        try:
+            sql = """
+                SELECT id, hedef_rol, bildirim_tipi, baslik, mesaj, 
+                       okundu, olusturma_tarihi, oda_id, gorev_id
+                FROM bildirimler
+                WHERE (hedef_rol = :hedef_rol OR hedef_kullanici_id = :kullanici_id)
+                AND id > :son_id
+                AND okundu = FALSE
+                AND olusturma_tarihi > NOW() - INTERVAL '24 hours'
+            """
+            
+            params = {
+                'hedef_rol': kullanici_rol,
+                'kullanici_id': kullanici_id,
+                'son_id': son_id,
+                'limit': limit
+            }
+            
+            if otel_id:
+                sql += " AND (hedef_otel_id = :otel_id OR hedef_otel_id IS NULL)"
+                params['otel_id'] = otel_id
+            
+            sql += " ORDER BY id ASC LIMIT :limit"
+            
+            result = db.session.execute(db.text(sql), params)
+            
+            bildirimler = []
+            for row in result:
+                bildirim = BildirimService._row_to_bildirim_dict(row)
+                if bildirim:
+                    bildirimler.append(bildirim)
+            
+            return bildirimler
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"Bildirim getirme hatası: {e}")
+            return []
+    
+    @staticmethod
+    def abone_ol(kullanici_id: int, kullanici_rol: str, otel_id: int = None):
+        """
+        Kullanıcının bildirim kanallarına abone olan bir Redis PubSub döndürür.
+        
+        Otel'i olmayan kullanıcılar (admin vb.) rolün tüm otel kanallarını
+        pattern ile dinler. Redis yoksa None döner.
+        
+        Not: kullanıcı kanalı otel filtresi uygulamaz; mesajı alan taraf
+        bildirim_kullaniciya_ait_mi ile kontrol etmelidir.
+        """
+        r = bildirim_redis()
+        if r is None:
+            return None
+        
+        try:
+            pubsub = r.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(f"{_KANAL_PREFIX}kullanici:{kullanici_id}")
+            if otel_id:
+                pubsub.subscribe(
+                    f"{_KANAL_PREFIX}rol:{kullanici_rol}:otel:{otel_id}",
+                    f"{_KANAL_PREFIX}rol:{kullanici_rol}:otel:0"
+                )
+            else:
+                pubsub.psubscribe(f"{_KANAL_PREFIX}rol:{kullanici_rol}:otel:*")
+            return pubsub
+        except Exception as e:
+            _redis_hatasi(e)
+            return None
+    
+    @staticmethod
+    def bildirim_kullaniciya_ait_mi(bildirim: Dict[str, Any], otel_id: int = None) -> bool:
+        """Yayından gelen bildirim kullanıcının otel filtresine uyuyor mu"""
+        if not otel_id:
+            return True
+        return bildirim.get('hedef_otel_id') in (None, otel_id)
 
 
 # Yardımcı fonksiyonlar - Kolay kullanım için
@@ -1,6 +1,13 @@
 """
 Redis Cache Helper
 Performans optimizasyonu için cache yardımcı fonksiyonları
+
+Okumalar önce worker başına L1'e (utils.l1_cache) bakar; silmeler L1'i
+tüm worker'larda Redis pub/sub ile temizler.
+
+Toplu invalidation için kayıtlar etiketlerle yazılır (utils.cache_tags):
+    cache_set(key, data, 60, tags=['otel:5', 'kullanici:12'])
+    cache_invalidate_tags('otel:5')
 """
 
 import redis
@@ -8,9 +15,14 @@ import json
 import logging
 from functools import wraps
 from config import Config
+from utils.l1_cache import L1Cache
+from utils.cache_tags import etiketle, etiketleri_temizle
 
 logger = logging.getLogger(__name__)
 
+_l1 = L1Cache('helper')
+_l2_stats = {'hits': 0, 'misses': 0}
+
 # Redis bağlantısı
 try:
     redis_client = redis.from_url(
@@ -35,26 +47,38 @@ def cache_get(key: str):
         return None
     
     try:
-        data = redis_client.get(key)
+        data = _l1.get(key)
+        if data is not None:
+            return json.loads(data)
+        
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.ttl(key)
+        data, kalan_ttl = pipe.execute()
         if data:
+            _l2_stats['hits'] += 1
+            if kalan_ttl and kalan_ttl > 0:
+                _l1.set(key, data, kalan_ttl)
             return json.loads(data)
+        _l2_stats['misses'] += 1
         return None
     except Exception as e:
         logger.warning(f"Cache get hatası ({key}): {e}")
         return None
 
 
-def cache_set(key: str, value, ttl: int = 60):
-    """Cache'e veri kaydet"""
+def cache_set(key: str, value, ttl: int = 60, tags=None):
+    """Cache'e veri kaydet (tags: toplu invalidation için etiketler)"""
     if not CACHE_AVAILABLE or not Config.CACHE_ENABLED:
         return False
     
     try:
-        redis_client.setex(
-            key,
-            ttl,
-            json.dumps(value, default=str)
-        )
+        data = json.dumps(value, default=str)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key, ttl, data)
+        etiketle(pipe, key, tags, ttl)
+        pipe.execute()
+        _l1.set(key, data, ttl)
         return True
     except Exception as e:
         logger.warning(f"Cache set hatası ({key}): {e}")
@@ -68,18 +92,39 @@ def cache_delete(key: str):
     
     try:
         redis_client.delete(key)
+        _l1.invalidate(key)
         return True
     except Exception as e:
         logger.warning(f"Cache delete hatası ({key}): {e}")
         return False
 
 
+def cache_invalidate_tags(*tags) -> int:
+    """Etiketlere kayıtlı tüm cache'leri sil, silinen key sayısını döndür"""
+    if not CACHE_AVAILABLE or not Config.CACHE_ENABLED:
+        return 0
+    
+    try:
+        silinen = etiketleri_temizle(redis_client, tags)
+        _l1.invalidate_many(silinen)
+        return len(silinen)
+    except Exception as e:
+        logger.warning(f"Cache tag invalidation hatası ({tags}): {e}")
+        return 0
+
+
 def cache_delete_pattern(pattern: str):
-    """Pattern'e uyan tüm cache'leri sil"""
+    """
+    Pattern'e uyan tüm cache'leri sil.
+    
+    KEYS tüm keyspace'i tarar ve Redis'i bloklar; yeni kod
+    cache_invalidate_tags kullanmalı.
+    """
     if not CACHE_AVAILABLE or not Config.CACHE_ENABLED:
         return 0
     
     try:
+        _l1.invalidate_pattern(pattern)
         keys = redis_client.keys(pattern)
         if keys:
             return redis_client.delete(*keys)
@@ -124,3 +169,16 @@ def cached(ttl: int = 60, key_prefix: str = ""):
         
         return wrapper
     return decorator
+
+
+def get_tier_stats():
+    """L1 / L2 katman istatistikleri (bu worker için)"""
+    toplam = _l2_stats['hits'] + _l2_stats['misses']
+    return {
+        'l1': _l1.stats(),
+        'l2': {
+            'hits': _l2_stats['hits'],
+            'misses': _l2_stats['misses'],
+            'hit_rate': round(_l2_stats['hits'] / toplam * 100, 2) if toplam else 0.0
+        }
+    }
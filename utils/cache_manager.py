@@ -27,6 +27,9 @@ Kullanım:
     
     # Manuel invalidation
     cache_manager.invalidate('urunler')
+
+İki katmanlı çalışır: worker başına L1 (utils.l1_cache) + Redis L2.
+Invalidation L1'i tüm worker'larda Redis pub/sub ile temizler.
 """
 
 import logging
@@ -35,6 +38,9 @@ from functools import wraps
 from typing import Optional, Any, Callable
 from flask import current_app
 
+from utils.l1_cache import L1Cache
+from utils.cache_tags import etiketle, etiketleri_temizle
+
 logger = logging.getLogger(__name__)
 
 # Global cache instance
@@ -84,6 +90,9 @@ class CacheManager:
     def __init__(self, redis_client=None):
         self.redis = redis_client
         self.enabled = redis_client is not None
+        self.l1 = _master_l1
+        self.l2_hits = 0
+        self.l2_misses = 0
         
     def _make_key(self, key: str, *args) -> str:
         """Cache key oluştur"""
@@ -113,10 +122,24 @@ class CacheManager:
         try:
             import pickle
             cache_key = self._make_key(key, *args)
-            data = self.redis.get(cache_key)
+            
+            data = self.l1.get(cache_key)
+            if data is not None:
+                logger.debug(f"✅ Cache L1 HIT: {cache_key}")
+                return pickle.loads(data)
+            
+            # Pipeline: değer + kalan TTL tek round-trip (L1 süresi L2'yi aşmasın)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(cache_key)
+            pipe.ttl(cache_key)
+            data, kalan_ttl = pipe.execute()
             if data:
+                self.l2_hits += 1
+                if kalan_ttl and kalan_ttl > 0:
+                    self.l1.set(cache_key, data, kalan_ttl)
                 logger.debug(f"✅ Cache HIT: {cache_key}")
                 return pickle.loads(data)
+            self.l2_misses += 1
             logger.debug(f"❌ Cache MISS: {cache_key}")
             return None
         except Exception as e:
@@ -140,7 +163,12 @@ class CacheManager:
                 timeout = self.ALLOWED_KEYS.get(key, self.TTL_MEDIUM)
             
             data = pickle.dumps(value)
-            self.redis.setex(cache_key, timeout, data)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(cache_key, timeout, data)
+            # invalidate(key) tüm argüman varyantlarını bu etiketle bulur
+            etiketle(pipe, cache_key, [f"{self.PREFIX}{key}"], timeout)
+            pipe.execute()
+            self.l1.set(cache_key, data, timeout)
             logger.debug(f"✅ Cache SET: {cache_key} (TTL: {timeout}s)")
             return True
         except Exception as e:
@@ -157,18 +185,16 @@ class CacheManager:
                 # Spesifik key'i sil
                 cache_key = self._make_key(key, *args)
                 self.redis.delete(cache_key)
+                self.l1.invalidate(cache_key)
                 logger.info(f"🗑️ Cache invalidated: {cache_key}")
             else:
-                # Pattern ile tüm ilgili key'leri sil
-                pattern = f"{self.PREFIX}{key}:*"
-                keys = list(self.redis.scan_iter(match=pattern, count=100))
-                if keys:
-                    self.redis.delete(*keys)
-                    logger.info(f"🗑️ Cache invalidated: {len(keys)} keys matching '{pattern}'")
-                    
-                # Base key'i de sil
+                # Etiketle kayıtlı tüm varyantları sil (SCAN yok)
                 base_key = f"{self.PREFIX}{key}"
+                keys = etiketleri_temizle(self.redis, [base_key])
                 self.redis.delete(base_key)
+                self.l1.invalidate_many(keys + [base_key])
+                if keys:
+                    logger.info(f"🗑️ Cache invalidated: {len(keys)} keys tagged '{base_key}'")
             return True
         except Exception as e:
             logger.error(f"Cache invalidate hatası: {str(e)}")
@@ -181,6 +207,7 @@ class CacheManager:
             
         try:
             pattern = f"{self.PREFIX}*"
+            self.l1.invalidate_all()
             keys = list(self.redis.scan_iter(match=pattern, count=100))
             if keys:
                 self.redis.delete(*keys)
@@ -203,7 +230,8 @@ class CacheManager:
             stats = {
                 'enabled': True,
                 'total_keys': len(keys),
-                'categories': {}
+                'categories': {},
+                'tiers': self.get_tier_stats()
             }
             
             for key in keys:
@@ -216,6 +244,22 @@ class CacheManager:
         except Exception as e:
             logger.error(f"Cache stats hatası: {str(e)}")
             return {'enabled': True, 'error': str(e)}
+    
+    def get_tier_stats(self) -> dict:
+        """Katman bazlı hit/miss istatistikleri (bu worker için)"""
+        l2_toplam = self.l2_hits + self.l2_misses
+        return {
+            'l1': self.l1.stats(),
+            'l2': {
+                'hits': self.l2_hits,
+                'misses': self.l2_misses,
+                'hit_rate': round(self.l2_hits / l2_toplam * 100, 2) if l2_toplam else 0.0
+            }
+        }
+
+
+# Worker başına master data L1'i (CacheManager yeniden oluşturulsa da aynı kalır)
+_master_l1 = L1Cache('master')
 
 
 # Global instance
@@ -381,6 +425,24 @@ class CacheStats:
                 'error': str(e)
             }
     
+    @classmethod
+    def get_tier_stats(cls) -> dict:
+        """
+        L1 (process içi) ve L2 (Redis) katmanlarının hit/miss istatistikleri.
+        Değerler bu worker'a aittir.
+        
+        Returns:
+            dict: {'master': {...}, 'helper': {...}}
+        """
+        global cache_manager
+        
+        from utils.cache_helper import get_tier_stats as helper_tier_stats
+        
+        return {
+            'master': cache_manager.get_tier_stats() if cache_manager else {},
+            'helper': helper_tier_stats()
+        }
+    
     @classmethod
     def get_hit_rate(cls) -> float:
         """
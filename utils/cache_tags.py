@@ -0,0 +1,93 @@
+"""
+Cache Etiketleri - Tag Tabanlı Invalidation
+
+Cache'e yazılan her kayıt bir veya daha fazla etiket altında (Redis set)
+kaydedilir: 'otel:5', 'kullanici:12', 'oda:40', 'executive' gibi.
+Invalidation bir etiketin üyelerini siler; maliyet o etiketteki kayıt
+sayısı kadardır (KEYS/SCAN gibi tüm keyspace'i dolaşmaz, Redis'i bloklamaz).
+
+Etiket set'leri ETIKET_TTL ile expire olur; ancak sık yazılan bir etiketin
+TTL'i her yazmada yenilendiği için set hiç expire olmayabilir. Bu yüzden
+yazmaların bir kısmında (BUDAMA_OLASILIGI) set'ten rastgele bir örnek alınır
+ve süresi dolmuş key'ler SREM ile çıkarılır; set canlı key sayısına yakın kalır.
+
+Kullanım:
+    from utils.cache_tags import etiketle, etiketleri_temizle
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.setex(key, ttl, data)
+    etiketle(pipe, key, ['otel:5', 'kullanici:12'], ttl)
+    pipe.execute()
+
+    silinen_keyler = etiketleri_temizle(redis_client, ['otel:5'])
+"""
+
+import random
+
+ETIKET_PREFIX = 'cache_tag:'
+ETIKET_TTL = 86400  # 1 gün
+BUDAMA_OLASILIGI = 0.05  # Yazmaların ~%5'inde etiket set'i budanır
+BUDAMA_ORNEK = 100  # Budamada kontrol edilen üye sayısı
+
+# Etiket set'lerini okuyup üyeleri ve set'i tek atomik adımda siler;
+# arada eklenen kayıt ya silinir ya da yeni set'e düşer, kaybolmaz.
+_TEMIZLE_LUA = """
+local silinen = {}
+for _, etiket in ipairs(KEYS) do
+    local uyeler = redis.call('SMEMBERS', etiket)
+    for i = 1, #uyeler, 500 do
+        redis.call('DEL', unpack(uyeler, i, math.min(i + 499, #uyeler)))
+    end
+    for _, uye in ipairs(uyeler) do
+        table.insert(silinen, uye)
+    end
+    redis.call('DEL', etiket)
+end
+return silinen
+"""
+
+
+# Set'ten rastgele örnek alıp artık var olmayan key'leri çıkarır (maliyet örnek boyutuyla sınırlı)
+_BUDA_LUA = """
+local uyeler = redis.call('SRANDMEMBER', KEYS[1], tonumber(ARGV[1]))
+local olu = {}
+for _, uye in ipairs(uyeler) do
+    if redis.call('EXISTS', uye) == 0 then
+        table.insert(olu, uye)
+    end
+end
+if #olu > 0 then
+    redis.call('SREM', KEYS[1], unpack(olu))
+end
+return #olu
+"""
+
+
+def etiket_key(etiket: str) -> str:
+    return f"{ETIKET_PREFIX}{etiket}"
+
+
+def etiketle(pipe, key: str, etiketler, ttl: int) -> None:
+    """Key'i etiket set'lerine ekler (çağıranın pipeline'ına komut ekler)"""
+    for etiket in etiketler or ():
+        tag_key = etiket_key(etiket)
+        pipe.sadd(tag_key, key)
+        pipe.expire(tag_key, max(ETIKET_TTL, int(ttl or 0)))
+        if random.random() < BUDAMA_OLASILIGI:
+            pipe.eval(_BUDA_LUA, 1, tag_key, BUDAMA_ORNEK)
+
+
+def etiketleri_temizle(client, etiketler) -> list:
+    """
+    Etiketlere kayıtlı tüm cache key'lerini siler.
+
+    Returns:
+        list[str]: Silinen key'ler (L1 invalidation için)
+    """
+    etiketler = [e for e in etiketler if e]
+    if not etiketler:
+        return []
+
+    script = client.register_script(_TEMIZLE_LUA)
+    silinen = script(keys=[etiket_key(e) for e in etiketler]) or []
+    return list({k.decode() if isinstance(k, bytes) else k for k in silinen})
@@ -1,10 +1,13 @@
 """
 Depo Sorumlusu Cache Service
 Depo sorumlusu stok ve sipariş endpoint'leri için cache yönetimi
+
+Invalidation etiket tabanlıdır (utils.cache_tags): otele bağlı kayıtlar
+'otel:{id}' etiketini de taşır, otel bazlı temizlik tüm servislerde geçerlidir.
 """
 
 import logging
-from utils.cache_helper import cache_get, cache_set, cache_delete_pattern
+from utils.cache_helper import cache_get, cache_set, cache_invalidate_tags
 
 logger = logging.getLogger(__name__)
 
@@ -31,10 +34,21 @@ class DepoCacheService:
         return cache_get(full_key)
     
     @staticmethod
-    def set_stok_bilgileri(cache_key: str, data: dict):
+    def _etiketler(grup: str, otel_id: int = None):
+        """Kayıt etiketleri: grup, grup+otel (yoksa grup+tum_oteller), otel"""
+        etiketler = [f"{DepoCacheService.CACHE_PREFIX}:{grup}"]
+        if otel_id:
+            etiketler += [f"{DepoCacheService.CACHE_PREFIX}:{grup}:otel:{otel_id}", f"otel:{otel_id}"]
+        else:
+            etiketler.append(f"{DepoCacheService.CACHE_PREFIX}:{grup}:tum_oteller")
+        return etiketler
+    
+    @staticmethod
+    def set_stok_bilgileri(cache_key: str, data: dict, otel_id: int = None):
         """Stok bilgilerini cache'le"""
         full_key = DepoCacheService.get_stok_bilgileri_cache_key(cache_key)
-        return cache_set(full_key, data, DepoCacheService.STOK_BILGILERI_TTL)
+        return cache_set(full_key, data, DepoCacheService.STOK_BILGILERI_TTL,
+                         tags=DepoCacheService._etiketler('stok', otel_id))
     
     @staticmethod
     def get_siparis_listesi_cache_key(otel_id: int = None):
@@ -54,7 +68,8 @@ class DepoCacheService:
     def set_siparis_listesi(data: list, otel_id: int = None):
         """Sipariş listesini cache'le"""
         cache_key = DepoCacheService.get_siparis_listesi_cache_key(otel_id)
-        return cache_set(cache_key, data, DepoCacheService.SIPARIS_LISTESI_TTL)
+        return cache_set(cache_key, data, DepoCacheService.SIPARIS_LISTESI_TTL,
+                         tags=DepoCacheService._etiketler('siparis', otel_id))
     
     @staticmethod
     def get_tedarik_listesi_cache_key(otel_id: int):
@@ -71,42 +86,45 @@ class DepoCacheService:
     def set_tedarik_listesi(data: list, otel_id: int):
         """Tedarik listesini cache'le"""
         cache_key = DepoCacheService.get_tedarik_listesi_cache_key(otel_id)
-        return cache_set(cache_key, data, DepoCacheService.TEDARIK_LISTESI_TTL)
+        return cache_set(cache_key, data, DepoCacheService.TEDARIK_LISTESI_TTL,
+                         tags=DepoCacheService._etiketler('tedarik', otel_id))
+    
+    @staticmethod
+    def _grup_invalidate(grup: str, otel_id: int = None):
+        """
+        Grup cache'ini temizle. Otel verilirse o otelin kayıtları ile
+        otel filtresiz (tüm oteller) kayıtlar temizlenir, çünkü onlar da
+        bu otelin verisini içerir.
+        """
+        prefix = DepoCacheService.CACHE_PREFIX
+        if otel_id:
+            return cache_invalidate_tags(f"{prefix}:{grup}:otel:{otel_id}", f"{prefix}:{grup}:tum_oteller")
+        return cache_invalidate_tags(f"{prefix}:{grup}")
     
     @staticmethod
     def invalidate_stok(otel_id: int = None):
         """Stok cache'ini temizle"""
-        if otel_id:
-            pattern = f"{DepoCacheService.CACHE_PREFIX}:stok:*{otel_id}*"
-        else:
-            pattern = f"{DepoCacheService.CACHE_PREFIX}:stok:*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = DepoCacheService._grup_invalidate('stok', otel_id)
         logger.info(f"Depo stok cache temizlendi (otel={otel_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_siparis(otel_id: int = None):
         """Sipariş cache'ini temizle"""
-        if otel_id:
-            pattern = f"{DepoCacheService.CACHE_PREFIX}:siparis:{otel_id}*"
-        else:
-            pattern = f"{DepoCacheService.CACHE_PREFIX}:siparis*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = DepoCacheService._grup_invalidate('siparis', otel_id)
         logger.info(f"Depo sipariş cache temizlendi (otel={otel_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_tedarik(otel_id: int):
         """Tedarik cache'ini temizle"""
-        pattern = f"{DepoCacheService.CACHE_PREFIX}:tedarik:{otel_id}*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"{DepoCacheService.CACHE_PREFIX}:tedarik:otel:{otel_id}")
         logger.info(f"Depo tedarik cache temizlendi (otel={otel_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_otel(otel_id: int):
         """Otele ait tüm cache'i temizle"""
-        pattern = f"{DepoCacheService.CACHE_PREFIX}:*:{otel_id}*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"otel:{otel_id}")
         logger.info(f"Depo cache temizlendi (otel={otel_id}): {deleted} key")
         return deleted
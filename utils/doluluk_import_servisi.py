@@ -0,0 +1,402 @@
+"""
+Doluluk Import Servisi - Arka Plan Excel İşleme
+
+/doluluk-yonetimi/yukle isteği sadece dosyayı kaydedip bir BackgroundJob
+oluşturur ve Celery'ye iş bırakır; Excel parse, misafir kaydı upsert'i ve
+görev oluşturma worker'da yapılır.
+
+İşleme parça parça (DOLULUK_IMPORT_CHUNK_SIZE satır) commit edilir. Her
+parçanın ilerlemesi (işlenen satır, yüzde, başarılı/hatalı sayıları)
+BackgroundJob.job_metadata'ya aynı transaction içinde yazılır; böylece
+worker ölürse iş, son commit edilen parçadan devam eder.
+
+Fonksiyonlar:
+- kuyruga_al: Job oluşturur ve Celery'ye gönderir (broker yoksa senkron işler)
+- isle: Job'ı sahiplenir, dosyayı parça parça işler, sonucu yazar
+- yarim_kalanlari_devam_ettir: Sahipsiz kalmış job'ları yeniden kuyruğa alır
+- ilerleme_getir: Durum endpoint'i için job ilerlemesi
+
+Kullanım:
+    from utils.doluluk_import_servisi import DolulukImportServisi
+
+    DolulukImportServisi.kuyruga_al(file_path, islem_kodu, user_id, otel_id, dosya_tipi)
+"""
+
+import json
+import logging
+import traceback
+import uuid
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+
+from models import db, BackgroundJob, DosyaYukleme, YuklemeGorev, get_kktc_now
+
+logger = logging.getLogger(__name__)
+
+JOB_ADI = 'doluluk_excel_import'
+
+
+class DolulukIsiDevralindi(Exception):
+    """Job başka bir worker tarafından devralındığında işlemeyi durdurur"""
+
+
+class DolulukImportServisi:
+    """Doluluk Excel yüklemelerini arka planda işleyen servis"""
+
+    @staticmethod
+    def job_id(islem_kodu):
+        """İşlem koduna bağlı deterministik job ID (tekrar kuyruğa alma idempotent)"""
+        return f'doluluk-{islem_kodu}'
+
+    @staticmethod
+    def _ayar(anahtar, varsayilan):
+        try:
+            return current_app.config.get(anahtar, varsayilan)
+        except RuntimeError:
+            return varsayilan
+
+    # ------------------------------------------------------------------
+    # Kuyruğa alma
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def kuyruga_al(file_path, islem_kodu, user_id, otel_id=None, override_dosya_tipi=None):
+        """
+        Yükleme için job oluşturur ve Celery'ye gönderir.
+
+        Returns:
+            dict: {'success': bool, 'job_id': str, 'kuyrukta': bool, 'message': str}
+        """
+        job_id = DolulukImportServisi.job_id(islem_kodu)
+
+        job = BackgroundJob(
+            job_id=job_id,
+            job_name=JOB_ADI,
+            status='pending',
+            job_metadata={
+                'islem_kodu': islem_kodu,
+                'file_path': file_path,
+                'user_id': user_id,
+                'otel_id': otel_id,
+                'override_dosya_tipi': override_dosya_tipi,
+                'islenen_satir': 0,
+                'toplam_satir': None,
+                'yuzde': 0,
+                'basarili_satir': 0,
+                'kayit_hatalari': []
+            }
+        )
+        db.session.add(job)
+
+        dosya_yukleme = DosyaYukleme.query.filter_by(islem_kodu=islem_kodu).first()
+        if dosya_yukleme:
+            dosya_yukleme.durum = 'isleniyor'
+        db.session.commit()
+
+        try:
+            from celery_app import doluluk_excel_isle_task
+            doluluk_excel_isle_task.delay(islem_kodu)
+            return {
+                'success': True,
+                'job_id': job_id,
+                'kuyrukta': True,
+                'message': 'Dosya işlenmek üzere kuyruğa alındı'
+            }
+        except Exception as e:
+            # Broker erişilemiyorsa yükleme kaybolmasın, istek içinde işlenir
+            logger.warning(f"⚠️ Doluluk import kuyruğa alınamadı, senkron işleniyor: {str(e)}")
+            sonuc = DolulukImportServisi.isle(islem_kodu)
+            return {
+                'success': sonuc.get('success', False),
+                'job_id': job_id,
+                'kuyrukta': False,
+                'message': sonuc.get('message', '')
+            }
+
+    # ------------------------------------------------------------------
+    # İşleme
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _sahiplen(job_id, token):
+        """
+        Job'ı satır kilidi altında sahiplenir.
+
+        pending veya heartbeat'i eskimiş running job'lar sahiplenilebilir;
+        tamamlanmış/başarısız job'lar tekrar işlenmez.
+
+        Returns:
+            BackgroundJob | None
+        """
+        job = BackgroundJob.query.filter_by(job_id=job_id).with_for_update().first()
+        if not job:
+            db.session.rollback()
+            return None
+
+        if job.status == 'running':
+            meta = job.job_metadata or {}
+            son = meta.get('heartbeat')
+            eski_sinir = get_kktc_now() - timedelta(
+                seconds=DolulukImportServisi._ayar('DOLULUK_IMPORT_STALE_SECONDS', 600)
+            )
+            if son and datetime.fromisoformat(son) > eski_sinir:
+                db.session.rollback()
+                return None
+        elif job.status != 'pending':
+            db.session.rollback()
+            return None
+
+        meta = dict(job.job_metadata or {})
+        meta['token'] = token
+        meta['heartbeat'] = get_kktc_now().isoformat()
+        meta['deneme'] = meta.get('deneme', 0) + 1
+        job.job_metadata = meta
+        job.status = 'running'
+        job.started_at = job.started_at or get_kktc_now()
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def _ilerleme_callback(job_id, token):
+        """Her parça commit edilmeden önce job ilerlemesini aynı session'a yazar"""
+        def callback(islenen, toplam, basarili, kayit_hatalari):
+            job = BackgroundJob.query.filter_by(job_id=job_id).with_for_update().first()
+            meta = dict(job.job_metadata or {})
+            if meta.get('token') != token:
+                raise DolulukIsiDevralindi(job_id)
+
+            meta.update({
+                'islenen_satir': islenen,
+                'toplam_satir': toplam,
+                'yuzde': round(islenen * 100 / toplam) if toplam else 100,
+                'basarili_satir': basarili,
+                'kayit_hatalari': kayit_hatalari[:200],
+                'heartbeat': get_kktc_now().isoformat()
+            })
+            job.job_metadata = meta
+        return callback
+
+    @staticmethod
+    def isle(islem_kodu):
+        """
+        Job'ı işler. Celery task'ı ve senkron yedek yol tarafından çağrılır.
+
+        Returns:
+            dict: {'success': bool, 'message': str, ...process_excel_file sonucu}
+        """
+        from utils.excel_service import ExcelProcessingService
+        from utils.file_management_service import FileManagementService
+
+        job_id = DolulukImportServisi.job_id(islem_kodu)
+        token = uuid.uuid4().hex
+
+        job = DolulukImportServisi._sahiplen(job_id, token)
+        if not job:
+            return {'success': False, 'message': 'Job bulunamadı veya başka bir worker işliyor'}
+
+        meta = dict(job.job_metadata)
+        otel_id = meta.get('otel_id')
+        user_id = meta.get('user_id')
+
+        result = ExcelProcessingService.process_excel_file(
+            meta['file_path'], islem_kodu, user_id, otel_id, meta.get('override_dosya_tipi'),
+            chunk_size=DolulukImportServisi._ayar('DOLULUK_IMPORT_CHUNK_SIZE', 200),
+            devam={
+                'islenen_satir': meta.get('islenen_satir', 0),
+                'basarili_satir': meta.get('basarili_satir', 0),
+                'kayit_hatalari': meta.get('kayit_hatalari', [])
+            },
+            ilerleme_callback=DolulukImportServisi._ilerleme_callback(job_id, token)
+        )
+
+        # Callback DolulukIsiDevralindi fırlattıysa process_excel_file hatayı yutar;
+        # job artık başka worker'da, sonuç yazılmamalı
+        job = BackgroundJob.query.filter_by(job_id=job_id).first()
+        if not job or (job.job_metadata or {}).get('token') != token:
+            logger.warning(f"⚠️ Doluluk import başka worker'a geçti: {job_id}")
+            return {'success': False, 'message': 'Job başka bir worker tarafından devralındı'}
+
+        if result['success']:
+            FileManagementService.update_dosya_yukleme_status(
+                islem_kodu,
+                'tamamlandi',
+                dosya_tipi=result['dosya_tipi'],
+                toplam_satir=result['toplam_satir'],
+                basarili_satir=result['basarili_satir'],
+                hatali_satir=result['hatali_satir'],
+                hata_detaylari=json.dumps(result['hatalar'], ensure_ascii=False) if result['hatalar'] else None
+            )
+
+            try:
+                DolulukImportServisi._yukleme_gorevini_tamamla(
+                    islem_kodu, otel_id, user_id, result['dosya_tipi']
+                )
+            except Exception as gorev_err:
+                db.session.rollback()
+                print(f"YuklemeGorev güncelleme hatası: {gorev_err}")
+
+            DolulukImportServisi._bitir(job_id, yuzde=100)
+            result['message'] = (
+                f"Dosya işlendi. Başarılı: {result['basarili_satir']}, Hatalı: {result['hatali_satir']}"
+            )
+        else:
+            FileManagementService.update_dosya_yukleme_status(
+                islem_kodu,
+                'hata',
+                hata_detaylari=json.dumps(result.get('hatalar', [result.get('error', 'Bilinmeyen hata')]), ensure_ascii=False)
+            )
+            DolulukImportServisi._bitir(
+                job_id,
+                hata=result.get('error', 'Bilinmeyen hata'),
+                stack_trace='\n'.join(result.get('hatalar', [])[-1:])
+            )
+            result['message'] = result.get('error', 'Bilinmeyen hata')
+
+        return result
+
+    @staticmethod
+    def _bitir(job_id, yuzde=None, hata=None, stack_trace=None):
+        """Job'ı completed/failed olarak kapatır"""
+        try:
+            job = BackgroundJob.query.filter_by(job_id=job_id).first()
+            if not job:
+                return
+
+            simdi = get_kktc_now()
+            job.completed_at = simdi
+            job.status = 'failed' if hata else 'completed'
+            job.error_message = hata
+            job.stack_trace = stack_trace
+            if job.started_at:
+                job.duration = (simdi - job.started_at).total_seconds()
+            if yuzde is not None:
+                meta = dict(job.job_metadata or {})
+                meta['yuzde'] = yuzde
+                job.job_metadata = meta
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Doluluk job kapatma hatası: {str(e)}")
+
+    @staticmethod
+    def _yukleme_gorevini_tamamla(islem_kodu, otel_id, user_id, dosya_tipi):
+        """
+        YuklemeGorev tablosunu günceller (dashboard için) ve 3 dosya tipi de
+        yüklendiyse günlük görevleri oluşturur.
+        """
+        # Dosya tipini YuklemeGorev formatına çevir
+        dosya_tipi_map = {
+            'in_house': 'inhouse',
+            'arrivals': 'arrivals',
+            'departures': 'departures'
+        }
+        yukleme_dosya_tipi = dosya_tipi_map.get(dosya_tipi, dosya_tipi)
+        dosya_yukleme = DosyaYukleme.query.filter_by(islem_kodu=islem_kodu).first()
+        bugun = date.today()
+
+        # Bugünkü görevi bul ve güncelle - otel_id ile ara
+        yukleme_gorev = YuklemeGorev.query.filter(
+            YuklemeGorev.otel_id == otel_id,
+            YuklemeGorev.gorev_tarihi == bugun,
+            YuklemeGorev.dosya_tipi == yukleme_dosya_tipi
+        ).first()
+
+        if yukleme_gorev:
+            yukleme_gorev.durum = 'completed'
+            yukleme_gorev.yukleme_zamani = get_kktc_now()
+            yukleme_gorev.dosya_yukleme_id = dosya_yukleme.id if dosya_yukleme else None
+        else:
+            yukleme_gorev = YuklemeGorev(
+                otel_id=otel_id,
+                depo_sorumlusu_id=user_id,
+                gorev_tarihi=bugun,
+                dosya_tipi=yukleme_dosya_tipi,
+                durum='completed',
+                yukleme_zamani=get_kktc_now(),
+                dosya_yukleme_id=dosya_yukleme.id if dosya_yukleme else None
+            )
+            db.session.add(yukleme_gorev)
+
+        db.session.commit()
+
+        # 🔥 KRİTİK: YuklemeGorev güncellendikten SONRA görev oluşturma kontrolü yap
+        # 3 dosya da yüklendiyse günlük görevleri oluştur
+        try:
+            from utils.gorev_service import GorevService
+
+            yuklemeler = YuklemeGorev.query.filter(
+                YuklemeGorev.otel_id == otel_id,
+                YuklemeGorev.gorev_tarihi == bugun,
+                YuklemeGorev.dosya_tipi.in_(['inhouse', 'arrivals', 'departures'])
+            ).all()
+            yukleme_durumlari = {tip: 'pending' for tip in ['inhouse', 'arrivals', 'departures']}
+            for yukleme in yuklemeler:
+                yukleme_durumlari[yukleme.dosya_tipi] = yukleme.durum
+
+            print(f"📊 Otel {otel_id} - Yükleme durumları: {yukleme_durumlari}")
+
+            if all(durum == 'completed' for durum in yukleme_durumlari.values()):
+                print(f"✅ Otel {otel_id} - 3 dosya da yüklendi! Görevler oluşturuluyor...")
+                gorev_result = GorevService.create_daily_tasks(otel_id, bugun)
+                print(f"✅ Görevler oluşturuldu: {gorev_result}")
+            else:
+                eksik_dosyalar = [tip for tip, durum in yukleme_durumlari.items() if durum != 'completed']
+                print(f"⏳ Otel {otel_id} - Eksik dosyalar: {eksik_dosyalar}. Görevler henüz oluşturulmayacak.")
+
+        except Exception as gorev_olusturma_err:
+            print(f"⚠️ Görev oluşturma hatası: {gorev_olusturma_err}")
+            traceback.print_exc()
+
+    # ------------------------------------------------------------------
+    # Kurtarma ve durum
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def yarim_kalanlari_devam_ettir():
+        """
+        Worker ölümü veya kayıp mesaj nedeniyle sahipsiz kalan job'ları
+        yeniden kuyruğa alır. İşleme kaldığı parçadan devam eder.
+
+        Returns:
+            int: Yeniden kuyruğa alınan job sayısı
+        """
+        from celery_app import doluluk_excel_isle_task
+
+        eski_sinir = get_kktc_now() - timedelta(
+            seconds=DolulukImportServisi._ayar('DOLULUK_IMPORT_STALE_SECONDS', 600)
+        )
+        jobs = BackgroundJob.query.filter(
+            BackgroundJob.job_name == JOB_ADI,
+            BackgroundJob.status.in_(['pending', 'running']),
+            BackgroundJob.created_at < eski_sinir
+        ).all()
+
+        sayi = 0
+        for job in jobs:
+            meta = job.job_metadata or {}
+            son = meta.get('heartbeat')
+            if job.status == 'running' and son and datetime.fromisoformat(son) > eski_sinir:
+                continue
+            doluluk_excel_isle_task.delay(meta.get('islem_kodu'))
+            sayi += 1
+
+        return sayi
+
+    @staticmethod
+    def ilerleme_getir(islem_kodu):
+        """
+        Returns:
+            dict | None: {'job_durum', 'yuzde', 'islenen_satir', 'toplam_satir'}
+        """
+        job = BackgroundJob.query.filter_by(job_id=DolulukImportServisi.job_id(islem_kodu)).first()
+        if not job:
+            return None
+
+        meta = job.job_metadata or {}
+        return {
+            'job_durum': job.status,
+            'yuzde': meta.get('yuzde', 0),
+            'islenen_satir': meta.get('islenen_satir', 0),
+            'toplam_satir': meta.get('toplam_satir')
+        }
@@ -0,0 +1,262 @@
+"""
+Excel Akışı - Sabit Bellekle XLSX Üretimi
+
+openpyxl Workbook'u tüm hücreleri bellekte tutar ve dosya ancak en sonda
+kaydedilir; bir yıllık stok hareketi gibi büyük raporlar worker RSS'ini
+şişirir ve ilk bayt gönderilmeden timeout'a düşer. ExcelAkisi tek sayfalı
+bir XLSX'i (SpreadsheetML) satır satır üretir: sayfa XML'i ZipAkisi
+üzerinden parça parça sıkıştırılarak istemciye akar. Bellekte satır
+tutulmaz; satırlar server-side cursor'dan (yield_per) okunabilir.
+
+- Başlık (birleştirilmiş), alt başlık ve renkli tablo başlığı satırları
+  mevcut raporlarla aynı görünümdedir.
+- Sütun genişlikleri satırlardan önce yazıldığı için sabit verilir.
+- Metinler inline string olarak yazılır (shared strings tablosu yok).
+
+Kullanım:
+    from utils.excel_akisi import ExcelAkisi, excel_yaniti
+
+    akis = ExcelAkisi('Stok Hareketleri', 'Stok Hareketleri Raporu',
+                      ['Tarih', 'Ürün', 'Miktar'], genislikler=[15, 25, 10])
+    satirlar = ((h.tarih, h.urun_ad, h.miktar) for h in sorgu.execution_options(yield_per=1000))
+    return excel_yaniti(akis, satirlar, 'stok_hareketleri.xlsx', modul='stok_excel')
+"""
+
+import re
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from flask import Response, stream_with_context
+
+from utils.helpers import log_hata
+from utils.zip_akisi import ZipAkisi
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Kaç satırda bir sayfa XML'i sıkıştırıcıya yazılır
+SATIR_PARTISI = 500
+
+# XML 1.0'da geçersiz kontrol karakterleri (openpyxl bunlarda hata verir)
+_GECERSIZ_KARAKTER = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_SAYFA_ADI_KARAKTER = re.compile(r'[\[\]:*?/\\]')
+
+_XML_BASI = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_CONTENT_TYPES = _XML_BASI + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = _XML_BASI + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = _XML_BASI + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Stil indeksleri (cellXfs sırası)
+_STIL_BASLIK = 1
+_STIL_ALT_BASLIK = 2
+_STIL_TABLO_BASLIGI = 3
+
+
+def sutun_harfi(indeks):
+    """1 tabanlı sütun indeksini Excel harfine çevirir (1 -> A, 27 -> AA)"""
+    harf = ''
+    while indeks:
+        indeks, kalan = divmod(indeks - 1, 26)
+        harf = chr(65 + kalan) + harf
+    return harf
+
+
+def _metin(deger):
+    return escape(_GECERSIZ_KARAKTER.sub('', deger))
+
+
+def _hucre(ref, deger, stil=0):
+    """Tek hücrenin XML'i; None boş hücre olarak atlanır"""
+    if deger is None:
+        return ''
+    s = f' s="{stil}"' if stil else ''
+    if isinstance(deger, bool):
+        return f'<c r="{ref}" t="b"{s}><v>{int(deger)}</v></c>'
+    if isinstance(deger, (int, float, Decimal)):
+        return f'<c r="{ref}"{s}><v>{deger}</v></c>'
+    if isinstance(deger, datetime):
+        deger = deger.strftime('%d.%m.%Y %H:%M')
+    elif isinstance(deger, date):
+        deger = deger.strftime('%d.%m.%Y')
+    metin = _metin(str(deger))
+    bosluk = ' xml:space="preserve"' if metin != metin.strip() else ''
+    return f'<c r="{ref}" t="inlineStr"{s}><is><t{bosluk}>{metin}</t></is></c>'
+
+
+class ExcelAkisi:
+    """Tek sayfalı, satır satır üretilen XLSX"""
+
+    def __init__(self, sayfa_adi, baslik, sutunlar, genislikler=None, alt_baslik=None,
+                 renk='4472C4', baslik_yazi_rengi='FFFFFF', ortala=True):
+        """
+        Args:
+            sayfa_adi: Sayfa (sheet) adı, 31 karaktere kısaltılır
+            baslik: A1'deki rapor başlığı
+            sutunlar: 4. satırdaki tablo başlıkları
+            genislikler: Sütun genişlikleri (sütun sırasıyla)
+            alt_baslik: A2'deki açıklama (tarih aralığı, rapor tarihi vb.)
+            renk: Tablo başlığı dolgu rengi (RGB hex)
+            baslik_yazi_rengi: Tablo başlığı yazı rengi; None ise siyah
+            ortala: Başlık ve tablo başlığı ortalansın mı
+        """
+        self.sayfa_adi = _SAYFA_ADI_KARAKTER.sub(' ', sayfa_adi)[:31] or 'Rapor'
+        self.baslik = baslik
+        self.sutunlar = list(sutunlar)
+        self.genislikler = list(genislikler or [])
+        self.alt_baslik = alt_baslik
+        self.renk = renk
+        self.baslik_yazi_rengi = baslik_yazi_rengi
+        self.ortala = ortala
+        self.satir_sayisi = 0
+
+    def _workbook_xml(self):
+        return _XML_BASI + (
+            f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+            f'<sheets><sheet name="{escape(self.sayfa_adi, {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        )
+
+    def _styles_xml(self):
+        hizalama = '<alignment horizontal="center"/>' if self.ortala else ''
+        hizala = ' applyAlignment="1"' if self.ortala else ''
+        yazi_rengi = f'<color rgb="FF{self.baslik_yazi_rengi}"/>' if self.baslik_yazi_rengi else ''
+        return _XML_BASI + (
+            f'<styleSheet xmlns="{_MAIN_NS}">'
+            '<fonts count="3">'
+            '<font><sz val="11"/><name val="Calibri"/></font>'
+            '<font><b/><sz val="16"/><name val="Calibri"/></font>'
+            f'<font><b/><sz val="11"/>{yazi_rengi}<name val="Calibri"/></font>'
+            '</fonts>'
+            '<fills count="3">'
+            '<fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill>'
+            f'<fill><patternFill patternType="solid"><fgColor rgb="FF{self.renk}"/>'
+            f'<bgColor rgb="FF{self.renk}"/></patternFill></fill>'
+            '</fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            '<cellXfs count="4">'
+            '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+            f'<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"{hizala}>{hizalama}</xf>'
+            f'<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"{hizala}>{hizalama}</xf>'
+            f'<xf numFmtId="0" fontId="2" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1"{hizala}>'
+            f'{hizalama}</xf>'
+            '</cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            '</styleSheet>'
+        )
+
+    def _satir(self, no, degerler, stil=0):
+        hucreler = ''.join(
+            _hucre(f'{sutun_harfi(i)}{no}', deger, stil) for i, deger in enumerate(degerler, 1)
+        )
+        return f'<row r="{no}">{hucreler}</row>'
+
+    def _sayfa_parcalari(self, satirlar):
+        """Sayfa XML'ini SATIR_PARTISI satırlık parçalar halinde üretir"""
+        son_sutun = sutun_harfi(max(len(self.sutunlar), 1))
+
+        bas = [_XML_BASI, f'<worksheet xmlns="{_MAIN_NS}">']
+        if self.genislikler:
+            bas.append('<cols>')
+            for i, genislik in enumerate(self.genislikler, 1):
+                bas.append(f'<col min="{i}" max="{i}" width="{genislik}" customWidth="1"/>')
+            bas.append('</cols>')
+        bas.append('<sheetData>')
+        bas.append(self._satir(1, [self.baslik], _STIL_BASLIK))
+        if self.alt_baslik:
+            bas.append(self._satir(2, [self.alt_baslik], _STIL_ALT_BASLIK))
+        bas.append(self._satir(4, self.sutunlar, _STIL_TABLO_BASLIGI))
+        yield ''.join(bas)
+
+        parti = []
+        no = 4
+        for degerler in satirlar:
+            no += 1
+            parti.append(self._satir(no, degerler))
+            self.satir_sayisi = no - 4
+            if len(parti) >= SATIR_PARTISI:
+                yield ''.join(parti)
+                parti = []
+        if parti:
+            yield ''.join(parti)
+
+        son = '</sheetData>'
+        if son_sutun != 'A':
+            birlesik = [f'<mergeCell ref="A1:{son_sutun}1"/>']
+            if self.alt_baslik and self.ortala:
+                birlesik.append(f'<mergeCell ref="A2:{son_sutun}2"/>')
+            son += f'<mergeCells count="{len(birlesik)}">{"".join(birlesik)}</mergeCells>'
+        yield son + '</worksheet>'
+
+    def uret(self, satirlar):
+        """
+        XLSX dosyasını parça parça üretir.
+
+        Args:
+            satirlar: Her biri sütun değerleri dizisi olan satırlar (generator olabilir)
+
+        Yields:
+            bytes: İstemciye gönderilecek dosya baytları
+        """
+        zip_akisi = ZipAkisi()
+        yield zip_akisi.dosya_ekle('[Content_Types].xml', _CONTENT_TYPES)
+        yield zip_akisi.dosya_ekle('_rels/.rels', _ROOT_RELS)
+        yield zip_akisi.dosya_ekle('xl/workbook.xml', self._workbook_xml())
+        yield zip_akisi.dosya_ekle('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield zip_akisi.dosya_ekle('xl/styles.xml', self._styles_xml())
+        yield from zip_akisi.dosya_akisi('xl/worksheets/sheet1.xml', self._sayfa_parcalari(satirlar))
+        yield zip_akisi.kapat()
+
+
+def excel_yaniti(akis, satirlar, dosya_adi, modul=None):
+    """
+    ExcelAkisi'ni indirme yanıtı olarak akıtır.
+
+    Satırlar yanıt gönderilirken okunur (request context korunur). Akış
+    sırasında hata olursa loglanır ve bağlantı kesilir; istemci yarım
+    dosyayı tamamlanmış sanmaz.
+    """
+    def uret():
+        try:
+            yield from akis.uret(satirlar)
+        except Exception as e:
+            log_hata(e, modul=modul, extra_info={'dosya': dosya_adi, 'satir': akis.satir_sayisi})
+            raise
+
+    ascii_adi = unicodedata.normalize('NFKD', dosya_adi).encode('ascii', 'ignore').decode('ascii').replace('"', '')
+    return Response(
+        stream_with_context(uret()),
+        mimetype=XLSX_MIMETYPE,
+        headers={
+            'Content-Disposition': f'attachment; filename="{ascii_adi}"; filename*=UTF-8\'\'{quote(dosya_adi)}',
+            'X-Accel-Buffering': 'no'
+        }
+    )
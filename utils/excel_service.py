@@ -11,7 +11,7 @@ import openpyxl
 import pandas as pd
 from datetime import datetime, date, time
 from models import db, MisafirKayit, DosyaYukleme, Oda, Kat
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, update
 import traceback
 import re
 import pytz
@@ -75,7 +75,8 @@ class ExcelProcessingService:
         return 'in_house'
     
     @staticmethod
-    def process_excel_file(file_path, islem_kodu, user_id, otel_id=None, override_dosya_tipi=None):
+    def process_excel_file(file_path, islem_kodu, user_id, otel_id=None, override_dosya_tipi=None,
+                           chunk_size=None, devam=None, ilerleme_callback=None):
         """
         Excel dosyasını işler ve veritabanına kaydeder
         
@@ -89,6 +90,12 @@ class ExcelProcessingService:
             user_id: Yükleyen kullanıcı ID
             otel_id: Otel ID (opsiyonel, filtreleme için)
             override_dosya_tipi: Kullanıcının onayladığı dosya tipi (opsiyonel)
+            chunk_size: Verilirse kayıtlar bu boyutta parçalar halinde commit edilir
+            devam: Yarım kalan işten devam durumu
+                   {'islenen_satir': int, 'basarili_satir': int, 'kayit_hatalari': list}
+            ilerleme_callback: Her parça commit edilmeden önce çağrılır
+                   (islenen_satir, toplam_satir, basarili_satir, kayit_hatalari);
+                   aynı session'a yazılan ilerleme parça ile atomik commit edilir
             
         Returns:
             dict: {
@@ -111,17 +118,17 @@ class ExcelProcessingService:
                     p4001_info['dosya_tipi'] = override_dosya_tipi
                     print(f"📋 Kullanıcı override: {override_dosya_tipi}")
                 return ExcelProcessingService._process_p4001_file(
-                    file_path, islem_kodu, user_id, otel_id, p4001_info
+                    file_path, islem_kodu, user_id, otel_id, p4001_info,
+                    chunk_size=chunk_size, devam=devam, ilerleme_callback=ilerleme_callback
                 )
             
-            # Standart format - Excel dosyasını aç
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
-            sheet = workbook.active
-            
-            # İlk satırdan başlıkları al
-            headers = []
-            for cell in sheet[1]:
-                headers.append(cell.value)
+            # Standart format - Sayfa tek seferde DataFrame'e okunur
+            # (tarih algılama, doğrulama ve kayıt aynı DataFrame üzerinden yapılır)
+            df_std = pd.read_excel(file_path, header=0, dtype=object)
+            headers = [
+                None if str(col).startswith('Unnamed:') else col
+                for col in df_std.columns
+            ]
             
             # Kullanıcı override ettiyse direkt onu kullan
             if override_dosya_tipi and override_dosya_tipi in ['in_house', 'arrivals', 'departures']:
@@ -131,10 +138,8 @@ class ExcelProcessingService:
                 # Önce header bazlı dosya tipini algıla
                 header_dosya_tipi = ExcelProcessingService.detect_file_type(headers)
                 
-                # Tarih bazlı akıllı algılama için verileri oku
+                # Tarih bazlı akıllı algılama
                 try:
-                    df_std = pd.read_excel(file_path, header=0)
-                    
                     # Arrival ve Departure sütun adlarını bul
                     arrival_col = 'Arrival' if 'Arrival' in df_std.columns else None
                     departure_col = 'Departure' if 'Departure' in df_std.columns else None
@@ -178,93 +183,22 @@ class ExcelProcessingService:
                     'hatalar': ['Gerekli sütunlar (Room no, Arrival, Departure) bulunamadı']
                 }
             
-            # Satırları işle
-            toplam_satir = 0
-            basarili_satir = 0
-            hatali_satir = 0
-            hatalar = []
-            
-            for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-                toplam_satir += 1
-                
-                try:
-                    # Satır verilerini çıkar
-                    row_data = ExcelProcessingService._extract_row_data(
-                        row, col_indices, dosya_tipi
-                    )
-                    
-                    # Veriyi doğrula
-                    is_valid, error_msg = ExcelProcessingService.validate_row(row_data, dosya_tipi)
-                    
-                    if not is_valid:
-                        hatali_satir += 1
-                        hatalar.append(f"Satır {row_idx}: {error_msg}")
-                        continue
-                    
-                    # Odayı bul veya oluştur
-                    oda = ExcelProcessingService.get_or_create_oda(
-                        row_data['oda_no'], otel_id
-                    )
-                    
-                    if not oda:
-                        hatali_satir += 1
-                        hatalar.append(f"Satır {row_idx}: Oda '{row_data['oda_no']}' bulunamadı veya oluşturulamadı")
-                        continue
-                    
-                    # UPSERT MANTIĞI - Aynı oda + kayıt tipi için:
-                    # 1. Mevcut kayıt varsa GÜNCELLE (en güncel bilgi)
-                    # 2. Yoksa yeni kayıt EKLE
-                    # NOT: Oda bazlı unique kayıt tutuyoruz, tarih farkı önemli değil
-                    giris_date = row_data['giris_tarihi'].date() if isinstance(row_data['giris_tarihi'], datetime) else row_data['giris_tarihi']
-                    cikis_date = row_data['cikis_tarihi'].date() if isinstance(row_data['cikis_tarihi'], datetime) else row_data['cikis_tarihi']
-                    
-                    # Aynı oda + kayıt tipi için mevcut kayıt var mı?
-                    # Tarih kontrolü: Yeni yüklenen dosyanın tarihleri ile çakışan kayıt
-                    mevcut_kayit = MisafirKayit.query.filter(
-                        MisafirKayit.oda_id == oda.id,
-                        MisafirKayit.kayit_tipi == kayit_tipi,
-                        # Tarih çakışması kontrolü: mevcut kayıt ile yeni kayıt aynı döneme denk geliyor mu?
-                        MisafirKayit.giris_tarihi <= cikis_date,
-                        MisafirKayit.cikis_tarihi >= giris_date
-                    ).first()
-                    
-                    if mevcut_kayit:
-                        # UPSERT: Mevcut kaydı güncelle (en güncel bilgi)
-                        mevcut_kayit.giris_tarihi = giris_date
-                        mevcut_kayit.cikis_tarihi = cikis_date
-                        mevcut_kayit.misafir_sayisi = row_data['misafir_sayisi']
-                        mevcut_kayit.islem_kodu = islem_kodu  # Son yükleme kodu
-                        if row_data.get('giris_saati'):
-                            mevcut_kayit.giris_saati = row_data['giris_saati']
-                        if row_data.get('cikis_saati'):
-                            mevcut_kayit.cikis_saati = row_data['cikis_saati']
-                        # Güncelleme zamanını kaydet
-                        mevcut_kayit.guncelleme_tarihi = get_kktc_now()
-                        basarili_satir += 1
-                    else:
-                        # INSERT: Yeni kayıt oluştur
-                        misafir_kayit = MisafirKayit(
-                            oda_id=oda.id,
-                            islem_kodu=islem_kodu,
-                            misafir_sayisi=row_data['misafir_sayisi'],
-                            giris_tarihi=giris_date,
-                            giris_saati=row_data.get('giris_saati'),
-                            cikis_tarihi=cikis_date,
-                            cikis_saati=row_data.get('cikis_saati'),
-                            kayit_tipi=kayit_tipi,
-                            olusturan_id=user_id
-                        )
-                        db.session.add(misafir_kayit)
-                        basarili_satir += 1
-                    basarili_satir += 1
-                    
-                except Exception as e:
-                    hatali_satir += 1
-                    hatalar.append(f"Satır {row_idx}: {str(e)}")
-                    continue
+            # Sütun bazlı doğrulama ve parse
+            toplam_satir = len(df_std)
+            gecerli, hatalar = ExcelProcessingService._prepare_standard_rows(
+                df_std, col_indices, dosya_tipi
+            )
             
-            # Toplu kaydet
-            db.session.commit()
+            # Odalar tek IN sorgusu, çakışan kayıtlar tek sorgu, yazım toplu (parça başına commit)
+            basarili_satir, kayit_hatalari = ExcelProcessingService._apply_in_chunks(
+                gecerli,
+                lambda parca: ExcelProcessingService._bulk_upsert_misafir_kayitlari(
+                    parca, otel_id, kayit_tipi, islem_kodu, user_id
+                ),
+                chunk_size, devam, ilerleme_callback
+            )
+            hatalar.extend(kayit_hatalari)
+            hatali_satir = len(hatalar)
             
             # Görevlendirme sistemi hook'u - Görevleri oluştur
             try:
@@ -298,6 +232,289 @@ class ExcelProcessingService:
                 'hatalar': [str(e), traceback.format_exc()]
             }
     
+    @staticmethod
+    def _parse_date_column(series):
+        """
+        Tarih sütununu vektörel olarak parse eder (parse_date ile aynı kurallar).
+        
+        date/datetime hücreleri doğrudan, string hücreler parse_date'teki
+        format sırasıyla denenir. Sayı vb. diğer tipler geçersiz sayılır.
+        
+        Returns:
+            pd.Series: datetime64 (normalize), geçersizler NaT
+        """
+        sonuc = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+        
+        tarih_mask = series.map(lambda v: isinstance(v, (date, pd.Timestamp)))
+        if tarih_mask.any():
+            sonuc[tarih_mask] = pd.to_datetime(series[tarih_mask], errors='coerce')
+        
+        str_mask = series.map(lambda v: isinstance(v, str))
+        if str_mask.any():
+            metinler = series[str_mask].str.strip()
+            for fmt in ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d']:
+                kalan = metinler[sonuc[metinler.index].isna()]
+                if kalan.empty:
+                    break
+                sonuc[kalan.index] = pd.to_datetime(kalan, format=fmt, errors='coerce')
+        
+        return sonuc.dt.normalize()
+    
+    @staticmethod
+    def _prepare_standard_rows(df, col_indices, dosya_tipi):
+        """
+        Standart format satırlarını sütun bazlı doğrular (validate_row kuralları).
+        
+        Args:
+            df: pd.read_excel ile okunmuş DataFrame (header=0, dtype=object)
+            col_indices: _get_column_indices sonucu
+            dosya_tipi: 'in_house', 'arrivals' veya 'departures'
+            
+        Returns:
+            tuple: (geçerli satırlar list[dict], hatalar list[str])
+                   dict: excel_row, oda_no, giris_tarihi, cikis_tarihi,
+                         misafir_sayisi, giris_saati, cikis_saati
+        """
+        def sutun(key):
+            return df.iloc[:, col_indices[key]] if key in col_indices else None
+        
+        def oda_str(value):
+            if value is None or (not isinstance(value, str) and pd.isna(value)) or not value:
+                return None
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            return str(value).strip() or None
+        
+        oda_no = sutun('oda_no').map(oda_str)
+        giris = ExcelProcessingService._parse_date_column(sutun('giris_tarihi'))
+        cikis = ExcelProcessingService._parse_date_column(sutun('cikis_tarihi'))
+        
+        # Misafir sayısı
+        if 'misafir_sayisi' in col_indices:
+            misafir_raw = sutun('misafir_sayisi').replace({'': None, '-': None})
+            misafir = pd.to_numeric(misafir_raw, errors='coerce')
+        else:
+            misafir = pd.Series(float('nan'), index=df.index)
+        
+        if dosya_tipi == 'departures':
+            # Departures için misafir sayısı zorunlu değil, varsayılan 1
+            misafir = misafir.where(misafir > 0, 1)
+        
+        # Hata mesajları - validate_row ile aynı öncelik sırası
+        hata = pd.Series(None, index=df.index, dtype=object)
+        kurallar = [
+            (oda_no.isna(), "Oda numarası boş"),
+            (giris.isna(), "Geçersiz giriş tarihi"),
+            (cikis.isna(), "Geçersiz çıkış tarihi"),
+            (giris >= cikis, "Giriş tarihi çıkış tarihinden önce olmalı"),
+        ]
+        if dosya_tipi != 'departures':
+            kurallar += [
+                (misafir.isna(), "Geçersiz misafir sayısı"),
+                (misafir <= 0, "Misafir sayısı eksik"),
+            ]
+        for mask, mesaj in kurallar:
+            hata = hata.mask(hata.isna() & mask, mesaj)
+        
+        excel_row = df.index + 2  # Header 1. satır
+        hatalar = [
+            f"Satır {excel_row[i]}: {mesaj}"
+            for i, mesaj in enumerate(hata) if pd.notna(mesaj)
+        ]
+        
+        gecerli_mask = hata.isna()
+        if not gecerli_mask.any():
+            return [], hatalar
+        
+        # Saatler sadece ilgili dosya tipinde okunur (az sayıda hücre)
+        giris_saati = None
+        cikis_saati = None
+        if dosya_tipi == 'arrivals' and 'giris_saati' in col_indices:
+            giris_saati = sutun('giris_saati')[gecerli_mask].map(ExcelProcessingService.parse_time)
+        if dosya_tipi == 'departures' and 'cikis_saati' in col_indices:
+            cikis_saati = sutun('cikis_saati')[gecerli_mask].map(ExcelProcessingService.parse_time)
+        
+        gecerli = []
+        for pos, idx in enumerate(df.index[gecerli_mask]):
+            gecerli.append({
+                'excel_row': int(idx) + 2,
+                'oda_no': oda_no[idx],
+                'giris_tarihi': giris[idx].date(),
+                'cikis_tarihi': cikis[idx].date(),
+                'misafir_sayisi': int(misafir[idx]),
+                'giris_saati': giris_saati.iloc[pos] if giris_saati is not None else None,
+                'cikis_saati': cikis_saati.iloc[pos] if cikis_saati is not None else None,
+            })
+        
+        return gecerli, hatalar
+    
+    @staticmethod
+    def _apply_in_chunks(satirlar, uygula, chunk_size=None, devam=None, ilerleme_callback=None):
+        """
+        Hazırlanmış satırları parçalar halinde yazar; her parça ayrı commit edilir.
+        
+        devam verilirse daha önce commit edilmiş satırlar atlanır; satır
+        sırası deterministik olduğu için yarıda kalan iş kaldığı yerden sürer.
+        
+        Args:
+            satirlar: Doğrulanmış satırlar (list)
+            uygula: parca -> (basarili, hatalar)
+            chunk_size: Parça boyutu (None ise tek parça)
+            devam: {'islenen_satir', 'basarili_satir', 'kayit_hatalari'}
+            ilerleme_callback: (islenen, toplam, basarili, hatalar) - commit öncesi çağrılır
+            
+        Returns:
+            tuple: (basarili_satir, kayit_hatalari) - devam durumu dahil kümülatif
+        """
+        devam = devam or {}
+        basarili = devam.get('basarili_satir', 0)
+        kayit_hatalari = list(devam.get('kayit_hatalari') or [])
+        toplam = len(satirlar)
+        boyut = chunk_size or max(toplam, 1)
+        
+        for baslangic in range(devam.get('islenen_satir', 0), toplam, boyut):
+            parca_basarili, parca_hatalari = uygula(satirlar[baslangic:baslangic + boyut])
+            basarili += parca_basarili
+            kayit_hatalari.extend(parca_hatalari)
+            
+            if ilerleme_callback:
+                ilerleme_callback(min(baslangic + boyut, toplam), toplam, basarili, kayit_hatalari)
+            
+            db.session.commit()
+        
+        return basarili, kayit_hatalari
+    
+    @staticmethod
+    def _resolve_odalar(oda_nolar, otel_id=None):
+        """
+        Oda numaralarını tek IN sorgusu ile çözer (get_or_create_oda'nın toplu hali).
+        
+        Returns:
+            dict: {oda_no: oda_id}
+        """
+        oda_nolar = list({no for no in oda_nolar if no})
+        if not oda_nolar:
+            return {}
+        
+        query = db.session.query(Oda.id, Oda.oda_no).filter(Oda.oda_no.in_(oda_nolar))
+        if otel_id:
+            query = query.join(Kat).filter(Kat.otel_id == otel_id)
+        
+        odalar = {}
+        for oda_id, oda_no in query.order_by(Oda.id):
+            odalar.setdefault(oda_no, oda_id)
+        return odalar
+    
+    @staticmethod
+    def _bulk_upsert_misafir_kayitlari(satirlar, otel_id, kayit_tipi, islem_kodu, user_id):
+        """
+        Doğrulanmış satırları MisafirKayit'a toplu yazar.
+        
+        UPSERT mantığı tek tek işlemeyle aynıdır: aynı oda + kayıt tipi için
+        tarihleri çakışan kayıt varsa güncellenir, yoksa yeni kayıt eklenir.
+        Dosyada aynı oda için çakışan birden fazla satır varsa sonraki satır
+        öncekini günceller. Çakışma kuralı bir unique constraint ile ifade
+        edilemediği için eşleştirme bellekte yapılır; yazım primary key ile
+        toplu UPDATE ve toplu INSERT (executemany) olarak gider.
+        
+        Returns:
+            tuple: (basarili_satir, hatalar)
+        """
+        if not satirlar:
+            return 0, []
+        
+        hatalar = []
+        odalar = ExcelProcessingService._resolve_odalar(
+            [s['oda_no'] for s in satirlar], otel_id
+        )
+        
+        eslesen = []
+        for satir in satirlar:
+            oda_id = odalar.get(satir['oda_no'])
+            if not oda_id:
+                hatalar.append(
+                    f"Satır {satir['excel_row']}: Oda '{satir['oda_no']}' bulunamadı veya oluşturulamadı"
+                )
+                continue
+            satir['oda_id'] = oda_id
+            eslesen.append(satir)
+        
+        if not eslesen:
+            return 0, hatalar
+        
+        # Dosyanın tarih aralığıyla çakışan tüm mevcut kayıtlar tek sorguda
+        en_erken = min(s['giris_tarihi'] for s in eslesen)
+        en_gec = max(s['cikis_tarihi'] for s in eslesen)
+        mevcutlar = db.session.query(
+            MisafirKayit.id, MisafirKayit.oda_id,
+            MisafirKayit.giris_tarihi, MisafirKayit.cikis_tarihi
+        ).filter(
+            MisafirKayit.oda_id.in_({s['oda_id'] for s in eslesen}),
+            MisafirKayit.kayit_tipi == kayit_tipi,
+            MisafirKayit.giris_tarihi <= en_gec,
+            MisafirKayit.cikis_tarihi >= en_erken
+        ).order_by(MisafirKayit.id).all()
+        
+        # oda_id -> [aday kayıt]; aday: {'id'|None, 'giris', 'cikis', 'yeni': dict|None}
+        adaylar = {}
+        for kayit in mevcutlar:
+            adaylar.setdefault(kayit.oda_id, []).append({
+                'id': kayit.id, 'giris': kayit.giris_tarihi, 'cikis': kayit.cikis_tarihi, 'yeni': None
+            })
+        
+        guncellemeler = {}
+        yeni_kayitlar = []
+        simdi = get_kktc_now()
+        
+        for satir in eslesen:
+            aday = next((
+                a for a in adaylar.get(satir['oda_id'], [])
+                if a['giris'] <= satir['cikis_tarihi'] and a['cikis'] >= satir['giris_tarihi']
+            ), None)
+            
+            if aday is None:
+                yeni = {
+                    'oda_id': satir['oda_id'],
+                    'islem_kodu': islem_kodu,
+                    'misafir_sayisi': satir['misafir_sayisi'],
+                    'giris_tarihi': satir['giris_tarihi'],
+                    'giris_saati': satir['giris_saati'],
+                    'cikis_tarihi': satir['cikis_tarihi'],
+                    'cikis_saati': satir['cikis_saati'],
+                    'kayit_tipi': kayit_tipi,
+                    'olusturan_id': user_id
+                }
+                yeni_kayitlar.append(yeni)
+                adaylar.setdefault(satir['oda_id'], []).append({
+                    'id': None, 'giris': satir['giris_tarihi'], 'cikis': satir['cikis_tarihi'], 'yeni': yeni
+                })
+                continue
+            
+            # Mevcut (veya bu dosyada eklenmiş) kaydı en güncel bilgiyle güncelle
+            if aday['yeni'] is not None:
+                hedef = aday['yeni']
+            else:
+                hedef = guncellemeler.setdefault(aday['id'], {'id': aday['id']})
+                hedef['guncelleme_tarihi'] = simdi
+            
+            hedef['giris_tarihi'] = satir['giris_tarihi']
+            hedef['cikis_tarihi'] = satir['cikis_tarihi']
+            hedef['misafir_sayisi'] = satir['misafir_sayisi']
+            hedef['islem_kodu'] = islem_kodu
+            if satir['giris_saati']:
+                hedef['giris_saati'] = satir['giris_saati']
+            if satir['cikis_saati']:
+                hedef['cikis_saati'] = satir['cikis_saati']
+            aday['giris'] = satir['giris_tarihi']
+            aday['cikis'] = satir['cikis_tarihi']
+        
+        if guncellemeler:
+            db.session.execute(update(MisafirKayit), list(guncellemeler.values()))
+        if yeni_kayitlar:
+            db.session.execute(insert(MisafirKayit), yeni_kayitlar)
+        
+        return len(eslesen), hatalar
+    
     @staticmethod
     def _get_column_indices(headers):
         """Sütun başlıklarından indeksleri bul"""
@@ -1035,7 +1252,75 @@ class ExcelProcessingService:
         return ExcelProcessingService.parse_date(date_value)
     
     @staticmethod
-    def _process_p4001_file(file_path, islem_kodu, user_id, otel_id, p4001_info):
+    def _bulk_insert_p4001_kayitlari(adaylar, otel_id, kayit_tipi, islem_kodu, user_id):
+        """
+        P4001 satırlarını toplu ekler. Odalar tek IN sorgusu ile çözülür,
+        aynı oda + tarih + kayıt tipi olan mevcut kayıtlar tek sorguda
+        bulunur ve duplicate olarak raporlanır.
+        
+        Returns:
+            tuple: (basarili_satir, hatalar)
+        """
+        hatalar = []
+        if not adaylar:
+            return 0, hatalar
+        
+        # Odalar tek IN sorgusu ile çözülür
+        odalar = ExcelProcessingService._resolve_odalar(
+            [a['oda_no'] for a in adaylar], otel_id
+        )
+        
+        # Duplicate kontrolü - aynı oda + tarih + kayıt tipi, tek sorguda
+        oda_ids = {oda_id for oda_id in odalar.values()}
+        mevcut_anahtarlar = set()
+        if oda_ids:
+            mevcut_anahtarlar = {
+                (row.oda_id, row.giris, row.cikis)
+                for row in db.session.query(
+                    MisafirKayit.oda_id,
+                    db.func.date(MisafirKayit.giris_tarihi).label('giris'),
+                    db.func.date(MisafirKayit.cikis_tarihi).label('cikis')
+                ).filter(
+                    MisafirKayit.oda_id.in_(oda_ids),
+                    MisafirKayit.kayit_tipi == kayit_tipi,
+                    MisafirKayit.giris_tarihi >= min(a['giris_tarihi'] for a in adaylar),
+                    MisafirKayit.giris_tarihi <= max(a['giris_tarihi'] for a in adaylar)
+                )
+            }
+        
+        yeni_kayitlar = []
+        for aday in adaylar:
+            oda_id = odalar.get(aday['oda_no'])
+            if not oda_id:
+                hatalar.append(f"Satır {aday['excel_row']}: Oda '{aday['oda_no']}' bulunamadı")
+                continue
+        
+            anahtar = (oda_id, aday['giris_tarihi'], aday['cikis_tarihi'])
+            if anahtar in mevcut_anahtarlar:
+                hatalar.append(
+                    f"Satır {aday['excel_row']}: Oda {aday['oda_no']} için {kayit_tipi} kaydı zaten mevcut (Duplicate)"
+                )
+                continue
+            mevcut_anahtarlar.add(anahtar)
+        
+            yeni_kayitlar.append({
+                'oda_id': oda_id,
+                'islem_kodu': islem_kodu,
+                'misafir_sayisi': aday['misafir_sayisi'],
+                'giris_tarihi': aday['giris_tarihi'],
+                'cikis_tarihi': aday['cikis_tarihi'],
+                'kayit_tipi': kayit_tipi,
+                'olusturan_id': user_id
+            })
+        
+        if yeni_kayitlar:
+            db.session.execute(insert(MisafirKayit), yeni_kayitlar)
+        
+        return len(yeni_kayitlar), hatalar
+    
+    @staticmethod
+    def _process_p4001_file(file_path, islem_kodu, user_id, otel_id, p4001_info,
+                            chunk_size=None, devam=None, ilerleme_callback=None):
         """
         P4001 (depo yöneticisi) formatındaki Excel dosyasını işler
         
@@ -1045,6 +1330,7 @@ class ExcelProcessingService:
             user_id: Yükleyen kullanıcı ID
             otel_id: Otel ID
             p4001_info: Format bilgileri
+            chunk_size, devam, ilerleme_callback: process_excel_file ile aynı
             
         Returns:
             dict: İşlem sonucu
@@ -1086,6 +1372,7 @@ class ExcelProcessingService:
             basarili_satir = 0
             hatali_satir = 0
             hatalar = []
+            adaylar = []  # Parse edilmiş satırlar, DB işlemleri döngüden sonra toplu
             
             for idx, row in df.iterrows():
                 # Oda numarası boşsa atla (2. misafir adı satırları)
@@ -1138,48 +1425,28 @@ class ExcelProcessingService:
                         hatalar.append(f"Satır {excel_row}: Giriş tarihi çıkış tarihinden önce olmalı")
                         continue
                     
-                    # Odayı bul
-                    oda = ExcelProcessingService.get_or_create_oda(oda_no_str, otel_id)
-                    
-                    if not oda:
-                        hatali_satir += 1
-                        hatalar.append(f"Satır {excel_row}: Oda '{oda_no_str}' bulunamadı")
-                        continue
-                    
-                    # Duplicate kontrolü - kayıt tipini de kontrol et
-                    mevcut_kayit = MisafirKayit.query.filter(
-                        MisafirKayit.oda_id == oda.id,
-                        db.func.date(MisafirKayit.giris_tarihi) == giris_tarihi,
-                        db.func.date(MisafirKayit.cikis_tarihi) == cikis_tarihi,
-                        MisafirKayit.kayit_tipi == kayit_tipi  # Kayıt tipini de kontrol et
-                    ).first()
-                    
-                    if mevcut_kayit:
-                        hatali_satir += 1
-                        hatalar.append(f"Satır {excel_row}: Oda {oda_no_str} için {kayit_tipi} kaydı zaten mevcut (Duplicate)")
-                        continue
-                    
-                    # MisafirKayit oluştur
-                    misafir_kayit = MisafirKayit(
-                        oda_id=oda.id,
-                        islem_kodu=islem_kodu,
-                        misafir_sayisi=misafir_sayisi,
-                        giris_tarihi=giris_tarihi,
-                        cikis_tarihi=cikis_tarihi,
-                        kayit_tipi=kayit_tipi,
-                        olusturan_id=user_id
-                    )
-                    
-                    db.session.add(misafir_kayit)
-                    basarili_satir += 1
+                    adaylar.append({
+                        'excel_row': excel_row,
+                        'oda_no': oda_no_str,
+                        'giris_tarihi': giris_tarihi,
+                        'cikis_tarihi': cikis_tarihi,
+                        'misafir_sayisi': misafir_sayisi
+                    })
                     
                 except Exception as e:
                     hatali_satir += 1
                     hatalar.append(f"Satır {excel_row}: {str(e)}")
                     continue
             
-            # Toplu kaydet
-            db.session.commit()
+            basarili_satir, kayit_hatalari = ExcelProcessingService._apply_in_chunks(
+                adaylar,
+                lambda parca: ExcelProcessingService._bulk_insert_p4001_kayitlari(
+                    parca, otel_id, kayit_tipi, islem_kodu, user_id
+                ),
+                chunk_size, devam, ilerleme_callback
+            )
+            hatali_satir += len(kayit_hatalari)
+            hatalar.extend(kayit_hatalari)
             
             # Görevlendirme hook'u
             try:
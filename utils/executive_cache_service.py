@@ -1,10 +1,13 @@
 """
 Executive Dashboard Cache Service
 Executive dashboard endpoint'leri için cache yönetimi
+
+Invalidation etiket tabanlıdır (utils.cache_tags): tüm kayıtlar 'executive',
+period'lu kayıtlar ayrıca 'executive:period:{period}' etiketini taşır.
 """
 
 import logging
-from utils.cache_helper import cache_get, cache_set, cache_delete_pattern
+from utils.cache_helper import cache_get, cache_set, cache_invalidate_tags
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +25,13 @@ class ExecutiveCacheService:
     TASK_COMPLETION_TTL = 60  # 1 dakika
     ACTIVITY_FEED_TTL = 30  # 30 saniye
     
+    @staticmethod
+    def _etiketler(period: str = None):
+        etiketler = [ExecutiveCacheService.CACHE_PREFIX]
+        if period:
+            etiketler.append(f"{ExecutiveCacheService.CACHE_PREFIX}:period:{period}")
+        return etiketler
+    
     @staticmethod
     def get_kpi_cache_key(period: str = 'today'):
         """KPI summary cache key"""
@@ -37,7 +47,8 @@ class ExecutiveCacheService:
     def set_kpi_summary(data: dict, period: str = 'today'):
         """KPI summary'yi cache'le"""
         cache_key = ExecutiveCacheService.get_kpi_cache_key(period)
-        return cache_set(cache_key, data, ExecutiveCacheService.KPI_SUMMARY_TTL)
+        return cache_set(cache_key, data, ExecutiveCacheService.KPI_SUMMARY_TTL,
+                         tags=ExecutiveCacheService._etiketler(period))
     
     @staticmethod
     def get_hotel_comparison_cache_key(period: str = 'today'):
@@ -54,7 +65,8 @@ class ExecutiveCacheService:
     def set_hotel_comparison(data: list, period: str = 'today'):
         """Hotel comparison'ı cache'le"""
         cache_key = ExecutiveCacheService.get_hotel_comparison_cache_key(period)
-        return cache_set(cache_key, data, ExecutiveCacheService.HOTEL_COMPARISON_TTL)
+        return cache_set(cache_key, data, ExecutiveCacheService.HOTEL_COMPARISON_TTL,
+                         tags=ExecutiveCacheService._etiketler(period))
     
     @staticmethod
     def get_consumption_trends_cache_key(period: str = 'today', days: int = None):
@@ -74,7 +86,8 @@ class ExecutiveCacheService:
     def set_consumption_trends(data: dict, period: str = 'today', days: int = None):
         """Consumption trends'i cache'le"""
         cache_key = ExecutiveCacheService.get_consumption_trends_cache_key(period, days)
-        return cache_set(cache_key, data, ExecutiveCacheService.CONSUMPTION_TRENDS_TTL)
+        return cache_set(cache_key, data, ExecutiveCacheService.CONSUMPTION_TRENDS_TTL,
+                         tags=ExecutiveCacheService._etiketler(period))
     
     @staticmethod
     def get_room_control_stats_cache_key(period: str = 'today', days: int = None):
@@ -94,7 +107,8 @@ class ExecutiveCacheService:
     def set_room_control_stats(data: dict, period: str = 'today', days: int = None):
         """Room control stats'i cache'le"""
         cache_key = ExecutiveCacheService.get_room_control_stats_cache_key(period, days)
-        return cache_set(cache_key, data, ExecutiveCacheService.ROOM_CONTROL_STATS_TTL)
+        return cache_set(cache_key, data, ExecutiveCacheService.ROOM_CONTROL_STATS_TTL,
+                         tags=ExecutiveCacheService._etiketler(period))
     
     @staticmethod
     def get_task_completion_cache_key(period: str = 'today'):
@@ -111,7 +125,8 @@ class ExecutiveCacheService:
     def set_task_completion(data: list, period: str = 'today'):
         """Task completion'ı cache'le"""
         cache_key = ExecutiveCacheService.get_task_completion_cache_key(period)
-        return cache_set(cache_key, data, ExecutiveCacheService.TASK_COMPLETION_TTL)
+        return cache_set(cache_key, data, ExecutiveCacheService.TASK_COMPLETION_TTL,
+                         tags=ExecutiveCacheService._etiketler(period))
     
     @staticmethod
     def get_activity_feed_cache_key(limit: int = 50):
@@ -128,20 +143,19 @@ class ExecutiveCacheService:
     def set_activity_feed(data: list, limit: int = 50):
         """Activity feed'i cache'le"""
         cache_key = ExecutiveCacheService.get_activity_feed_cache_key(limit)
-        return cache_set(cache_key, data, ExecutiveCacheService.ACTIVITY_FEED_TTL)
+        return cache_set(cache_key, data, ExecutiveCacheService.ACTIVITY_FEED_TTL,
+                         tags=ExecutiveCacheService._etiketler())
     
     @staticmethod
     def invalidate_all():
         """Tüm executive dashboard cache'ini temizle"""
-        pattern = f"{ExecutiveCacheService.CACHE_PREFIX}:*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(ExecutiveCacheService.CACHE_PREFIX)
         logger.info(f"Executive dashboard cache temizlendi: {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_period(period: str):
         """Belirli bir period için cache'i temizle"""
-        pattern = f"{ExecutiveCacheService.CACHE_PREFIX}:*:{period}*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"{ExecutiveCacheService.CACHE_PREFIX}:period:{period}")
         logger.info(f"Executive dashboard cache temizlendi (period={period}): {deleted} key")
         return deleted
@@ -6,7 +6,9 @@ gerekli servis fonksiyonlarını içerir.
 
 Fonksiyonlar:
 - fifo_stok_giris: Yeni stok girişi (tedarik veya ilk yükleme)
+- fifo_toplu_giris: Çok satırlı toplu stok girişi (tek commit)
 - fifo_stok_cikis: FIFO kuralına göre stok çıkışı
+- fifo_toplu_cikis: Çok ürünlü, set bazlı ve satır kilitli FIFO stok çıkışı
 - fifo_stok_durumu: Ürün bazlı FIFO stok durumu
 - fifo_parti_detaylari: Parti bazlı stok detayları
 - ilk_stok_yukle: İlk stok yükleme işlemi
@@ -21,15 +23,24 @@ Kullanım:
     FifoStokServisi.fifo_stok_cikis(otel_id, urun_id, miktar, islem_tipi, referans_id)
 """
 
+from collections import namedtuple
 from datetime import datetime
 from decimal import Decimal
+from sqlalchemy import text
 from models import (
     db, Otel, Urun, UrunStok, StokFifoKayit, StokFifoKullanim,
     StokHareket, get_kktc_now
 )
+from models._models import stok_bakiye_uygula
 from utils.helpers import log_islem, log_hata
 from utils.audit import audit_create
 
+# Eşzamanlı çıkışta kilitlenen parti tükenmişse eksik kısım için yeniden seçim sayısı
+FIFO_KILIT_DENEME_SAYISI = 3
+
+# Kilitli parti satırı (fifo_toplu_cikis içinde otomatik oluşturulan partiler için)
+FifoParti = namedtuple('FifoParti', ['id', 'urun_id', 'kalan_miktar', 'giris_tarihi'])
+
 
 class FifoStokServisi:
     """FIFO stok yönetim servisi"""
@@ -134,13 +145,228 @@ class FifoStokServisi:
             log_hata(e, 'fifo_stok_giris')
             return {'success': False, 'message': f'Stok girişi hatası: {str(e)}'}
     
+    @staticmethod
+    def fifo_toplu_giris(otel_id, kalemler, kaynak_tipi='tedarik', kullanici_id=None,
+                         aciklama=None, commit=True):
+        """
+        Birden fazla satır için FIFO stok girişini tek transaction'da yapar.
+        
+        Partiler, stok hareketleri ve yeni UrunStok satırları executemany ile
+        toplu eklenir; mevcut UrunStok satırları tek sorguda kilitlenip tek
+        executemany UPDATE ile artırılır. Satır başına commit ve SistemLog
+        yazılmaz, işlem sonunda tek özet log atılır.
+        
+        Aynı tedarik detayına ait açık bir parti zaten varsa yeni parti
+        açılmaz, mevcut partinin miktarı artırılır.
+        
+        Args:
+            otel_id: Otel ID
+            kalemler: [{'urun_id': int, 'miktar': int, 'tedarik_detay_id': int|None}, ...]
+            kaynak_tipi: 'tedarik', 'ilk_yukleme', 'iade', 'sayim_fazlasi'
+            kullanici_id: İşlemi yapan kullanıcı
+            aciklama: Stok hareketi açıklaması
+            commit: False ise commit çağıranın transaction'ına bırakılır; çağıran
+                    commit'ten sonra log_kaydi'ni 'fifo_stok_giris' olarak loglar
+            
+        Returns:
+            dict: {
+                'success': bool,
+                'sonuclar': [{'urun_id', 'urun_adi', 'miktar', 'success', 'fifo_kayit_id', 'message'}],
+                'eklenen_miktar': int,
+                'log_kaydi': dict,
+                'message': str
+            }
+        """
+        try:
+            simdi = get_kktc_now()
+            hareket_aciklama = aciklama or f'FIFO Stok Girişi - {kaynak_tipi}'
+            
+            urun_ids = {k.get('urun_id') for k in kalemler if k.get('urun_id')}
+            urunler = {
+                u.id: u for u in Urun.query.filter(Urun.id.in_(urun_ids)).all()
+            } if urun_ids else {}
+            
+            # Geçerli satırları ayır, geçersizleri satır bazlı sonuçla işaretle
+            sonuclar = []
+            gecerli = []
+            for kalem in kalemler:
+                urun_id = kalem.get('urun_id')
+                miktar = kalem.get('miktar', 0)
+                urun = urunler.get(urun_id)
+                sonuc = {
+                    'urun_id': urun_id,
+                    'urun_adi': urun.urun_adi if urun else None,
+                    'miktar': miktar,
+                    'success': False,
+                    'fifo_kayit_id': None
+                }
+                sonuclar.append(sonuc)
+                
+                if not miktar or miktar <= 0:
+                    sonuc['message'] = 'Miktar sıfırdan büyük olmalıdır'
+                elif urun is None:
+                    sonuc['message'] = 'Ürün bulunamadı'
+                else:
+                    gecerli.append((kalem, sonuc))
+            
+            if not gecerli:
+                return {
+                    'success': False,
+                    'sonuclar': sonuclar,
+                    'eklenen_miktar': 0,
+                    'message': 'Eklenecek geçerli satır yok'
+                }
+            
+            # Aynı tedarik detayına ait açık partiler (varsa miktarı artırılır)
+            detay_ids = {k.get('tedarik_detay_id') for k, _ in gecerli if k.get('tedarik_detay_id')}
+            mevcut_partiler = {}
+            if detay_ids and kaynak_tipi == 'tedarik':
+                mevcut_partiler = {
+                    f.tedarik_detay_id: f.id for f in db.session.query(
+                        StokFifoKayit.id, StokFifoKayit.tedarik_detay_id
+                    ).filter(
+                        StokFifoKayit.tedarik_detay_id.in_(detay_ids)
+                    ).order_by(StokFifoKayit.tedarik_detay_id, StokFifoKayit.id).with_for_update()
+                }
+            
+            parti_artislari = []
+            yeni_parti_satirlari = []
+            for kalem, sonuc in gecerli:
+                detay_id = kalem.get('tedarik_detay_id') if kaynak_tipi == 'tedarik' else None
+                if detay_id in mevcut_partiler:
+                    parti_artislari.append({'id': mevcut_partiler[detay_id], 'miktar': kalem['miktar']})
+                    sonuc['fifo_kayit_id'] = mevcut_partiler[detay_id]
+                else:
+                    yeni_parti_satirlari.append((sonuc, {
+                        'otel_id': otel_id,
+                        'urun_id': kalem['urun_id'],
+                        'tedarik_detay_id': detay_id,
+                        'giris_miktari': kalem['miktar'],
+                        'kalan_miktar': kalem['miktar'],
+                        'kullanilan_miktar': 0,
+                        'giris_tarihi': simdi,
+                        'tukendi': False
+                    }))
+            
+            if parti_artislari:
+                db.session.execute(text("""
+                    UPDATE stok_fifo_kayitlari
+                    SET giris_miktari = giris_miktari + :miktar,
+                        kalan_miktar = kalan_miktar + :miktar,
+                        tukendi = false
+                    WHERE id = :id
+                """), parti_artislari)
+            
+            if yeni_parti_satirlari:
+                parti_ids = db.session.execute(
+                    StokFifoKayit.__table__.insert().returning(
+                        StokFifoKayit.id, sort_by_parameter_order=True
+                    ),
+                    [satir for _, satir in yeni_parti_satirlari]
+                ).scalars().all()
+                for (sonuc, _), parti_id in zip(yeni_parti_satirlari, parti_ids):
+                    sonuc['fifo_kayit_id'] = parti_id
+            
+            # Ürün bazlı toplam giriş
+            urun_toplamlari = {}
+            for kalem, _ in gecerli:
+                urun_toplamlari[kalem['urun_id']] = urun_toplamlari.get(kalem['urun_id'], 0) + kalem['miktar']
+            
+            # UrunStok: mevcut satırları kilitle ve artır, olmayanları ekle
+            mevcut_stok_ids = {
+                row.urun_id: row.id for row in db.session.query(UrunStok.id, UrunStok.urun_id).filter(
+                    UrunStok.otel_id == otel_id,
+                    UrunStok.urun_id.in_(urun_toplamlari.keys())
+                ).order_by(UrunStok.urun_id).with_for_update()
+            }
+            
+            stok_artislari = [
+                {'id': mevcut_stok_ids[uid], 'miktar': miktar, 'simdi': simdi, 'kullanici_id': kullanici_id}
+                for uid, miktar in urun_toplamlari.items() if uid in mevcut_stok_ids
+            ]
+            if stok_artislari:
+                db.session.execute(text("""
+                    UPDATE urun_stok
+                    SET mevcut_stok = mevcut_stok + :miktar,
+                        son_giris_tarihi = :simdi,
+                        son_guncelleme_tarihi = :simdi,
+                        son_guncelleyen_id = COALESCE(:kullanici_id, son_guncelleyen_id)
+                    WHERE id = :id
+                """), stok_artislari)
+            
+            yeni_stoklar = [
+                {
+                    'otel_id': otel_id,
+                    'urun_id': uid,
+                    'mevcut_stok': miktar,
+                    'minimum_stok': urunler[uid].kritik_stok_seviyesi or 10,
+                    'kritik_stok_seviyesi': urunler[uid].kritik_stok_seviyesi or 5,
+                    'son_giris_tarihi': simdi,
+                    'son_guncelleme_tarihi': simdi,
+                    'son_guncelleyen_id': kullanici_id
+                }
+                for uid, miktar in urun_toplamlari.items() if uid not in mevcut_stok_ids
+            ]
+            if yeni_stoklar:
+                db.session.execute(UrunStok.__table__.insert(), yeni_stoklar)
+            
+            # Stok hareketleri - toplu insert mapper event'lerini tetiklemez, bakiye ayrıca uygulanır
+            db.session.execute(StokHareket.__table__.insert(), [
+                {
+                    'urun_id': kalem['urun_id'],
+                    'hareket_tipi': 'giris',
+                    'miktar': kalem['miktar'],
+                    'aciklama': hareket_aciklama,
+                    'islem_yapan_id': kullanici_id,
+                    'islem_tarihi': simdi
+                }
+                for kalem, _ in gecerli
+            ])
+            connection = db.session.connection()
+            for uid, miktar in urun_toplamlari.items():
+                stok_bakiye_uygula(connection, uid, miktar)
+            
+            for _, sonuc in gecerli:
+                sonuc['success'] = True
+                sonuc['message'] = f"{urunler[sonuc['urun_id']].urun_adi} için {sonuc['miktar']} adet stok girişi yapıldı"
+            
+            eklenen_miktar = sum(urun_toplamlari.values())
+            log_kaydi = {
+                'otel_id': otel_id,
+                'kaynak_tipi': kaynak_tipi,
+                'satir_sayisi': len(gecerli),
+                'urun_sayisi': len(urun_toplamlari),
+                'eklenen_miktar': eklenen_miktar
+            }
+            
+            if commit:
+                db.session.commit()
+                log_islem('ekleme', 'fifo_stok_giris', log_kaydi)
+            
+            return {
+                'success': True,
+                'sonuclar': sonuclar,
+                'eklenen_miktar': eklenen_miktar,
+                'log_kaydi': log_kaydi,
+                'message': f'{len(gecerli)} satır için {eklenen_miktar} adet stok girişi yapıldı'
+            }
+            
+        except Exception as e:
+            db.session.rollback()
+            log_hata(e, 'fifo_toplu_giris')
+            return {'success': False, 'sonuclar': [], 'eklenen_miktar': 0,
+                    'message': f'Stok girişi hatası: {str(e)}'}
+    
     @staticmethod
     def fifo_stok_cikis(otel_id, urun_id, miktar, islem_tipi='zimmet', 
-                        referans_id=None, kullanici_id=None):
+                        referans_id=None, kullanici_id=None, commit=True):
         """
         FIFO kuralına göre stok çıkışı yapar.
         En eski partiden başlayarak stok düşer.
         
+        Tek ürünlük fifo_toplu_cikis çağrısıdır; birden fazla ürün için
+        doğrudan fifo_toplu_cikis kullanılmalıdır.
+        
         Args:
             otel_id: Otel ID
             urun_id: Ürün ID
@@ -148,123 +374,289 @@ class FifoStokServisi:
             islem_tipi: 'zimmet', 'minibar_dolum', 'fire', 'sayim_eksik'
             referans_id: İlgili işlem kaydının ID'si
             kullanici_id: İşlemi yapan kullanıcı
+            commit: False ise commit çağıranın transaction'ına bırakılır; çağıran
+                    commit'ten sonra log_kaydi'ni 'fifo_stok_cikis' olarak loglar
             
         Returns:
-            dict: {'success': bool, 'kullanim_kayitlari': list, 'message': str}
+            dict: {'success': bool, 'kullanim_kayitlari': list, 'log_kaydi': dict, 'message': str}
+        """
+        sonuc = FifoStokServisi.fifo_toplu_cikis(
+            otel_id=otel_id,
+            kalemler=[{'urun_id': urun_id, 'miktar': miktar, 'referans_id': referans_id}],
+            islem_tipi=islem_tipi,
+            kullanici_id=kullanici_id,
+            commit=commit
+        )
+        
+        if not sonuc['success']:
+            return {'success': False, 'message': sonuc['message']}
+        
+        kullanim_kayitlari = sonuc['kullanim_kayitlari'].get(urun_id, [])
+        return {
+            'success': True,
+            'kullanim_kayitlari': kullanim_kayitlari,
+            'log_kaydi': sonuc['log_kaydi'],
+            'message': f'{miktar} adet stok çıkışı yapıldı ({len(kullanim_kayitlari)} partiden)'
+        }
+    
+    @staticmethod
+    def _fifo_partilerini_kilitle(otel_id, talepler, haric_ids):
+        """
+        Talebi karşılamak için gereken en eski partileri seçer ve kilitler.
+        
+        Pencere toplamı (SUM OVER) ile sadece kümülatif miktarı talebe
+        ulaşana kadar olan partiler seçilir; yalnızca bu satırlar
+        FOR UPDATE ile kilitlenir. Kilit sırası (urun_id, giris_tarihi, id)
+        tüm çağrılarda aynı olduğu için eşzamanlı çıkışlar deadlock'a girmez.
+        
+        Args:
+            otel_id: Otel ID
+            talepler: {urun_id: miktar}
+            haric_ids: Daha önce kilitlenmiş parti ID'leri
+            
+        Returns:
+            list: Kilitlenmiş satırlar (id, urun_id, kalan_miktar, giris_tarihi)
+        """
+        urun_ids = list(talepler.keys())
+        return db.session.execute(text("""
+            SELECT f.id, f.urun_id, f.kalan_miktar, f.giris_tarihi
+            FROM stok_fifo_kayitlari f
+            WHERE f.id IN (
+                SELECT t.id FROM (
+                    SELECT id, urun_id,
+                           SUM(kalan_miktar) OVER (
+                               PARTITION BY urun_id ORDER BY giris_tarihi, id
+                           ) - kalan_miktar AS onceki_toplam
+                    FROM stok_fifo_kayitlari
+                    WHERE otel_id = :otel_id
+                      AND urun_id = ANY(CAST(:urun_ids AS integer[]))
+                      AND tukendi = false
+                      AND kalan_miktar > 0
+                      AND NOT (id = ANY(CAST(:haric_ids AS integer[])))
+                ) t
+                JOIN unnest(CAST(:urun_ids AS integer[]), CAST(:miktarlar AS integer[]))
+                     AS talep(urun_id, miktar) ON talep.urun_id = t.urun_id
+                WHERE t.onceki_toplam < talep.miktar
+            )
+            ORDER BY f.urun_id, f.giris_tarihi, f.id
+            FOR UPDATE
+        """), {
+            'otel_id': otel_id,
+            'urun_ids': urun_ids,
+            'miktarlar': [talepler[uid] for uid in urun_ids],
+            'haric_ids': list(haric_ids)
+        }).fetchall()
+    
+    @staticmethod
+    def fifo_toplu_cikis(otel_id, kalemler, islem_tipi='zimmet', kullanici_id=None, commit=True):
+        """
+        Birden fazla ürün için FIFO stok çıkışını tek transaction'da yapar.
+        
+        Partiler Python'a tek tek yüklenip kullanılmaz; gereken partiler tek
+        sorguda seçilip kilitlenir, parti/UrunStok güncellemeleri ve kullanım
+        kayıtları toplu (executemany) yazılır. 30 ürünlük bir zimmet tek
+        round-trip dizisi ve tek commit ile tamamlanır.
+        
+        Args:
+            otel_id: Otel ID
+            kalemler: [{'urun_id': int, 'miktar': int, 'referans_id': int|None}, ...]
+                      Aynı ürün birden fazla kalemde bulunabilir.
+            islem_tipi: 'zimmet', 'minibar_dolum', 'fire', 'sayim_eksik'
+            kullanici_id: İşlemi yapan kullanıcı
+            commit: False ise commit çağıranın transaction'ına bırakılır; çağıran
+                    commit'ten sonra log_kaydi'ni 'fifo_stok_cikis' olarak loglar
+            
+        Returns:
+            dict: {
+                'success': bool,
+                'kullanim_kayitlari': {urun_id: [{'fifo_kayit_id', 'kullanim_id', 'miktar', 'parti_tarihi'}]},
+                'yetersiz': [{'urun_id', 'mevcut', 'istenen'}],
+                'log_kaydi': dict,
+                'message': str
+            }
         """
         try:
-            if miktar <= 0:
-                return {'success': False, 'message': 'Miktar sıfırdan büyük olmalıdır'}
+            talepler = {}
+            for kalem in kalemler:
+                if kalem['miktar'] <= 0:
+                    return {'success': False, 'message': 'Miktar sıfırdan büyük olmalıdır'}
+                talepler[kalem['urun_id']] = talepler.get(kalem['urun_id'], 0) + kalem['miktar']
+            
+            if not talepler:
+                return {'success': False, 'message': 'Çıkış yapılacak ürün yok'}
+            
+            simdi = get_kktc_now()
+            
+            # Gereken partileri kilitle - eşzamanlı çıkış partiyi tükettiyse eksik kısım için tekrar seç
+            partiler = {uid: [] for uid in talepler}
+            kilitli_ids = set()
+            eksik = dict(talepler)
+            for _ in range(FIFO_KILIT_DENEME_SAYISI):
+                satirlar = FifoStokServisi._fifo_partilerini_kilitle(otel_id, eksik, kilitli_ids)
+                if not satirlar:
+                    break
+                for satir in satirlar:
+                    kilitli_ids.add(satir.id)
+                    if satir.kalan_miktar > 0:
+                        partiler[satir.urun_id].append(satir)
+                eksik = {
+                    uid: talepler[uid] - sum(p.kalan_miktar for p in partiler[uid])
+                    for uid in talepler
+                }
+                eksik = {uid: m for uid, m in eksik.items() if m > 0}
+                if not eksik:
+                    break
             
-            # Mevcut FIFO kayıtlarını al (en eski önce - FIFO)
-            fifo_kayitlar = StokFifoKayit.query.filter(
-                StokFifoKayit.otel_id == otel_id,
-                StokFifoKayit.urun_id == urun_id,
-                StokFifoKayit.tukendi == False,
-                StokFifoKayit.kalan_miktar > 0
-            ).order_by(StokFifoKayit.giris_tarihi.asc()).all()
-            
-            # Toplam mevcut FIFO stok
-            toplam_fifo = sum(f.kalan_miktar for f in fifo_kayitlar)
-            
-            # UrunStok'tan mevcut stok kontrolü
-            urun_stok = UrunStok.query.filter_by(otel_id=otel_id, urun_id=urun_id).first()
-            toplam_urun_stok = urun_stok.mevcut_stok if urun_stok else 0
-            
-            # FIFO kaydı yoksa veya yetersizse ama UrunStok'ta varsa, otomatik FIFO kaydı oluştur
-            if toplam_fifo < miktar and toplam_urun_stok >= miktar:
-                eksik_miktar = toplam_urun_stok - toplam_fifo
-                if eksik_miktar > 0:
-                    # Mevcut stok için FIFO kaydı oluştur (geçmiş tarihli)
-                    yeni_fifo = StokFifoKayit(
-                        otel_id=otel_id,
-                        urun_id=urun_id,
-                        tedarik_detay_id=None,
-                        giris_miktari=eksik_miktar,
-                        kalan_miktar=eksik_miktar,
-                        kullanilan_miktar=0,
-                        giris_tarihi=get_kktc_now(),
-                        tukendi=False
-                    )
-                    db.session.add(yeni_fifo)
-                    db.session.flush()
-                    fifo_kayitlar.append(yeni_fifo)
-                    toplam_fifo = sum(f.kalan_miktar for f in fifo_kayitlar)
+            # UrunStok satırlarını tek sorguda kilitle
+            urun_stoklari = {
+                us.urun_id: us for us in UrunStok.query.filter(
+                    UrunStok.otel_id == otel_id,
+                    UrunStok.urun_id.in_(talepler.keys())
+                ).order_by(UrunStok.urun_id).with_for_update().all()
+            }
+            
+            # FIFO kaydı yetersiz ama UrunStok'ta varsa, fark için otomatik FIFO kaydı oluştur
+            for uid in list(eksik):
+                toplam_fifo = sum(p.kalan_miktar for p in partiler[uid])
+                urun_stok = urun_stoklari.get(uid)
+                toplam_urun_stok = urun_stok.mevcut_stok if urun_stok else 0
+                if toplam_urun_stok >= talepler[uid]:
+                    eksik_miktar = toplam_urun_stok - toplam_fifo
+                    yeni_fifo_id = db.session.execute(
+                        StokFifoKayit.__table__.insert().values(
+                            otel_id=otel_id,
+                            urun_id=uid,
+                            tedarik_detay_id=None,
+                            giris_miktari=eksik_miktar,
+                            kalan_miktar=eksik_miktar,
+                            kullanilan_miktar=0,
+                            giris_tarihi=simdi,
+                            tukendi=False
+                        ).returning(StokFifoKayit.id)
+                    ).scalar()
+                    partiler[uid].append(FifoParti(yeni_fifo_id, uid, eksik_miktar, simdi))
+                    del eksik[uid]
             
             # Stok kontrolü
-            if toplam_fifo < miktar:
+            if eksik:
+                yetersiz = [
+                    {
+                        'urun_id': uid,
+                        'mevcut': talepler[uid] - eksik_miktar,
+                        'istenen': talepler[uid]
+                    }
+                    for uid, eksik_miktar in eksik.items()
+                ]
+                if commit:
+                    db.session.rollback()
                 return {
-                    'success': False, 
-                    'message': f'Yetersiz stok. Mevcut: {toplam_fifo}, İstenen: {miktar}'
+                    'success': False,
+                    'yetersiz': yetersiz,
+                    'message': 'Yetersiz stok. ' + ', '.join(
+                        f"Ürün {y['urun_id']} - Mevcut: {y['mevcut']}, İstenen: {y['istenen']}"
+                        for y in yetersiz
+                    )
                 }
             
-            # FIFO kuralına göre çıkış yap
-            kalan_miktar = miktar
-            kullanim_kayitlari = []
-            
-            for fifo in fifo_kayitlar:
-                if kalan_miktar <= 0:
-                    break
+            # Kalemleri FIFO sırasına göre partilere dağıt
+            parti_kullanimlari = {}
+            kullanim_satirlari = []
+            parti_imleci = {uid: 0 for uid in talepler}
+            parti_kalan = {p.id: p.kalan_miktar for uid in partiler for p in partiler[uid]}
+            
+            for kalem in kalemler:
+                uid = kalem['urun_id']
+                kalan = kalem['miktar']
+                while kalan > 0:
+                    parti = partiler[uid][parti_imleci[uid]]
+                    alinacak = min(parti_kalan[parti.id], kalan)
+                    parti_kalan[parti.id] -= alinacak
+                    parti_kullanimlari[parti.id] = parti_kullanimlari.get(parti.id, 0) + alinacak
+                    kullanim_satirlari.append((parti, {
+                        'fifo_kayit_id': parti.id,
+                        'miktar': alinacak,
+                        'islem_tipi': islem_tipi,
+                        'referans_id': kalem.get('referans_id'),
+                        'islem_tarihi': simdi
+                    }))
+                    kalan -= alinacak
+                    if parti_kalan[parti.id] == 0:
+                        parti_imleci[uid] += 1
+            
+            # Partileri set bazlı güncelle (kilitli satırlar, tek executemany)
+            db.session.execute(text("""
+                UPDATE stok_fifo_kayitlari
+                SET kalan_miktar = kalan_miktar - :miktar,
+                    kullanilan_miktar = COALESCE(kullanilan_miktar, 0) + :miktar,
+                    tukendi = (kalan_miktar - :miktar = 0),
+                    son_kullanim_tarihi = :simdi
+                WHERE id = :id
+            """), [
+                {'id': parti_id, 'miktar': miktar, 'simdi': simdi}
+                for parti_id, miktar in parti_kullanimlari.items()
+            ])
+            
+            # Kullanım kayıtlarını toplu ekle
+            kullanim_ids = db.session.execute(
+                StokFifoKullanim.__table__.insert().returning(
+                    StokFifoKullanim.id, sort_by_parameter_order=True
+                ),
+                [satir for _, satir in kullanim_satirlari]
+            ).scalars().all()
+            
+            # UrunStok ve stok hareketleri
+            for uid, miktar in talepler.items():
+                urun_stok = urun_stoklari.get(uid)
+                if urun_stok:
+                    urun_stok.mevcut_stok -= miktar
+                    urun_stok.son_cikis_tarihi = simdi
+                    urun_stok.son_30gun_cikis = (urun_stok.son_30gun_cikis or 0) + miktar
+                    if kullanici_id:
+                        urun_stok.son_guncelleyen_id = kullanici_id
                 
-                # Bu partiden ne kadar alınacak?
-                alinacak = min(fifo.kalan_miktar, kalan_miktar)
-                
-                # Kullanım kaydı oluştur
-                kullanim = fifo.kullan(alinacak, islem_tipi, referans_id)
-                kullanim_kayitlari.append({
-                    'fifo_kayit_id': fifo.id,
-                    'kullanim_id': kullanim.id,
-                    'miktar': alinacak,
-                    'parti_tarihi': fifo.giris_tarihi.isoformat()
+                db.session.add(StokHareket(
+                    urun_id=uid,
+                    hareket_tipi='cikis',
+                    miktar=miktar,
+                    aciklama=f'FIFO Stok Çıkışı - {islem_tipi}',
+                    islem_yapan_id=kullanici_id
+                ))
+            
+            db.session.flush()
+            
+            kullanim_kayitlari = {uid: [] for uid in talepler}
+            for (parti, satir), kullanim_id in zip(kullanim_satirlari, kullanim_ids):
+                kullanim_kayitlari[parti.urun_id].append({
+                    'fifo_kayit_id': parti.id,
+                    'kullanim_id': kullanim_id,
+                    'miktar': satir['miktar'],
+                    'parti_tarihi': parti.giris_tarihi.isoformat()
                 })
-                
-                kalan_miktar -= alinacak
             
-            # UrunStok güncelle
-            urun_stok = UrunStok.query.filter_by(
-                otel_id=otel_id, 
-                urun_id=urun_id
-            ).first()
-            
-            if urun_stok:
-                urun_stok.mevcut_stok -= miktar
-                urun_stok.son_cikis_tarihi = get_kktc_now()
-                urun_stok.son_30gun_cikis += miktar
-                if kullanici_id:
-                    urun_stok.son_guncelleyen_id = kullanici_id
-            
-            # Stok hareketi kaydet
-            stok_hareket = StokHareket(
-                urun_id=urun_id,
-                hareket_tipi='cikis',
-                miktar=miktar,
-                aciklama=f'FIFO Stok Çıkışı - {islem_tipi}',
-                islem_yapan_id=kullanici_id
-            )
-            db.session.add(stok_hareket)
-            
-            db.session.commit()
-            
-            # Log kaydı
-            urun = db.session.get(Urun, urun_id)
-            log_islem('guncelleme', 'fifo_stok_cikis', {
+            log_kaydi = {
                 'otel_id': otel_id,
-                'urun_id': urun_id,
-                'urun_adi': urun.urun_adi if urun else 'Bilinmiyor',
-                'miktar': miktar,
                 'islem_tipi': islem_tipi,
-                'parti_sayisi': len(kullanim_kayitlari)
-            })
+                'urunler': talepler,
+                'parti_sayisi': len(parti_kullanimlari)
+            }
+            
+            # log_islem session dışında yazar; commit=False ise çağıran kendi
+            # commit'inden sonra loglar (rollback olan çıkış audit'e düşmez)
+            if commit:
+                db.session.commit()
+                log_islem('guncelleme', 'fifo_stok_cikis', log_kaydi)
             
             return {
                 'success': True,
                 'kullanim_kayitlari': kullanim_kayitlari,
-                'message': f'{miktar} adet stok çıkışı yapıldı ({len(kullanim_kayitlari)} partiden)'
+                'yetersiz': [],
+                'log_kaydi': log_kaydi,
+                'message': f'{len(talepler)} ürün için stok çıkışı yapıldı ({len(parti_kullanimlari)} partiden)'
             }
             
         except Exception as e:
             db.session.rollback()
-            log_hata(e, 'fifo_stok_cikis')
+            log_hata(e, 'fifo_toplu_cikis')
             return {'success': False, 'message': f'Stok çıkışı hatası: {str(e)}'}
     
     @staticmethod
@@ -355,32 +747,29 @@ class FifoStokServisi:
             if not stok_verileri:
                 return {'success': False, 'message': 'Stok verisi boş olamaz'}
             
-            yuklenen_sayisi = 0
-            hatalar = []
+            kalemler = [
+                {'urun_id': veri.get('urun_id'), 'miktar': veri.get('miktar', 0)}
+                for veri in stok_verileri
+                if veri.get('urun_id') and veri.get('miktar', 0) > 0
+            ]
             
-            for veri in stok_verileri:
-                urun_id = veri.get('urun_id')
-                miktar = veri.get('miktar', 0)
-                
-                if not urun_id or miktar <= 0:
-                    continue
-                
-                # FIFO stok girişi yap
-                sonuc = FifoStokServisi.fifo_stok_giris(
-                    otel_id=otel_id,
-                    urun_id=urun_id,
-                    miktar=miktar,
-                    kaynak_tipi='ilk_yukleme',
-                    referans_id=None,
-                    kullanici_id=kullanici_id,
-                    aciklama=f'İlk stok yüklemesi - {otel.ad}'
-                )
-                
-                if sonuc['success']:
-                    yuklenen_sayisi += 1
-                else:
-                    urun = db.session.get(Urun, urun_id)
-                    hatalar.append(f"{urun.urun_adi if urun else urun_id}: {sonuc['message']}")
+            # Tüm ürünler tek transaction'da yüklenir, otel bayrağı ile birlikte commit edilir
+            sonuc = FifoStokServisi.fifo_toplu_giris(
+                otel_id=otel_id,
+                kalemler=kalemler,
+                kaynak_tipi='ilk_yukleme',
+                kullanici_id=kullanici_id,
+                aciklama=f'İlk stok yüklemesi - {otel.ad}',
+                commit=False
+            )
+            
+            yuklenen_sayisi = sum(1 for s in sonuc['sonuclar'] if s['success'])
+            hatalar = [
+                f"{s['urun_adi'] or s['urun_id']}: {s['message']}"
+                for s in sonuc['sonuclar'] if not s['success']
+            ]
+            if not sonuc['sonuclar'] and not sonuc['success']:
+                hatalar.append(sonuc['message'])
             
             if yuklenen_sayisi > 0:
                 # Otel ilk stok yükleme durumunu güncelle
@@ -390,6 +779,7 @@ class FifoStokServisi:
                 db.session.commit()
                 
                 # Log kaydı
+                log_islem('ekleme', 'fifo_stok_giris', sonuc['log_kaydi'])
                 log_islem('ekleme', 'ilk_stok_yukleme', {
                     'otel_id': otel_id,
                     'otel_adi': otel.ad,
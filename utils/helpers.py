@@ -11,7 +11,9 @@ from reportlab.pdfbase.ttfonts import TTFont
 from io import BytesIO
 from flask import session, request
 from models import Kullanici, StokHareket, Urun, SistemLog, HataLog, db
-from sqlalchemy import case
+from utils.stok_bakiye_servisleri import StokBakiyeServisi
+from utils.log_tamponu import log_tamponu
+import enum
 import json
 import traceback
 import logging
@@ -126,27 +128,14 @@ def get_current_user():
 
 
 def get_stok_toplamlari(urun_ids=None):
-    """Belirtilen ürünler için stok toplamlarını tek sorguda getir."""
-    net_miktar = db.func.sum(
-        case(
-            (StokHareket.hareket_tipi.in_(['giris', 'devir', 'sayim']), StokHareket.miktar),
-            (StokHareket.hareket_tipi == 'cikis', -StokHareket.miktar),
-            else_=0
-        )
-    )
-
-    query = db.session.query(StokHareket.urun_id, net_miktar.label('net'))
-
-    if urun_ids:
-        query = query.filter(StokHareket.urun_id.in_(urun_ids))
-
-    stoklar = {row.urun_id: int(row.net or 0) for row in query.group_by(StokHareket.urun_id)}
-
-    if urun_ids:
-        for uid in urun_ids:
-            stoklar.setdefault(uid, 0)
+    """
+    Belirtilen ürünler için stok toplamlarını tek sorguda getir.
 
-    return stoklar
+    Toplamlar stok_hareketleri üzerinden her seferinde hesaplanmaz;
+    hareketlerle aynı transaction'da güncellenen urun_stok_bakiyeleri
+    tablosundan okunur (bkz. utils/stok_bakiye_servisleri.py).
+    """
+    return StokBakiyeServisi.bakiyeleri_getir(urun_ids)
 
 
 def get_toplam_stok(urun_id):
@@ -176,37 +165,32 @@ def get_kritik_stok_urunler():
     return kritik_urunler
 
 
-def get_stok_durumu(urun_id, stok_cache=None):
+class StokDurum(str, enum.Enum):
+    """Ürün stok durumu sınıfları (badge/ikon gösterimi templates/_stok_helpers.html'de)"""
+    KRITIK = 'kritik'
+    DIKKAT = 'dikkat'
+    NORMAL = 'normal'
+
+
+def stok_durumu_siniflandir(urun, mevcut_stok):
     """
-    Ürün stok durumunu kategorize et ve badge bilgisi döndür
+    Tek bir ürünün stok durumunu sınıflandır (sorgu yapmaz)
+    
+    Args:
+        urun: Yüklenmiş Urun objesi
+        mevcut_stok: Ürünün mevcut stok miktarı
     
     Returns:
         dict: {
             'durum': 'kritik' | 'dikkat' | 'normal',
-            'badge_class': Tailwind CSS class,
-            'badge_text': Görünecek metin,
-            'icon': SVG icon HTML,
+            'urun': Urun,
             'mevcut_stok': int,
             'kritik_seviye': int,
             'yuzde': float (stok doluluk yüzdesi)
         }
     """
-    urun = Urun.query.get(urun_id)
-    if not urun:
-        return None
-    
-    if stok_cache is None:
-        mevcut_stok = get_toplam_stok(urun_id)
-    else:
-        mevcut_stok = stok_cache.get(urun_id, 0)
-    kritik_seviye = urun.kritik_stok_seviyesi
-    
     # Kritik seviye None ise normal kabul et
-    if kritik_seviye is None:
-        kritik_seviye = 0
-    
-    # Kritik seviyenin %150'si dikkat eşiği
-    dikkat_esigi = kritik_seviye * 1.5
+    kritik_seviye = urun.kritik_stok_seviyesi or 0
     
     # Yüzde hesaplama (kritik seviyeye göre)
     if kritik_seviye > 0:
@@ -214,45 +198,63 @@ def get_stok_durumu(urun_id, stok_cache=None):
     else:
         yuzde = 100 if mevcut_stok > 0 else 0
     
+    # Kritik seviyenin %150'si dikkat eşiği
     if mevcut_stok <= kritik_seviye:
-        # KRİTİK - Kırmızı
-        return {
-            'durum': 'kritik',
-            'badge_class': 'bg-red-100 text-red-800 border border-red-300',
-            'badge_text': 'Kritik Stok',
-            'icon': '''<svg class="w-5 h-5 text-red-500" fill="currentColor" viewBox="0 0 20 20">
-                        <path fill-rule="evenodd" d="M8.257 3.099c.765-1.36 2.722-1.36 3.486 0l5.58 9.92c.75 1.334-.213 2.98-1.742 2.98H4.42c-1.53 0-2.493-1.646-1.743-2.98l5.58-9.92zM11 13a1 1 0 11-2 0 1 1 0 012 0zm-1-8a1 1 0 00-1 1v3a1 1 0 002 0V6a1 1 0 00-1-1z" clip-rule="evenodd"/>
-                      </svg>''',
-            'mevcut_stok': mevcut_stok,
-            'kritik_seviye': kritik_seviye,
-            'yuzde': yuzde
-        }
-    elif mevcut_stok <= dikkat_esigi:
-        # DİKKAT - Sarı
-        return {
-            'durum': 'dikkat',
-            'badge_class': 'bg-yellow-100 text-yellow-800 border border-yellow-300',
-            'badge_text': 'Dikkat',
-            'icon': '''<svg class="w-5 h-5 text-yellow-500" fill="currentColor" viewBox="0 0 20 20">
-                        <path fill-rule="evenodd" d="M18 10a8 8 0 11-16 0 8 8 0 0116 0zm-7-4a1 1 0 11-2 0 1 1 0 012 0zM9 9a1 1 0 000 2v3a1 1 0 001 1h1a1 1 0 100-2v-3a1 1 0 00-1-1H9z" clip-rule="evenodd"/>
-                      </svg>''',
-            'mevcut_stok': mevcut_stok,
-            'kritik_seviye': kritik_seviye,
-            'yuzde': yuzde
-        }
+        durum = StokDurum.KRITIK
+    elif mevcut_stok <= kritik_seviye * 1.5:
+        durum = StokDurum.DIKKAT
     else:
-        # NORMAL - Yeşil
-        return {
-            'durum': 'normal',
-            'badge_class': 'bg-green-100 text-green-800 border border-green-300',
-            'badge_text': 'Yeterli',
-            'icon': '''<svg class="w-5 h-5 text-green-500" fill="currentColor" viewBox="0 0 20 20">
-                        <path fill-rule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-9.293a1 1 0 00-1.414-1.414L9 10.586 7.707 9.293a1 1 0 00-1.414 1.414l2 2a1 1 0 001.414 0l4-4z" clip-rule="evenodd"/>
-                      </svg>''',
-            'mevcut_stok': mevcut_stok,
-            'kritik_seviye': kritik_seviye,
-            'yuzde': yuzde
-        }
+        durum = StokDurum.NORMAL
+    
+    return {
+        'durum': durum.value,
+        'urun': urun,
+        'mevcut_stok': mevcut_stok,
+        'kritik_seviye': kritik_seviye,
+        'yuzde': yuzde
+    }
+
+
+def stok_durumlarini_siniflandir(urunler, stok_map):
+    """
+    Yüklenmiş ürün listesini ve bakiye map'ini tek geçişte sınıflandır
+    
+    Args:
+        urunler: Urun objeleri listesi (önceden yüklenmiş)
+        stok_map: {urun_id: mevcut_stok} (get_stok_toplamlari çıktısı)
+    
+    Returns:
+        dict: {'kritik': [...], 'dikkat': [...], 'normal': [...]}
+    """
+    kategoriler = {durum.value: [] for durum in StokDurum}
+    
+    for urun in urunler:
+        kayit = stok_durumu_siniflandir(urun, stok_map.get(urun.id, 0))
+        kategoriler[kayit['durum']].append(kayit)
+    
+    return kategoriler
+
+
+def get_stok_durumu(urun_id, stok_cache=None):
+    """
+    Ürün stok durumunu kategorize et
+    
+    Toplu kullanımda stok_durumlarini_siniflandir tercih edilmelidir;
+    bu fonksiyon ürünü ayrıca sorgular.
+    
+    Returns:
+        dict: stok_durumu_siniflandir çıktısı veya ürün yoksa None
+    """
+    urun = db.session.get(Urun, urun_id)
+    if not urun:
+        return None
+    
+    if stok_cache is None:
+        mevcut_stok = get_toplam_stok(urun_id)
+    else:
+        mevcut_stok = stok_cache.get(urun_id, 0)
+    
+    return stok_durumu_siniflandir(urun, mevcut_stok)
 
 
 def get_tum_urunler_stok_durumlari():
@@ -275,17 +277,7 @@ def get_tum_urunler_stok_durumlari():
     urunler = Urun.query.filter_by(aktif=True).all()
     stok_map = get_stok_toplamlari([urun.id for urun in urunler])
     
-    kategoriler = {
-        'kritik': [],
-        'dikkat': [],
-        'normal': []
-    }
-    
-    for urun in urunler:
-        durum = get_stok_durumu(urun.id, stok_cache=stok_map)
-        if durum:
-            durum['urun'] = urun
-            kategoriler[durum['durum']].append(durum)
+    kategoriler = stok_durumlarini_siniflandir(urunler, stok_map)
     
     return {
         'kritik': sorted(kategoriler['kritik'], key=lambda x: x['mevcut_stok']),
@@ -540,26 +532,20 @@ def log_islem(islem_tipi, modul, islem_detay=None):
         ip_adresi = request.remote_addr if request else None
         tarayici = request.headers.get('User-Agent', '')[:200] if request else None
         
-        # Log kaydı oluştur
-        log = SistemLog(
-            kullanici_id=kullanici_id,
-            islem_tipi=islem_tipi,
-            modul=modul,
-            islem_detay=detay_json,
-            ip_adresi=ip_adresi,
-            tarayici=tarayici
-        )
-        
-        db.session.add(log)
-        db.session.commit()
+        # Log kaydı tampona alınır, arka planda toplu yazılır (çağıranın session'ı commit edilmez)
+        log_tamponu.ekle(SistemLog.__table__, {
+            'kullanici_id': kullanici_id,
+            'islem_tipi': islem_tipi,
+            'modul': modul,
+            'islem_detay': detay_json,
+            'ip_adresi': ip_adresi,
+            'tarayici': tarayici,
+            'islem_tarihi': get_kktc_now()
+        })
         
     except Exception as e:
         # Log hatası uygulamayı durdurmamalı
         print(f'Log hatası: {str(e)}')
-        try:
-            db.session.rollback()
-        except Exception:
-            pass
 
 
 def get_son_loglar(limit=50):
@@ -1029,7 +1015,7 @@ def sifirla_minibar_stoklari(kullanici_id):
         }
     """
     try:
-        from models import MinibarIslemDetay, MinibarIslem
+        from models import MinibarIslemDetay, MinibarIslem, OdaMinibarDurum
         from utils.audit import audit_delete
         
         # İşlem öncesi özet bilgileri al
@@ -1043,6 +1029,9 @@ def sifirla_minibar_stoklari(kullanici_id):
         # Sonra tüm işlemleri sil
         silinen_islem = MinibarIslem.query.delete()
         
+        # Toplu silme mapper event'lerini tetiklemez, oda durumları ayrıca silinir
+        OdaMinibarDurum.query.delete()
+        
         # Transaction commit
         db.session.commit()
         
@@ -1,10 +1,14 @@
 """
 Kat Sorumlusu Cache Service
 Kat sorumlusu dashboard ve işlem endpoint'leri için cache yönetimi
+
+Invalidation etiket tabanlıdır (utils.cache_tags). Kayıtlar grup etiketi
+('kat_sorumlusu:minibar:{id}') ve varlık etiketi ('kullanici:{id}',
+'otel:{id}', 'oda:{id}') ile yazılır.
 """
 
 import logging
-from utils.cache_helper import cache_get, cache_set, cache_delete_pattern
+from utils.cache_helper import cache_get, cache_set, cache_delete, cache_invalidate_tags
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,10 @@ class KatSorumlusuCacheService:
     ZIMMET_OZET_TTL = 120  # 2 dakika
     KRITIK_STOKLAR_TTL = 60  # 1 dakika
     
+    @staticmethod
+    def _kullanici_etiketleri(grup: str, kullanici_id: int):
+        return [f"{KatSorumlusuCacheService.CACHE_PREFIX}:{grup}:{kullanici_id}", f"kullanici:{kullanici_id}"]
+    
     # ✅ YENİ EKLENEN CACHE METODLARI
     @staticmethod
     def get_minibar_urunler_cache_key(kullanici_id: int):
@@ -40,7 +48,8 @@ class KatSorumlusuCacheService:
     def set_minibar_urunler(data: list, kullanici_id: int):
         """Minibar ürünleri cache'le"""
         cache_key = KatSorumlusuCacheService.get_minibar_urunler_cache_key(kullanici_id)
-        return cache_set(cache_key, data, KatSorumlusuCacheService.MINIBAR_URUNLER_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.MINIBAR_URUNLER_TTL,
+                         tags=KatSorumlusuCacheService._kullanici_etiketleri('minibar_urunler', kullanici_id))
     
     @staticmethod
     def get_zimmet_ozet_cache_key(kullanici_id: int):
@@ -57,22 +66,29 @@ class KatSorumlusuCacheService:
     def set_zimmet_ozet(data: dict, kullanici_id: int):
         """Zimmet özetini cache'le"""
         cache_key = KatSorumlusuCacheService.get_zimmet_ozet_cache_key(kullanici_id)
-        return cache_set(cache_key, data, KatSorumlusuCacheService.ZIMMET_OZET_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.ZIMMET_OZET_TTL,
+                         tags=KatSorumlusuCacheService._kullanici_etiketleri('zimmet', kullanici_id))
     
     @staticmethod
     def invalidate_minibar_urunler(kullanici_id: int):
         """Minibar ürünler cache'ini temizle"""
-        pattern = f"{KatSorumlusuCacheService.CACHE_PREFIX}:minibar_urunler:{kullanici_id}"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"{KatSorumlusuCacheService.CACHE_PREFIX}:minibar_urunler:{kullanici_id}")
         logger.info(f"Minibar ürünler cache temizlendi (kullanici={kullanici_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_zimmet_ozet(kullanici_id: int):
         """Zimmet özet cache'ini temizle"""
-        pattern = f"{KatSorumlusuCacheService.CACHE_PREFIX}:zimmet_ozet:{kullanici_id}"
-        deleted = cache_delete_pattern(pattern)
-        logger.info(f"Zimmet özet cache temizlendi (kullanici={kullanici_id}): {deleted} key")
+        cache_key = KatSorumlusuCacheService.get_zimmet_ozet_cache_key(kullanici_id)
+        deleted = cache_delete(cache_key)
+        logger.info(f"Zimmet özet cache temizlendi (kullanici={kullanici_id})")
+        return 1 if deleted else 0
+    
+    @staticmethod
+    def invalidate_zimmet(kullanici_id: int):
+        """Zimmet ürünler ve zimmet özet cache'ini temizle"""
+        deleted = cache_invalidate_tags(f"{KatSorumlusuCacheService.CACHE_PREFIX}:zimmet:{kullanici_id}")
+        logger.info(f"Zimmet cache temizlendi (kullanici={kullanici_id}): {deleted} key")
         return deleted
     
     @staticmethod
@@ -93,7 +109,8 @@ class KatSorumlusuCacheService:
     def set_dashboard(data: dict, kullanici_id: int, tarih: str = None):
         """Dashboard verisini cache'le"""
         cache_key = KatSorumlusuCacheService.get_dashboard_cache_key(kullanici_id, tarih)
-        return cache_set(cache_key, data, KatSorumlusuCacheService.DASHBOARD_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.DASHBOARD_TTL,
+                         tags=KatSorumlusuCacheService._kullanici_etiketleri('dashboard', kullanici_id))
     
     @staticmethod
     def get_minibar_islemler_cache_key(kullanici_id: int, tarih: str = None, 
@@ -124,7 +141,8 @@ class KatSorumlusuCacheService:
         cache_key = KatSorumlusuCacheService.get_minibar_islemler_cache_key(
             kullanici_id, tarih, oda_no, islem_tipi
         )
-        return cache_set(cache_key, data, KatSorumlusuCacheService.MINIBAR_ISLEMLER_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.MINIBAR_ISLEMLER_TTL,
+                         tags=KatSorumlusuCacheService._kullanici_etiketleri('minibar', kullanici_id))
     
     @staticmethod
     def get_dnd_liste_cache_key(otel_id: int, tarih: str = None, sadece_aktif: bool = False):
@@ -146,7 +164,8 @@ class KatSorumlusuCacheService:
     def set_dnd_liste(data: list, otel_id: int, tarih: str = None, sadece_aktif: bool = False):
         """DND listesini cache'le"""
         cache_key = KatSorumlusuCacheService.get_dnd_liste_cache_key(otel_id, tarih, sadece_aktif)
-        return cache_set(cache_key, data, KatSorumlusuCacheService.DND_LISTE_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.DND_LISTE_TTL,
+                         tags=[f"{KatSorumlusuCacheService.CACHE_PREFIX}:dnd:{otel_id}", f"otel:{otel_id}"])
     
     @staticmethod
     def get_oda_setup_cache_key(oda_id: int):
@@ -163,7 +182,8 @@ class KatSorumlusuCacheService:
     def set_oda_setup(data: dict, oda_id: int):
         """Oda setup'ı cache'le"""
         cache_key = KatSorumlusuCacheService.get_oda_setup_cache_key(oda_id)
-        return cache_set(cache_key, data, KatSorumlusuCacheService.ODA_SETUP_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.ODA_SETUP_TTL,
+                         tags=[f"oda:{oda_id}"])
     
     @staticmethod
     def get_zimmet_urunler_cache_key(kullanici_id: int):
@@ -180,7 +200,8 @@ class KatSorumlusuCacheService:
     def set_zimmet_urunler(data: list, kullanici_id: int):
         """Zimmet ürünleri cache'le"""
         cache_key = KatSorumlusuCacheService.get_zimmet_urunler_cache_key(kullanici_id)
-        return cache_set(cache_key, data, KatSorumlusuCacheService.ZIMMET_URUNLER_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.ZIMMET_URUNLER_TTL,
+                         tags=KatSorumlusuCacheService._kullanici_etiketleri('zimmet', kullanici_id))
     
     @staticmethod
     def get_kritik_stoklar_cache_key(kullanici_id: int):
@@ -197,44 +218,40 @@ class KatSorumlusuCacheService:
     def set_kritik_stoklar(data: dict, kullanici_id: int):
         """Kritik stokları cache'le"""
         cache_key = KatSorumlusuCacheService.get_kritik_stoklar_cache_key(kullanici_id)
-        return cache_set(cache_key, data, KatSorumlusuCacheService.KRITIK_STOKLAR_TTL)
+        return cache_set(cache_key, data, KatSorumlusuCacheService.KRITIK_STOKLAR_TTL,
+                         tags=KatSorumlusuCacheService._kullanici_etiketleri('kritik_stok', kullanici_id))
     
     @staticmethod
     def invalidate_kullanici(kullanici_id: int):
         """Kullanıcıya ait tüm cache'i temizle"""
-        pattern = f"{KatSorumlusuCacheService.CACHE_PREFIX}:*:{kullanici_id}*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"kullanici:{kullanici_id}")
         logger.info(f"Kat sorumlusu cache temizlendi (kullanici={kullanici_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_otel(otel_id: int):
         """Otele ait tüm cache'i temizle"""
-        pattern = f"{KatSorumlusuCacheService.CACHE_PREFIX}:*:{otel_id}*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"otel:{otel_id}")
         logger.info(f"Kat sorumlusu cache temizlendi (otel={otel_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_minibar(kullanici_id: int):
         """Minibar işlem cache'ini temizle"""
-        pattern = f"{KatSorumlusuCacheService.CACHE_PREFIX}:minibar:{kullanici_id}*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"{KatSorumlusuCacheService.CACHE_PREFIX}:minibar:{kullanici_id}")
         logger.info(f"Minibar cache temizlendi (kullanici={kullanici_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_dnd(otel_id: int):
         """DND cache'ini temizle"""
-        pattern = f"{KatSorumlusuCacheService.CACHE_PREFIX}:dnd:{otel_id}*"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"{KatSorumlusuCacheService.CACHE_PREFIX}:dnd:{otel_id}")
         logger.info(f"DND cache temizlendi (otel={otel_id}): {deleted} key")
         return deleted
     
     @staticmethod
     def invalidate_oda_setup(oda_id: int):
         """Oda setup cache'ini temizle"""
-        pattern = f"{KatSorumlusuCacheService.CACHE_PREFIX}:oda_setup:{oda_id}"
-        deleted = cache_delete_pattern(pattern)
+        deleted = cache_invalidate_tags(f"oda:{oda_id}")
         logger.info(f"Oda setup cache temizlendi (oda={oda_id}): {deleted} key")
         return deleted
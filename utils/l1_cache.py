@@ -0,0 +1,321 @@
+"""
+L1 Cache - Process İçi Önbellek (Redis L2 Önünde)
+
+Master data (oteller, oda_tipleri, urun_gruplari...) hemen her sayfada
+okunur; her okuma Redis'e gidip gelmesin diye worker başına sınırlı bir
+LRU/TTL önbellek tutulur. Redis (L2) asıl kaynak olmaya devam eder.
+
+- Kayıtlar serileştirilmiş payload (pickle bytes / json str) olarak tutulur.
+  Nesnenin kendisi tutulmaz: ORM instance'ları thread'ler/session'lar arası
+  paylaşılamaz ve çağıran tarafın döndürülen listeyi değiştirmesi cache'i
+  bozar. Kazanç Redis round-trip'inin kalkmasıdır.
+- Boyut muhasebesi: kayıt sayısı (CACHE_L1_MAX_ENTRIES) ve toplam payload
+  byte'ı (CACHE_L1_MAX_BYTES) aşılınca en eski kullanılan kayıt atılır.
+- Worker'lar arası invalidation Redis pub/sub ile yapılır: bir worker
+  invalidate ettiğinde mesaj yayınlar, diğer worker'lardaki dinleyici
+  thread kendi L1'inden aynı key/pattern'i siler. Dinleyici bağlantısı
+  koparsa mesaj kaçırılmış olabileceği için tüm L1'ler temizlenir.
+
+Kullanım:
+    from utils.l1_cache import L1Cache
+
+    l1 = L1Cache('master')
+    payload = l1.get(key)
+    l1.set(key, payload, ttl=60)
+    l1.invalidate_pattern('minibar:urunler:*')   # Tüm worker'larda
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_KANALI = 'minibar:cache:l1:invalidate'
+
+
+class L1Cache:
+    """Sınırlı, thread-safe LRU + TTL önbellek (process başına)"""
+
+    def __init__(self, ad, max_entries=None, max_bytes=None, ttl=None):
+        self.ad = ad
+        self.max_entries = int(max_entries or Config.CACHE_L1_MAX_ENTRIES)
+        self.max_bytes = int(max_bytes or Config.CACHE_L1_MAX_BYTES)
+        self.ttl = int(ttl or Config.CACHE_L1_TTL)
+        self.enabled = Config.CACHE_L1_ENABLED
+
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._kayitlar = OrderedDict()  # key -> (bitis, payload, boyut)
+        self._toplam_byte = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        _invalidation_bus.kaydet(self)
+
+    # ------------------------------------------------------------------
+    # Okuma / yazma
+    # ------------------------------------------------------------------
+
+    def _fork_kontrol(self):
+        """Fork sonrası master'dan kopyalanan içerik kullanılmaz"""
+        if self._pid != os.getpid():
+            self._kayitlar = OrderedDict()
+            self._toplam_byte = 0
+            self._pid = os.getpid()
+
+    def get(self, key):
+        """Payload'ı döndürür; yoksa veya süresi dolduysa None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._fork_kontrol()
+            kayit = self._kayitlar.get(key)
+            if kayit is None:
+                self.misses += 1
+                return None
+
+            bitis, payload, boyut = kayit
+            if bitis < time.monotonic():
+                self._sil(key)
+                self.misses += 1
+                return None
+
+            self._kayitlar.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, key, payload, ttl=None):
+        """Payload'ı kaydeder (ttl, L1 üst sınırı ile kırpılır)"""
+        if not self.enabled or payload is None:
+            return
+
+        boyut = len(payload)
+        if boyut > self.max_bytes // 4:
+            # Tek kayıt L1'in çeyreğinden büyükse L1'e alınmaz, sadece L2'de kalır
+            return
+
+        sure = min(int(ttl), self.ttl) if ttl else self.ttl
+
+        with self._lock:
+            self._fork_kontrol()
+            if key in self._kayitlar:
+                self._sil(key)
+
+            self._kayitlar[key] = (time.monotonic() + sure, payload, boyut)
+            self._toplam_byte += boyut
+
+            while self._kayitlar and (
+                len(self._kayitlar) > self.max_entries or self._toplam_byte > self.max_bytes
+            ):
+                eski_key = next(iter(self._kayitlar))
+                self._sil(eski_key)
+                self.evictions += 1
+
+        _invalidation_bus.baslat()
+
+    def _sil(self, key):
+        kayit = self._kayitlar.pop(key, None)
+        if kayit is not None:
+            self._toplam_byte -= kayit[2]
+
+    # ------------------------------------------------------------------
+    # Yerel silme (bu process)
+    # ------------------------------------------------------------------
+
+    def delete(self, key):
+        with self._lock:
+            self._fork_kontrol()
+            self._sil(key)
+            self.invalidations += 1
+
+    def delete_many(self, keys):
+        with self._lock:
+            self._fork_kontrol()
+            for key in keys:
+                self._sil(key)
+            self.invalidations += len(keys)
+
+    def delete_pattern(self, pattern):
+        """Glob pattern'e uyan kayıtları siler (Redis SCAN match ile aynı sözdizimi)"""
+        with self._lock:
+            self._fork_kontrol()
+            for key in [k for k in self._kayitlar if fnmatch.fnmatchcase(k, pattern)]:
+                self._sil(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._kayitlar = OrderedDict()
+            self._toplam_byte = 0
+            self._pid = os.getpid()
+            self.invalidations += 1
+
+    # ------------------------------------------------------------------
+    # Tüm worker'larda silme
+    # ------------------------------------------------------------------
+
+    def invalidate(self, key):
+        self.delete(key)
+        _invalidation_bus.yayinla(self.ad, 'key', key)
+
+    def invalidate_many(self, keys):
+        if not keys:
+            return
+        self.delete_many(keys)
+        _invalidation_bus.yayinla(self.ad, 'keys', list(keys))
+
+    def invalidate_pattern(self, pattern):
+        self.delete_pattern(pattern)
+        _invalidation_bus.yayinla(self.ad, 'pattern', pattern)
+
+    def invalidate_all(self):
+        self.clear()
+        _invalidation_bus.yayinla(self.ad, 'clear', None)
+
+    # ------------------------------------------------------------------
+    # İstatistik
+    # ------------------------------------------------------------------
+
+    def stats(self):
+        with self._lock:
+            toplam = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._kayitlar),
+                'bytes': self._toplam_byte,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / toplam * 100, 2) if toplam else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'listener_alive': _invalidation_bus.dinleyici_calisiyor()
+            }
+
+
+class _InvalidationBus:
+    """
+    L1 invalidation mesajlarını Redis pub/sub üzerinden dağıtır.
+    Dinleyici thread process başına bir kez, ilk L1 yazımında başlatılır.
+    """
+
+    def __init__(self):
+        self._cacheler = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._kaynak = None
+        self._redis = None
+
+    def kaydet(self, cache):
+        self._cacheler[cache.ad] = cache
+
+    def _client(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(
+                Config.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+        return self._redis
+
+    def dinleyici_calisiyor(self):
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def baslat(self):
+        if self.dinleyici_calisiyor():
+            return
+
+        with self._lock:
+            if self.dinleyici_calisiyor():
+                return
+            if self._pid != os.getpid():
+                self._redis = None
+                self._kaynak = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._dinle, name='l1-cache-invalidation', daemon=True)
+            self._thread.start()
+
+    def yayinla(self, cache_adi, islem, hedef):
+        """Diğer worker'lara invalidation mesajı gönderir"""
+        try:
+            mesaj = json.dumps({
+                'kaynak': self._kaynak,
+                'cache': cache_adi,
+                'islem': islem,
+                'hedef': hedef
+            })
+            self._client().publish(INVALIDATION_KANALI, mesaj)
+        except Exception as e:
+            logger.warning(f"L1 invalidation yayınlanamadı ({cache_adi}:{hedef}): {str(e)}")
+
+    def _uygula(self, veri):
+        try:
+            mesaj = json.loads(veri)
+        except (TypeError, ValueError):
+            return
+        if mesaj.get('kaynak') == self._kaynak:
+            return
+
+        cache = self._cacheler.get(mesaj.get('cache'))
+        if cache is None:
+            return
+
+        islem = mesaj.get('islem')
+        if islem == 'key':
+            cache.delete(mesaj.get('hedef'))
+        elif islem == 'keys':
+            cache.delete_many(mesaj.get('hedef') or [])
+        elif islem == 'pattern':
+            cache.delete_pattern(mesaj.get('hedef'))
+        elif islem == 'clear':
+            cache.clear()
+
+    def _tumunu_temizle(self):
+        for cache in self._cacheler.values():
+            cache.clear()
+
+    def _dinle(self):
+        bekleme = 1
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_KANALI)
+                # Abonelikten önce yazılmış kayıtlar kaçan bir mesajla bayatlamış olabilir
+                self._tumunu_temizle()
+                bekleme = 1
+                while True:
+                    mesaj = pubsub.get_message(timeout=30)
+                    if mesaj and mesaj.get('type') == 'message':
+                        self._uygula(mesaj.get('data'))
+            except Exception as e:
+                # Bağlantı koptuysa aradaki invalidation'lar kaçmış olabilir
+                logger.warning(f"L1 invalidation dinleyicisi yeniden bağlanıyor: {str(e)}")
+                self._tumunu_temizle()
+                time.sleep(bekleme)
+                bekleme = min(bekleme * 2, 30)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+_invalidation_bus = _InvalidationBus()
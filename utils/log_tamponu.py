@@ -0,0 +1,213 @@
+"""
+Log Tamponu - SistemLog / AuditLog Toplu Yazıcı
+
+log_islem ve log_audit kayıtları istek içinde commit edilmek yerine
+process içi sınırlı bir kuyruğa alınır ve arka plan thread'i tarafından
+toplu INSERT (executemany) ile yazılır. Böylece:
+- POST endpoint'leri log için ekstra commit ödemez
+- Log yazımı çağıranın session'ını commit etmez (yan etki yok)
+
+Flush tetikleyicileri:
+- Kuyrukta LOG_TAMPON_BATCH_SIZE kayıt birikmesi
+- LOG_TAMPON_FLUSH_INTERVAL saniye geçmesi
+- Process kapanışı (atexit, gunicorn worker_int, Celery worker_process_shutdown)
+
+Kuyruk dolarsa (LOG_TAMPON_MAX_SIZE) LOG_TAMPON_DOLU_POLITIKASI uygulanır:
+- 'senkron': Kayıt çağıranın thread'inde, ayrı bir bağlantıyla hemen yazılır
+- 'dusur': Kayıt düşürülür ve sayaç artırılır
+
+Kullanım:
+    from utils.log_tamponu import log_tamponu
+
+    log_tamponu.ekle(SistemLog.__table__, {...})
+    log_tamponu.flush()  # Kapanışta / testlerde
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from flask import current_app, has_app_context
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+
+class LogTamponu:
+    """Sınırlı kuyruklu, thread tabanlı toplu log yazıcı (process başına bir adet)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        self._app = None
+        self._kuyruk = None
+        self._uyandir = None
+        self._thread = None
+        self.dusurulen = 0
+        self.yazilan = 0
+
+    # ------------------------------------------------------------------
+    # Ayarlar
+    # ------------------------------------------------------------------
+
+    def _ayar(self, anahtar, varsayilan):
+        if self._app is None:
+            return varsayilan
+        return self._app.config.get(anahtar, varsayilan)
+
+    @property
+    def aktif(self):
+        return bool(self._ayar('LOG_TAMPON_ENABLED', True)) and not self._ayar('TESTING', False)
+
+    # ------------------------------------------------------------------
+    # Başlatma (fork güvenli)
+    # ------------------------------------------------------------------
+
+    def _hazirla(self):
+        """
+        Kuyruk ve thread'i bu process için hazırlar.
+
+        preload_app=True ile master'da oluşturulan thread fork sonrası
+        worker'da yaşamaz; PID değiştiyse kuyruk ve thread yeniden kurulur.
+        """
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+
+            if self._pid != os.getpid():
+                self._kuyruk = queue.Queue(maxsize=int(self._ayar('LOG_TAMPON_MAX_SIZE', 5000)))
+                self._uyandir = threading.Event()
+                self._pid = os.getpid()
+
+            self._thread = threading.Thread(
+                target=self._calistir,
+                name='log-tamponu',
+                daemon=True
+            )
+            self._thread.start()
+
+    def _calistir(self):
+        """Arka plan döngüsü: batch dolunca veya aralık geçince flush eder"""
+        aralik = float(self._ayar('LOG_TAMPON_FLUSH_INTERVAL', 2.0))
+        while True:
+            self._uyandir.wait(timeout=aralik)
+            self._uyandir.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Log tamponu flush hatası: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Kayıt ekleme
+    # ------------------------------------------------------------------
+
+    def ekle(self, tablo, kayit):
+        """
+        Kaydı kuyruğa ekler.
+
+        Args:
+            tablo: SQLAlchemy Table (örn: SistemLog.__table__)
+            kayit: dict - kolon adı → değer
+        """
+        if self._app is None and has_app_context():
+            self._app = current_app._get_current_object()
+
+        if not self.aktif:
+            self._yaz([(tablo, kayit)])
+            return
+
+        self._hazirla()
+
+        try:
+            self._kuyruk.put_nowait((tablo, kayit))
+        except queue.Full:
+            if self._ayar('LOG_TAMPON_DOLU_POLITIKASI', 'senkron') == 'dusur':
+                self.dusurulen += 1
+                if self.dusurulen % 100 == 1:
+                    logger.warning(f"⚠️ Log tamponu dolu, kayıtlar düşürülüyor (toplam: {self.dusurulen})")
+            else:
+                self._yaz([(tablo, kayit)])
+            return
+
+        if self._kuyruk.qsize() >= int(self._ayar('LOG_TAMPON_BATCH_SIZE', 100)):
+            self._uyandir.set()
+
+    # ------------------------------------------------------------------
+    # Yazma
+    # ------------------------------------------------------------------
+
+    def flush(self):
+        """Kuyruktaki tüm kayıtları toplu olarak yazar"""
+        if self._kuyruk is None or self._pid != os.getpid():
+            return 0
+
+        with self._flush_lock:
+            kayitlar = []
+            while True:
+                try:
+                    kayitlar.append(self._kuyruk.get_nowait())
+                except queue.Empty:
+                    break
+
+            if kayitlar:
+                self._yaz(kayitlar)
+            return len(kayitlar)
+
+    def _yaz(self, kayitlar):
+        """
+        Kayıtları tablo bazında gruplayıp ayrı bir bağlantıyla yazar.
+        Toplu yazım başarısız olursa (örn: silinmiş kullanıcı FK'si)
+        kayıtlar tek tek denenir, sadece hatalı olanlar kaybolur.
+        """
+        if self._app is None:
+            logger.warning(f"Log tamponu: app context yok, {len(kayitlar)} kayıt yazılamadı")
+            return
+
+        gruplar = {}
+        for tablo, kayit in kayitlar:
+            gruplar.setdefault(tablo, []).append(kayit)
+
+        with self._app.app_context():
+            for tablo, satirlar in gruplar.items():
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(tablo.insert(), satirlar)
+                    self.yazilan += len(satirlar)
+                except Exception as e:
+                    logger.warning(f"Log tamponu toplu yazım hatası ({tablo.name}): {str(e)}")
+                    for satir in satirlar:
+                        try:
+                            with db.engine.begin() as conn:
+                                conn.execute(tablo.insert(), satir)
+                            self.yazilan += 1
+                        except Exception as satir_hata:
+                            logger.error(f"Log kaydı yazılamadı ({tablo.name}): {str(satir_hata)}")
+
+    def durum(self):
+        """İzleme için tampon istatistikleri"""
+        return {
+            'aktif': self.aktif,
+            'bekleyen': self._kuyruk.qsize() if self._kuyruk is not None else 0,
+            'yazilan': self.yazilan,
+            'dusurulen': self.dusurulen
+        }
+
+
+log_tamponu = LogTamponu()
+
+
+def _kapanista_flush():
+    try:
+        log_tamponu.flush()
+    except Exception as e:
+        logger.error(f"Kapanışta log tamponu flush hatası: {str(e)}")
+
+
+atexit.register(_kapanista_flush)
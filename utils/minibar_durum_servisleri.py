@@ -0,0 +1,280 @@
+"""
+Minibar Durum Servisleri
+
+oda_minibar_durumlari tablosu, minibar_islem_detay geçmişinin (oda, ürün)
+bazlı anlık özetidir: mevcut miktar, son setup miktarı, son işlem. Durum,
+MinibarIslemDetay mapper event'leri ile aynı transaction içinde güncellenir
+(bkz. models._models.minibar_durum_uygula). Bu modül okuma, mutabakat
+(drift kontrolü) ve yeniden oluşturma işlemlerini içerir.
+
+Fonksiyonlar:
+- oda_durumlari_getir: Bir odanın ürün durumlarını tek sorguda getirir
+- odalar_durumlari_getir: Birden fazla odanın durumlarını tek sorguda getirir
+- oda_minibar_bilgisi: Oda minibar ekranı için son işlem + ürün özetleri
+- mutabakat: Geçmiş ile durum tablosunu karşılaştırır, sapmaları düzeltir
+- yeniden_olustur: Durum tablosunu geçmişten sıfırdan oluşturur
+
+Kullanım:
+    from utils.minibar_durum_servisleri import MinibarDurumServisi
+
+    durumlar = MinibarDurumServisi.oda_durumlari_getir(oda_id)
+    rapor = MinibarDurumServisi.mutabakat(duzelt=True)
+"""
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+
+from models import db, MinibarIslem, OdaMinibarDurum, Oda, Urun
+from models._models import (
+    MINIBAR_DURUM_GECMIS_SQL, MINIBAR_DURUM_KOLONLARI, minibar_durum_hucre_hesapla
+)
+
+logger = logging.getLogger(__name__)
+
+# Mutabakatta karşılaştırılan alanlar
+_KARSILASTIRILAN_ALANLAR = (
+    'mevcut_miktar', 'ekstra_miktar', 'setup_miktari', 'son_islem_id', 'son_detay_id',
+    'ilk_baslangic_stok', 'toplam_ilk_dolum', 'toplam_doldurma', 'ilk_dolum_yapildi'
+)
+
+
+class MinibarDurumServisi:
+    """Materyalize oda minibar durumu servisi"""
+
+    @staticmethod
+    def urun_durumu_getir(oda_id, urun_id):
+        """
+        Tek bir (oda, ürün) hücresinin durumunu getirir (primary key okuması).
+
+        Returns:
+            OdaMinibarDurum veya None (oda bu ürünle hiç işlem görmediyse)
+        """
+        # Durum flush sırasında SQL ile güncellendiği için identity map'teki kopya tazelenir
+        return db.session.get(OdaMinibarDurum, (oda_id, urun_id), populate_existing=True)
+
+    @staticmethod
+    def oda_durumlari_getir(oda_id, urun_yukle=False):
+        """
+        Bir odanın tüm ürün durumlarını getirir.
+
+        Args:
+            oda_id: Oda ID
+            urun_yukle: True ise Urun ilişkisi aynı sorguda yüklenir
+
+        Returns:
+            dict: {urun_id: OdaMinibarDurum, ...}
+        """
+        query = OdaMinibarDurum.query.populate_existing().filter(OdaMinibarDurum.oda_id == oda_id)
+        if urun_yukle:
+            query = query.options(joinedload(OdaMinibarDurum.urun).joinedload(Urun.grup))
+        return {durum.urun_id: durum for durum in query}
+
+    @staticmethod
+    def odalar_durumlari_getir(oda_ids, urun_id=None):
+        """
+        Birden fazla odanın durumlarını tek sorguda getirir (kat/toplu ekranlar).
+
+        Args:
+            oda_ids: Oda ID listesi
+            urun_id: Verilirse sadece bu ürünün durumları
+
+        Returns:
+            dict: {oda_id: {urun_id: OdaMinibarDurum, ...}, ...}
+        """
+        if not oda_ids:
+            return {}
+
+        query = OdaMinibarDurum.query.populate_existing().filter(OdaMinibarDurum.oda_id.in_(oda_ids))
+        if urun_id is not None:
+            query = query.filter(OdaMinibarDurum.urun_id == urun_id)
+
+        durumlar = {oda_id: {} for oda_id in oda_ids}
+        for durum in query:
+            durumlar.setdefault(durum.oda_id, {})[durum.urun_id] = durum
+        return durumlar
+
+    @staticmethod
+    def son_islemleri_getir(oda_ids):
+        """
+        Odaların son minibar işlemlerini tek sorguda getirir
+        (DISTINCT ON, idx_oda_tarih indeksi ile).
+
+        Returns:
+            dict: {oda_id: MinibarIslem, ...} - işlemi olmayan odalar yer almaz
+        """
+        if not oda_ids:
+            return {}
+
+        islemler = MinibarIslem.query.filter(
+            MinibarIslem.oda_id.in_(oda_ids)
+        ).distinct(MinibarIslem.oda_id).order_by(
+            MinibarIslem.oda_id,
+            MinibarIslem.islem_tarihi.desc().nullslast(),
+            MinibarIslem.id.desc()
+        ).all()
+
+        return {islem.oda_id: islem for islem in islemler}
+
+    @staticmethod
+    def oda_minibar_bilgisi(oda_id):
+        """
+        Oda minibar ekranı için son işlem ve ürün özetlerini getirir.
+
+        Ürün listesi son işlemde yer alan ürünlerdir; toplamlar durum
+        tablosundan okunur, işlem geçmişi dolaşılmaz.
+
+        Returns:
+            dict veya None (oda hiç işlem görmediyse):
+                {'oda', 'son_islem', 'urunler', 'toplam_urun', 'toplam_miktar'}
+        """
+        son_islem = MinibarIslem.query.options(
+            joinedload(MinibarIslem.oda).joinedload(Oda.kat),
+            joinedload(MinibarIslem.personel)
+        ).filter(
+            MinibarIslem.oda_id == oda_id
+        ).order_by(
+            MinibarIslem.islem_tarihi.desc().nullslast(),
+            MinibarIslem.id.desc()
+        ).first()
+
+        if not son_islem:
+            return None
+
+        durumlar = OdaMinibarDurum.query.populate_existing().options(
+            joinedload(OdaMinibarDurum.urun).joinedload(Urun.grup)
+        ).filter(
+            OdaMinibarDurum.oda_id == oda_id,
+            OdaMinibarDurum.son_islem_id == son_islem.id
+        ).order_by(OdaMinibarDurum.urun_id).all()
+
+        minibar_urunler = []
+        for durum in durumlar:
+            minibar_urunler.append({
+                'urun': durum.urun,
+                'baslangic_stok': durum.ilk_baslangic_stok,
+                'bitis_stok': durum.mevcut_miktar,
+                'eklenen_miktar': durum.toplam_ilk_dolum + durum.toplam_doldurma,
+                # Doldurma/kontrol işlemlerinde eklenen miktar tüketimi karşılar
+                'tuketim': durum.toplam_doldurma,
+                'mevcut_miktar': durum.mevcut_miktar
+            })
+
+        return {
+            'oda': son_islem.oda,
+            'son_islem': son_islem,
+            'urunler': minibar_urunler,
+            'toplam_urun': len(minibar_urunler),
+            'toplam_miktar': sum(u['mevcut_miktar'] for u in minibar_urunler)
+        }
+
+    @staticmethod
+    def hucre_yeniden_hesapla(oda_id, urun_id=None):
+        """Bir oda (veya oda/ürün) durumunu geçmişten yeniden hesaplar (commit çağırana aittir)"""
+        minibar_durum_hucre_hesapla(db.session.connection(), oda_id, urun_id)
+
+    @staticmethod
+    def gecmisten_hesapla():
+        """
+        Tüm durumları minibar_islem_detay geçmişinden hesaplar.
+        Sadece mutabakat ve yeniden oluşturma için kullanılmalıdır.
+
+        Returns:
+            dict: {(oda_id, urun_id): {alan: deger, ...}, ...}
+        """
+        sonuc = db.session.execute(text(MINIBAR_DURUM_GECMIS_SQL.format(filtre='')))
+        return {(row.oda_id, row.urun_id): row._asdict() for row in sonuc}
+
+    @staticmethod
+    def mutabakat(duzelt=True):
+        """
+        Durum tablosunu işlem geçmişi ile karşılaştırır.
+
+        Karşılaştırma sırasında minibar tabloları SHARE modunda kilitlenir;
+        böylece mutabakat sürerken yeni işlem yazılıp yanlış sapma
+        raporlanmaz. Okumalar engellenmez, yazmalar sorgu süresince bekler.
+
+        Args:
+            duzelt: True ise sapan hücreler geçmişten yeniden hesaplanır
+
+        Returns:
+            dict: {'success': bool, 'kontrol_edilen': int, 'sapma_sayisi': int,
+                   'sapmalar': [{'oda_id', 'urun_id', 'alanlar'}], 'duzeltildi': bool}
+        """
+        try:
+            db.session.execute(text('LOCK TABLE minibar_islemleri, minibar_islem_detay IN SHARE MODE'))
+
+            beklenen = MinibarDurumServisi.gecmisten_hesapla()
+            mevcut = {
+                (durum.oda_id, durum.urun_id): durum
+                for durum in OdaMinibarDurum.query
+            }
+
+            sapmalar = []
+            for anahtar in set(beklenen) | set(mevcut):
+                olmasi_gereken = beklenen.get(anahtar)
+                kayitli = mevcut.get(anahtar)
+
+                if olmasi_gereken is None or kayitli is None:
+                    farkli = ['kayit']
+                else:
+                    farkli = [
+                        alan for alan in _KARSILASTIRILAN_ALANLAR
+                        if getattr(kayitli, alan) != olmasi_gereken[alan]
+                    ]
+
+                if farkli:
+                    sapmalar.append({'oda_id': anahtar[0], 'urun_id': anahtar[1], 'alanlar': farkli})
+
+            if sapmalar and duzelt:
+                baglanti = db.session.connection()
+                for sapma in sapmalar:
+                    minibar_durum_hucre_hesapla(baglanti, sapma['oda_id'], sapma['urun_id'])
+
+            # Düzeltme yapılmasa da SHARE kilidini bırakmak için transaction kapatılır
+            db.session.commit()
+
+            if sapmalar:
+                logger.warning(
+                    f"⚠️ Minibar durum mutabakatı: {len(sapmalar)} hücrede sapma "
+                    f"({'düzeltildi' if duzelt else 'sadece raporlandı'})"
+                )
+
+            return {
+                'success': True,
+                'kontrol_edilen': len(set(beklenen) | set(mevcut)),
+                'sapma_sayisi': len(sapmalar),
+                'sapmalar': sapmalar,
+                'duzeltildi': bool(sapmalar) and duzelt
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Minibar durum mutabakat hatası: {str(e)}")
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def yeniden_olustur():
+        """
+        Durum tablosunu işlem geçmişinden sıfırdan oluşturur.
+
+        Returns:
+            dict: {'success': bool, 'hucre_sayisi': int}
+        """
+        try:
+            db.session.execute(text('LOCK TABLE minibar_islemleri, minibar_islem_detay IN SHARE MODE'))
+            db.session.execute(text('DELETE FROM oda_minibar_durumlari'))
+            sonuc = db.session.execute(text(
+                f"INSERT INTO oda_minibar_durumlari ({MINIBAR_DURUM_KOLONLARI}) "
+                + MINIBAR_DURUM_GECMIS_SQL.format(filtre='')
+            ))
+            db.session.commit()
+
+            logger.info(f"✅ Oda minibar durumları yeniden oluşturuldu: {sonuc.rowcount} hücre")
+            return {'success': True, 'hucre_sayisi': sonuc.rowcount}
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Oda minibar durum yeniden oluşturma hatası: {str(e)}")
+            return {'success': False, 'message': str(e)}
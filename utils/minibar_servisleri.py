@@ -9,6 +9,7 @@ from models import (
     MinibarIslem, MinibarIslemDetay, PersonelZimmetDetay,
     PersonelZimmet
 )
+from utils.minibar_durum_servisleri import MinibarDurumServisi
 from datetime import datetime, timezone
 import pytz
 
@@ -16,7 +17,6 @@ import pytz
 KKTC_TZ = pytz.timezone('Europe/Nicosia')
 def get_kktc_now():
     return datetime.now(KKTC_TZ)
-from sqlalchemy import desc
 import logging
 
 logger = logging.getLogger(__name__)
@@ -119,26 +119,8 @@ def oda_setup_durumu_getir(oda_id):
         dolap_ici_setuplar = []
         dolap_disi_setuplar = []
         
-        from sqlalchemy import func as sql_func
-
-        latest_subq = db.session.query(
-            MinibarIslemDetay.urun_id,
-            sql_func.max(MinibarIslem.islem_tarihi).label('max_tarih')
-        ).join(MinibarIslem).filter(
-            MinibarIslem.oda_id == oda_id
-        ).group_by(MinibarIslemDetay.urun_id).subquery()
-
-        latest_detaylar = db.session.query(MinibarIslemDetay).join(
-            MinibarIslem
-        ).join(
-            latest_subq,
-            db.and_(
-                MinibarIslemDetay.urun_id == latest_subq.c.urun_id,
-                MinibarIslem.islem_tarihi == latest_subq.c.max_tarih
-            )
-        ).filter(MinibarIslem.oda_id == oda_id).all()
-
-        detay_by_urun = {d.urun_id: d for d in latest_detaylar}
+        # Ürünlerin anlık durumu (oda_minibar_durumlari - tek indeksli okuma)
+        durum_by_urun = MinibarDurumServisi.oda_durumlari_getir(oda_id)
 
         for setup in setuplar:
             if not setup.aktif:
@@ -152,14 +134,14 @@ def oda_setup_durumu_getir(oda_id):
             urun_listesi = []
             
             for icerik in icerikler:
-                son_islem_detay = detay_by_urun.get(icerik.urun_id)
+                urun_durumu = durum_by_urun.get(icerik.urun_id)
                 
                 mevcut_miktar = 0
                 ekstra_miktar = 0
                 
-                if son_islem_detay:
-                    mevcut_miktar = son_islem_detay.bitis_stok or 0
-                    ekstra_miktar = son_islem_detay.ekstra_miktar or 0
+                if urun_durumu:
+                    mevcut_miktar = urun_durumu.mevcut_miktar or 0
+                    ekstra_miktar = urun_durumu.ekstra_miktar or 0
                 
                 # Durum hesapla
                 setup_miktari = icerik.adet
@@ -249,16 +231,11 @@ def tuketim_hesapla(oda_id, urun_id, setup_miktari, eklenen_miktar):
     """
     try:
         # Son durumu getir
-        son_islem_detay = MinibarIslemDetay.query.join(
-            MinibarIslem
-        ).filter(
-            MinibarIslem.oda_id == oda_id,
-            MinibarIslemDetay.urun_id == urun_id
-        ).order_by(desc(MinibarIslem.islem_tarihi)).first()
+        urun_durumu = MinibarDurumServisi.urun_durumu_getir(oda_id, urun_id)
         
         mevcut_miktar = 0
-        if son_islem_detay:
-            mevcut_miktar = son_islem_detay.bitis_stok or 0
+        if urun_durumu:
+            mevcut_miktar = urun_durumu.mevcut_miktar or 0
         
         # Tüketim = (Setup miktarı - Mevcut miktar)
         # Eklenen miktar tüketimi karşılar
@@ -391,17 +368,12 @@ def minibar_stok_guncelle(oda_id, urun_id, yeni_miktar, ekstra_miktar=0):
     """
     try:
         # Son durumu getir
-        son_islem_detay = MinibarIslemDetay.query.join(
-            MinibarIslem
-        ).filter(
-            MinibarIslem.oda_id == oda_id,
-            MinibarIslemDetay.urun_id == urun_id
-        ).order_by(desc(MinibarIslem.islem_tarihi)).first()
+        urun_durumu = MinibarDurumServisi.urun_durumu_getir(oda_id, urun_id)
         
         baslangic_stok = 0
-        if son_islem_detay:
+        if urun_durumu:
             # Önceki işlemin bitiş stoğu
-            baslangic_stok = son_islem_detay.bitis_stok or 0
+            baslangic_stok = urun_durumu.mevcut_miktar or 0
         else:
             # İlk işlem - Setup miktarını bul
             oda = Oda.query.get(oda_id)
@@ -75,40 +75,67 @@ class AnomalyDetector:
         
         return is_anomaly, z_score, mean, std
     
-    def detect_with_model(self, metric_type: str, values: list):
+    def detect_with_model(self, metric_type: str, values: list, threshold=3.0):
         """
         Model ile anomali tespiti (fallback: Z-Score)
         
         Args:
             metric_type: Metrik tipi
             values: Değerler listesi
+            threshold: Fallback Z-Score eşik değeri
             
         Returns:
             tuple: (is_anomaly, z_score, mean, std) - Z-Score ile tutarlı format
         """
-        self.total_detections += 1
+        return self.detect_with_model_batch(metric_type, {0: values}, threshold=threshold)[0]
+    
+    def detect_with_model_batch(self, metric_type: str, series: dict, threshold=3.0):
+        """
+        Birden fazla seri için model ile anomali tespiti (fallback: Z-Score)
+        
+        Model paketi registry'den bir kez alınır ve tüm entity'ler tek
+        model.predict çağrısıyla skorlanır. Model feature engineering ile
+        eğitildiyse (feature_list != ['value']) her entity için eğitimdeki
+        feature satırı FeatureEngineer.create_feature_matrix ile toplu
+        hesaplanır; ham veri modellerinde serinin son değeri kullanılır.
+        Feature satırı eksik kalan entity'ler Z-Score ile değerlendirilir.
+        
+        Args:
+            metric_type: Metrik tipi
+            series: {entity_id: değerler listesi}
+            threshold: Fallback Z-Score eşik değeri
+            
+        Returns:
+            dict: {entity_id: (is_anomaly, z_score, mean, std)}
+        """
+        from utils.ml.model_registry import model_registry
+        
+        if not series:
+            return {}
+        
+        self.total_detections += len(series)
+        
+        def zscore_fallback(neden, alert_kontrol=True):
+            self.fallback_count += len(series)
+            self.fallback_reasons[neden] += len(series)
+            if alert_kontrol:
+                # Fallback oranı yüksekse alert oluştur
+                self._check_fallback_rate_alert()
+            return {
+                entity_id: self.detect_with_zscore(values, threshold=threshold)
+                for entity_id, values in series.items()
+            }
         
         try:
-            # Model yükle (dosyadan)
-            model_package = self.model_manager.load_model_from_file(
-                model_type='isolation_forest',
-                metric_type=metric_type
-            )
+            # Model paketi (process içi registry, sürüm değişmediyse diske gidilmez)
+            model_package = model_registry.getir('isolation_forest', metric_type)
             
             if model_package is None:
-                # Fallback: Z-Score kullan
-                self.fallback_count += 1
-                self.fallback_reasons['file_not_found'] += 1
-                
                 logger.warning(
                     f"⚠️  [FALLBACK_FILE_NOT_FOUND] Model bulunamadı, Z-Score fallback: {metric_type} | "
                     f"Fallback rate: {self._get_fallback_rate():.1f}%"
                 )
-                
-                # Fallback oranı yüksekse alert oluştur
-                self._check_fallback_rate_alert()
-                
-                return self.detect_with_zscore(values)
+                return zscore_fallback('file_not_found')
             
             # Model package'dan model ve scaler'ı çıkar
             try:
@@ -116,98 +143,119 @@ class AnomalyDetector:
                 if isinstance(model_package, dict):
                     model = model_package.get('model')
                     scaler = model_package.get('scaler')
+                    feature_list = model_package.get('feature_list')
                 else:
                     # Eski format: direkt model
                     model = model_package
                     scaler = None
+                    feature_list = None
                 
                 if model is None:
                     raise ValueError("Model package içinde model bulunamadı")
                 
-                # Veriyi hazırla
-                values_array = np.array(values).reshape(-1, 1)
+                sonuclar = {}
+                if feature_list and list(feature_list) != ['value']:
+                    # Eğitimdeki feature'lar, eğitimdeki sırayla (entity başına bir satır)
+                    satirlar = self._feature_satirlari(metric_type, list(series), feature_list)
+                    eksik = satirlar.index[satirlar.isna().any(axis=1)].tolist()
+                    if eksik:
+                        self.fallback_count += len(eksik)
+                        self.fallback_reasons['prediction_error'] += len(eksik)
+                        for entity_id in eksik:
+                            sonuclar[entity_id] = self.detect_with_zscore(series[entity_id], threshold=threshold)
+                        satirlar = satirlar.drop(index=eksik)
+                    entity_ids = satirlar.index.tolist()
+                    values_array = satirlar.to_numpy(dtype=float)
+                else:
+                    # Ham veri modeli: her serinin son değeri
+                    entity_ids = list(series)
+                    values_array = np.array([series[entity_id][-1] for entity_id in entity_ids], dtype=float).reshape(-1, 1)
+                
+                if not entity_ids:
+                    return sonuclar
                 
                 # Scaler varsa uygula
                 if scaler is not None:
                     values_array = scaler.transform(values_array)
                 
-                # Model ile tahmin yap
+                # Model ile tahmin yap (metrik tipi başına tek çağrı)
                 predictions = model.predict(values_array)
                 
-                # İstatistikleri hesapla (Z-Score ile tutarlı return için)
-                mean = float(np.mean(values))
-                std = float(np.std(values))
-                current_value = values[-1]
-                z_score = abs((current_value - mean) / std) if std > 0 else 0
-                
-                # Modeli bellekten temizle
-                del model_package
-                
-                # -1: anomali, 1: normal
-                is_anomaly = predictions[-1] == -1
+                for entity_id, prediction in zip(entity_ids, predictions):
+                    values = series[entity_id]
+                    
+                    # İstatistikleri hesapla (Z-Score ile tutarlı return için)
+                    mean = float(np.mean(values))
+                    std = float(np.std(values))
+                    current_value = values[-1]
+                    z_score = abs((current_value - mean) / std) if std > 0 else 0
+                    
+                    # -1: anomali, 1: normal
+                    sonuclar[entity_id] = (prediction == -1, z_score, mean, std)
                 
-                return is_anomaly, z_score, mean, std
+                return sonuclar
                 
             except Exception as pred_error:
                 # Prediction hatası - fallback
-                self.fallback_count += 1
-                self.fallback_reasons['prediction_error'] += 1
-                
                 logger.error(
                     f"❌ [FALLBACK_PREDICTION_ERROR] Model prediction hatası: {metric_type} | "
                     f"Error: {str(pred_error)} | "
                     f"Fallback rate: {self._get_fallback_rate():.1f}%"
                 )
-                
-                # Model'i temizle
-                try:
-                    del model_package
-                except:
-                    pass
-                
-                # Fallback: Z-Score
-                return self.detect_with_zscore(values)
+                return zscore_fallback('prediction_error', alert_kontrol=False)
             
         except FileNotFoundError as e:
             # Dosya bulunamadı
-            self.fallback_count += 1
-            self.fallback_reasons['file_not_found'] += 1
-            
             logger.warning(
                 f"⚠️  [FALLBACK_FILE_NOT_FOUND] Model dosyası bulunamadı: {metric_type} | "
                 f"Fallback rate: {self._get_fallback_rate():.1f}%"
             )
-            
-            self._check_fallback_rate_alert()
-            return self.detect_with_zscore(values)
+            return zscore_fallback('file_not_found')
             
         except (EOFError, pickle.UnpicklingError) as e:
             # Corrupt file
-            self.fallback_count += 1
-            self.fallback_reasons['corrupt_file'] += 1
-            
             logger.error(
                 f"❌ [FALLBACK_CORRUPT_FILE] Model dosyası bozuk: {metric_type} | "
                 f"Error: {str(e)} | "
                 f"Fallback rate: {self._get_fallback_rate():.1f}%"
             )
-            
-            self._check_fallback_rate_alert()
-            return self.detect_with_zscore(values)
+            return zscore_fallback('corrupt_file')
             
         except Exception as e:
             # Genel hata
-            self.fallback_count += 1
-            self.fallback_reasons['load_error'] += 1
-            
             logger.error(
                 f"❌ [FALLBACK_LOAD_ERROR] Model yükleme hatası: {metric_type} | "
                 f"Error: {str(e)} | "
                 f"Fallback rate: {self._get_fallback_rate():.1f}%"
             )
-            
-            self._check_fallback_rate_alert()
-            return self.detect_with_zscore(values)
+            return zscore_fallback('load_error')
+    
+    def _feature_satirlari(self, metric_type, entity_ids, feature_list, lookback_days=30):
+        """
+        Entity'lerin model feature satırlarını toplu hesaplar
+        
+        Args:
+            metric_type: Metrik tipi
+            entity_ids: Entity ID listesi
+            feature_list: Modelin eğitildiği feature'lar (sırası korunur)
+            lookback_days: Eğitimle aynı pencere (model_trainer 30 gün kullanır)
+        
+        Returns:
+            DataFrame: entity_id index'li, feature_list kolonlu (verisi olmayan entity'ler NaN)
+        """
+        from utils.ml.feature_engineer import FeatureEngineer
+        
+        df = FeatureEngineer(self.db).create_feature_matrix(
+            metric_type, entity_ids=entity_ids, lookback_days=lookback_days, save_to_db=False
+        )
+        if df is None:
+            raise ValueError(f"Feature matrix oluşturulamadı: {metric_type}")
+        
+        eksik_kolonlar = [kolon for kolon in feature_list if kolon not in df.columns]
+        if eksik_kolonlar:
+            raise ValueError(f"Model feature'ları bulunamadı: {eksik_kolonlar}")
+        
+        return df.set_index('entity_id').reindex(entity_ids)[list(feature_list)]
     
     def detect_stok_anomalies(self):
         """
@@ -225,6 +273,9 @@ class AnomalyDetector:
             
             alert_count = 0
             
+            # Z-Score/model kontrolüne girecek seriler: {urun_id: (urun, values)}
+            seriler = {}
+            
             for urun in urunler:
                 # Bu ürün için son 30 günlük metrikleri al
                 metrikler = MLMetric.query.filter(
@@ -273,12 +324,20 @@ class AnomalyDetector:
                     
                     continue  # Negatif stok için Z-Score kontrolüne gerek yok
                 
-                # Normal Z-Score anomali tespiti (sadece pozitif stoklar için)
+                # Normal anomali tespiti (sadece pozitif stoklar için)
                 if len(metrikler) < 3:
                     continue
                 
-                # Z-Score ile anomali tespiti
-                is_anomaly, z_score, mean, std = self.detect_with_zscore(values)
+                seriler[urun.id] = (urun, values)
+            
+            # Model ile toplu anomali tespiti (model yoksa Z-Score fallback)
+            sonuclar = self.detect_with_model_batch(
+                'stok_seviye',
+                {urun_id: values for urun_id, (urun, values) in seriler.items()}
+            )
+            
+            for urun_id, (urun, values) in seriler.items():
+                is_anomaly, z_score, mean, std = sonuclar[urun_id]
                 
                 if is_anomaly:
                     current_value = values[-1]
@@ -346,6 +405,9 @@ class AnomalyDetector:
             
             alert_count = 0
             
+            # Anomali kontrolüne girecek seriler: {oda_id: (oda, values)}
+            seriler = {}
+            
             for oda in odalar:
                 # Bu oda için son 7 günlük metrikleri al (tuketim_oran - DataCollector ile uyumlu)
                 metrikler = MLMetric.query.filter(
@@ -357,10 +419,17 @@ class AnomalyDetector:
                 if len(metrikler) < 3:
                     continue
                 
-                values = [m.metric_value for m in metrikler]
-                
-                # Z-Score ile anomali tespiti (daha düşük threshold: 2.5)
-                is_anomaly, z_score, mean, std = self.detect_with_zscore(values, threshold=2.5)
+                seriler[oda.id] = (oda, [m.metric_value for m in metrikler])
+            
+            # Model ile toplu anomali tespiti (fallback Z-Score, daha düşük threshold: 2.5)
+            sonuclar = self.detect_with_model_batch(
+                'tuketim_oran',
+                {oda_id: values for oda_id, (oda, values) in seriler.items()},
+                threshold=2.5
+            )
+            
+            for oda_id, (oda, values) in seriler.items():
+                is_anomaly, z_score, mean, std = sonuclar[oda_id]
                 
                 if is_anomaly:
                     current_value = values[-1]
@@ -434,6 +503,9 @@ class AnomalyDetector:
             
             alert_count = 0
             
+            # Anomali kontrolüne girecek seriler: {personel_id: (personel, values)}
+            seriler = {}
+            
             for personel in kat_sorumlulari:
                 # Bu personel için son 7 günlük metrikleri al
                 metrikler = MLMetric.query.filter(
@@ -445,10 +517,17 @@ class AnomalyDetector:
                 if len(metrikler) < 3:
                     continue
                 
-                values = [m.metric_value for m in metrikler]
-                
-                # Z-Score ile anomali tespiti
-                is_anomaly, z_score, mean, std = self.detect_with_zscore(values, threshold=2.0)
+                seriler[personel.id] = (personel, [m.metric_value for m in metrikler])
+            
+            # Model ile toplu anomali tespiti (fallback Z-Score, threshold: 2.0)
+            sonuclar = self.detect_with_model_batch(
+                'dolum_sure',
+                {personel_id: values for personel_id, (personel, values) in seriler.items()},
+                threshold=2.0
+            )
+            
+            for personel_id, (personel, values) in seriler.items():
+                is_anomaly, z_score, mean, std = sonuclar[personel_id]
                 
                 if is_anomaly:
                     current_value = values[-1]
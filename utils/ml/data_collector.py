@@ -17,52 +17,68 @@ class DataCollector:
         self.db = db
         self.collection_interval = timedelta(minutes=15)  # Toplama aralığı
     
-
+    def _toplu_kaydet(self, satirlar):
+        """
+        Metrik satırlarını tek bir toplu INSERT (executemany) ile yazar.
+        Args:
+            satirlar: dict listesi - metric_type, entity_id, metric_value, timestamp, extra_data
+        Returns: Yazılan satır sayısı
+        """
+        from models import MLMetric
+        
+        if satirlar:
+            self.db.session.execute(MLMetric.__table__.insert(), satirlar)
+        return len(satirlar)
     
     def collect_tuketim_metrics(self):
         """
         Oda bazlı tüketim verilerini topla (son 24 saat)
+        Tüm odalar tek bir GROUP BY sorgusuyla hesaplanır.
         Returns: Toplanan metrik sayısı
         """
         try:
-            from models import Oda, MinibarIslem, MinibarIslemDetay, MLMetric
+            from models import Oda, OdaTipi, Kat, MinibarIslem, MinibarIslemDetay
             
             # Son 24 saatlik verileri al
             son_24_saat = datetime.now(timezone.utc) - timedelta(hours=24)
-            
-            # Aktif odaları al
-            odalar = Oda.query.filter_by(aktif=True).all()
-            
-            collected_count = 0
             timestamp = datetime.now(timezone.utc)
             
-            for oda in odalar:
-                # Son 24 saatteki tüketimi hesapla
-                tuketim_toplam = self.db.session.query(
-                    func.coalesce(func.sum(MinibarIslemDetay.tuketim), 0)
-                ).join(
-                    MinibarIslem
-                ).filter(
-                    MinibarIslem.oda_id == oda.id,
-                    MinibarIslem.islem_tarihi >= son_24_saat,
-                    MinibarIslem.islem_tipi.in_(['ilk_dolum', 'yeniden_dolum', 'eksik_tamamlama', 'sayim'])
-                ).scalar()
-                
-                # Sadece tüketim varsa kaydet
-                if tuketim_toplam > 0:
-                    metric = MLMetric(
-                        metric_type='tuketim_oran',  # Railway'de: tuketim_oran
-                        entity_id=oda.id,
-                        metric_value=float(tuketim_toplam),
-                        timestamp=timestamp,
-                        extra_data={
-                            'oda_no': oda.oda_no,
-                            'oda_tipi': oda.oda_tipi_adi,
-                            'kat': oda.kat.kat_adi if oda.kat else None
-                        }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
+            tuketim_toplam = func.sum(MinibarIslemDetay.tuketim)
+            
+            # Sadece tüketimi olan aktif odalar
+            sonuclar = self.db.session.query(
+                Oda.id, Oda.oda_no, OdaTipi.ad.label('oda_tipi'), Kat.kat_adi,
+                tuketim_toplam.label('tuketim_toplam')
+            ).join(
+                MinibarIslem, MinibarIslem.oda_id == Oda.id
+            ).join(
+                MinibarIslemDetay, MinibarIslemDetay.islem_id == MinibarIslem.id
+            ).outerjoin(
+                OdaTipi, OdaTipi.id == Oda.oda_tipi_id
+            ).outerjoin(
+                Kat, Kat.id == Oda.kat_id
+            ).filter(
+                Oda.aktif == True,
+                MinibarIslem.islem_tarihi >= son_24_saat,
+                MinibarIslem.islem_tipi.in_(['ilk_dolum', 'yeniden_dolum', 'eksik_tamamlama', 'sayim'])
+            ).group_by(
+                Oda.id, Oda.oda_no, OdaTipi.ad, Kat.kat_adi
+            ).having(tuketim_toplam > 0).all()
+            
+            collected_count = self._toplu_kaydet([
+                {
+                    'metric_type': 'tuketim_oran',  # Railway'de: tuketim_oran
+                    'entity_id': row.id,
+                    'metric_value': float(row.tuketim_toplam),
+                    'timestamp': timestamp,
+                    'extra_data': {
+                        'oda_no': row.oda_no,
+                        'oda_tipi': row.oda_tipi,
+                        'kat': row.kat_adi
+                    }
+                }
+                for row in sonuclar
+            ])
             
             self.db.session.commit()
             logger.info(f"✅ Tüketim metrikleri toplandı: {collected_count} oda")
@@ -76,56 +92,54 @@ class DataCollector:
     def collect_dolum_metrics(self):
         """
         Dolum süresi metriklerini topla (son 7 gün)
+        Ardışık işlemler arası sürelerin ortalaması (son - ilk) / (n - 1)
+        olduğundan tüm personel tek GROUP BY sorgusuyla hesaplanır.
         Returns: Toplanan metrik sayısı
         """
         try:
-            from models import Kullanici, MinibarIslem, MLMetric
+            from models import Kullanici, Otel, MinibarIslem
             
             # Son 7 günlük verileri al
             son_7_gun = datetime.now(timezone.utc) - timedelta(days=7)
-            
-            # Kat sorumluları
-            kat_sorumlulari = Kullanici.query.filter_by(
-                rol='kat_sorumlusu',
-                aktif=True
-            ).all()
-            
-            collected_count = 0
             timestamp = datetime.now(timezone.utc)
             
-            for personel in kat_sorumlulari:
-                # Son 7 gündeki dolum işlemlerini al
-                dolum_islemleri = MinibarIslem.query.filter(
-                    MinibarIslem.personel_id == personel.id,
-                    MinibarIslem.islem_tarihi >= son_7_gun,
-                    MinibarIslem.islem_tipi.in_(['ilk_dolum', 'yeniden_dolum', 'eksik_tamamlama'])
-                ).order_by(MinibarIslem.islem_tarihi).all()
-                
-                if len(dolum_islemleri) >= 2:
-                    # Ortalama dolum süresini hesapla (işlemler arası süre)
-                    sureler = []
-                    for i in range(1, len(dolum_islemleri)):
-                        onceki = dolum_islemleri[i-1].islem_tarihi
-                        sonraki = dolum_islemleri[i].islem_tarihi
-                        sure_dakika = (sonraki - onceki).total_seconds() / 60
-                        sureler.append(sure_dakika)
-                    
-                    if sureler:
-                        ortalama_sure = sum(sureler) / len(sureler)
-                        
-                        metric = MLMetric(
-                            metric_type='dolum_sure',
-                            entity_id=personel.id,
-                            metric_value=float(ortalama_sure),
-                            timestamp=timestamp,
-                            extra_data={
-                                'personel_adi': f"{personel.ad} {personel.soyad}",
-                                'islem_sayisi': len(dolum_islemleri),
-                                'otel': personel.otel.ad if personel.otel else None
-                            }
-                        )
-                        self.db.session.add(metric)
-                        collected_count += 1
+            islem_sayisi = func.count(MinibarIslem.id)
+            
+            sonuclar = self.db.session.query(
+                Kullanici.id, Kullanici.ad, Kullanici.soyad, Otel.ad.label('otel_adi'),
+                islem_sayisi.label('islem_sayisi'),
+                func.min(MinibarIslem.islem_tarihi).label('ilk_islem'),
+                func.max(MinibarIslem.islem_tarihi).label('son_islem')
+            ).join(
+                MinibarIslem, MinibarIslem.personel_id == Kullanici.id
+            ).outerjoin(
+                Otel, Otel.id == Kullanici.otel_id
+            ).filter(
+                Kullanici.rol == 'kat_sorumlusu',
+                Kullanici.aktif == True,
+                MinibarIslem.islem_tarihi >= son_7_gun,
+                MinibarIslem.islem_tipi.in_(['ilk_dolum', 'yeniden_dolum', 'eksik_tamamlama'])
+            ).group_by(
+                Kullanici.id, Kullanici.ad, Kullanici.soyad, Otel.ad
+            ).having(islem_sayisi >= 2).all()
+            
+            satirlar = []
+            for row in sonuclar:
+                # Ortalama dolum süresi (işlemler arası süre, dakika)
+                ortalama_sure = (row.son_islem - row.ilk_islem).total_seconds() / 60 / (row.islem_sayisi - 1)
+                satirlar.append({
+                    'metric_type': 'dolum_sure',
+                    'entity_id': row.id,
+                    'metric_value': float(ortalama_sure),
+                    'timestamp': timestamp,
+                    'extra_data': {
+                        'personel_adi': f"{row.ad} {row.soyad}",
+                        'islem_sayisi': row.islem_sayisi,
+                        'otel': row.otel_adi
+                    }
+                })
+            
+            collected_count = self._toplu_kaydet(satirlar)
             
             self.db.session.commit()
             logger.info(f"✅ Dolum süresi metrikleri toplandı: {collected_count} personel")
@@ -139,74 +153,75 @@ class DataCollector:
     def collect_zimmet_metrics(self):
         """
         Zimmet kullanım ve fire metriklerini topla
+        Aktif zimmet detayları personel bazında tek sorguda toplanır.
         Returns: Toplanan metrik sayısı
         """
         try:
-            from models import Kullanici, PersonelZimmet, PersonelZimmetDetay, MLMetric
+            from models import Kullanici, PersonelZimmet, PersonelZimmetDetay
             
-            # Aktif kat sorumluları
-            kat_sorumlulari = Kullanici.query.filter_by(
-                rol='kat_sorumlusu',
-                aktif=True
-            ).all()
-            
-            collected_count = 0
             timestamp = datetime.now(timezone.utc)
             
-            for personel in kat_sorumlulari:
-                # Aktif zimmetleri al
-                aktif_zimmetler = PersonelZimmet.query.filter_by(
-                    personel_id=personel.id,
-                    durum='aktif'
-                ).all()
-                
-                if not aktif_zimmetler:
+            kullanilan = func.coalesce(PersonelZimmetDetay.kullanilan_miktar, 0)
+            # Fire = Zimmet - Kullanılan - Kalan (negatifse 0)
+            fire = func.greatest(
+                PersonelZimmetDetay.miktar - kullanilan - func.coalesce(PersonelZimmetDetay.kalan_miktar, 0),
+                0
+            )
+            
+            sonuclar = self.db.session.query(
+                Kullanici.id, Kullanici.ad, Kullanici.soyad,
+                func.coalesce(func.sum(PersonelZimmetDetay.miktar), 0).label('toplam_zimmet'),
+                func.coalesce(func.sum(kullanilan), 0).label('toplam_kullanim'),
+                func.coalesce(func.sum(fire), 0).label('toplam_fire')
+            ).join(
+                PersonelZimmet, PersonelZimmet.personel_id == Kullanici.id
+            ).join(
+                PersonelZimmetDetay, PersonelZimmetDetay.zimmet_id == PersonelZimmet.id
+            ).filter(
+                Kullanici.rol == 'kat_sorumlusu',
+                Kullanici.aktif == True,
+                PersonelZimmet.durum == 'aktif'
+            ).group_by(
+                Kullanici.id, Kullanici.ad, Kullanici.soyad
+            ).all()
+            
+            satirlar = []
+            for row in sonuclar:
+                toplam_zimmet = int(row.toplam_zimmet)
+                if toplam_zimmet <= 0:
                     continue
                 
-                toplam_zimmet = 0
-                toplam_kullanim = 0
-                toplam_fire = 0
+                toplam_kullanim = int(row.toplam_kullanim)
+                toplam_fire = int(row.toplam_fire)
+                personel_adi = f"{row.ad} {row.soyad}"
                 
-                for zimmet in aktif_zimmetler:
-                    for detay in zimmet.detaylar:
-                        toplam_zimmet += detay.miktar
-                        toplam_kullanim += detay.kullanilan_miktar
-                        # Fire = Zimmet - Kullanılan - Kalan
-                        fire = detay.miktar - detay.kullanilan_miktar - (detay.kalan_miktar or 0)
-                        toplam_fire += max(0, fire)
+                # Kullanım oranı
+                satirlar.append({
+                    'metric_type': 'zimmet_kullanim',
+                    'entity_id': row.id,
+                    'metric_value': float(toplam_kullanim / toplam_zimmet * 100),
+                    'timestamp': timestamp,
+                    'extra_data': {
+                        'personel_adi': personel_adi,
+                        'toplam_zimmet': toplam_zimmet,
+                        'toplam_kullanim': toplam_kullanim
+                    }
+                })
                 
-                if toplam_zimmet > 0:
-                    # Kullanım oranı
-                    kullanim_oran = (toplam_kullanim / toplam_zimmet * 100)
-                    metric = MLMetric(
-                        metric_type='zimmet_kullanim',
-                        entity_id=personel.id,
-                        metric_value=float(kullanim_oran),
-                        timestamp=timestamp,
-                        extra_data={
-                            'personel_adi': f"{personel.ad} {personel.soyad}",
-                            'toplam_zimmet': toplam_zimmet,
-                            'toplam_kullanim': toplam_kullanim
-                        }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
-                    
-                    # Fire oranı
-                    fire_oran = (toplam_fire / toplam_zimmet * 100)
-                    metric = MLMetric(
-                        metric_type='zimmet_fire',
-                        entity_id=personel.id,
-                        metric_value=float(fire_oran),
-                        timestamp=timestamp,
-                        extra_data={
-                            'personel_adi': f"{personel.ad} {personel.soyad}",
-                            'toplam_zimmet': toplam_zimmet,
-                            'toplam_fire': toplam_fire
-                        }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
+                # Fire oranı
+                satirlar.append({
+                    'metric_type': 'zimmet_fire',
+                    'entity_id': row.id,
+                    'metric_value': float(toplam_fire / toplam_zimmet * 100),
+                    'timestamp': timestamp,
+                    'extra_data': {
+                        'personel_adi': personel_adi,
+                        'toplam_zimmet': toplam_zimmet,
+                        'toplam_fire': toplam_fire
+                    }
+                })
+            
+            collected_count = self._toplu_kaydet(satirlar)
             
             self.db.session.commit()
             logger.info(f"✅ Zimmet metrikleri toplandı: {collected_count} kayıt")
@@ -220,69 +235,83 @@ class DataCollector:
     def collect_occupancy_metrics(self):
         """
         Doluluk ve boş oda tüketim metriklerini topla
+        Tüketim, in-house ve arrival durumları oda bazında birer toplu sorguyla alınır.
         Returns: Toplanan metrik sayısı
         """
         try:
-            from models import Oda, MisafirKayit, MinibarIslem, MinibarIslemDetay, MLMetric
+            from models import Oda, MisafirKayit, MinibarIslem, MinibarIslemDetay
             
             # Son 24 saat
             simdi = datetime.now(timezone.utc)
             son_24_saat = simdi - timedelta(hours=24)
+            bugun = simdi.date()
+            timestamp = simdi
             
-            # Aktif odaları al
-            odalar = Oda.query.filter_by(aktif=True).all()
+            tuketim_toplam = func.sum(MinibarIslemDetay.tuketim)
+            
+            # Son 24 saatte tüketimi olan aktif odalar
+            tuketimler = self.db.session.query(
+                Oda.id, Oda.oda_no, tuketim_toplam.label('tuketim_toplam')
+            ).join(
+                MinibarIslem, MinibarIslem.oda_id == Oda.id
+            ).join(
+                MinibarIslemDetay, MinibarIslemDetay.islem_id == MinibarIslem.id
+            ).filter(
+                Oda.aktif == True,
+                MinibarIslem.islem_tarihi >= son_24_saat
+            ).group_by(Oda.id, Oda.oda_no).having(tuketim_toplam > 0).all()
+            
+            if not tuketimler:
+                self.db.session.commit()
+                logger.info("✅ Doluluk metrikleri toplandı: 0 kayıt")
+                return 0
             
-            collected_count = 0
-            timestamp = simdi
+            oda_ids = [row.id for row in tuketimler]
             
-            for oda in odalar:
-                # Oda dolu mu kontrol et (son 24 saatte arrival var mı?)
-                misafir = MisafirKayit.query.filter(
-                    MisafirKayit.oda_id == oda.id,
+            # In-house kayıtları (hala odada olanlar)
+            in_house_odalar = {
+                row.oda_id for row in self.db.session.query(MisafirKayit.oda_id).filter(
+                    MisafirKayit.oda_id.in_(oda_ids),
+                    MisafirKayit.kayit_tipi == 'in_house',
+                    MisafirKayit.giris_tarihi <= bugun,
+                    MisafirKayit.cikis_tarihi >= bugun
+                ).distinct()
+            }
+            
+            # Oda başına son 24 saatteki en son arrival kaydı (DISTINCT ON)
+            son_arrival_cikis = {
+                row.oda_id: row.cikis_tarihi for row in self.db.session.query(
+                    MisafirKayit.oda_id, MisafirKayit.cikis_tarihi
+                ).filter(
+                    MisafirKayit.oda_id.in_(oda_ids),
                     MisafirKayit.kayit_tipi == 'arrival',
                     MisafirKayit.giris_tarihi >= son_24_saat.date()
-                ).order_by(MisafirKayit.giris_tarihi.desc()).first()
-                
-                # In-house kayıtları kontrol et (hala odada mı?)
-                in_house = MisafirKayit.query.filter(
-                    MisafirKayit.oda_id == oda.id,
-                    MisafirKayit.kayit_tipi == 'in_house',
-                    MisafirKayit.giris_tarihi <= simdi.date(),
-                    MisafirKayit.cikis_tarihi >= simdi.date()
-                ).order_by(MisafirKayit.giris_tarihi.desc()).first()
-                
+                ).distinct(MisafirKayit.oda_id).order_by(
+                    MisafirKayit.oda_id, MisafirKayit.giris_tarihi.desc()
+                )
+            }
+            
+            satirlar = []
+            for row in tuketimler:
                 # Oda durumu belirle
-                oda_dolu = False
-                if in_house:
-                    oda_dolu = True
-                elif misafir and misafir.cikis_tarihi >= simdi.date():
-                    oda_dolu = True
-                
-                # Son 24 saatteki tüketimi hesapla
-                tuketim_toplam = self.db.session.query(
-                    func.coalesce(func.sum(MinibarIslemDetay.tuketim), 0)
-                ).join(
-                    MinibarIslem
-                ).filter(
-                    MinibarIslem.oda_id == oda.id,
-                    MinibarIslem.islem_tarihi >= son_24_saat
-                ).scalar()
+                arrival_cikis = son_arrival_cikis.get(row.id)
+                oda_dolu = row.id in in_house_odalar or (arrival_cikis is not None and arrival_cikis >= bugun)
                 
                 # Boş oda ama tüketim var mı?
-                if not oda_dolu and tuketim_toplam > 0:
-                    metric = MLMetric(
-                        metric_type='bosta_tuketim',
-                        entity_id=oda.id,
-                        metric_value=float(tuketim_toplam),
-                        timestamp=timestamp,
-                        extra_data={
-                            'oda_no': oda.oda_no,
+                if not oda_dolu:
+                    satirlar.append({
+                        'metric_type': 'bosta_tuketim',
+                        'entity_id': row.id,
+                        'metric_value': float(row.tuketim_toplam),
+                        'timestamp': timestamp,
+                        'extra_data': {
+                            'oda_no': row.oda_no,
                             'oda_dolu': False,
-                            'tuketim': int(tuketim_toplam)
+                            'tuketim': int(row.tuketim_toplam)
                         }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
+                    })
+            
+            collected_count = self._toplu_kaydet(satirlar)
             
             self.db.session.commit()
             logger.info(f"✅ Doluluk metrikleri toplandı: {collected_count} kayıt")
@@ -296,63 +325,69 @@ class DataCollector:
     def collect_talep_metrics(self):
         """
         Misafir dolum talep metriklerini topla
+        Yanıt süreleri ve oda bazlı yoğunluk birer sorguyla alınır.
         Returns: Toplanan metrik sayısı
         """
         try:
-            from models import MinibarDolumTalebi, Oda, MLMetric
+            from models import MinibarDolumTalebi, Oda, Kat
             
             # Son 24 saatlik talepler
             son_24_saat = datetime.now(timezone.utc) - timedelta(hours=24)
+            timestamp = datetime.now(timezone.utc)
             
-            talepler = MinibarDolumTalebi.query.filter(
-                MinibarDolumTalebi.talep_tarihi >= son_24_saat
+            satirlar = []
+            
+            # Talep yanıt süresi (tamamlanan talepler için)
+            tamamlananlar = self.db.session.query(
+                MinibarDolumTalebi.id, MinibarDolumTalebi.oda_id,
+                MinibarDolumTalebi.talep_tarihi, MinibarDolumTalebi.tamamlanma_tarihi,
+                Oda.oda_no
+            ).outerjoin(
+                Oda, Oda.id == MinibarDolumTalebi.oda_id
+            ).filter(
+                MinibarDolumTalebi.talep_tarihi >= son_24_saat,
+                MinibarDolumTalebi.durum == 'tamamlandi',
+                MinibarDolumTalebi.tamamlanma_tarihi.isnot(None)
             ).all()
             
-            collected_count = 0
-            timestamp = datetime.now(timezone.utc)
+            for row in tamamlananlar:
+                yanit_sure = (row.tamamlanma_tarihi - row.talep_tarihi).total_seconds() / 60  # dakika
+                satirlar.append({
+                    'metric_type': 'talep_yanit_sure',
+                    'entity_id': row.oda_id,
+                    'metric_value': float(yanit_sure),
+                    'timestamp': timestamp,
+                    'extra_data': {
+                        'oda_no': row.oda_no,
+                        'talep_id': row.id
+                    }
+                })
             
             # Oda bazlı talep yoğunluğu
-            oda_talep_sayilari = {}
-            
-            for talep in talepler:
-                # Talep yanıt süresi (tamamlanan talepler için)
-                if talep.durum == 'tamamlandi' and talep.tamamlanma_tarihi:
-                    yanit_sure = (talep.tamamlanma_tarihi - talep.talep_tarihi).total_seconds() / 60  # dakika
-                    
-                    metric = MLMetric(
-                        metric_type='talep_yanit_sure',
-                        entity_id=talep.oda_id,
-                        metric_value=float(yanit_sure),
-                        timestamp=timestamp,
-                        extra_data={
-                            'oda_no': talep.oda.oda_no if talep.oda else None,
-                            'talep_id': talep.id
-                        }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
-                
-                # Talep yoğunluğu sayımı
-                if talep.oda_id not in oda_talep_sayilari:
-                    oda_talep_sayilari[talep.oda_id] = 0
-                oda_talep_sayilari[talep.oda_id] += 1
-            
-            # Talep yoğunluğu metriklerini kaydet
-            for oda_id, talep_sayisi in oda_talep_sayilari.items():
-                oda = Oda.query.filter_by(id=oda_id).first()
-                if oda:
-                    metric = MLMetric(
-                        metric_type='talep_yogunluk',
-                        entity_id=oda_id,
-                        metric_value=float(talep_sayisi),
-                        timestamp=timestamp,
-                        extra_data={
-                            'oda_no': oda.oda_no,
-                            'kat': oda.kat.kat_adi if oda.kat else None
-                        }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
+            yogunluklar = self.db.session.query(
+                Oda.id, Oda.oda_no, Kat.kat_adi,
+                func.count(MinibarDolumTalebi.id).label('talep_sayisi')
+            ).join(
+                MinibarDolumTalebi, MinibarDolumTalebi.oda_id == Oda.id
+            ).outerjoin(
+                Kat, Kat.id == Oda.kat_id
+            ).filter(
+                MinibarDolumTalebi.talep_tarihi >= son_24_saat
+            ).group_by(Oda.id, Oda.oda_no, Kat.kat_adi).all()
+            
+            for row in yogunluklar:
+                satirlar.append({
+                    'metric_type': 'talep_yogunluk',
+                    'entity_id': row.id,
+                    'metric_value': float(row.talep_sayisi),
+                    'timestamp': timestamp,
+                    'extra_data': {
+                        'oda_no': row.oda_no,
+                        'kat': row.kat_adi
+                    }
+                })
+            
+            collected_count = self._toplu_kaydet(satirlar)
             
             self.db.session.commit()
             logger.info(f"✅ Talep metrikleri toplandı: {collected_count} kayıt")
@@ -366,44 +401,41 @@ class DataCollector:
     def collect_qr_metrics(self):
         """
         QR okutma metriklerini topla
+        Personel bazlı okutma sayıları tek GROUP BY sorgusuyla alınır.
         Returns: Toplanan metrik sayısı
         """
         try:
-            from models import QRKodOkutmaLog, Kullanici, MLMetric
+            from models import QRKodOkutmaLog, Kullanici
             
             # Son 24 saatlik QR okutmalar
             son_24_saat = datetime.now(timezone.utc) - timedelta(hours=24)
-            
-            # Kat sorumluları
-            kat_sorumlulari = Kullanici.query.filter_by(
-                rol='kat_sorumlusu',
-                aktif=True
-            ).all()
-            
-            collected_count = 0
             timestamp = datetime.now(timezone.utc)
             
-            for personel in kat_sorumlulari:
-                # Bu personelin son 24 saatteki QR okutma sayısı
-                qr_count = QRKodOkutmaLog.query.filter(
-                    QRKodOkutmaLog.kullanici_id == personel.id,
-                    QRKodOkutmaLog.okutma_tarihi >= son_24_saat,
-                    QRKodOkutmaLog.basarili == True
-                ).count()
-                
-                if qr_count > 0:
-                    metric = MLMetric(
-                        metric_type='qr_okutma_siklik',
-                        entity_id=personel.id,
-                        metric_value=float(qr_count),
-                        timestamp=timestamp,
-                        extra_data={
-                            'personel_adi': f"{personel.ad} {personel.soyad}",
-                            'okutma_sayisi': qr_count
-                        }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
+            sonuclar = self.db.session.query(
+                Kullanici.id, Kullanici.ad, Kullanici.soyad,
+                func.count(QRKodOkutmaLog.id).label('qr_count')
+            ).join(
+                QRKodOkutmaLog, QRKodOkutmaLog.kullanici_id == Kullanici.id
+            ).filter(
+                Kullanici.rol == 'kat_sorumlusu',
+                Kullanici.aktif == True,
+                QRKodOkutmaLog.okutma_tarihi >= son_24_saat,
+                QRKodOkutmaLog.basarili == True
+            ).group_by(Kullanici.id, Kullanici.ad, Kullanici.soyad).all()
+            
+            collected_count = self._toplu_kaydet([
+                {
+                    'metric_type': 'qr_okutma_siklik',
+                    'entity_id': row.id,
+                    'metric_value': float(row.qr_count),
+                    'timestamp': timestamp,
+                    'extra_data': {
+                        'personel_adi': f"{row.ad} {row.soyad}",
+                        'okutma_sayisi': row.qr_count
+                    }
+                }
+                for row in sonuclar
+            ])
             
             self.db.session.commit()
             logger.info(f"✅ QR metrikleri toplandı: {collected_count} kayıt")
@@ -475,17 +507,13 @@ class DataCollector:
             
             engineer = FeatureEngineer(self.db)
             
-            # Aktif ürünler için feature çıkar ve kaydet
-            urunler = Urun.query.filter_by(aktif=True).limit(100).all()  # Max 100 ürün
-            saved_count = 0
+            # Aktif ürünler için feature'lar tek seferde çıkarılır ve toplu kaydedilir
+            urun_ids = [row.id for row in self.db.session.query(Urun.id).filter(Urun.aktif == True).limit(100)]  # Max 100 ürün
+            if not urun_ids:
+                return
             
-            for urun in urunler:
-                try:
-                    features = engineer.extract_stok_features(urun.id, lookback_days=30, save_to_db=True)
-                    if features:
-                        saved_count += 1
-                except Exception:
-                    continue
+            df = engineer.create_feature_matrix('stok_seviye', entity_ids=urun_ids, lookback_days=30, save_to_db=True)
+            saved_count = len(df) if df is not None else 0
             
             if saved_count > 0:
                 logger.info(f"📊 {saved_count} ürün için feature kaydedildi")
@@ -554,10 +582,10 @@ class DataCollector:
     def collect_stok_metrics_incremental(self):
         """
         Stok metriklerini incremental topla
-        Sadece değişen stokları kaydet
+        Sadece değişen stokları kaydet (stok ve son metrikler toplu sorgularla alınır)
         """
         try:
-            from models import Urun, StokHareket, MLMetric
+            from models import Urun, UrunGrup, StokHareket, MLMetric
             from sqlalchemy import case
 
             # Tüm ürünlerin stok durumunu tek sorguda hesapla
@@ -569,47 +597,59 @@ class DataCollector:
             
             stok_map = {row.urun_id: (row.giris_toplam - row.cikis_toplam) for row in stok_durumu}
 
+            # Ürün başına son stok_seviye metriği (DISTINCT ON, idx_ml_metrics_entity)
+            son_metrikler = {
+                row.entity_id: row for row in self.db.session.query(
+                    MLMetric.entity_id, MLMetric.metric_value, MLMetric.timestamp
+                ).filter(
+                    MLMetric.metric_type == 'stok_seviye'
+                ).distinct(MLMetric.entity_id).order_by(
+                    MLMetric.entity_id, MLMetric.timestamp.desc()
+                )
+            }
+
             # Aktif ürünleri al
-            urunler = Urun.query.filter_by(aktif=True).all()
+            urunler = self.db.session.query(
+                Urun.id, Urun.urun_adi, Urun.kritik_stok_seviyesi, UrunGrup.grup_adi
+            ).outerjoin(
+                UrunGrup, UrunGrup.id == Urun.grup_id
+            ).filter(Urun.aktif == True).all()
 
-            collected_count = 0
+            satirlar = []
             skipped_count = 0
             timestamp = datetime.now(timezone.utc)
+            duplicate_siniri = timestamp - timedelta(minutes=5)
 
             for urun in urunler:
-                # Duplicate kontrol
-                if self._check_duplicate('stok_seviye', urun.id, timestamp):
+                last_metric = son_metrikler.get(urun.id)
+
+                # Duplicate kontrol (son 5 dakika içinde kayıt var mı)
+                if last_metric is not None and last_metric.timestamp >= duplicate_siniri:
                     skipped_count += 1
                     continue
 
                 # O(1) maliyetle mevcut stoğu al
                 mevcut_stok = stok_map.get(urun.id, 0)
 
-                # Son kaydedilen stok değerini al
-                last_metric = MLMetric.query.filter_by(
-                    metric_type='stok_seviye',
-                    entity_id=urun.id
-                ).order_by(MLMetric.timestamp.desc()).first()
-
                 # Stok değişmişse kaydet
                 if last_metric is None or abs(last_metric.metric_value - mevcut_stok) > 0.01:
-                    metric = MLMetric(
-                        metric_type='stok_seviye',
-                        entity_id=urun.id,
-                        metric_value=float(mevcut_stok),
-                        timestamp=timestamp,
-                        extra_data={
+                    satirlar.append({
+                        'metric_type': 'stok_seviye',
+                        'entity_id': urun.id,
+                        'metric_value': float(mevcut_stok),
+                        'timestamp': timestamp,
+                        'extra_data': {
                             'urun_adi': urun.urun_adi,
                             'kritik_seviye': urun.kritik_stok_seviyesi,
-                            'grup': urun.grup.grup_adi if urun.grup else None,
+                            'grup': urun.grup_adi,
                             'degisim': float(mevcut_stok - (last_metric.metric_value if last_metric else 0))
                         }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
+                    })
                 else:
                     skipped_count += 1
 
+            collected_count = self._toplu_kaydet(satirlar)
+
             self.db.session.commit()
             logger.info(f"✅ Stok metrikleri: {collected_count} yeni, {skipped_count} atlandı")
             return collected_count
@@ -622,9 +662,10 @@ class DataCollector:
     def collect_new_transactions_only(self):
         """
         Sadece yeni işlemleri topla (son toplama sonrası)
+        Minibar tüketimleri işlem bazında tek GROUP BY sorgusuyla toplanır.
         """
         try:
-            from models import StokHareket, MinibarIslem, MLMetric
+            from models import StokHareket, MinibarIslem, MinibarIslemDetay
 
             # Son veri toplama zamanı
             last_collection = self._get_last_collection_time('transaction_processed')
@@ -633,66 +674,72 @@ class DataCollector:
                 # İlk toplama - son 24 saat
                 last_collection = datetime.now(timezone.utc) - timedelta(hours=24)
 
-            collected_count = 0
             timestamp = datetime.now(timezone.utc)
+            satirlar = []
 
             # Yeni stok hareketleri
-            new_stok_hareketleri = StokHareket.query.filter(
+            new_stok_hareketleri = self.db.session.query(
+                StokHareket.id, StokHareket.urun_id, StokHareket.miktar,
+                StokHareket.hareket_tipi, StokHareket.islem_tarihi, StokHareket.aciklama
+            ).filter(
                 StokHareket.islem_tarihi > last_collection
             ).all()
 
             for hareket in new_stok_hareketleri:
-                # İşlem metriği kaydet
-                metric = MLMetric(
-                    metric_type='stok_hareket',
-                    entity_id=hareket.urun_id,
-                    metric_value=float(hareket.miktar if hareket.hareket_tipi == 'giris' else -hareket.miktar),
-                    timestamp=hareket.islem_tarihi,
-                    extra_data={
+                # İşlem metriği
+                satirlar.append({
+                    'metric_type': 'stok_hareket',
+                    'entity_id': hareket.urun_id,
+                    'metric_value': float(hareket.miktar if hareket.hareket_tipi == 'giris' else -hareket.miktar),
+                    'timestamp': hareket.islem_tarihi,
+                    'extra_data': {
                         'hareket_tipi': hareket.hareket_tipi,
                         'hareket_id': hareket.id,
                         'aciklama': hareket.aciklama
                     }
-                )
-                self.db.session.add(metric)
-                collected_count += 1
-
-            # Yeni minibar işlemleri
-            new_minibar_islemleri = MinibarIslem.query.filter(
+                })
+
+            # Yeni minibar işlemleri (tüketimi olanlar)
+            toplam_tuketim = func.sum(MinibarIslemDetay.tuketim)
+            new_minibar_islemleri = self.db.session.query(
+                MinibarIslem.id, MinibarIslem.oda_id, MinibarIslem.islem_tipi,
+                MinibarIslem.islem_tarihi, MinibarIslem.personel_id,
+                toplam_tuketim.label('toplam_tuketim')
+            ).join(
+                MinibarIslemDetay, MinibarIslemDetay.islem_id == MinibarIslem.id
+            ).filter(
                 MinibarIslem.islem_tarihi > last_collection
-            ).all()
+            ).group_by(MinibarIslem.id).having(toplam_tuketim > 0).all()
 
             for islem in new_minibar_islemleri:
                 # Tüketim metriği
-                toplam_tuketim = sum(detay.tuketim for detay in islem.detaylar)
-
-                if toplam_tuketim > 0:
-                    metric = MLMetric(
-                        metric_type='minibar_tuketim',
-                        entity_id=islem.oda_id,
-                        metric_value=float(toplam_tuketim),
-                        timestamp=islem.islem_tarihi,
-                        extra_data={
-                            'islem_tipi': islem.islem_tipi,
-                            'islem_id': islem.id,
-                            'personel_id': islem.personel_id
-                        }
-                    )
-                    self.db.session.add(metric)
-                    collected_count += 1
+                satirlar.append({
+                    'metric_type': 'minibar_tuketim',
+                    'entity_id': islem.oda_id,
+                    'metric_value': float(islem.toplam_tuketim),
+                    'timestamp': islem.islem_tarihi,
+                    'extra_data': {
+                        'islem_tipi': islem.islem_tipi,
+                        'islem_id': islem.id,
+                        'personel_id': islem.personel_id
+                    }
+                })
+
+            collected_count = len(satirlar)
 
             # İşlem tamamlandı işareti
-            marker = MLMetric(
-                metric_type='transaction_processed',
-                entity_id=0,
-                metric_value=float(collected_count),
-                timestamp=timestamp,
-                extra_data={
+            satirlar.append({
+                'metric_type': 'transaction_processed',
+                'entity_id': 0,
+                'metric_value': float(collected_count),
+                'timestamp': timestamp,
+                'extra_data': {
                     'last_collection': last_collection.isoformat(),
                     'new_transactions': collected_count
                 }
-            )
-            self.db.session.add(marker)
+            })
+
+            self._toplu_kaydet(satirlar)
 
             self.db.session.commit()
             logger.info(f"✅ Yeni işlemler toplandı: {collected_count} kayıt")
@@ -751,15 +798,10 @@ class DataCollector:
         Returns: Silinen kayıt sayısı
         """
         try:
-            from models import MLMetric
-            
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-            
-            deleted_count = MLMetric.query.filter(
-                MLMetric.timestamp < cutoff_date
-            ).delete()
-            
-            self.db.session.commit()
+            from utils.partition_yoneticisi import PartitionYoneticisi
+
+            # ml_metrics aylık partition'lı: süresi dolan partition'lar düşürülür
+            deleted_count = PartitionYoneticisi.temizle('ml_metrics', gun=days)['silinen']
             
             if deleted_count > 0:
                 logger.info(f"🗑️  {deleted_count} eski metrik silindi ({days} günden eski)")
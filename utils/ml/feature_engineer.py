@@ -1,6 +1,11 @@
 """
 Feature Engineering - ML Anomaly Detection System
 Ham verilerden anlamlı özellikler (features) çıkarır
+
+Feature'lar toplu (batch) hesaplanır: lookback penceresindeki tüm metrikler
+tek sorguda DataFrame'e alınır, istatistik/trend/zaman feature'ları
+groupby işlemleriyle tüm entity'ler için birlikte çıkarılır ve ml_features'a
+tek INSERT ile yazılır. Tekil extract_* metodları aynı yolu tek entity ile kullanır.
 """
 
 from datetime import datetime, timezone, timedelta
@@ -11,6 +16,39 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Feature anahtarı -> ml_features kolonu (kalan anahtarlar extra_features'a yazılır)
+_FEATURE_KOLONLARI = {
+    # Statistical
+    'mean': 'mean_value',
+    'std': 'std_value',
+    'min': 'min_value',
+    'max': 'max_value',
+    'median': 'median_value',
+    'q25': 'q25_value',
+    'q75': 'q75_value',
+    # Trend
+    'slope': 'trend_slope',
+    'trend': 'trend_direction',
+    'volatility': 'volatility',
+    'change_rate': 'momentum',
+    # Domain Specific
+    'days_since_last_change': 'days_since_last_change',
+    'change_frequency': 'change_frequency',
+    'avg_change': 'avg_change_magnitude',
+    # Lag
+    'lag_1': 'lag_1',
+    'lag_7': 'lag_7',
+    'lag_30': 'lag_30',
+    # Rolling
+    'rolling_mean_7': 'rolling_mean_7',
+    'rolling_std_7': 'rolling_std_7',
+    'rolling_mean_30': 'rolling_mean_30',
+    'rolling_std_30': 'rolling_std_30',
+}
+
+# Tüketim feature'ları her iki tüketim metriğinden birlikte hesaplanır
+_TUKETIM_TIPLERI = ['tuketim_oran', 'minibar_tuketim']
+
 
 class FeatureEngineer:
     """Feature engineering servisi"""
@@ -18,6 +56,31 @@ class FeatureEngineer:
     def __init__(self, db):
         self.db = db
     
+    def _feature_satiri(self, metric_type, entity_id, features_dict, timestamp):
+        """Feature dictionary'sini ml_features satırına (kolon -> değer) çevirir"""
+        satir = {
+            'metric_type': metric_type,
+            'entity_id': int(entity_id),
+            'timestamp': timestamp,
+            
+            # Time
+            'hour_of_day': timestamp.hour,
+            'day_of_week': timestamp.weekday(),
+            'is_weekend': (timestamp.weekday() >= 5),
+            'day_of_month': timestamp.day,
+            
+            'zero_count': features_dict.get('zero_count', 0),
+            
+            # Extra features (diğer tüm feature'lar)
+            'extra_features': {
+                k: v for k, v in features_dict.items()
+                if k not in _FEATURE_KOLONLARI
+            }
+        }
+        for anahtar, kolon in _FEATURE_KOLONLARI.items():
+            satir[kolon] = features_dict.get(anahtar)
+        return satir
+    
     def save_features_to_db(self, metric_type, entity_id, features_dict, timestamp=None):
         """
         Feature'ları veritabanına kaydet
@@ -37,60 +100,7 @@ class FeatureEngineer:
             if timestamp is None:
                 timestamp = datetime.now(timezone.utc)
             
-            # Feature mapping
-            feature = MLFeature(
-                metric_type=metric_type,
-                entity_id=entity_id,
-                timestamp=timestamp,
-                
-                # Statistical
-                mean_value=features_dict.get('mean'),
-                std_value=features_dict.get('std'),
-                min_value=features_dict.get('min'),
-                max_value=features_dict.get('max'),
-                median_value=features_dict.get('median'),
-                q25_value=features_dict.get('q25'),
-                q75_value=features_dict.get('q75'),
-                
-                # Trend
-                trend_slope=features_dict.get('slope'),
-                trend_direction=features_dict.get('trend'),
-                volatility=features_dict.get('volatility'),
-                momentum=features_dict.get('change_rate'),
-                
-                # Time
-                hour_of_day=timestamp.hour,
-                day_of_week=timestamp.weekday(),
-                is_weekend=(timestamp.weekday() >= 5),
-                day_of_month=timestamp.day,
-                
-                # Domain Specific
-                days_since_last_change=features_dict.get('days_since_last_change'),
-                change_frequency=features_dict.get('change_frequency'),
-                avg_change_magnitude=features_dict.get('avg_change'),
-                zero_count=features_dict.get('zero_count', 0),
-                
-                # Lag
-                lag_1=features_dict.get('lag_1'),
-                lag_7=features_dict.get('lag_7'),
-                lag_30=features_dict.get('lag_30'),
-                
-                # Rolling
-                rolling_mean_7=features_dict.get('rolling_mean_7'),
-                rolling_std_7=features_dict.get('rolling_std_7'),
-                rolling_mean_30=features_dict.get('rolling_mean_30'),
-                rolling_std_30=features_dict.get('rolling_std_30'),
-                
-                # Extra features (diğer tüm feature'lar)
-                extra_features={
-                    k: v for k, v in features_dict.items()
-                    if k not in ['mean', 'std', 'min', 'max', 'median', 'q25', 'q75',
-                                 'slope', 'trend', 'volatility', 'change_rate',
-                                 'days_since_last_change', 'change_frequency', 'avg_change',
-                                 'lag_1', 'lag_7', 'lag_30',
-                                 'rolling_mean_7', 'rolling_std_7', 'rolling_mean_30', 'rolling_std_30']
-                }
-            )
+            feature = MLFeature(**self._feature_satiri(metric_type, entity_id, features_dict, timestamp))
             
             self.db.session.add(feature)
             self.db.session.commit()
@@ -103,6 +113,38 @@ class FeatureEngineer:
             logger.error(f"Feature kaydetme hatası: {str(e)}")
             return None
     
+    def save_features_bulk(self, metric_type, features_df, timestamps):
+        """
+        Feature matrisini ml_features'a tek INSERT (executemany) ile kaydet
+        
+        Args:
+            metric_type: Metrik tipi
+            features_df: entity_id index'li feature DataFrame'i
+            timestamps: {entity_id: zaman damgası} (entity'nin son metrik zamanı)
+        
+        Returns:
+            Kaydedilen satır sayısı
+        """
+        try:
+            from models import MLFeature
+            
+            satirlar = [
+                self._feature_satiri(metric_type, entity_id, features, timestamps[entity_id])
+                for entity_id, features in zip(features_df.index, features_df.to_dict('records'))
+            ]
+            
+            if satirlar:
+                self.db.session.execute(MLFeature.__table__.insert(), satirlar)
+            self.db.session.commit()
+            
+            logger.info(f"✅ Feature'lar kaydedildi: {metric_type} - {len(satirlar)} entity")
+            return len(satirlar)
+            
+        except Exception as e:
+            self.db.session.rollback()
+            logger.error(f"Toplu feature kaydetme hatası: {str(e)}")
+            return 0
+    
     def extract_stok_features(self, urun_id, lookback_days=30, save_to_db=True):
         """
         Stok verileri için feature'lar çıkar
@@ -121,75 +163,7 @@ class FeatureEngineer:
         - Kritik seviyeye yakınlık
         """
         try:
-            from models import MLMetric, Urun
-            
-            # Son N günlük stok metrikleri
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=lookback_days)
-            
-            metrics = MLMetric.query.filter(
-                MLMetric.metric_type == 'stok_seviye',
-                MLMetric.entity_id == urun_id,
-                MLMetric.timestamp >= cutoff_date
-            ).order_by(MLMetric.timestamp.asc()).all()
-            
-            if len(metrics) < 2:
-                return None
-            
-            # Değerleri al
-            values = np.array([m.metric_value for m in metrics])
-            timestamps = [m.timestamp for m in metrics]
-            
-            # Ürün bilgisi
-            urun = Urun.query.get(urun_id)
-            kritik_seviye = urun.kritik_stok_seviyesi if urun else 0
-            
-            # Feature'lar
-            features = {
-                # İstatistiksel özellikler
-                'mean': float(np.mean(values)),
-                'std': float(np.std(values)),
-                'min': float(np.min(values)),
-                'max': float(np.max(values)),
-                'median': float(np.median(values)),
-                'q25': float(np.percentile(values, 25)),
-                'q75': float(np.percentile(values, 75)),
-                
-                # Trend özellikleri
-                'trend': self._calculate_trend(values),
-                'slope': self._calculate_slope(timestamps, values),
-                'volatility': float(np.std(values) / (np.mean(values) + 1e-6)),  # Coefficient of variation
-                
-                # Değişim özellikleri
-                'change_rate': float((values[-1] - values[0]) / (values[0] + 1e-6)),
-                'avg_change': float(np.mean(np.diff(values))),
-                'max_change': float(np.max(np.abs(np.diff(values)))),
-                
-                # Kritik seviye özellikleri
-                'distance_to_critical': float(values[-1] - kritik_seviye),
-                'critical_ratio': float(values[-1] / (kritik_seviye + 1e-6)),
-                'below_critical_count': int(np.sum(values <= kritik_seviye)),
-                'below_critical_ratio': float(np.sum(values <= kritik_seviye) / len(values)),
-                
-                # Zaman özellikleri
-                'days_of_data': lookback_days,
-                'data_points': len(metrics),
-                'data_density': float(len(metrics) / lookback_days),
-                
-                # Son değer
-                'current_value': float(values[-1]),
-                'previous_value': float(values[-2] if len(values) > 1 else values[-1]),
-                
-                # Anomali skorları
-                'z_score': self._calculate_z_score(values[-1], values),
-                'iqr_score': self._calculate_iqr_score(values[-1], values),
-            }
-            
-            # Veritabanına kaydet
-            if save_to_db:
-                self.save_features_to_db('stok_seviye', urun_id, features, timestamps[-1])
-            
-            return features
-            
+            return self._ilk_satir(self._stok_feature_matrisi([urun_id], lookback_days, save_to_db))
         except Exception as e:
             logger.error(f"Stok feature extraction hatası: {str(e)}")
             return None
@@ -206,81 +180,7 @@ class FeatureEngineer:
         - Seasonality
         """
         try:
-            from models import MLMetric, Oda, MisafirKayit
-            
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=lookback_days)
-            
-            metrics = MLMetric.query.filter(
-                MLMetric.metric_type.in_(['tuketim_oran', 'minibar_tuketim']),
-                MLMetric.entity_id == oda_id,
-                MLMetric.timestamp >= cutoff_date
-            ).order_by(MLMetric.timestamp.asc()).all()
-            
-            if len(metrics) < 2:
-                return None
-            
-            values = np.array([m.metric_value for m in metrics])
-            timestamps = [m.timestamp for m in metrics]
-            
-            # Oda bilgisi
-            oda = Oda.query.get(oda_id)
-            
-            # Doluluk bilgisi
-            doluluk_count = MisafirKayit.query.filter(
-                MisafirKayit.oda_id == oda_id,
-                MisafirKayit.giris_tarihi >= cutoff_date.date()
-            ).count()
-            
-            # Hafta içi/sonu ayrımı
-            weekday_values = []
-            weekend_values = []
-            
-            for ts, val in zip(timestamps, values):
-                if ts.weekday() < 5:  # Pazartesi-Cuma
-                    weekday_values.append(val)
-                else:  # Cumartesi-Pazar
-                    weekend_values.append(val)
-            
-            features = {
-                # Temel istatistikler
-                'mean': float(np.mean(values)),
-                'std': float(np.std(values)),
-                'min': float(np.min(values)),
-                'max': float(np.max(values)),
-                'median': float(np.median(values)),
-                
-                # Trend
-                'trend': self._calculate_trend(values),
-                'slope': self._calculate_slope(timestamps, values),
-                
-                # Hafta içi/sonu
-                'weekday_mean': float(np.mean(weekday_values)) if weekday_values else 0,
-                'weekend_mean': float(np.mean(weekend_values)) if weekend_values else 0,
-                'weekday_weekend_ratio': float(np.mean(weekday_values) / (np.mean(weekend_values) + 1e-6)) if weekday_values and weekend_values else 1,
-                
-                # Doluluk ilişkisi
-                'occupancy_count': doluluk_count,
-                'consumption_per_occupancy': float(np.sum(values) / (doluluk_count + 1e-6)),
-                
-                # Pattern özellikleri
-                'consistency': 1.0 - float(np.std(values) / (np.mean(values) + 1e-6)),
-                'peak_to_avg_ratio': float(np.max(values) / (np.mean(values) + 1e-6)),
-                
-                # Zaman özellikleri
-                'days_of_data': lookback_days,
-                'data_points': len(metrics),
-                
-                # Son değer
-                'current_value': float(values[-1]),
-                'z_score': self._calculate_z_score(values[-1], values),
-                
-                # Oda özellikleri
-                'oda_tipi': oda.oda_tipi_adi if oda else 'unknown',
-                'kat_id': oda.kat_id if oda else 0,
-            }
-            
-            return features
-            
+            return self._ilk_satir(self._tuketim_feature_matrisi([oda_id], lookback_days))
         except Exception as e:
             logger.error(f"Tüketim feature extraction hatası: {str(e)}")
             return None
@@ -296,79 +196,7 @@ class FeatureEngineer:
         - Zaman dilimi analizi
         """
         try:
-            from models import MLMetric, Kullanici
-            
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=lookback_days)
-            
-            metrics = MLMetric.query.filter(
-                MLMetric.metric_type == 'dolum_sure',
-                MLMetric.entity_id == personel_id,
-                MLMetric.timestamp >= cutoff_date
-            ).order_by(MLMetric.timestamp.asc()).all()
-            
-            if len(metrics) < 2:
-                return None
-            
-            values = np.array([m.metric_value for m in metrics])
-            timestamps = [m.timestamp for m in metrics]
-            
-            # Personel bilgisi
-            personel = Kullanici.query.get(personel_id)
-            
-            # Zaman dilimi analizi (sabah/öğle/akşam)
-            morning_values = []  # 06:00-12:00
-            afternoon_values = []  # 12:00-18:00
-            evening_values = []  # 18:00-24:00
-            
-            for ts, val in zip(timestamps, values):
-                hour = ts.hour
-                if 6 <= hour < 12:
-                    morning_values.append(val)
-                elif 12 <= hour < 18:
-                    afternoon_values.append(val)
-                elif 18 <= hour < 24:
-                    evening_values.append(val)
-            
-            features = {
-                # Temel istatistikler
-                'mean': float(np.mean(values)),
-                'std': float(np.std(values)),
-                'min': float(np.min(values)),
-                'max': float(np.max(values)),
-                'median': float(np.median(values)),
-                
-                # Verimlilik
-                'efficiency_score': float(1.0 / (np.mean(values) + 1e-6)),  # Düşük süre = yüksek verimlilik
-                'consistency': 1.0 - float(np.std(values) / (np.mean(values) + 1e-6)),
-                
-                # Trend
-                'trend': self._calculate_trend(values),
-                'improvement_rate': -self._calculate_slope(timestamps, values),  # Negatif slope = iyileşme
-                
-                # Zaman dilimi analizi
-                'morning_mean': float(np.mean(morning_values)) if morning_values else 0,
-                'afternoon_mean': float(np.mean(afternoon_values)) if afternoon_values else 0,
-                'evening_mean': float(np.mean(evening_values)) if evening_values else 0,
-                
-                # Performans metrikleri
-                'fast_operations_ratio': float(np.sum(values < np.median(values)) / len(values)),
-                'slow_operations_ratio': float(np.sum(values > np.percentile(values, 75)) / len(values)),
-                
-                # Zaman özellikleri
-                'days_of_data': lookback_days,
-                'data_points': len(metrics),
-                'operations_per_day': float(len(metrics) / lookback_days),
-                
-                # Son değer
-                'current_value': float(values[-1]),
-                'z_score': self._calculate_z_score(values[-1], values),
-                
-                # Personel özellikleri
-                'personel_adi': f"{personel.ad} {personel.soyad}" if personel else 'unknown',
-            }
-            
-            return features
-            
+            return self._ilk_satir(self._dolum_feature_matrisi([personel_id], lookback_days))
         except Exception as e:
             logger.error(f"Dolum feature extraction hatası: {str(e)}")
             return None
@@ -400,46 +228,38 @@ class FeatureEngineer:
         
         return features
     
-    def create_feature_matrix(self, metric_type, entity_ids=None, lookback_days=30):
+    def create_feature_matrix(self, metric_type, entity_ids=None, lookback_days=30, save_to_db=True):
         """
         Birden fazla entity için feature matrix oluştur
         
+        Tüm entity'lerin metrikleri tek sorguda okunur ve feature'lar
+        groupby ile birlikte hesaplanır (entity başına sorgu yapılmaz).
+        
+        Args:
+            metric_type: Metrik tipi
+            entity_ids: Entity ID listesi (None ise pencerede verisi olan tüm entity'ler)
+            lookback_days: Kaç günlük veri kullanılacak
+            save_to_db: stok_seviye feature'larını ml_features'a toplu kaydet mi?
+        
         Returns: pandas DataFrame
         """
         try:
-            from models import MLMetric
-            
-            if entity_ids is None:
-                # Tüm entity'leri al
-                entity_ids = self.db.session.query(
-                    MLMetric.entity_id
-                ).filter(
-                    MLMetric.metric_type == metric_type
-                ).distinct().all()
-                entity_ids = [e[0] for e in entity_ids]
-            
-            features_list = []
-            
-            for entity_id in entity_ids:
-                if metric_type == 'stok_seviye':
-                    features = self.extract_stok_features(entity_id, lookback_days)
-                elif metric_type in ['tuketim_oran', 'minibar_tuketim']:
-                    features = self.extract_tuketim_features(entity_id, lookback_days)
-                elif metric_type == 'dolum_sure':
-                    features = self.extract_dolum_features(entity_id, lookback_days)
-                else:
-                    continue
-                
-                if features:
-                    features['entity_id'] = entity_id
-                    features['metric_type'] = metric_type
-                    features_list.append(features)
+            if metric_type == 'stok_seviye':
+                features_df = self._stok_feature_matrisi(entity_ids, lookback_days, save_to_db)
+            elif metric_type in _TUKETIM_TIPLERI:
+                features_df = self._tuketim_feature_matrisi(entity_ids, lookback_days)
+            elif metric_type == 'dolum_sure':
+                features_df = self._dolum_feature_matrisi(entity_ids, lookback_days)
+            else:
+                return None
             
-            if not features_list:
+            if features_df is None or features_df.empty:
                 return None
             
             # DataFrame oluştur
-            df = pd.DataFrame(features_list)
+            df = features_df.reset_index(drop=True)
+            df['entity_id'] = features_df.index.to_numpy()
+            df['metric_type'] = metric_type
             
             logger.info(f"✅ Feature matrix oluşturuldu: {len(df)} entity, {len(df.columns)} feature")
             
@@ -449,6 +269,331 @@ class FeatureEngineer:
             logger.error(f"Feature matrix oluşturma hatası: {str(e)}")
             return None
     
+    # Batch feature hesaplama
+    
+    def _metrikleri_yukle(self, metric_types, entity_ids, lookback_days):
+        """
+        Lookback penceresindeki metrikleri tek sorguda DataFrame'e yükler.
+        
+        Returns:
+            DataFrame (entity_id, value, timestamp, saniye, saat, gun) - entity ve
+            zamana göre sıralı, 2'den az ölçümü olan entity'ler çıkarılmış; veri yoksa None
+        """
+        from models import MLMetric
+        
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+        
+        query = self.db.session.query(
+            MLMetric.entity_id, MLMetric.metric_value, MLMetric.timestamp
+        ).filter(
+            MLMetric.metric_type.in_(metric_types),
+            MLMetric.timestamp >= cutoff_date
+        )
+        if entity_ids is not None:
+            query = query.filter(MLMetric.entity_id.in_(list(entity_ids)))
+        
+        satirlar = query.order_by(
+            MLMetric.entity_id, MLMetric.timestamp.asc(), MLMetric.id.asc()
+        ).all()
+        
+        if not satirlar:
+            return None
+        
+        df = pd.DataFrame(satirlar, columns=['entity_id', 'value', 'timestamp'])
+        df['value'] = df['value'].astype(float)
+        
+        boyut = df.groupby('entity_id')['value'].transform('size')
+        df = df[boyut >= 2].reset_index(drop=True)
+        if df.empty:
+            return None
+        
+        zaman = pd.to_datetime(df['timestamp'], utc=True)
+        # Saat/gün ayrımı KKTC saatine göre yapılır (yaz/kış saati satır bazında)
+        yerel = zaman.dt.tz_convert('Europe/Nicosia')
+        
+        df['saniye'] = (zaman - zaman.groupby(df['entity_id']).transform('first')).dt.total_seconds()
+        df['saat'] = yerel.dt.hour
+        df['gun'] = yerel.dt.weekday
+        return df
+    
+    def _grup_istatistikleri(self, df):
+        """
+        Entity bazında temel istatistik, trend, slope ve anomali skorlarını hesaplar
+        (_calculate_trend/_calculate_slope/_calculate_z_score/_calculate_iqr_score ile aynı formüller).
+        
+        Returns:
+            DataFrame: entity_id index'li
+        """
+        g = df.groupby('entity_id')['value']
+        ist = pd.DataFrame({
+            'n': g.size(),
+            'mean': g.mean(),
+            'std': g.std(ddof=0),
+            'min': g.min(),
+            'max': g.max(),
+            'median': g.median(),
+            'q25': g.quantile(0.25),
+            'q75': g.quantile(0.75),
+            'sum': g.sum(),
+            'ilk': g.first(),
+            'son': g.last(),
+            'onceki': g.shift(1).groupby(df['entity_id']).last(),
+        })
+        
+        # Trend: ikinci yarı ortalaması - ilk yarı ortalaması, eşik std * 0.5
+        ilk_yari = g.cumcount() < (g.transform('size') // 2)
+        fark = (
+            df.loc[~ilk_yari].groupby('entity_id')['value'].mean()
+            - df.loc[ilk_yari].groupby('entity_id')['value'].mean()
+        ).reindex(ist.index)
+        esik = ist['std'] * 0.5
+        ist['trend'] = np.select([fark > esik, fark < -esik], [1, -1], 0)
+        
+        # Linear regression slope (x: ilk ölçümden itibaren saniye)
+        x = df['saniye']
+        y = df['value']
+        toplamlar = pd.DataFrame({
+            'x': x, 'y': y, 'xy': x * y, 'xx': x * x, 'entity_id': df['entity_id']
+        }).groupby('entity_id').sum()
+        n = ist['n']
+        ist['slope'] = (
+            (n * toplamlar['xy'] - toplamlar['x'] * toplamlar['y'])
+            / (n * toplamlar['xx'] - toplamlar['x'] ** 2 + 1e-6)
+        )
+        
+        # Ardışık değişimler
+        degisim = g.diff()
+        ist['avg_change'] = degisim.groupby(df['entity_id']).mean()
+        ist['max_change'] = degisim.abs().groupby(df['entity_id']).max()
+        
+        # Son değerin z-score ve IQR skoru
+        std_guvenli = ist['std'].where(ist['std'] >= 1e-6, 1.0)
+        ist['z_score'] = np.where(ist['std'] < 1e-6, 0.0, (ist['son'] - ist['mean']) / std_guvenli)
+        
+        iqr = ist['q75'] - ist['q25']
+        iqr_guvenli = iqr.where(iqr >= 1e-6, 1.0)
+        alt_sinir = ist['q25'] - 1.5 * iqr
+        ust_sinir = ist['q75'] + 1.5 * iqr
+        ist['iqr_score'] = np.select(
+            [iqr < 1e-6, ist['son'] < alt_sinir, ist['son'] > ust_sinir],
+            [0.0, (alt_sinir - ist['son']) / iqr_guvenli, (ist['son'] - ust_sinir) / iqr_guvenli],
+            0.0
+        )
+        return ist
+    
+    def _grup_ortalamasi(self, df, maske, index):
+        """Maskeye uyan ölçümlerin entity bazında ortalaması (ölçüm yoksa NaN)"""
+        return df.loc[maske].groupby('entity_id')['value'].mean().reindex(index)
+    
+    def _ilk_satir(self, features_df):
+        """Tek entity'lik feature matrisini dictionary'ye çevirir"""
+        if features_df is None or features_df.empty:
+            return None
+        return features_df.to_dict('records')[0]
+    
+    def _stok_feature_matrisi(self, entity_ids, lookback_days, save_to_db):
+        """Stok feature'ları (entity_id = urun_id index'li DataFrame)"""
+        from models import Urun
+        
+        df = self._metrikleri_yukle(['stok_seviye'], entity_ids, lookback_days)
+        if df is None:
+            return None
+        
+        ist = self._grup_istatistikleri(df)
+        
+        # Ürün kritik seviyeleri tek sorguda
+        kritik_map = dict(self.db.session.query(
+            Urun.id, Urun.kritik_stok_seviyesi
+        ).filter(Urun.id.in_(ist.index.tolist())).all())
+        kritik = pd.Series(kritik_map, dtype=float).reindex(ist.index).fillna(0.0)
+        
+        kritik_alti = (df['value'] <= df['entity_id'].map(kritik)).groupby(df['entity_id']).sum()
+        
+        features = pd.DataFrame({
+            # İstatistiksel özellikler
+            'mean': ist['mean'],
+            'std': ist['std'],
+            'min': ist['min'],
+            'max': ist['max'],
+            'median': ist['median'],
+            'q25': ist['q25'],
+            'q75': ist['q75'],
+            
+            # Trend özellikleri
+            'trend': ist['trend'],
+            'slope': ist['slope'],
+            'volatility': ist['std'] / (ist['mean'] + 1e-6),  # Coefficient of variation
+            
+            # Değişim özellikleri
+            'change_rate': (ist['son'] - ist['ilk']) / (ist['ilk'] + 1e-6),
+            'avg_change': ist['avg_change'],
+            'max_change': ist['max_change'],
+            
+            # Kritik seviye özellikleri
+            'distance_to_critical': ist['son'] - kritik,
+            'critical_ratio': ist['son'] / (kritik + 1e-6),
+            'below_critical_count': kritik_alti.astype(int),
+            'below_critical_ratio': kritik_alti / ist['n'],
+            
+            # Zaman özellikleri
+            'days_of_data': lookback_days,
+            'data_points': ist['n'],
+            'data_density': ist['n'] / lookback_days,
+            
+            # Son değer
+            'current_value': ist['son'],
+            'previous_value': ist['onceki'],
+            
+            # Anomali skorları
+            'z_score': ist['z_score'],
+            'iqr_score': ist['iqr_score'],
+        }, index=ist.index)
+        
+        # Veritabanına kaydet (zaman damgası: entity'nin son ölçümü)
+        if save_to_db:
+            son_zamanlar = df.groupby('entity_id')['timestamp'].last()
+            self.save_features_bulk('stok_seviye', features, {
+                entity_id: pd.Timestamp(zaman).to_pydatetime()
+                for entity_id, zaman in son_zamanlar.items()
+            })
+        
+        return features
+    
+    def _tuketim_feature_matrisi(self, entity_ids, lookback_days):
+        """Tüketim feature'ları (entity_id = oda_id index'li DataFrame)"""
+        from models import Oda, OdaTipi, MisafirKayit
+        
+        df = self._metrikleri_yukle(_TUKETIM_TIPLERI, entity_ids, lookback_days)
+        if df is None:
+            return None
+        
+        ist = self._grup_istatistikleri(df)
+        oda_ids = ist.index.tolist()
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+        
+        # Oda bilgisi
+        odalar = {
+            row.id: row for row in self.db.session.query(
+                Oda.id, Oda.kat_id, OdaTipi.ad.label('oda_tipi')
+            ).outerjoin(
+                OdaTipi, OdaTipi.id == Oda.oda_tipi_id
+            ).filter(Oda.id.in_(oda_ids))
+        }
+        
+        # Doluluk bilgisi
+        doluluk = pd.Series(dict(self.db.session.query(
+            MisafirKayit.oda_id, func.count(MisafirKayit.id)
+        ).filter(
+            MisafirKayit.oda_id.in_(oda_ids),
+            MisafirKayit.giris_tarihi >= cutoff_date.date()
+        ).group_by(MisafirKayit.oda_id).all()), dtype=float).reindex(ist.index).fillna(0).astype(int)
+        
+        # Hafta içi/sonu ayrımı
+        hafta_ici = self._grup_ortalamasi(df, df['gun'] < 5, ist.index)  # Pazartesi-Cuma
+        hafta_sonu = self._grup_ortalamasi(df, df['gun'] >= 5, ist.index)  # Cumartesi-Pazar
+        
+        features = pd.DataFrame({
+            # Temel istatistikler
+            'mean': ist['mean'],
+            'std': ist['std'],
+            'min': ist['min'],
+            'max': ist['max'],
+            'median': ist['median'],
+            
+            # Trend
+            'trend': ist['trend'],
+            'slope': ist['slope'],
+            
+            # Hafta içi/sonu
+            'weekday_mean': hafta_ici.fillna(0),
+            'weekend_mean': hafta_sonu.fillna(0),
+            'weekday_weekend_ratio': (hafta_ici / (hafta_sonu + 1e-6)).fillna(1),
+            
+            # Doluluk ilişkisi
+            'occupancy_count': doluluk,
+            'consumption_per_occupancy': ist['sum'] / (doluluk + 1e-6),
+            
+            # Pattern özellikleri
+            'consistency': 1.0 - ist['std'] / (ist['mean'] + 1e-6),
+            'peak_to_avg_ratio': ist['max'] / (ist['mean'] + 1e-6),
+            
+            # Zaman özellikleri
+            'days_of_data': lookback_days,
+            'data_points': ist['n'],
+            
+            # Son değer
+            'current_value': ist['son'],
+            'z_score': ist['z_score'],
+            
+            # Oda özellikleri
+            'oda_tipi': [odalar[oda_id].oda_tipi if oda_id in odalar else 'unknown' for oda_id in oda_ids],
+            'kat_id': [odalar[oda_id].kat_id if oda_id in odalar else 0 for oda_id in oda_ids],
+        }, index=ist.index)
+        
+        return features
+    
+    def _dolum_feature_matrisi(self, entity_ids, lookback_days):
+        """Dolum süresi feature'ları (entity_id = personel_id index'li DataFrame)"""
+        from models import Kullanici
+        
+        df = self._metrikleri_yukle(['dolum_sure'], entity_ids, lookback_days)
+        if df is None:
+            return None
+        
+        ist = self._grup_istatistikleri(df)
+        personel_ids = ist.index.tolist()
+        
+        # Personel bilgisi
+        personeller = {
+            row.id: f"{row.ad} {row.soyad}" for row in self.db.session.query(
+                Kullanici.id, Kullanici.ad, Kullanici.soyad
+            ).filter(Kullanici.id.in_(personel_ids))
+        }
+        
+        # Performans metrikleri (entity'nin kendi medyan/q75 değerine göre)
+        hizli = (df['value'] < df['entity_id'].map(ist['median'])).groupby(df['entity_id']).sum()
+        yavas = (df['value'] > df['entity_id'].map(ist['q75'])).groupby(df['entity_id']).sum()
+        
+        features = pd.DataFrame({
+            # Temel istatistikler
+            'mean': ist['mean'],
+            'std': ist['std'],
+            'min': ist['min'],
+            'max': ist['max'],
+            'median': ist['median'],
+            
+            # Verimlilik
+            'efficiency_score': 1.0 / (ist['mean'] + 1e-6),  # Düşük süre = yüksek verimlilik
+            'consistency': 1.0 - ist['std'] / (ist['mean'] + 1e-6),
+            
+            # Trend
+            'trend': ist['trend'],
+            'improvement_rate': -ist['slope'],  # Negatif slope = iyileşme
+            
+            # Zaman dilimi analizi (sabah 06-12 / öğle 12-18 / akşam 18-24)
+            'morning_mean': self._grup_ortalamasi(df, df['saat'].between(6, 11), ist.index).fillna(0),
+            'afternoon_mean': self._grup_ortalamasi(df, df['saat'].between(12, 17), ist.index).fillna(0),
+            'evening_mean': self._grup_ortalamasi(df, df['saat'] >= 18, ist.index).fillna(0),
+            
+            # Performans metrikleri
+            'fast_operations_ratio': hizli / ist['n'],
+            'slow_operations_ratio': yavas / ist['n'],
+            
+            # Zaman özellikleri
+            'days_of_data': lookback_days,
+            'data_points': ist['n'],
+            'operations_per_day': ist['n'] / lookback_days,
+            
+            # Son değer
+            'current_value': ist['son'],
+            'z_score': ist['z_score'],
+            
+            # Personel özellikleri
+            'personel_adi': [personeller.get(personel_id, 'unknown') for personel_id in personel_ids],
+        }, index=ist.index)
+        
+        return features
+    
     # Helper methods
     
     def _calculate_trend(self, values):
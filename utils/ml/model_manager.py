@@ -500,7 +500,11 @@ class ModelManager:
             
             self.db.session.add(new_model)
             self.db.session.commit()
-            
+
+            # Bu process'teki registry yeni sürümü TTL beklemeden yüklesin
+            from utils.ml.model_registry import model_registry
+            model_registry.gecersiz_kil(model_type, metric_type)
+
             # Total save time
             total_time_ms = (time.time() - start_time) * 1000
             
@@ -0,0 +1,162 @@
+"""
+Model Registry - Process İçi Model Önbelleği
+Deserialize edilmiş model paketlerini bellekte tutar
+
+Anomali tespiti her çağrıda aktif MLModel kaydını sorgulayıp modeli
+diskten joblib ile yüklüyordu. Registry paketi (model_type, metric_type,
+sürüm) anahtarıyla bellekte tutar; sürüm aktif MLModel kaydının id'sidir.
+
+- Sürüm kontrolü: Aktif kaydın id'si en fazla ML_MODEL_REGISTRY_TTL
+  saniyede bir (idx_ml_models_type_active indeksi ile tek kolon) okunur.
+  Sürüm değişmediyse disk ve joblib'e hiç gidilmez.
+- Hot-swap: Yeni sürüm kilit dışında yüklenir, hazır olunca kayıt tek
+  atamayla değiştirilir; okuyanlar ya eski ya yeni paketi görür.
+- Eğitim aynı process'te yapıldıysa save_model_to_file registry'yi
+  geçersiz kılar, yeni model TTL beklemeden kullanılır.
+
+Kullanım:
+    from utils.ml.model_registry import model_registry
+
+    paket = model_registry.getir('isolation_forest', 'stok_seviye')
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_Kayit = namedtuple('_Kayit', ['surum', 'paket', 'kontrol_zamani'])
+
+
+class ModelRegistry:
+    """Aktif model paketlerinin process içi önbelleği (thread-safe, fork güvenli)"""
+
+    def __init__(self, ttl=None):
+        self.ttl = int(ttl if ttl is not None else Config.ML_MODEL_REGISTRY_TTL)
+        self.enabled = Config.ML_MODEL_REGISTRY_ENABLED
+
+        self._lock = threading.Lock()
+        self._yukleme_kilitleri = {}
+        self._pid = os.getpid()
+        self._kayitlar = {}  # (model_type, metric_type) -> _Kayit
+        self._model_manager = None
+
+        self.hits = 0
+        self.loads = 0
+        self.swaps = 0
+
+    def _fork_kontrol(self):
+        """Fork sonrası kilitler ve manager yeniden kurulur"""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._yukleme_kilitleri = {}
+            self._kayitlar = {}
+            self._model_manager = None
+            self._pid = os.getpid()
+
+    def _manager(self):
+        if self._model_manager is None:
+            from models import db
+            from utils.ml.model_manager import ModelManager
+            self._model_manager = ModelManager(db)
+        return self._model_manager
+
+    def _aktif_surum(self, model_type, metric_type):
+        """Aktif model kaydının id'si (yoksa None)"""
+        from models import db, MLModel
+
+        return db.session.query(MLModel.id).filter(
+            MLModel.model_type == model_type,
+            MLModel.metric_type == metric_type,
+            MLModel.is_active == True
+        ).order_by(MLModel.id.desc()).limit(1).scalar()
+
+    def getir(self, model_type, metric_type):
+        """
+        Aktif model paketini döndürür (yoksa None).
+
+        Returns:
+            dict (model, scaler, feature_list, ...) veya eski formatta direkt model
+        """
+        if not self.enabled:
+            return self._manager().load_model_from_file(model_type=model_type, metric_type=metric_type)
+
+        self._fork_kontrol()
+        anahtar = (model_type, metric_type)
+
+        kayit = self._kayitlar.get(anahtar)
+        if kayit is not None and time.monotonic() - kayit.kontrol_zamani < self.ttl:
+            self.hits += 1
+            return kayit.paket
+
+        with self._lock:
+            yukleme_kilidi = self._yukleme_kilitleri.setdefault(anahtar, threading.Lock())
+
+        # Aynı model için aynı anda tek yükleme yapılır, diğer thread'ler sonucu kullanır
+        with yukleme_kilidi:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is not None and time.monotonic() - kayit.kontrol_zamani < self.ttl:
+                self.hits += 1
+                return kayit.paket
+
+            surum = self._aktif_surum(model_type, metric_type)
+
+            if kayit is not None and kayit.surum == surum:
+                # Sürüm değişmedi, sadece kontrol zamanı yenilenir
+                self._kayitlar[anahtar] = kayit._replace(kontrol_zamani=time.monotonic())
+                self.hits += 1
+                return kayit.paket
+
+            paket = None
+            if surum is not None:
+                paket = self._manager().load_model_from_file(model_type=model_type, metric_type=metric_type)
+                self.loads += 1
+
+            # Bulunamayan model de TTL boyunca hatırlanır (her tespitte disk denenmez)
+            self._kayitlar[anahtar] = _Kayit(surum, paket, time.monotonic())
+
+            if kayit is not None:
+                self.swaps += 1
+                logger.info(
+                    f"🔄 [MODEL_REGISTRY_SWAP] {model_type}_{metric_type}: "
+                    f"v{kayit.surum} -> v{surum}"
+                )
+
+            return paket
+
+    def gecersiz_kil(self, model_type=None, metric_type=None):
+        """Kayıtları siler; sonraki getir() aktif sürümü yeniden okur"""
+        self._fork_kontrol()
+        with self._lock:
+            if model_type is None and metric_type is None:
+                self._kayitlar = {}
+                return
+            for anahtar in list(self._kayitlar):
+                if (model_type is None or anahtar[0] == model_type) and \
+                        (metric_type is None or anahtar[1] == metric_type):
+                    self._kayitlar.pop(anahtar, None)
+
+    def stats(self):
+        """İzleme için registry durumu"""
+        return {
+            'enabled': self.enabled,
+            'ttl': self.ttl,
+            'modeller': {
+                f"{anahtar[0]}_{anahtar[1]}": {
+                    'surum': kayit.surum,
+                    'yuklu': kayit.paket is not None
+                }
+                for anahtar, kayit in list(self._kayitlar.items())
+            },
+            'hits': self.hits,
+            'loads': self.loads,
+            'swaps': self.swaps
+        }
+
+
+model_registry = ModelRegistry()
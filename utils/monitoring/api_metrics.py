@@ -1,30 +1,238 @@
 """
 API Metrics - API Endpoint Performance Monitoring
 Developer Dashboard için API endpoint performans izleme servisi
+
+Kayıt yolu kilitsizdir: her thread kendi shard'ına (endpoint -> histogram)
+yazar; sadece thread'in ilk isteğinde shard listeye kilit altında eklenir.
+Response time'lar log ölçekli kovalarda (her kova bir öncekinin 2^(1/8)
+katı, ~%4 bağıl hata) sayılır; kayıt sabit zamanlı, percentile'lar
+kovalardan hesaplanır, sıralama yapılmaz.
+
+Endpoint başına SQL sayaçları (sorgu sayısı, DB süresi, bütçe aşımı ve
+tekrar eden parmak izleri) aynı histogramda tutulur; bkz. sorgu_butcesi.
+
+Deployment geneli görünüm: Her worker kümülatif özetini API_METRICS_YAYIN_ARALIGI
+saniyede bir Redis'e yazar (TTL'li, worker başına bir key). Canlı worker
+token'ları son yayın zamanıyla bir ZSET'te tutulur; okuma tarafı keyspace
+taramadan bu ZSET'teki worker key'lerini MGET ile okur ve tüm worker
+özetlerini birleştirir; kendi worker'ı için Redis yerine güncel
+yerel özeti kullanır. Redis yoksa sadece yerel worker görülür.
+
+Kapanan (max_requests ile yenilenen) veya yayını kesilen worker'ın son
+özeti kalıcı 'emekli' toplamına eklenir (prometheus_client multiprocess
+modundaki gibi); deployment geneli sayaçlar worker değişince azalmaz.
 """
+import atexit
+import json
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
-from collections import defaultdict
+import math
+import os
+import socket
 import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Histogram kovaları: kova i'nin üst sınırı KOVA_TABANI * KOVA_CARPANI ** i (saniye)
+KOVA_TABANI = 0.0001  # 0.1 ms
+KOVA_ADIMI = 8  # İkiye katlanma başına kova sayısı
+KOVA_CARPANI = 2 ** (1 / KOVA_ADIMI)
+KOVA_SAYISI = 26 * KOVA_ADIMI  # ~0.1 ms - ~1.9 saat
+_LOG_CARPAN = math.log(KOVA_CARPANI)
+
+REDIS_KEY_ONEKI = 'minibar:api_metrics:worker:'
+REDIS_NESIL_KEY = 'minibar:api_metrics:nesil'
+REDIS_WORKERLER_KEY = 'minibar:api_metrics:workerler'  # ZSET: token -> son yayın zamanı
+REDIS_EMEKLI_KEY = 'minibar:api_metrics:emekli'  # Ölen worker'ların birleştirilmiş son özetleri
+
+# worker_paketleri()'nde emekli toplamının anahtarı (gerçek bir worker değildir)
+EMEKLI_TOKEN = 'emekli'
+
+# Yayın aralığının bu katı süredir yayın yapmayan worker ölü sayılır; key'i
+# daha uzun yaşar ki son özeti emekli toplamına eklenebilsin
+OLU_WORKER_CARPANI = 3
+WORKER_KEY_TTL_CARPANI = 10
+
+# Endpoint başına saklanan en fazla tekrar eden (N+1) sorgu parmak izi
+MAX_TEKRAR_KAYDI = 20
+
+
+def kova_indeksi(duration: float) -> int:
+    if duration <= KOVA_TABANI:
+        return 0
+    return min(KOVA_SAYISI - 1, math.ceil(math.log(duration / KOVA_TABANI) / _LOG_CARPAN))
+
+
+def kova_ust_siniri(indeks: int) -> float:
+    """Kovanın üst sınırı (saniye); dışa aktarımda sabit sınırlara dağıtmak için"""
+    return KOVA_TABANI * KOVA_CARPANI ** indeks
+
+
+def _kova_degeri(indeks: int) -> float:
+    """Kovanın temsili değeri (alt ve üst sınırın geometrik ortası)"""
+    if indeks == 0:
+        return KOVA_TABANI
+    return KOVA_TABANI * KOVA_CARPANI ** (indeks - 0.5)
+
+
+class _EndpointHistogrami:
+    """Tek endpoint'in sayaçları; sadece sahibi olan thread yazar"""
+
+    __slots__ = ('request_count', 'total_duration', 'error_count', 'min', 'max',
+                 'last_request', 'kovalar', 'status_codes', 'methods',
+                 'sorgu_sayisi', 'db_suresi', 'max_sorgu', 'butce_asimi', 'tekrarlar')
+
+    def __init__(self):
+        self.request_count = 0
+        self.total_duration = 0.0
+        self.error_count = 0
+        self.min = None
+        self.max = 0.0
+        self.last_request = None
+        self.kovalar = {}  # kova indeksi -> sayı (seyrek)
+        self.status_codes = {}
+        self.methods = {}
+        self.sorgu_sayisi = 0
+        self.db_suresi = 0.0
+        self.max_sorgu = 0
+        self.butce_asimi = 0
+        self.tekrarlar = {}  # parmak izi metni -> [istek sayısı, en yüksek tekrar]
+
+    def kaydet(self, duration: float, status_code: int, method: str,
+               sorgu: Optional[Dict[str, Any]] = None) -> None:
+        self.request_count += 1
+        self.total_duration += duration
+        if status_code >= 400:
+            self.error_count += 1
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if duration > self.max:
+            self.max = duration
+        self.last_request = time.time()
+
+        indeks = kova_indeksi(duration)
+        self.kovalar[indeks] = self.kovalar.get(indeks, 0) + 1
+        self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        self.methods[method] = self.methods.get(method, 0) + 1
+
+        if sorgu:
+            self.sorgu_sayisi += sorgu['sayi']
+            self.db_suresi += sorgu['sure']
+            if sorgu['sayi'] > self.max_sorgu:
+                self.max_sorgu = sorgu['sayi']
+            if sorgu['asim']:
+                self.butce_asimi += 1
+            for metin, tekrar in sorgu['tekrarlar'].items():
+                kayit = self.tekrarlar.get(metin)
+                if kayit is None:
+                    if len(self.tekrarlar) < MAX_TEKRAR_KAYDI:
+                        self.tekrarlar[metin] = [1, tekrar]
+                else:
+                    kayit[0] += 1
+                    kayit[1] = max(kayit[1], tekrar)
+
+    def ozet(self) -> Dict[str, Any]:
+        return {
+            'request_count': self.request_count,
+            'total_duration': self.total_duration,
+            'error_count': self.error_count,
+            'min': self.min,
+            'max': self.max,
+            'last_request': self.last_request,
+            'kovalar': self.kovalar.copy(),
+            'status_codes': self.status_codes.copy(),
+            'methods': self.methods.copy(),
+            'sorgu_sayisi': self.sorgu_sayisi,
+            'db_suresi': self.db_suresi,
+            'max_sorgu': self.max_sorgu,
+            'butce_asimi': self.butce_asimi,
+            # Sahip thread araya ekleme yapabilir; önce sığ kopya alınır
+            'tekrarlar': {metin: list(kayit) for metin, kayit in self.tekrarlar.copy().items()}
+        }
+
+
+class _Shard:
+    """Thread başına endpoint histogramları"""
+
+    __slots__ = ('nesil', 'endpointler')
+
+    def __init__(self, nesil: int):
+        self.nesil = nesil
+        self.endpointler = {}
+
+
+def _ozet_birlestir(hedef: Dict[str, Any], kaynak: Dict[str, Any]) -> None:
+    """kaynak endpoint özetini hedefe ekler"""
+    hedef['request_count'] += kaynak['request_count']
+    hedef['total_duration'] += kaynak['total_duration']
+    hedef['error_count'] += kaynak['error_count']
+    if kaynak['min'] is not None and (hedef['min'] is None or kaynak['min'] < hedef['min']):
+        hedef['min'] = kaynak['min']
+    hedef['max'] = max(hedef['max'], kaynak['max'])
+    if kaynak['last_request'] and (not hedef['last_request'] or kaynak['last_request'] > hedef['last_request']):
+        hedef['last_request'] = kaynak['last_request']
+    for alan in ('kovalar', 'status_codes', 'methods'):
+        for anahtar, sayi in kaynak[alan].items():
+            hedef[alan][anahtar] = hedef[alan].get(anahtar, 0) + sayi
+
+    # SQL sayaçları (eski sürüm worker paketlerinde olmayabilir)
+    hedef['sorgu_sayisi'] += kaynak.get('sorgu_sayisi', 0)
+    hedef['db_suresi'] += kaynak.get('db_suresi', 0.0)
+    hedef['max_sorgu'] = max(hedef['max_sorgu'], kaynak.get('max_sorgu', 0))
+    hedef['butce_asimi'] += kaynak.get('butce_asimi', 0)
+    for metin, (istek, tekrar) in kaynak.get('tekrarlar', {}).items():
+        kayit = hedef['tekrarlar'].get(metin)
+        if kayit is None:
+            hedef['tekrarlar'][metin] = [istek, tekrar]
+        else:
+            kayit[0] += istek
+            kayit[1] = max(kayit[1], tekrar)
+
+
+def _bos_ozet() -> Dict[str, Any]:
+    return {
+        'request_count': 0, 'total_duration': 0.0, 'error_count': 0,
+        'min': None, 'max': 0.0, 'last_request': None,
+        'kovalar': {}, 'status_codes': {}, 'methods': {},
+        'sorgu_sayisi': 0, 'db_suresi': 0.0, 'max_sorgu': 0, 'butce_asimi': 0, 'tekrarlar': {}
+    }
+
 
 class APIMetrics:
     """API endpoint performans izleme servisi"""
-    
-    # In-memory metrics storage (production'da Redis kullanılmalı)
-    _metrics = defaultdict(lambda: {
-        'request_count': 0,
-        'total_duration': 0.0,
-        'error_count': 0,
-        'status_codes': defaultdict(int),
-        'response_times': [],
-        'last_request': None
-    })
+
+    _local = threading.local()
+    _shardlar = []
     _lock = threading.Lock()
-    
+    _nesil = 0  # reset_metrics ile artar; eski nesil shard'lar yok sayılır
+
+    # Redis yayını (process başına)
+    _pid = None
+    _token = None
+    _redis = None
+    _yayinci = None
+    _redis_nesil = None
+    _ek_kaynaklar = {}
+    _ek_birlestiriciler = {}
+    _yayinlandi = False
+
+    @classmethod
+    def _shard(cls) -> _Shard:
+        shard = getattr(cls._local, 'shard', None)
+        if shard is None or shard.nesil != cls._nesil:
+            shard = _Shard(cls._nesil)
+            cls._local.shard = shard
+            with cls._lock:
+                # Eski nesil shard'lar burada temizlenir; ölen thread'lerin shard'ı kalır
+                cls._shardlar = [s for s in cls._shardlar if s.nesil == cls._nesil]
+                cls._shardlar.append(shard)
+        return shard
+
     @classmethod
     def track_request(
         cls,
@@ -32,94 +240,315 @@ class APIMetrics:
         duration: float,
         status_code: int,
         method: str = 'GET',
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        sorgu: Optional[Dict[str, Any]] = None
     ) -> None:
         """
         API request'i track et
-        
+
         Args:
             endpoint: Flask endpoint adı
             duration: Request süresi (saniye)
             status_code: HTTP status code
             method: HTTP method
             user_id: Kullanıcı ID
+            sorgu: Request'in SQL özeti (SorguButcesi.istek_bitir sonucu)
         """
         try:
-            with cls._lock:
-                metrics = cls._metrics[endpoint]
-                
-                # Request sayısını artır
-                metrics['request_count'] += 1
-                
-                # Toplam süreyi ekle
-                metrics['total_duration'] += duration
-                
-                # Hata sayısını artır (4xx, 5xx)
-                if status_code >= 400:
-                    metrics['error_count'] += 1
-                
-                # Status code sayacı
-                metrics['status_codes'][status_code] += 1
-                
-                # Response time'ları sakla (son 1000 request)
-                metrics['response_times'].append(duration)
-                if len(metrics['response_times']) > 1000:
-                    metrics['response_times'].pop(0)
-                
-                # Son request zamanı
-                metrics['last_request'] = datetime.utcnow()
-                
-                # Method bilgisi
-                if 'methods' not in metrics:
-                    metrics['methods'] = defaultdict(int)
-                metrics['methods'][method] += 1
-                
+            if cls._pid != os.getpid():
+                cls._yayinciyi_baslat()
+
+            shard = cls._shard()
+            histogram = shard.endpointler.get(endpoint)
+            if histogram is None:
+                histogram = shard.endpointler[endpoint] = _EndpointHistogrami()
+            histogram.kaydet(duration, status_code, method, sorgu)
+
         except Exception as e:
             logger.error(f"Track request hatası: {str(e)}")
-    
+
+    # ------------------------------------------------------------------
+    # Özet ve birleştirme
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _yerel_ozet(cls) -> Dict[str, Dict[str, Any]]:
+        """Bu process'in tüm thread shard'larının birleşimi"""
+        nesil = cls._nesil
+        with cls._lock:
+            shardlar = [s for s in cls._shardlar if s.nesil == nesil]
+
+        sonuc = {}
+        for shard in shardlar:
+            for endpoint, histogram in list(shard.endpointler.items()):
+                hedef = sonuc.get(endpoint)
+                if hedef is None:
+                    hedef = sonuc[endpoint] = _bos_ozet()
+                _ozet_birlestir(hedef, histogram.ozet())
+        return sonuc
+
+    @classmethod
+    def ek_kaynak_kaydet(cls, ad: str, fonksiyon, birlestir=None) -> None:
+        """
+        Worker özetine eklenecek ek veri kaynağı (ör. DB pool, cache sayaçları).
+        fonksiyon JSON'a çevrilebilir dict döndürmeli; worker_paketleri()'nde
+        her worker için 'ek'[ad] altında görünür.
+
+        birlestir(hedef, kaynak) verilirse ölen worker'ın sayaçları emekli
+        toplamına bununla eklenir (hedef None olabilir, yeni hedefi döndürür);
+        verilmezse kaynak emekli toplamına taşınmaz (gauge'lar gibi).
+        """
+        cls._ek_kaynaklar[ad] = fonksiyon
+        if birlestir is not None:
+            cls._ek_birlestiriciler[ad] = birlestir
+
+    @classmethod
+    def _yerel_paket(cls) -> Dict[str, Any]:
+        ek = {}
+        for ad, fonksiyon in list(cls._ek_kaynaklar.items()):
+            try:
+                ek[ad] = fonksiyon()
+            except Exception as e:
+                logger.debug(f"API metrics ek kaynak hatası ({ad}): {str(e)}")
+        return {'endpointler': cls._yerel_ozet(), 'ek': ek}
+
+    @staticmethod
+    def _paket_yukle(veri: str) -> Dict[str, Any]:
+        paket = json.loads(veri)
+        for ozet in paket['endpointler'].values():
+            ozet['kovalar'] = {int(k): v for k, v in ozet['kovalar'].items()}
+            ozet['status_codes'] = {int(k): v for k, v in ozet['status_codes'].items()}
+        return paket
+
+    @classmethod
+    def worker_paketleri(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        Worker başına özetler: {worker_token: {'endpointler': {...}, 'ek': {...}}}
+        Bu worker her zaman güncel yerel özetle yer alır; Redis yoksa tek kayıt döner.
+        Ölen worker'ların toplamı varsa EMEKLI_TOKEN anahtarıyla eklenir.
+        """
+        yerel_token = cls._token or f"{socket.gethostname()}:{os.getpid()}"
+        paketler = {yerel_token: cls._yerel_paket()}
+        if not Config.API_METRICS_REDIS_ENABLED:
+            return paketler
+
+        try:
+            client = cls._client()
+            cls._olu_workerlari_emekli_et(client)
+            tokenlar = [t for t in client.zrange(REDIS_WORKERLER_KEY, 0, -1) if t != cls._token]
+            keyler = [f'{REDIS_KEY_ONEKI}{token}' for token in tokenlar] + [REDIS_EMEKLI_KEY]
+            degerler = client.mget(keyler)
+            for token, veri in zip(tokenlar, degerler):
+                if veri:
+                    paketler[token] = cls._paket_yukle(veri)
+            if degerler[-1]:
+                paketler[EMEKLI_TOKEN] = cls._paket_yukle(degerler[-1])
+        except Exception as e:
+            logger.warning(f"API metrics Redis okuma hatası, yerel veriler kullanılıyor: {str(e)}")
+
+        return paketler
+
+    @classmethod
+    def endpoint_ozetleri(cls, paketler: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+        """Worker paketlerindeki endpoint özetlerinin birleşimi (deployment geneli)"""
+        if paketler is None:
+            paketler = cls.worker_paketleri()
+
+        sonuc = {}
+        for paket in paketler.values():
+            for endpoint, ozet in paket['endpointler'].items():
+                hedef = sonuc.get(endpoint)
+                if hedef is None:
+                    hedef = sonuc[endpoint] = _bos_ozet()
+                _ozet_birlestir(hedef, ozet)
+        return sonuc
+
+    # ------------------------------------------------------------------
+    # Emekli (ölen worker) toplamı
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _emekli_toplamina_ekle(cls, client, paket: Dict[str, Any]) -> None:
+        """Paketin sayaçlarını kalıcı emekli toplamına ekler (WATCH ile, eşzamanlı okuyuculara karşı)"""
+        import redis
+
+        for _ in range(5):
+            with client.pipeline() as pipe:
+                try:
+                    pipe.watch(REDIS_EMEKLI_KEY)
+                    mevcut = pipe.get(REDIS_EMEKLI_KEY)
+                    toplam = cls._paket_yukle(mevcut) if mevcut else {'endpointler': {}, 'ek': {}}
+
+                    for endpoint, ozet in paket['endpointler'].items():
+                        hedef = toplam['endpointler'].get(endpoint)
+                        if hedef is None:
+                            hedef = toplam['endpointler'][endpoint] = _bos_ozet()
+                        _ozet_birlestir(hedef, ozet)
+                    for ad, birlestir in cls._ek_birlestiriciler.items():
+                        kaynak = paket.get('ek', {}).get(ad)
+                        if kaynak:
+                            toplam['ek'][ad] = birlestir(toplam['ek'].get(ad), kaynak)
+
+                    pipe.multi()
+                    pipe.set(REDIS_EMEKLI_KEY, json.dumps(toplam))
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+        logger.warning("API metrics emekli toplamı güncellenemedi (eşzamanlı yazım)")
+
+    @classmethod
+    def _olu_workerlari_emekli_et(cls, client) -> None:
+        """
+        Süresi geçen worker token'larını ZSET'ten çıkarır, son özetlerini emekli
+        toplamına ekler. ZREM'i kazanan tek okuyucu ekler; çift sayım olmaz.
+        """
+        esik = time.time() - Config.API_METRICS_YAYIN_ARALIGI * OLU_WORKER_CARPANI
+        for token in client.zrangebyscore(REDIS_WORKERLER_KEY, '-inf', esik):
+            if not client.zrem(REDIS_WORKERLER_KEY, token):
+                continue
+            key = f'{REDIS_KEY_ONEKI}{token}'
+            veri = client.get(key)
+            if veri:
+                cls._emekli_toplamina_ekle(client, cls._paket_yukle(veri))
+            client.delete(key)
+
+    @classmethod
+    def _emekli_ol(cls) -> None:
+        """Worker kapanırken güncel özetini emekli toplamına ekler ve listeden çıkar"""
+        try:
+            client = cls._client()
+            if not client.zrem(REDIS_WORKERLER_KEY, cls._token):
+                # Hiç yayın yapmadı veya ölü sayılıp zaten eklendi
+                return
+            cls._emekli_toplamina_ekle(client, cls._yerel_paket())
+            client.delete(f'{REDIS_KEY_ONEKI}{cls._token}')
+        except Exception as e:
+            logger.debug(f"API metrics kapanış yayını başarısız: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Redis yayını
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _client(cls):
+        if cls._redis is None:
+            import redis
+            cls._redis = redis.from_url(
+                Config.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+        return cls._redis
+
+    @classmethod
+    def _yayinciyi_baslat(cls) -> None:
+        """Fork sonrası process'e ait token ve yayın thread'i kurulur"""
+        with cls._lock:
+            if cls._pid == os.getpid():
+                return
+            # Master'dan kopyalanan shard'lar bu worker'ın trafiği değil
+            cls._local = threading.local()
+            cls._shardlar = []
+            cls._redis = None
+            cls._redis_nesil = None
+            cls._yayinlandi = False
+            cls._token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            cls._pid = os.getpid()
+
+            if Config.API_METRICS_REDIS_ENABLED:
+                cls._yayinci = threading.Thread(target=cls._yayin_dongusu, name='api-metrics-yayin', daemon=True)
+                cls._yayinci.start()
+
+    @classmethod
+    def _yayin_dongusu(cls) -> None:
+        pid = os.getpid()
+        while cls._pid == pid:
+            time.sleep(Config.API_METRICS_YAYIN_ARALIGI)
+            cls._yayinla()
+
+    @classmethod
+    def _yayinla(cls) -> None:
+        """Yerel kümülatif özeti Redis'e yazar, başka worker'ın reset'ini uygular"""
+        try:
+            client = cls._client()
+
+            nesil = client.get(REDIS_NESIL_KEY)
+            if cls._redis_nesil is None:
+                cls._redis_nesil = nesil
+            elif nesil != cls._redis_nesil:
+                cls._redis_nesil = nesil
+                cls._nesil += 1
+
+            if cls._yayinlandi and client.zscore(REDIS_WORKERLER_KEY, cls._token) is None:
+                # Yayın uzun süre kesildi ve son özet emekli toplamına eklendi:
+                # aynı sayaçlar ikinci kez sayılmasın diye yerel özet sıfırlanır
+                cls._nesil += 1
+
+            pipe = client.pipeline(transaction=False)
+            pipe.set(
+                f'{REDIS_KEY_ONEKI}{cls._token}',
+                json.dumps(cls._yerel_paket()),
+                ex=Config.API_METRICS_YAYIN_ARALIGI * WORKER_KEY_TTL_CARPANI
+            )
+            pipe.zadd(REDIS_WORKERLER_KEY, {cls._token: time.time()})
+            pipe.execute()
+            cls._yayinlandi = True
+        except Exception as e:
+            logger.debug(f"API metrics Redis yayını başarısız: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Sorgular
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _iso(zaman: Optional[float]) -> Optional[str]:
+        return datetime.utcfromtimestamp(zaman).isoformat() if zaman else None
+
     @classmethod
     def get_endpoint_stats(cls, sort_by: str = 'avg_time') -> List[Dict[str, Any]]:
         """
         Tüm endpoint istatistiklerini getir
-        
+
         Args:
             sort_by: Sıralama kriteri (avg_time, request_count, error_rate)
-            
+
         Returns:
             List[Dict]: Endpoint istatistikleri
         """
         try:
             stats = []
-            
-            with cls._lock:
-                for endpoint, metrics in cls._metrics.items():
-                    request_count = metrics['request_count']
-                    if request_count == 0:
-                        continue
-                    
-                    avg_time = metrics['total_duration'] / request_count
-                    error_rate = (metrics['error_count'] / request_count) * 100
-                    
-                    # Response time percentiles
-                    response_times = sorted(metrics['response_times'])
-                    p50 = cls._percentile(response_times, 50)
-                    p95 = cls._percentile(response_times, 95)
-                    p99 = cls._percentile(response_times, 99)
-                    
-                    stats.append({
-                        'endpoint': endpoint,
-                        'request_count': request_count,
-                        'avg_response_time': round(avg_time, 4),
-                        'error_count': metrics['error_count'],
-                        'error_rate': round(error_rate, 2),
-                        'p50': round(p50, 4),
-                        'p95': round(p95, 4),
-                        'p99': round(p99, 4),
-                        'last_request': metrics['last_request'].isoformat() if metrics['last_request'] else None,
-                        'status_codes': dict(metrics['status_codes']),
-                        'methods': dict(metrics.get('methods', {}))
-                    })
-            
+
+            for endpoint, metrics in cls.endpoint_ozetleri().items():
+                request_count = metrics['request_count']
+                if request_count == 0:
+                    continue
+
+                avg_time = metrics['total_duration'] / request_count
+                error_rate = (metrics['error_count'] / request_count) * 100
+
+                # Response time percentiles
+                p50, p95, p99 = cls._percentiles(metrics, (50, 95, 99))
+
+                stats.append({
+                    'endpoint': endpoint,
+                    'request_count': request_count,
+                    'avg_response_time': round(avg_time, 4),
+                    'error_count': metrics['error_count'],
+                    'error_rate': round(error_rate, 2),
+                    'p50': round(p50, 4),
+                    'p95': round(p95, 4),
+                    'p99': round(p99, 4),
+                    'last_request': cls._iso(metrics['last_request']),
+                    'status_codes': metrics['status_codes'],
+                    'methods': metrics['methods'],
+                    'avg_queries': round(metrics['sorgu_sayisi'] / request_count, 1),
+                    'avg_db_time': round(metrics['db_suresi'] / request_count, 4),
+                    'max_queries': metrics['max_sorgu'],
+                    'budget_violations': metrics['butce_asimi']
+                })
+
             # Sıralama
             if sort_by == 'avg_time':
                 stats.sort(key=lambda x: x['avg_response_time'], reverse=True)
@@ -127,236 +556,306 @@ class APIMetrics:
                 stats.sort(key=lambda x: x['request_count'], reverse=True)
             elif sort_by == 'error_rate':
                 stats.sort(key=lambda x: x['error_rate'], reverse=True)
-            
+            elif sort_by == 'queries':
+                stats.sort(key=lambda x: x['avg_queries'], reverse=True)
+
             return stats
         except Exception as e:
             logger.error(f"Get endpoint stats hatası: {str(e)}")
             return []
-    
+
     @classmethod
     def get_endpoint_details(cls, endpoint: str) -> Optional[Dict[str, Any]]:
         """
         Belirli bir endpoint'in detaylı istatistiklerini getir
-        
+
         Args:
             endpoint: Endpoint adı
-            
+
         Returns:
             Dict: Endpoint detayları
         """
         try:
-            with cls._lock:
-                if endpoint not in cls._metrics:
-                    return None
-                
-                metrics = cls._metrics[endpoint]
+            metrics = cls.endpoint_ozetleri().get(endpoint)
+            if not metrics:
+                return None
+
+            request_count = metrics['request_count']
+            if request_count == 0:
+                return None
+
+            avg_time = metrics['total_duration'] / request_count
+            error_rate = (metrics['error_count'] / request_count) * 100
+
+            p50, p75, p90, p95, p99 = cls._percentiles(metrics, (50, 75, 90, 95, 99))
+
+            return {
+                'endpoint': endpoint,
+                'request_count': request_count,
+                'total_duration': round(metrics['total_duration'], 4),
+                'avg_response_time': round(avg_time, 4),
+                'min_response_time': round(metrics['min'] or 0, 4),
+                'max_response_time': round(metrics['max'], 4),
+                'error_count': metrics['error_count'],
+                'error_rate': round(error_rate, 2),
+                'success_rate': round(100 - error_rate, 2),
+                'p50': round(p50, 4),
+                'p75': round(p75, 4),
+                'p90': round(p90, 4),
+                'p95': round(p95, 4),
+                'p99': round(p99, 4),
+                'last_request': cls._iso(metrics['last_request']),
+                'status_codes': metrics['status_codes'],
+                'methods': metrics['methods'],
+                'avg_queries': round(metrics['sorgu_sayisi'] / request_count, 1),
+                'avg_db_time': round(metrics['db_suresi'] / request_count, 4),
+                'max_queries': metrics['max_sorgu'],
+                'budget_violations': metrics['butce_asimi'],
+                'repeated_queries': cls._tekrar_listesi(metrics),
+                'timestamp': datetime.utcnow().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Get endpoint details hatası: {str(e)}")
+            return None
+
+    @staticmethod
+    def _tekrar_listesi(metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Tekrar eden (olası N+1) sorgular, en çok tekrarlanan önce"""
+        return sorted(
+            (
+                {'query': metin, 'request_count': istek, 'max_repeat': tekrar}
+                for metin, (istek, tekrar) in metrics['tekrarlar'].items()
+            ),
+            key=lambda x: x['max_repeat'],
+            reverse=True
+        )
+
+    @classmethod
+    def get_query_budget_report(cls, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        SQL bütçesini aşan endpoint'ler (bütçe aşımı sayısına göre)
+
+        Args:
+            limit: Maksimum endpoint sayısı
+
+        Returns:
+            List[Dict]: Endpoint, sorgu ortalamaları ve tekrar eden sorgular
+        """
+        try:
+            rapor = []
+            for endpoint, metrics in cls.endpoint_ozetleri().items():
+                if not metrics['butce_asimi']:
+                    continue
                 request_count = metrics['request_count']
-                
-                if request_count == 0:
-                    return None
-                
-                avg_time = metrics['total_duration'] / request_count
-                error_rate = (metrics['error_count'] / request_count) * 100
-                
-                # Response time statistics
-                response_times = sorted(metrics['response_times'])
-                min_time = min(response_times) if response_times else 0
-                max_time = max(response_times) if response_times else 0
-                
-                return {
+                rapor.append({
                     'endpoint': endpoint,
                     'request_count': request_count,
-                    'total_duration': round(metrics['total_duration'], 4),
-                    'avg_response_time': round(avg_time, 4),
-                    'min_response_time': round(min_time, 4),
-                    'max_response_time': round(max_time, 4),
-                    'error_count': metrics['error_count'],
-                    'error_rate': round(error_rate, 2),
-                    'success_rate': round(100 - error_rate, 2),
-                    'p50': round(cls._percentile(response_times, 50), 4),
-                    'p75': round(cls._percentile(response_times, 75), 4),
-                    'p90': round(cls._percentile(response_times, 90), 4),
-                    'p95': round(cls._percentile(response_times, 95), 4),
-                    'p99': round(cls._percentile(response_times, 99), 4),
-                    'last_request': metrics['last_request'].isoformat() if metrics['last_request'] else None,
-                    'status_codes': dict(metrics['status_codes']),
-                    'methods': dict(metrics.get('methods', {})),
-                    'timestamp': datetime.utcnow().isoformat()
-                }
+                    'budget_violations': metrics['butce_asimi'],
+                    'violation_rate': round(metrics['butce_asimi'] / request_count * 100, 2),
+                    'avg_queries': round(metrics['sorgu_sayisi'] / request_count, 1),
+                    'max_queries': metrics['max_sorgu'],
+                    'avg_db_time': round(metrics['db_suresi'] / request_count, 4),
+                    'repeated_queries': cls._tekrar_listesi(metrics)[:5]
+                })
+
+            rapor.sort(key=lambda x: x['budget_violations'], reverse=True)
+            return rapor[:limit]
         except Exception as e:
-            logger.error(f"Get endpoint details hatası: {str(e)}")
-            return None
-    
+            logger.error(f"Query budget report hatası: {str(e)}")
+            return []
+
     @classmethod
     def get_error_rate(cls, endpoint: Optional[str] = None) -> Dict[str, Any]:
         """
         Hata oranlarını getir
-        
+
         Args:
             endpoint: Belirli bir endpoint (None ise tümü)
-            
+
         Returns:
             Dict: Hata oranı istatistikleri
         """
         try:
-            with cls._lock:
-                if endpoint:
-                    # Belirli endpoint için
-                    if endpoint not in cls._metrics:
-                        return {
-                            'endpoint': endpoint,
-                            'error_rate': 0,
-                            'error_count': 0,
-                            'request_count': 0
-                        }
-                    
-                    metrics = cls._metrics[endpoint]
-                    request_count = metrics['request_count']
-                    error_count = metrics['error_count']
-                    error_rate = (error_count / request_count * 100) if request_count > 0 else 0
-                    
+            ozetler = cls.endpoint_ozetleri()
+            if endpoint:
+                # Belirli endpoint için
+                if endpoint not in ozetler:
                     return {
                         'endpoint': endpoint,
-                        'error_rate': round(error_rate, 2),
-                        'error_count': error_count,
-                        'request_count': request_count,
-                        'status_codes': dict(metrics['status_codes'])
-                    }
-                else:
-                    # Tüm endpoint'ler için
-                    total_requests = 0
-                    total_errors = 0
-                    error_by_endpoint = []
-                    
-                    for ep, metrics in cls._metrics.items():
-                        request_count = metrics['request_count']
-                        error_count = metrics['error_count']
-                        
-                        total_requests += request_count
-                        total_errors += error_count
-                        
-                        if error_count > 0:
-                            error_rate = (error_count / request_count * 100) if request_count > 0 else 0
-                            error_by_endpoint.append({
-                                'endpoint': ep,
-                                'error_rate': round(error_rate, 2),
-                                'error_count': error_count,
-                                'request_count': request_count
-                            })
-                    
-                    # Hata oranına göre sırala
-                    error_by_endpoint.sort(key=lambda x: x['error_rate'], reverse=True)
-                    
-                    overall_error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
-                    
-                    return {
-                        'overall_error_rate': round(overall_error_rate, 2),
-                        'total_errors': total_errors,
-                        'total_requests': total_requests,
-                        'error_by_endpoint': error_by_endpoint[:10],  # Top 10
-                        'timestamp': datetime.utcnow().isoformat()
+                        'error_rate': 0,
+                        'error_count': 0,
+                        'request_count': 0
                     }
+
+                metrics = ozetler[endpoint]
+                request_count = metrics['request_count']
+                error_count = metrics['error_count']
+                error_rate = (error_count / request_count * 100) if request_count > 0 else 0
+
+                return {
+                    'endpoint': endpoint,
+                    'error_rate': round(error_rate, 2),
+                    'error_count': error_count,
+                    'request_count': request_count,
+                    'status_codes': metrics['status_codes']
+                }
+            else:
+                # Tüm endpoint'ler için
+                total_requests = 0
+                total_errors = 0
+                error_by_endpoint = []
+
+                for ep, metrics in ozetler.items():
+                    request_count = metrics['request_count']
+                    error_count = metrics['error_count']
+
+                    total_requests += request_count
+                    total_errors += error_count
+
+                    if error_count > 0:
+                        error_rate = (error_count / request_count * 100) if request_count > 0 else 0
+                        error_by_endpoint.append({
+                            'endpoint': ep,
+                            'error_rate': round(error_rate, 2),
+                            'error_count': error_count,
+                            'request_count': request_count
+                        })
+
+                # Hata oranına göre sırala
+                error_by_endpoint.sort(key=lambda x: x['error_rate'], reverse=True)
+
+                overall_error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
+
+                return {
+                    'overall_error_rate': round(overall_error_rate, 2),
+                    'total_errors': total_errors,
+                    'total_requests': total_requests,
+                    'error_by_endpoint': error_by_endpoint[:10],  # Top 10
+                    'timestamp': datetime.utcnow().isoformat()
+                }
         except Exception as e:
             logger.error(f"Get error rate hatası: {str(e)}")
             return {
                 'error': str(e)
             }
-    
+
     @classmethod
     def get_performance_summary(cls) -> Dict[str, Any]:
         """
         Genel performans özeti
-        
+
         Returns:
             Dict: Performans özeti
         """
         try:
-            with cls._lock:
-                total_requests = 0
-                total_errors = 0
-                total_duration = 0.0
-                all_response_times = []
-                endpoint_count = 0
-                
-                for metrics in cls._metrics.values():
-                    if metrics['request_count'] > 0:
-                        endpoint_count += 1
-                        total_requests += metrics['request_count']
-                        total_errors += metrics['error_count']
-                        total_duration += metrics['total_duration']
-                        all_response_times.extend(metrics['response_times'])
-                
-                avg_response_time = (total_duration / total_requests) if total_requests > 0 else 0
-                error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
-                
-                # Overall percentiles
-                all_response_times.sort()
-                p50 = cls._percentile(all_response_times, 50)
-                p95 = cls._percentile(all_response_times, 95)
-                p99 = cls._percentile(all_response_times, 99)
-                
-                return {
-                    'total_endpoints': endpoint_count,
-                    'total_requests': total_requests,
-                    'total_errors': total_errors,
-                    'error_rate': round(error_rate, 2),
-                    'avg_response_time': round(avg_response_time, 4),
-                    'p50_response_time': round(p50, 4),
-                    'p95_response_time': round(p95, 4),
-                    'p99_response_time': round(p99, 4),
-                    'timestamp': datetime.utcnow().isoformat()
-                }
+            toplam = _bos_ozet()
+            endpoint_count = 0
+
+            for metrics in cls.endpoint_ozetleri().values():
+                if metrics['request_count'] > 0:
+                    endpoint_count += 1
+                    _ozet_birlestir(toplam, metrics)
+
+            total_requests = toplam['request_count']
+            total_errors = toplam['error_count']
+            avg_response_time = (toplam['total_duration'] / total_requests) if total_requests > 0 else 0
+            error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
+
+            # Overall percentiles
+            p50, p95, p99 = cls._percentiles(toplam, (50, 95, 99))
+
+            return {
+                'total_endpoints': endpoint_count,
+                'total_requests': total_requests,
+                'total_errors': total_errors,
+                'error_rate': round(error_rate, 2),
+                'avg_response_time': round(avg_response_time, 4),
+                'p50_response_time': round(p50, 4),
+                'p95_response_time': round(p95, 4),
+                'p99_response_time': round(p99, 4),
+                'timestamp': datetime.utcnow().isoformat()
+            }
         except Exception as e:
             logger.error(f"Get performance summary hatası: {str(e)}")
             return {
                 'error': str(e)
             }
-    
+
     @classmethod
     def reset_metrics(cls, endpoint: Optional[str] = None) -> bool:
         """
         Metrikleri sıfırla
-        
+
+        Tümü sıfırlanırken diğer worker'lar da bir sonraki yayında
+        Redis'teki nesil değişikliğini görüp kendi sayaçlarını sıfırlar.
+
         Args:
-            endpoint: Belirli bir endpoint (None ise tümü)
-            
+            endpoint: Belirli bir endpoint (None ise tümü, sadece bu worker)
+
         Returns:
             bool: Başarılı ise True
         """
         try:
-            with cls._lock:
-                if endpoint:
-                    if endpoint in cls._metrics:
-                        del cls._metrics[endpoint]
-                else:
-                    cls._metrics.clear()
-                
-                logger.info(f"Metrics sıfırlandı: {endpoint or 'tümü'}")
-                return True
+            if endpoint:
+                with cls._lock:
+                    shardlar = list(cls._shardlar)
+                for shard in shardlar:
+                    shard.endpointler.pop(endpoint, None)
+            else:
+                cls._nesil += 1
+                if Config.API_METRICS_REDIS_ENABLED:
+                    try:
+                        client = cls._client()
+                        cls._redis_nesil = str(client.incr(REDIS_NESIL_KEY))
+                        keyler = [f'{REDIS_KEY_ONEKI}{token}' for token in client.zrange(REDIS_WORKERLER_KEY, 0, -1)]
+                        client.delete(REDIS_WORKERLER_KEY, REDIS_EMEKLI_KEY, *keyler)
+                    except Exception as e:
+                        logger.warning(f"API metrics Redis sıfırlama hatası: {str(e)}")
+
+            logger.info(f"Metrics sıfırlandı: {endpoint or 'tümü'}")
+            return True
         except Exception as e:
             logger.error(f"Reset metrics hatası: {str(e)}")
             return False
-    
+
     @staticmethod
-    def _percentile(data: List[float], percentile: int) -> float:
+    def _percentiles(metrics: Dict[str, Any], percentiles) -> List[float]:
         """
-        Percentile hesapla
-        
+        Histogram kovalarından percentile hesapla (tek geçiş)
+
         Args:
-            data: Sıralı veri listesi
-            percentile: Percentile değeri (0-100)
-            
+            metrics: Endpoint özeti (kovalar, request_count, min, max)
+            percentiles: Percentile değerleri (0-100, artan sırada)
+
         Returns:
-            float: Percentile değeri
+            List[float]: Percentile değerleri (gözlenen min/max ile sınırlı)
         """
-        if not data:
-            return 0.0
-        
-        k = (len(data) - 1) * (percentile / 100)
-        f = int(k)
-        c = k - f
-        
-        if f + 1 < len(data):
-            return data[f] + (data[f + 1] - data[f]) * c
-        else:
-            return data[f]
+        n = metrics['request_count']
+        if not n:
+            return [0.0] * len(percentiles)
+
+        alt, ust = metrics['min'] or 0.0, metrics['max']
+        sonuclar = []
+        kumulatif = 0
+        kovalar = iter(sorted(metrics['kovalar'].items()))
+        indeks = None
+        for percentile in percentiles:
+            hedef = max(1, math.ceil(n * percentile / 100))
+            while kumulatif < hedef:
+                try:
+                    indeks, sayi = next(kovalar)
+                except StopIteration:
+                    break
+                kumulatif += sayi
+            deger = _kova_degeri(indeks) if indeks is not None else ust
+            sonuclar.append(min(max(deger, alt), ust))
+        return sonuclar
+
+
+def _kapanista_yayinla():
+    """Worker kapanırken son özeti emekli toplamına eklenir"""
+    if Config.API_METRICS_REDIS_ENABLED and APIMetrics._pid == os.getpid():
+        APIMetrics._emekli_ol()
+
+
+atexit.register(_kapanista_yayinla)
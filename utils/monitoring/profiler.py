@@ -6,12 +6,19 @@ import logging
 import cProfile
 import pstats
 import io
+import json
+import os
+import socket
+import sys
 import time
+import uuid
 import psutil
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import threading
 
+from config import Config
+
 logger = logging.getLogger(__name__)
 
 
@@ -253,3 +260,415 @@ class PerformanceProfiler:
         except Exception as e:
             logger.error(f"List active profiles hatası: {str(e)}")
             return []
+
+
+# ============================================
+# Sampling Profiler - Request Thread'lerinin Sürekli Örneklenmesi
+# ============================================
+#
+# cProfile sadece başlatan thread'i görür ve her çağrıyı ölçtüğü için pahalıdır.
+# Sampling modunda her worker'daki arka plan thread'i PROFILER_HZ sıklıkla
+# sys._current_frames() ile request işleyen thread'lerin stack'lerini alır ve
+# (endpoint, stack) başına örnek sayar. Örnekleme süresi izlenir; maliyet
+# PROFILER_MAX_OVERHEAD yüzdesini geçerse örnekleme aralığı otomatik açılır.
+#
+# Worker'lar biriken örnekleri PROFILER_YAYIN_ARALIGI saniyede bir Redis
+# hash'ine (HINCRBY) ekler; okuma tarafı tüm worker'ların birleşimini görür.
+# Açma/kapama Redis'teki durum key'i üzerinden tüm worker'lara yayılır.
+# Çıktı flamegraph.pl / speedscope uyumlu "folded stack" formatıdır:
+#     endpoint;modul:fonksiyon;modul:fonksiyon <örnek sayısı>
+
+REDIS_DURUM_KEY = 'minibar:profiler:durum'
+REDIS_YIGIN_KEY = 'minibar:profiler:yiginlar'
+REDIS_WORKER_KEY = 'minibar:profiler:workerler'
+YIGIN_TTL = 86400  # Saniye
+
+MAX_DERINLIK = 64  # Stack başına en fazla frame (en dıştakiler kırpılır)
+MAX_YIGIN = 20000  # Yayın aralığı başına en fazla farklı stack
+TASAN_YIGIN = '(diger)'
+
+# Uzun ömürlü stream endpoint'leri: thread'leri zamanın çoğunu pub/sub
+# beklemesinde geçirir, örneklenirse profili bekleme yığınları doldurur
+ORNEKLENMEYEN_ENDPOINTLER = frozenset({'api_bildirim_stream'})
+
+_PROJE_KOKU = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_STDLIB_KOKU = os.path.dirname(os.path.abspath(os.__file__))
+
+
+def _frame_etiketi(kod) -> str:
+    """Code object için kısa 'modul/yolu.py:Sinif.fonksiyon' etiketi"""
+    dosya = kod.co_filename
+    indeks = dosya.rfind('site-packages' + os.sep)
+    if indeks >= 0:
+        dosya = dosya[indeks + len('site-packages') + 1:]
+    elif dosya.startswith(_PROJE_KOKU):
+        dosya = dosya[len(_PROJE_KOKU) + 1:]
+    elif dosya.startswith(_STDLIB_KOKU):
+        dosya = dosya[len(_STDLIB_KOKU) + 1:]
+    ad = getattr(kod, 'co_qualname', kod.co_name)
+    # ';' folded formatta ayraç, boşluk sayıdan önceki ayraç
+    return f"{dosya}:{ad}".replace(';', ':').replace(' ', '_')
+
+
+class SamplingProfiler:
+    """Worker başına düşük maliyetli stack örnekleyici"""
+
+    _lock = threading.Lock()
+    _pid = None
+    _token = None
+    _redis = None
+
+    _aktif_istekler = {}  # thread id -> endpoint
+    _bekleyen = {}  # (endpoint, code tuple) -> örnek sayısı (yayınlanmamış)
+    _yerel = {}  # Redis yoksa kümülatif folded satır -> örnek sayısı
+    _etiketler = {}  # code object -> etiket
+
+    _aktif = False
+    _hz = None
+    _oturum = None
+    _baslangic = None
+    _ornekleyici_no = 0  # Her başlatmada artar; eski örnekleyici thread'i kendiliğinden durur
+    _ornek_sayisi = 0
+    _ornekleme_suresi = 0.0
+    _calisma_baslangici = None
+
+    # ------------------------------------------------------------------
+    # Request kaydı (metrics middleware)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def istek_basladi(cls, endpoint: Optional[str]) -> None:
+        if endpoint in ORNEKLENMEYEN_ENDPOINTLER:
+            return
+        if cls._pid != os.getpid():
+            cls._baslat()
+        cls._aktif_istekler[threading.get_ident()] = endpoint or '(bilinmeyen)'
+
+    @classmethod
+    def istek_bitti(cls) -> None:
+        cls._aktif_istekler.pop(threading.get_ident(), None)
+
+    # ------------------------------------------------------------------
+    # Worker yaşam döngüsü
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _baslat(cls) -> None:
+        """Fork sonrası process'e ait durum ve kontrol thread'i kurulur"""
+        with cls._lock:
+            if cls._pid == os.getpid():
+                return
+            cls._aktif_istekler = {}
+            cls._bekleyen = {}
+            cls._yerel = {}
+            cls._redis = None
+            cls._aktif = False
+            cls._token = f"{socket.gethostname()}:{os.getpid()}"
+            cls._pid = os.getpid()
+
+        cls._durumu_uygula(cls._durum_oku())
+        threading.Thread(target=cls._kontrol_dongusu, name='profiler-kontrol', daemon=True).start()
+
+    @classmethod
+    def _client(cls):
+        if cls._redis is None:
+            import redis
+            cls._redis = redis.from_url(
+                Config.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+        return cls._redis
+
+    @classmethod
+    def _durum_oku(cls) -> Dict[str, Any]:
+        """Deployment geneli profiler durumu (Redis yoksa/boşsa config varsayılanı)"""
+        try:
+            veri = cls._client().get(REDIS_DURUM_KEY)
+            if veri:
+                return json.loads(veri)
+        except Exception as e:
+            logger.debug(f"Profiler durumu okunamadı: {str(e)}")
+        if cls._oturum is not None:
+            return {'aktif': cls._aktif, 'hz': cls._hz, 'oturum': cls._oturum, 'baslangic': cls._baslangic}
+        return {
+            'aktif': Config.PROFILER_VARSAYILAN_AKTIF,
+            'hz': Config.PROFILER_HZ,
+            'oturum': 'varsayilan',
+            'baslangic': time.time()
+        }
+
+    @classmethod
+    def _durumu_uygula(cls, durum: Dict[str, Any]) -> None:
+        if durum.get('oturum') != cls._oturum:
+            # Yeni oturum: önceki oturumun yayınlanmamış örnekleri atılır
+            with cls._lock:
+                cls._bekleyen = {}
+                cls._yerel = {}
+            cls._oturum = durum.get('oturum')
+            cls._ornek_sayisi = 0
+            cls._ornekleme_suresi = 0.0
+            cls._calisma_baslangici = time.time()
+        cls._hz = max(1, min(int(durum.get('hz') or Config.PROFILER_HZ), 250))
+        cls._baslangic = durum.get('baslangic')
+
+        aktif = bool(durum.get('aktif')) and Config.PROFILER_ENABLED
+        if aktif and not cls._aktif:
+            cls._aktif = True
+            cls._calisma_baslangici = time.time()
+            cls._ornekleyici_no += 1
+            threading.Thread(
+                target=cls._ornekleme_dongusu, args=(cls._ornekleyici_no,),
+                name='profiler-ornekleyici', daemon=True
+            ).start()
+        elif not aktif:
+            cls._aktif = False
+
+    @classmethod
+    def _kontrol_dongusu(cls) -> None:
+        """Durum değişikliklerini uygular, biriken örnekleri yayınlar"""
+        pid = os.getpid()
+        while cls._pid == pid:
+            time.sleep(Config.PROFILER_YAYIN_ARALIGI)
+            try:
+                cls._durumu_uygula(cls._durum_oku())
+                cls._yayinla()
+            except Exception as e:
+                logger.debug(f"Profiler kontrol hatası: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Örnekleme
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _ornekleme_dongusu(cls, no: int) -> None:
+        pid = os.getpid()
+        kendi = threading.get_ident()
+        while cls._aktif and cls._ornekleyici_no == no and cls._pid == pid:
+            bas = time.perf_counter()
+            try:
+                cls._ornekle(kendi)
+            except Exception as e:
+                logger.debug(f"Profiler örnekleme hatası: {str(e)}")
+            sure = time.perf_counter() - bas
+            cls._ornekleme_suresi += sure
+
+            # Maliyet sınırı: örnekleme süresi aralığın PROFILER_MAX_OVERHEAD yüzdesini geçmez
+            aralik = max(1.0 / cls._hz, sure * 100 / Config.PROFILER_MAX_OVERHEAD)
+            time.sleep(max(0.0, aralik - sure))
+
+    @classmethod
+    def _ornekle(cls, kendi: int) -> None:
+        istekler = list(cls._aktif_istekler.items())
+        if not istekler:
+            return
+        frameler = sys._current_frames()
+
+        for thread_id, endpoint in istekler:
+            frame = frameler.get(thread_id)
+            if frame is None or thread_id == kendi:
+                continue
+            kodlar = []
+            while frame is not None and len(kodlar) < MAX_DERINLIK:
+                kodlar.append(frame.f_code)
+                frame = frame.f_back
+            kodlar.reverse()
+            anahtar = (endpoint, tuple(kodlar))
+
+            with cls._lock:
+                sayi = cls._bekleyen.get(anahtar)
+                if sayi is not None:
+                    cls._bekleyen[anahtar] = sayi + 1
+                elif len(cls._bekleyen) < MAX_YIGIN:
+                    cls._bekleyen[anahtar] = 1
+                else:
+                    tasan = (endpoint, None)
+                    cls._bekleyen[tasan] = cls._bekleyen.get(tasan, 0) + 1
+            cls._ornek_sayisi += 1
+        del frameler
+
+    @classmethod
+    def _folded(cls, endpoint: str, kodlar) -> str:
+        if kodlar is None:
+            return f'{endpoint};{TASAN_YIGIN}'
+        etiketler = cls._etiketler
+        parcalar = [endpoint.replace(';', ':').replace(' ', '_')]
+        for kod in kodlar:
+            etiket = etiketler.get(kod)
+            if etiket is None:
+                etiket = etiketler[kod] = _frame_etiketi(kod)
+            parcalar.append(etiket)
+        return ';'.join(parcalar)
+
+    @classmethod
+    def _bekleyeni_al(cls) -> Dict[str, int]:
+        """Yayınlanmamış örnekleri folded satırlara çevirip boşaltır"""
+        with cls._lock:
+            bekleyen, cls._bekleyen = cls._bekleyen, {}
+        satirlar = {}
+        for (endpoint, kodlar), sayi in bekleyen.items():
+            satir = cls._folded(endpoint, kodlar)
+            satirlar[satir] = satirlar.get(satir, 0) + sayi
+        return satirlar
+
+    @classmethod
+    def _yayinla(cls) -> None:
+        satirlar = cls._bekleyeni_al()
+        try:
+            client = cls._client()
+            pipe = client.pipeline(transaction=False)
+            for satir, sayi in satirlar.items():
+                pipe.hincrby(REDIS_YIGIN_KEY, satir, sayi)
+            pipe.expire(REDIS_YIGIN_KEY, YIGIN_TTL)
+            pipe.hset(REDIS_WORKER_KEY, cls._token, json.dumps(cls._worker_ozeti()))
+            pipe.expire(REDIS_WORKER_KEY, Config.PROFILER_YAYIN_ARALIGI * 3)
+            pipe.execute()
+        except Exception as e:
+            # Redis yoksa örnekler bu worker'da kümülatif tutulur
+            logger.debug(f"Profiler Redis yayını başarısız: {str(e)}")
+            with cls._lock:
+                for satir, sayi in satirlar.items():
+                    cls._yerel[satir] = cls._yerel.get(satir, 0) + sayi
+
+    @classmethod
+    def _worker_ozeti(cls) -> Dict[str, Any]:
+        gecen = time.time() - (cls._calisma_baslangici or time.time())
+        return {
+            'aktif': cls._aktif,
+            'hz': cls._hz,
+            'ornek_sayisi': cls._ornek_sayisi,
+            'overhead_yuzde': round(cls._ornekleme_suresi / gecen * 100, 3) if gecen > 0 else 0,
+            'zaman': time.time()
+        }
+
+    # ------------------------------------------------------------------
+    # Yönetim ve okuma (system monitor)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def ayarla(cls, aktif: bool, hz: Optional[int] = None, sifirla: bool = False) -> Dict[str, Any]:
+        """
+        Profiler'ı tüm worker'larda açar/kapatır (en geç PROFILER_YAYIN_ARALIGI içinde).
+
+        Args:
+            aktif: Örnekleme açık mı
+            hz: Saniyedeki örnek sayısı (None ise mevcut/config)
+            sifirla: True ise toplanmış örnekler silinir, yeni oturum başlar
+        """
+        if cls._pid != os.getpid():
+            cls._baslat()
+        mevcut = cls._durum_oku()
+        yeni_oturum = sifirla or (aktif and not mevcut.get('aktif'))
+        durum = {
+            'aktif': bool(aktif),
+            'hz': int(hz or mevcut.get('hz') or Config.PROFILER_HZ),
+            'oturum': uuid.uuid4().hex[:12] if yeni_oturum else mevcut.get('oturum'),
+            'baslangic': time.time() if yeni_oturum else mevcut.get('baslangic')
+        }
+        try:
+            client = cls._client()
+            pipe = client.pipeline()
+            pipe.set(REDIS_DURUM_KEY, json.dumps(durum))
+            if yeni_oturum:
+                pipe.delete(REDIS_YIGIN_KEY)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Profiler durumu Redis'e yazılamadı, sadece bu worker: {str(e)}")
+        cls._durumu_uygula(durum)
+        logger.info(f"Sampling profiler {'açıldı' if aktif else 'kapatıldı'} ({durum['hz']} Hz)")
+        return cls.durum()
+
+    @classmethod
+    def durum(cls) -> Dict[str, Any]:
+        """Profiler durumu ve worker başına örnek sayısı / maliyet"""
+        durum = cls._durum_oku()
+        workerler = {cls._token or f"{socket.gethostname()}:{os.getpid()}": cls._worker_ozeti()}
+        try:
+            client = cls._client()
+            # max_requests ile yenilenen worker'ların kayıtları: 3 yayın aralığıdır güncellenmeyen silinir
+            esik = time.time() - Config.PROFILER_YAYIN_ARALIGI * 3
+            olu = []
+            for token, veri in client.hgetall(REDIS_WORKER_KEY).items():
+                ozet = json.loads(veri)
+                if ozet.get('zaman', 0) < esik:
+                    olu.append(token)
+                    continue
+                workerler.setdefault(token, ozet)
+            if olu:
+                client.hdel(REDIS_WORKER_KEY, *olu)
+        except Exception as e:
+            logger.debug(f"Profiler worker durumları okunamadı: {str(e)}")
+        return {
+            'enabled': Config.PROFILER_ENABLED,
+            'active': bool(durum.get('aktif')),
+            'hz': durum.get('hz'),
+            'session': durum.get('oturum'),
+            'started_at': datetime.utcfromtimestamp(durum['baslangic']).isoformat() if durum.get('baslangic') else None,
+            'max_overhead_percent': Config.PROFILER_MAX_OVERHEAD,
+            'workers': workerler
+        }
+
+    @classmethod
+    def yiginlar(cls, endpoint: Optional[str] = None) -> Dict[str, int]:
+        """Tüm worker'ların folded stack sayıları (bu worker'ın yayınlanmamışları dahil)"""
+        if cls._pid != os.getpid():
+            cls._baslat()
+        with cls._lock:
+            bekleyen = list(cls._bekleyen.items())
+            sonuc = dict(cls._yerel)
+        for (ep, kodlar), sayi in bekleyen:
+            satir = cls._folded(ep, kodlar)
+            sonuc[satir] = sonuc.get(satir, 0) + sayi
+        try:
+            for satir, sayi in cls._client().hgetall(REDIS_YIGIN_KEY).items():
+                sonuc[satir] = sonuc.get(satir, 0) + int(sayi)
+        except Exception as e:
+            logger.debug(f"Profiler yığınları Redis'ten okunamadı: {str(e)}")
+
+        if endpoint:
+            onek = endpoint.replace(';', ':').replace(' ', '_') + ';'
+            sonuc = {satir: sayi for satir, sayi in sonuc.items() if satir.startswith(onek)}
+        return sonuc
+
+    @classmethod
+    def folded_metin(cls, endpoint: Optional[str] = None) -> str:
+        """flamegraph.pl / speedscope için folded stack metni"""
+        return ''.join(
+            f'{satir} {sayi}\n'
+            for satir, sayi in sorted(cls.yiginlar(endpoint).items())
+        )
+
+    @classmethod
+    def ozet(cls, limit: int = 20) -> Dict[str, Any]:
+        """
+        Endpoint başına örnek sayıları ve en çok zaman harcanan fonksiyonlar
+
+        Returns:
+            Dict: total_samples, endpoints, self (yaprak frame), inclusive (stack'te görünen)
+        """
+        endpointler = {}
+        kendi = {}
+        kapsayan = {}
+        toplam = 0
+        for satir, sayi in cls.yiginlar().items():
+            frameler = satir.split(';')
+            toplam += sayi
+            endpointler[frameler[0]] = endpointler.get(frameler[0], 0) + sayi
+            if len(frameler) > 1:
+                kendi[frameler[-1]] = kendi.get(frameler[-1], 0) + sayi
+            for frame in set(frameler[1:]):
+                kapsayan[frame] = kapsayan.get(frame, 0) + sayi
+
+        def _liste(sayaclar):
+            return [
+                {'name': ad, 'samples': sayi, 'percent': round(sayi / toplam * 100, 2) if toplam else 0}
+                for ad, sayi in sorted(sayaclar.items(), key=lambda t: t[1], reverse=True)[:limit]
+            ]
+
+        return {
+            'total_samples': toplam,
+            'endpoints': _liste(endpointler),
+            'self': _liste(kendi),
+            'inclusive': _liste(kapsayan)
+        }
@@ -0,0 +1,406 @@
+"""
+Prometheus Exporter - /metrics İçin OpenMetrics / Prometheus Metin Formatı
+Mevcut izleme verilerini (APIMetrics, DB pool, cache, Celery) standart
+scrape formatında sunar
+
+Çok process'li toplama:
+- HTTP histogramları ve worker gauge'ları APIMetrics'in Redis'teki worker
+  özetlerinden okunur; scrape hangi gunicorn worker'ına düşerse düşsün
+  tüm worker'lar görülür. Histogram ve sayaçlar worker'lar üzerinden
+  toplanır, pool gauge'ları worker etiketiyle ayrı verilir.
+- Ölen / yenilenen worker'ların sayaçları APIMetrics'in emekli toplamında
+  kalır; toplamlar worker değişince azalmaz (rate() sahte reset görmez).
+- Celery görev süreleri task_postrun sinyalinde doğrudan Redis hash'lerine
+  yazılır (worker child'lar kısa ömürlü olabilir).
+
+Histogram kovaları sabit LE_SINIRLARI'dır; APIMetrics'in log ölçekli
+kovaları üst sınırlarına göre bu sınırlara dağıtılır.
+
+Kullanım:
+    from utils.monitoring.prometheus_exporter import metrics_metni
+
+    metin = metrics_metni(openmetrics=True)
+"""
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from config import Config
+from utils.monitoring.api_metrics import APIMetrics, EMEKLI_TOKEN, kova_ust_siniri
+
+logger = logging.getLogger(__name__)
+
+LE_SINIRLARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CELERY_GOREVLER_KEY = 'minibar:metrics:celery:gorevler'
+CELERY_GOREV_KEY_ONEKI = 'minibar:metrics:celery:gorev:'
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _le_indeksi(deger: float) -> int:
+    """Değerin düştüğü ilk sınırın indeksi (len(LE_SINIRLARI) = +Inf)"""
+    return bisect.bisect_left(LE_SINIRLARI, deger)
+
+
+# ============================================
+# DB POOL
+# ============================================
+
+class PoolMetrics:
+    """Process'in bağlantı havuzu gauge'ları ve bekleme süresi histogramı"""
+
+    _lock = threading.Lock()
+    _pool = None
+    _kovalar = [0] * (len(LE_SINIRLARI) + 1)
+    _toplam = 0.0
+    _sayi = 0
+    _timeout = 0
+
+    @classmethod
+    def bekleme_kaydet(cls, sure: float, timeout: bool = False) -> None:
+        with cls._lock:
+            cls._kovalar[_le_indeksi(sure)] += 1
+            cls._toplam += sure
+            cls._sayi += 1
+            if timeout:
+                cls._timeout += 1
+
+    @classmethod
+    def ozet(cls) -> Dict[str, Any]:
+        """APIMetrics worker özetine eklenen 'pool' kaynağı"""
+        pool = cls._pool
+        with cls._lock:
+            sonuc = {
+                'bekleme': {'kovalar': list(cls._kovalar), 'toplam': cls._toplam, 'sayi': cls._sayi},
+                'timeout': cls._timeout
+            }
+        if pool is not None:
+            sonuc.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(0, pool.overflow()),
+                'checked_in': pool.checkedin()
+            })
+        return sonuc
+
+
+def pool_birlestir(hedef: Optional[Dict[str, Any]], kaynak: Dict[str, Any]) -> Dict[str, Any]:
+    """Ölen worker'ın pool sayaçlarını emekli toplamına ekler (gauge'lar taşınmaz)"""
+    hedef = hedef or {'bekleme': {'kovalar': [0] * (len(LE_SINIRLARI) + 1), 'toplam': 0.0, 'sayi': 0}, 'timeout': 0}
+    bekleme = kaynak['bekleme']
+    hedef['bekleme']['kovalar'] = [a + b for a, b in zip(hedef['bekleme']['kovalar'], bekleme['kovalar'])]
+    hedef['bekleme']['toplam'] += bekleme['toplam']
+    hedef['bekleme']['sayi'] += bekleme['sayi']
+    hedef['timeout'] += kaynak.get('timeout', 0)
+    return hedef
+
+
+class OlculenQueuePool(QueuePool):
+    """Bağlantı alma süresini (kuyrukta bekleme + gerekirse yeni bağlantı) ölçen QueuePool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # engine.dispose() yeni pool oluşturur; gauge'lar her zaman güncel pool'dan okunur
+        PoolMetrics._pool = self
+
+    def _do_get(self):
+        baslangic = time.perf_counter()
+        try:
+            baglanti = super()._do_get()
+        except PoolTimeoutError:
+            PoolMetrics.bekleme_kaydet(time.perf_counter() - baslangic, timeout=True)
+            raise
+        PoolMetrics.bekleme_kaydet(time.perf_counter() - baslangic)
+        return baglanti
+
+
+# ============================================
+# CACHE
+# ============================================
+
+def cache_ozeti() -> Dict[str, Dict[str, Dict[str, int]]]:
+    """APIMetrics worker özetine eklenen 'cache' kaynağı: {cache: {katman: {hits, misses}}}"""
+    from utils.cache_manager import CacheStats
+
+    sonuc = {}
+    for cache_adi, katmanlar in CacheStats.get_tier_stats().items():
+        sonuc[cache_adi] = {
+            katman: {'hits': degerler.get('hits', 0), 'misses': degerler.get('misses', 0)}
+            for katman, degerler in (katmanlar or {}).items()
+        }
+    return sonuc
+
+
+def cache_birlestir(hedef: Optional[Dict[str, Any]], kaynak: Dict[str, Any]) -> Dict[str, Any]:
+    """Ölen worker'ın cache hit/miss sayaçlarını emekli toplamına ekler"""
+    hedef = hedef or {}
+    for cache_adi, katmanlar in kaynak.items():
+        hedef_katmanlar = hedef.setdefault(cache_adi, {})
+        for katman, degerler in katmanlar.items():
+            sayaclar = hedef_katmanlar.setdefault(katman, {'hits': 0, 'misses': 0})
+            sayaclar['hits'] += degerler.get('hits', 0)
+            sayaclar['misses'] += degerler.get('misses', 0)
+    return hedef
+
+
+APIMetrics.ek_kaynak_kaydet('pool', PoolMetrics.ozet, pool_birlestir)
+APIMetrics.ek_kaynak_kaydet('cache', cache_ozeti, cache_birlestir)
+
+
+# ============================================
+# CELERY
+# ============================================
+
+class CeleryMetrics:
+    """Celery görev süreleri (Redis hash'leri, tüm worker'lar ortak)"""
+
+    _redis = None
+
+    @classmethod
+    def _client(cls):
+        if cls._redis is None:
+            import redis
+            cls._redis = redis.from_url(
+                Config.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+        return cls._redis
+
+    @classmethod
+    def gorev_kaydet(cls, gorev_adi: str, sure: float, durum: str) -> None:
+        """task_postrun sinyalinden çağrılır"""
+        try:
+            key = f'{CELERY_GOREV_KEY_ONEKI}{gorev_adi}'
+            pipe = cls._client().pipeline(transaction=False)
+            pipe.sadd(CELERY_GOREVLER_KEY, gorev_adi)
+            pipe.hincrby(key, f'b{_le_indeksi(sure)}', 1)
+            pipe.hincrby(key, 'sayi', 1)
+            pipe.hincrbyfloat(key, 'toplam', sure)
+            pipe.hincrby(key, f'durum:{durum or "UNKNOWN"}', 1)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Celery metrik kaydı başarısız: {str(e)}")
+
+    @classmethod
+    def ozet(cls) -> Dict[str, Dict[str, Any]]:
+        """{gorev_adi: {'kovalar', 'sayi', 'toplam', 'durumlar'}}"""
+        client = cls._client()
+        gorevler = sorted(client.smembers(CELERY_GOREVLER_KEY))
+        if not gorevler:
+            return {}
+
+        pipe = client.pipeline(transaction=False)
+        for gorev_adi in gorevler:
+            pipe.hgetall(f'{CELERY_GOREV_KEY_ONEKI}{gorev_adi}')
+
+        sonuc = {}
+        for gorev_adi, alanlar in zip(gorevler, pipe.execute()):
+            if not alanlar:
+                continue
+            kovalar = [0] * (len(LE_SINIRLARI) + 1)
+            durumlar = {}
+            for alan, deger in alanlar.items():
+                if alan.startswith('b'):
+                    kovalar[int(alan[1:])] = int(deger)
+                elif alan.startswith('durum:'):
+                    durumlar[alan[len('durum:'):]] = int(deger)
+            sonuc[gorev_adi] = {
+                'kovalar': kovalar,
+                'sayi': int(alanlar.get('sayi', 0)),
+                'toplam': float(alanlar.get('toplam', 0)),
+                'durumlar': durumlar
+            }
+        return sonuc
+
+
+# ============================================
+# METİN ÜRETİMİ
+# ============================================
+
+def _etiket_degeri(deger) -> str:
+    return str(deger).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiketler(etiketler: Optional[Dict[str, Any]]) -> str:
+    if not etiketler:
+        return ''
+    return '{' + ','.join(f'{ad}="{_etiket_degeri(deger)}"' for ad, deger in etiketler.items()) + '}'
+
+
+def _sayi(deger) -> str:
+    if isinstance(deger, float):
+        return repr(round(deger, 6))
+    return str(deger)
+
+
+class _MetinYazici:
+    """Metrik ailelerini Prometheus 0.0.4 veya OpenMetrics 1.0 formatında yazar"""
+
+    def __init__(self, openmetrics: bool):
+        self.openmetrics = openmetrics
+        self.satirlar: List[str] = []
+
+    def aile(self, ad: str, tip: str, aciklama: str) -> None:
+        # OpenMetrics'te counter ailesinin adı _total soneki içermez
+        tip_adi = ad if (self.openmetrics or tip != 'counter') else f'{ad}_total'
+        self.satirlar.append(f'# HELP {tip_adi} {aciklama}')
+        self.satirlar.append(f'# TYPE {tip_adi} {tip}')
+
+    def ornek(self, ad: str, deger, etiketler: Optional[Dict[str, Any]] = None) -> None:
+        self.satirlar.append(f'{ad}{_etiketler(etiketler)} {_sayi(deger)}')
+
+    def histogram(self, ad: str, kovalar: List[int], toplam: float, sayi: int,
+                  etiketler: Optional[Dict[str, Any]] = None) -> None:
+        """kovalar: LE_SINIRLARI + [+Inf] için kümülatif olmayan sayılar"""
+        etiketler = etiketler or {}
+        kumulatif = 0
+        for le, adet in zip(LE_SINIRLARI, kovalar):
+            kumulatif += adet
+            self.ornek(f'{ad}_bucket', kumulatif, {**etiketler, 'le': repr(le)})
+        self.ornek(f'{ad}_bucket', sayi, {**etiketler, 'le': '+Inf'})
+        self.ornek(f'{ad}_sum', toplam, etiketler)
+        self.ornek(f'{ad}_count', sayi, etiketler)
+
+    def metin(self) -> str:
+        if self.openmetrics:
+            self.satirlar.append('# EOF')
+        return '\n'.join(self.satirlar) + '\n'
+
+
+def _api_kovalari(ozet: Dict[str, Any]) -> List[int]:
+    """APIMetrics log kovalarını sabit LE sınırlarına dağıtır"""
+    kovalar = [0] * (len(LE_SINIRLARI) + 1)
+    for indeks, adet in ozet['kovalar'].items():
+        kovalar[_le_indeksi(kova_ust_siniri(indeks))] += adet
+    return kovalar
+
+
+def _http_metrikleri(yazici: _MetinYazici, endpointler: Dict[str, Dict[str, Any]]) -> None:
+    yazici.aile('minibar_http_request_duration_seconds', 'histogram',
+                'HTTP istek süresi (endpoint bazında, tüm worker\'lar)')
+    for endpoint, ozet in sorted(endpointler.items()):
+        yazici.histogram(
+            'minibar_http_request_duration_seconds',
+            _api_kovalari(ozet), ozet['total_duration'], ozet['request_count'],
+            {'endpoint': endpoint}
+        )
+
+    yazici.aile('minibar_http_responses', 'counter', 'HTTP yanıt sayısı (endpoint ve status code bazında)')
+    for endpoint, ozet in sorted(endpointler.items()):
+        for kod, adet in sorted(ozet['status_codes'].items()):
+            yazici.ornek('minibar_http_responses_total', adet, {'endpoint': endpoint, 'code': kod})
+
+    yazici.aile('minibar_http_db_queries', 'counter', 'İsteklerin çalıştırdığı SQL sorgu sayısı (endpoint bazında)')
+    for endpoint, ozet in sorted(endpointler.items()):
+        yazici.ornek('minibar_http_db_queries_total', ozet['sorgu_sayisi'], {'endpoint': endpoint})
+
+    yazici.aile('minibar_http_db_query_budget_violations', 'counter', 'SQL bütçesini aşan istek sayısı')
+    for endpoint, ozet in sorted(endpointler.items()):
+        if ozet['butce_asimi']:
+            yazici.ornek('minibar_http_db_query_budget_violations_total', ozet['butce_asimi'], {'endpoint': endpoint})
+
+
+def _pool_metrikleri(yazici: _MetinYazici, paketler: Dict[str, Dict[str, Any]]) -> None:
+    pool_paketleri = {
+        worker: paket['ek']['pool'] for worker, paket in paketler.items()
+        if paket.get('ek', {}).get('pool')
+    }
+    if not pool_paketleri:
+        return
+
+    for alan, aciklama in (
+        ('size', 'Pool kalıcı bağlantı sayısı'),
+        ('checked_out', 'Kullanımdaki bağlantı sayısı'),
+        ('overflow', 'pool_size üzerindeki ek bağlantı sayısı'),
+        ('checked_in', 'Boşta bekleyen bağlantı sayısı'),
+    ):
+        yazici.aile(f'minibar_db_pool_{alan}', 'gauge', aciklama)
+        for worker, pool in sorted(pool_paketleri.items()):
+            if alan in pool:
+                yazici.ornek(f'minibar_db_pool_{alan}', pool[alan], {'worker': worker})
+
+    kovalar = [0] * (len(LE_SINIRLARI) + 1)
+    toplam = 0.0
+    sayi = 0
+    timeout = 0
+    for pool in pool_paketleri.values():
+        bekleme = pool['bekleme']
+        kovalar = [a + b for a, b in zip(kovalar, bekleme['kovalar'])]
+        toplam += bekleme['toplam']
+        sayi += bekleme['sayi']
+        timeout += pool.get('timeout', 0)
+
+    yazici.aile('minibar_db_pool_wait_seconds', 'histogram', 'Pool\'dan bağlantı alma süresi')
+    yazici.histogram('minibar_db_pool_wait_seconds', kovalar, toplam, sayi)
+    yazici.aile('minibar_db_pool_timeouts', 'counter', 'pool_timeout nedeniyle alınamayan bağlantılar')
+    yazici.ornek('minibar_db_pool_timeouts_total', timeout)
+
+
+def _cache_metrikleri(yazici: _MetinYazici, paketler: Dict[str, Dict[str, Any]]) -> None:
+    toplamlar = {}  # (cache, katman, sonuc) -> adet
+    for paket in paketler.values():
+        for cache_adi, katmanlar in (paket.get('ek', {}).get('cache') or {}).items():
+            for katman, degerler in katmanlar.items():
+                for sonuc, alan in (('hit', 'hits'), ('miss', 'misses')):
+                    anahtar = (cache_adi, katman, sonuc)
+                    toplamlar[anahtar] = toplamlar.get(anahtar, 0) + degerler.get(alan, 0)
+    if not toplamlar:
+        return
+
+    yazici.aile('minibar_cache_requests', 'counter', 'Cache okuma sayısı (cache servisi, katman ve sonuç bazında)')
+    for (cache_adi, katman, sonuc), adet in sorted(toplamlar.items()):
+        yazici.ornek('minibar_cache_requests_total', adet,
+                     {'cache': cache_adi, 'tier': katman, 'result': sonuc})
+
+
+def _celery_metrikleri(yazici: _MetinYazici) -> None:
+    try:
+        gorevler = CeleryMetrics.ozet()
+    except Exception as e:
+        logger.warning(f"Celery metrikleri okunamadı: {str(e)}")
+        return
+    if not gorevler:
+        return
+
+    yazici.aile('minibar_celery_task_duration_seconds', 'histogram', 'Celery görev çalışma süresi')
+    for gorev_adi, ozet in sorted(gorevler.items()):
+        yazici.histogram('minibar_celery_task_duration_seconds',
+                         ozet['kovalar'], ozet['toplam'], ozet['sayi'], {'task': gorev_adi})
+
+    yazici.aile('minibar_celery_tasks', 'counter', 'Biten Celery görevleri (son durum bazında)')
+    for gorev_adi, ozet in sorted(gorevler.items()):
+        for durum, adet in sorted(ozet['durumlar'].items()):
+            yazici.ornek('minibar_celery_tasks_total', adet, {'task': gorev_adi, 'state': durum})
+
+
+def metrics_metni(openmetrics: bool = False) -> str:
+    """
+    Tüm metrikleri scrape formatında üretir
+
+    Args:
+        openmetrics: True ise OpenMetrics 1.0, değilse Prometheus 0.0.4 metin formatı
+
+    Returns:
+        str: Exposition metni
+    """
+    yazici = _MetinYazici(openmetrics)
+    paketler = APIMetrics.worker_paketleri()
+
+    yazici.aile('minibar_workers', 'gauge', 'Metrik yayınlayan web worker sayısı')
+    yazici.ornek('minibar_workers', len([token for token in paketler if token != EMEKLI_TOKEN]))
+
+    _http_metrikleri(yazici, APIMetrics.endpoint_ozetleri(paketler))
+    _pool_metrikleri(yazici, paketler)
+    _cache_metrikleri(yazici, paketler)
+    _celery_metrikleri(yazici)
+
+    return yazici.metin()
@@ -1,6 +1,11 @@
 """
 Query Analyzer - Database Query Performance Monitoring
 Developer Dashboard için query analiz ve optimizasyon servisi
+
+İstatistikler (get_query_stats, get_slow_queries) worker'ların parmak izi
+bazında topladığı query_istatistikleri tablosundan okunur
+(bkz. sorgu_istatistikleri.py); query_logs sadece >2s sorguların ham
+örneklerini (EXPLAIN / öneri için) tutar.
 """
 import logging
 from typing import Dict, List, Optional, Any
@@ -101,45 +106,83 @@ class QueryAnalyzer:
         hours: int = 24
     ) -> List[Dict[str, Any]]:
         """
-        Yavaş query'leri getir
+        Yavaş query'leri getir (parmak izi + endpoint bazında, query_istatistikleri'nden)
         
         Args:
-            threshold: Yavaş query eşiği (saniye)
+            threshold: Yavaş query eşiği (saniye, en yüksek süreye göre)
             limit: Maksimum query sayısı
             hours: Son kaç saat
             
         Returns:
-            List[Dict]: Yavaş query listesi
+            List[Dict]: Yavaş query listesi (id = parmak izi)
         """
         try:
-            since = datetime.utcnow() - timedelta(hours=hours)
-            
-            queries = QueryLog.query.filter(
-                QueryLog.execution_time >= threshold,
-                QueryLog.timestamp >= since
-            ).order_by(
-                QueryLog.execution_time.desc()
-            ).limit(limit).all()
+            satirlar = self.db.session.execute(text("""
+                SELECT parmak_izi, endpoint, MIN(sorgu_metni) AS sorgu_metni,
+                       SUM(sayi) AS sayi, SUM(toplam_sure) AS toplam_sure, MAX(max_sure) AS max_sure,
+                       SUM(yavas_sayi) AS yavas_sayi, MAX(son_gorulme) AS son_gorulme
+                FROM query_istatistikleri
+                WHERE zaman_dilimi >= NOW() - make_interval(hours => :hours)
+                GROUP BY parmak_izi, endpoint
+                HAVING MAX(max_sure) >= :threshold
+                ORDER BY MAX(max_sure) DESC
+                LIMIT :limit
+            """), {'hours': hours, 'threshold': threshold, 'limit': limit}).fetchall()
+            
+            p95ler = self._p95_hesapla([(s.parmak_izi, s.endpoint) for s in satirlar], hours)
             
             return [
                 {
-                    'id': q.id,
-                    'query_text': q.query_text[:500],
-                    'execution_time': round(q.execution_time, 4),
-                    'timestamp': q.timestamp.isoformat() if q.timestamp else None,
-                    'endpoint': q.endpoint,
-                    'user_id': q.user_id,
-                    'severity': self._get_severity(q.execution_time)
+                    'id': s.parmak_izi,
+                    'query_text': s.sorgu_metni[:500],
+                    'execution_time': round(s.max_sure, 4),
+                    'avg_time': round(s.toplam_sure / s.sayi, 4) if s.sayi else 0,
+                    'p95_time': round(p95ler.get((s.parmak_izi, s.endpoint), 0), 4),
+                    'count': s.sayi,
+                    'slow_count': s.yavas_sayi,
+                    'timestamp': s.son_gorulme.isoformat() if s.son_gorulme else None,
+                    'endpoint': s.endpoint or None,
+                    'user_id': None,
+                    'severity': self._get_severity(s.max_sure)
                 }
-                for q in queries
+                for s in satirlar
             ]
         except Exception as e:
             logger.error(f"Slow queries hatası: {str(e)}")
+            self.db.session.rollback()
             return []
     
+    def _p95_hesapla(self, anahtarlar: List[tuple], hours: int) -> Dict[tuple, float]:
+        """Verilen (parmak izi, endpoint) anahtarlarının dilim histogramlarını birleştirip p95 hesaplar"""
+        if not anahtarlar:
+            return {}
+        
+        from utils.monitoring.api_metrics import APIMetrics
+        
+        satirlar = self.db.session.execute(text("""
+            SELECT parmak_izi, endpoint, sayi, max_sure, kovalar
+            FROM query_istatistikleri
+            WHERE zaman_dilimi >= NOW() - make_interval(hours => :hours)
+              AND parmak_izi = ANY(:izler)
+        """), {'hours': hours, 'izler': list({iz for iz, _ in anahtarlar})}).fetchall()
+        
+        istenen = set(anahtarlar)
+        histogramlar = {}
+        for s in satirlar:
+            anahtar = (s.parmak_izi, s.endpoint)
+            if anahtar not in istenen:
+                continue
+            h = histogramlar.setdefault(anahtar, {'request_count': 0, 'min': None, 'max': 0.0, 'kovalar': {}})
+            h['request_count'] += s.sayi
+            h['max'] = max(h['max'], s.max_sure)
+            for indeks, adet in (s.kovalar or {}).items():
+                h['kovalar'][int(indeks)] = h['kovalar'].get(int(indeks), 0) + adet
+        
+        return {anahtar: APIMetrics._percentiles(h, (95,))[0] for anahtar, h in histogramlar.items()}
+    
     def get_query_stats(self, hours: int = 24) -> Dict[str, Any]:
         """
-        Query istatistiklerini getir
+        Query istatistiklerini getir (query_istatistikleri toplam tablosundan)
         
         Args:
             hours: Son kaç saat
@@ -148,74 +191,81 @@ class QueryAnalyzer:
             Dict: İstatistikler
         """
         try:
-            since = datetime.utcnow() - timedelta(hours=hours)
-            
-            # Toplam query sayısı
-            total_queries = QueryLog.query.filter(
-                QueryLog.timestamp >= since
-            ).count()
-            
-            # Ortalama execution time
-            from sqlalchemy import func
-            avg_time = self.db.session.query(
-                func.avg(QueryLog.execution_time)
-            ).filter(
-                QueryLog.timestamp >= since
-            ).scalar() or 0
-            
-            # En yavaş query
-            slowest = QueryLog.query.filter(
-                QueryLog.timestamp >= since
-            ).order_by(
-                QueryLog.execution_time.desc()
-            ).first()
-            
-            # Yavaş query sayısı (>1s)
-            slow_count = QueryLog.query.filter(
-                QueryLog.timestamp >= since,
-                QueryLog.execution_time >= 1.0
-            ).count()
-            
-            # Çok yavaş query sayısı (>5s)
-            very_slow_count = QueryLog.query.filter(
-                QueryLog.timestamp >= since,
-                QueryLog.execution_time >= 5.0
-            ).count()
+            params = {'hours': hours}
+            
+            # Genel toplamlar - tek tarama
+            genel = self.db.session.execute(text("""
+                SELECT COALESCE(SUM(sayi), 0) AS sayi,
+                       COALESCE(SUM(toplam_sure), 0) AS toplam_sure,
+                       COALESCE(MAX(max_sure), 0) AS max_sure,
+                       COALESCE(SUM(yavas_sayi), 0) AS yavas_sayi,
+                       COALESCE(SUM(cok_yavas_sayi), 0) AS cok_yavas_sayi,
+                       COUNT(DISTINCT parmak_izi) AS parmak_izi_sayisi
+                FROM query_istatistikleri
+                WHERE zaman_dilimi >= NOW() - make_interval(hours => :hours)
+            """), params).fetchone()
             
             # Endpoint bazlı istatistikler
-            endpoint_stats = self.db.session.query(
-                QueryLog.endpoint,
-                func.count(QueryLog.id).label('count'),
-                func.avg(QueryLog.execution_time).label('avg_time')
-            ).filter(
-                QueryLog.timestamp >= since,
-                QueryLog.endpoint.isnot(None)
-            ).group_by(
-                QueryLog.endpoint
-            ).order_by(
-                func.avg(QueryLog.execution_time).desc()
-            ).limit(10).all()
+            endpoint_stats = self.db.session.execute(text("""
+                SELECT endpoint, SUM(sayi) AS sayi, SUM(toplam_sure) / NULLIF(SUM(sayi), 0) AS ort_sure,
+                       SUM(toplam_sure) AS toplam_sure
+                FROM query_istatistikleri
+                WHERE zaman_dilimi >= NOW() - make_interval(hours => :hours)
+                  AND endpoint <> ''
+                GROUP BY endpoint
+                ORDER BY SUM(toplam_sure) DESC
+                LIMIT 10
+            """), params).fetchall()
+            
+            # Toplam DB süresine en çok katkı veren sorgular
+            top_fingerprints = self.db.session.execute(text("""
+                SELECT parmak_izi, MIN(sorgu_metni) AS sorgu_metni, SUM(sayi) AS sayi,
+                       SUM(toplam_sure) AS toplam_sure, MAX(max_sure) AS max_sure
+                FROM query_istatistikleri
+                WHERE zaman_dilimi >= NOW() - make_interval(hours => :hours)
+                GROUP BY parmak_izi
+                ORDER BY SUM(toplam_sure) DESC
+                LIMIT 10
+            """), params).fetchall()
+            
+            total_queries = genel.sayi
+            avg_time = (genel.toplam_sure / total_queries) if total_queries else 0
             
             return {
                 'total_queries': total_queries,
+                'total_fingerprints': genel.parmak_izi_sayisi,
+                'total_time': round(genel.toplam_sure, 4),
                 'avg_execution_time': round(avg_time, 4),
-                'slowest_query_time': round(slowest.execution_time, 4) if slowest else 0,
-                'slow_queries_count': slow_count,
-                'very_slow_queries_count': very_slow_count,
-                'slow_percentage': round((slow_count / total_queries * 100), 2) if total_queries > 0 else 0,
+                'slowest_query_time': round(genel.max_sure, 4),
+                'slow_queries_count': genel.yavas_sayi,
+                'very_slow_queries_count': genel.cok_yavas_sayi,
+                'slow_percentage': round((genel.yavas_sayi / total_queries * 100), 2) if total_queries > 0 else 0,
                 'top_endpoints': [
                     {
                         'endpoint': stat.endpoint,
-                        'count': stat.count,
-                        'avg_time': round(stat.avg_time, 4)
+                        'count': stat.sayi,
+                        'avg_time': round(stat.ort_sure or 0, 4),
+                        'total_time': round(stat.toplam_sure, 4)
                     }
                     for stat in endpoint_stats
                 ],
+                'top_fingerprints': [
+                    {
+                        'id': fp.parmak_izi,
+                        'query_text': fp.sorgu_metni[:500],
+                        'count': fp.sayi,
+                        'total_time': round(fp.toplam_sure, 4),
+                        'avg_time': round(fp.toplam_sure / fp.sayi, 4) if fp.sayi else 0,
+                        'max_time': round(fp.max_sure, 4)
+                    }
+                    for fp in top_fingerprints
+                ],
                 'period_hours': hours,
                 'timestamp': datetime.utcnow().isoformat()
             }
         except Exception as e:
             logger.error(f"Query stats hatası: {str(e)}")
+            self.db.session.rollback()
             return {
                 'total_queries': 0,
                 'error': str(e)
@@ -425,6 +475,9 @@ from sqlalchemy import event
 from sqlalchemy.engine import Engine
 import time
 from flask import has_request_context, request, g
+from config import Config
+from utils.monitoring.sorgu_butcesi import SorguButcesi
+from utils.monitoring.sorgu_istatistikleri import SorguIstatistikleri
 
 @event.listens_for(Engine, "before_cursor_execute")
 def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
@@ -437,13 +490,21 @@ def after_cursor_execute(conn, cursor, statement, parameters, context, executema
     try:
         total_time = time.time() - conn.info['query_start_time'].pop(-1)
         
+        # Request başına sorgu sayımı (SQL bütçesi / N+1 tespiti)
+        endpoint = None
+        if has_request_context():
+            endpoint = request.endpoint
+            SorguButcesi.sorgu_kaydet(g, statement, total_time)
+        
+        # Parmak izi bazında toplam istatistikler (query_istatistikleri)
+        if Config.QUERY_ISTATISTIK_ENABLED:
+            SorguIstatistikleri.kaydet(conn.engine, statement, total_time, endpoint)
+        
         # Sadece çok yavaş query'leri logla (>2s) - production overhead azaltma
         if total_time > 2.0:
-            endpoint = None
             user_id = None
             
             if has_request_context():
-                endpoint = request.endpoint
                 from flask import session
                 user_id = session.get('user_id')
             
@@ -0,0 +1,175 @@
+"""
+SQL Sorgu Bütçesi - Request Başına Sorgu Sayımı ve N+1 Tespiti
+
+Yavaş tek sorgular query_logs'a düşer; asıl sorun ise request başına
+yüzlerce hızlı sorgudur (döngü içinde oda.kat, islem.detaylar,
+Urun.query.get gibi lazy load'lar). Bu modül her request'in sorgularını
+sayar:
+
+- Sorgu sayısı ve toplam DB süresi g.sorgu_sayaci'nda tutulur
+  (query_analyzer'daki after_cursor_execute listener'ı besler).
+- Sorgular parmak izine indirgenir (literal, parametre ve IN listeleri '?'
+  olur); aynı parmak izinin bir request'te tekrar sayısı N+1 göstergesidir.
+- Response'a Server-Timing header'ı eklenir (tarayıcı DevTools'ta görünür).
+- SQL_BUTCE_MAX_SORGU sorgu veya SQL_BUTCE_MAX_TEKRAR tekrar aşılırsa
+  uyarı loglanır ve endpoint APIMetrics'te bütçe aşımıyla işaretlenir.
+
+Kullanım:
+    from utils.monitoring.sorgu_butcesi import parmak_izi
+
+    iz_id, metin = parmak_izi("SELECT * FROM urunler WHERE id = 42")
+    # metin: "SELECT * FROM urunler WHERE id = ?"
+"""
+import hashlib
+import logging
+import re
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Any
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Parmak izi normalizasyonu (sıra önemli)
+_YORUM = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_METIN = re.compile(r"'(?:[^']|'')*'")
+_PARAMETRE = re.compile(r'%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+')
+_SAYI = re.compile(r'(?<![\w.])\d+(?:\.\d+)?\b')
+_DIZI = re.compile(r'ARRAY\[[^\]]*\]', re.I)
+_IN_LISTESI = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_VALUES_SATIRLARI = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_BOSLUK = re.compile(r'\s+')
+
+# Aynı endpoint için bütçe uyarısı en fazla bu aralıkla loglanır (saniye)
+UYARI_ARALIGI = 60
+
+_son_uyarilar = {}
+
+
+@lru_cache(maxsize=4096)
+def parmak_izi(statement: str) -> Tuple[str, str]:
+    """
+    SQL statement'ı normalize edilmiş parmak izine çevirir.
+
+    ORM sorguları parametreli geldiği için aynı statement metni tekrar tekrar
+    görülür; sonuç önbelleklenir.
+
+    Returns:
+        Tuple[str, str]: (16 karakterlik parmak izi id'si, normalize metin)
+    """
+    metin = _YORUM.sub(' ', statement)
+    metin = _METIN.sub('?', metin)
+    metin = _PARAMETRE.sub('?', metin)
+    metin = _SAYI.sub('?', metin)
+    metin = _DIZI.sub('ARRAY[?]', metin)
+    metin = _IN_LISTESI.sub('IN (?)', metin)
+    metin = _VALUES_SATIRLARI.sub(r'\1, ...', metin)
+    metin = _BOSLUK.sub(' ', metin).strip()
+    return hashlib.md5(metin.encode('utf-8')).hexdigest()[:16], metin
+
+
+class IstekSorguSayaci:
+    """Tek request'in sorgu sayaçları (g.sorgu_sayaci); sadece request thread'i yazar"""
+
+    __slots__ = ('sayi', 'sure', 'statementlar')
+
+    def __init__(self):
+        self.sayi = 0
+        self.sure = 0.0
+        self.statementlar = {}  # ham statement -> [sayı, süre]
+
+    def kaydet(self, statement: str, sure: float) -> None:
+        self.sayi += 1
+        self.sure += sure
+        kayit = self.statementlar.get(statement)
+        if kayit is None:
+            self.statementlar[statement] = [1, sure]
+        else:
+            kayit[0] += 1
+            kayit[1] += sure
+
+    def parmak_izleri(self) -> Dict[str, Dict[str, Any]]:
+        """Statement'ları parmak izinde birleştirir: {iz_id: {'metin', 'sayi', 'sure'}}"""
+        sonuc = {}
+        for statement, (sayi, sure) in self.statementlar.items():
+            iz_id, metin = parmak_izi(statement)
+            hedef = sonuc.get(iz_id)
+            if hedef is None:
+                sonuc[iz_id] = {'metin': metin, 'sayi': sayi, 'sure': sure}
+            else:
+                hedef['sayi'] += sayi
+                hedef['sure'] += sure
+        return sonuc
+
+
+class SorguButcesi:
+    """Request başına SQL bütçesi kontrolü"""
+
+    @staticmethod
+    def aktif_mi() -> bool:
+        return Config.SQL_BUTCE_ENABLED
+
+    @staticmethod
+    def istek_baslat(g) -> None:
+        """before_request: request'e boş sayaç bağlar"""
+        g.sorgu_sayaci = IstekSorguSayaci()
+
+    @staticmethod
+    def sorgu_kaydet(g, statement: str, sure: float) -> None:
+        """after_cursor_execute: request'in sayacına sorguyu ekler"""
+        sayac = g.get('sorgu_sayaci')
+        if sayac is not None:
+            sayac.kaydet(statement, sure)
+
+    @staticmethod
+    def istek_bitir(g, endpoint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        after_request: bütçeyi kontrol eder, gerekirse uyarı loglar.
+
+        Returns:
+            Dict: {'sayi', 'sure', 'tekrarlar': {metin: tekrar}, 'asim'}
+                  (sayaç yoksa None)
+        """
+        sayac = g.pop('sorgu_sayaci', None)
+        if sayac is None:
+            return None
+
+        max_sorgu = Config.SQL_BUTCE_MAX_SORGU
+        max_tekrar = Config.SQL_BUTCE_MAX_TEKRAR
+
+        tekrarlar = {}
+        if sayac.sayi > max_tekrar:
+            for iz in sayac.parmak_izleri().values():
+                if iz['sayi'] > max_tekrar:
+                    tekrarlar[iz['metin']] = iz['sayi']
+
+        asim = sayac.sayi > max_sorgu or bool(tekrarlar)
+        if asim and endpoint:
+            SorguButcesi._uyar(endpoint, sayac, tekrarlar)
+
+        return {'sayi': sayac.sayi, 'sure': sayac.sure, 'tekrarlar': tekrarlar, 'asim': asim}
+
+    @staticmethod
+    def _uyar(endpoint: str, sayac: IstekSorguSayaci, tekrarlar: Dict[str, int]) -> None:
+        simdi = time.time()
+        if simdi - _son_uyarilar.get(endpoint, 0) < UYARI_ARALIGI:
+            return
+        _son_uyarilar[endpoint] = simdi
+
+        mesaj = f"⚠️ SQL bütçesi aşıldı: {endpoint} - {sayac.sayi} sorgu, {sayac.sure * 1000:.1f} ms DB"
+        if tekrarlar:
+            metin, tekrar = max(tekrarlar.items(), key=lambda t: t[1])
+            mesaj += f" | olası N+1 ({tekrar}x): {metin[:200]}"
+        logger.warning(mesaj)
+
+    @staticmethod
+    def server_timing(ozet: Dict[str, Any], toplam_sure: float) -> str:
+        """Server-Timing header değeri: db süresi/sorgu sayısı ve toplam süre"""
+        deger = (
+            f'db;dur={ozet["sure"] * 1000:.1f};desc="{ozet["sayi"]} sorgu", '
+            f'app;dur={toplam_sure * 1000:.1f}'
+        )
+        if ozet['asim']:
+            deger += ', sql-butce;desc="asildi"'
+        return deger
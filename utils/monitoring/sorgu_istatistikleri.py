@@ -0,0 +1,196 @@
+"""
+Sorgu İstatistikleri - Parmak İzi Bazında Bellek İçi Toplama
+
+Her SQL sorgusu (sadece yavaşlar değil) parmak izine indirgenir
+(bkz. sorgu_butcesi.parmak_izi) ve worker belleğinde
+(zaman dilimi, parmak izi, endpoint) anahtarıyla sayı / toplam / max süre ve
+log ölçekli süre histogramı olarak toplanır. Arka plan thread'i
+QUERY_ISTATISTIK_FLUSH_ARALIGI saniyede bir biriken anahtarları
+query_istatistikleri tablosuna anahtar başına tek upsert ile yazar
+(pg_stat_statements benzeri, endpoint kırılımlı).
+
+- Yazım, listener'ın aldığı engine üzerinden ayrı bağlantıyla yapılır;
+  app context gerekmez, request transaction'ına karışmaz.
+- Upsert'ler anahtar sırasıyla yapılır; eşzamanlı flush eden worker'lar
+  birbirini kilitlemez.
+- Flush thread'inin kendi sorguları sayılmaz.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+
+from config import Config
+from utils.monitoring.api_metrics import kova_indeksi
+from utils.monitoring.sorgu_butcesi import parmak_izi
+
+logger = logging.getLogger(__name__)
+
+YAVAS_ESIK = 1.0  # Saniye
+COK_YAVAS_ESIK = 5.0
+
+# Bir flush aralığında tutulacak en fazla anahtar; aşılırsa yeni anahtarlar sayılmaz
+MAX_ANAHTAR = 20000
+
+# Parmak izi + endpoint başına dilim satırı. Histogram kovaları (jsonb) anahtar
+# bazında toplanır.
+_UPSERT_SQL = text("""
+    INSERT INTO query_istatistikleri AS t (
+        zaman_dilimi, parmak_izi, endpoint, sorgu_metni, sayi, toplam_sure, max_sure,
+        yavas_sayi, cok_yavas_sayi, kovalar, son_gorulme
+    )
+    VALUES (
+        to_timestamp(:dilim), :parmak_izi, :endpoint, :sorgu_metni, :sayi, :toplam_sure, :max_sure,
+        :yavas_sayi, :cok_yavas_sayi, CAST(:kovalar AS jsonb), NOW()
+    )
+    ON CONFLICT (zaman_dilimi, parmak_izi, endpoint) DO UPDATE SET
+        sayi = t.sayi + EXCLUDED.sayi,
+        toplam_sure = t.toplam_sure + EXCLUDED.toplam_sure,
+        max_sure = GREATEST(t.max_sure, EXCLUDED.max_sure),
+        yavas_sayi = t.yavas_sayi + EXCLUDED.yavas_sayi,
+        cok_yavas_sayi = t.cok_yavas_sayi + EXCLUDED.cok_yavas_sayi,
+        kovalar = COALESCE((
+            SELECT jsonb_object_agg(
+                k, COALESCE((t.kovalar ->> k)::int, 0) + COALESCE((EXCLUDED.kovalar ->> k)::int, 0)
+            )
+            FROM (
+                SELECT jsonb_object_keys(t.kovalar)
+                UNION
+                SELECT jsonb_object_keys(EXCLUDED.kovalar)
+            ) AS anahtarlar(k)
+        ), '{}'::jsonb),
+        son_gorulme = EXCLUDED.son_gorulme
+""")
+
+
+class _Toplam:
+    """Tek (dilim, parmak izi, endpoint) anahtarının sayaçları"""
+
+    __slots__ = ('metin', 'sayi', 'toplam_sure', 'max_sure', 'yavas_sayi', 'cok_yavas_sayi', 'kovalar')
+
+    def __init__(self, metin: str):
+        self.metin = metin
+        self.sayi = 0
+        self.toplam_sure = 0.0
+        self.max_sure = 0.0
+        self.yavas_sayi = 0
+        self.cok_yavas_sayi = 0
+        self.kovalar = {}
+
+    def ekle(self, sure: float) -> None:
+        self.sayi += 1
+        self.toplam_sure += sure
+        if sure > self.max_sure:
+            self.max_sure = sure
+        if sure >= YAVAS_ESIK:
+            self.yavas_sayi += 1
+            if sure >= COK_YAVAS_ESIK:
+                self.cok_yavas_sayi += 1
+        indeks = kova_indeksi(sure)
+        self.kovalar[indeks] = self.kovalar.get(indeks, 0) + 1
+
+
+class SorguIstatistikleri:
+    """Worker başına sorgu parmak izi toplayıcısı"""
+
+    _lock = threading.Lock()
+    _toplamlar = {}  # (dilim, parmak izi, endpoint) -> _Toplam
+    _pid = None
+    _engine = None
+    _yazici = None
+    _yazici_thread = threading.local()
+
+    @classmethod
+    def kaydet(cls, engine, statement: str, sure: float, endpoint: Optional[str]) -> None:
+        """after_cursor_execute: sorguyu worker belleğindeki toplama ekler"""
+        if getattr(cls._yazici_thread, 'aktif', False):
+            return
+        if cls._pid != os.getpid():
+            cls._baslat(engine)
+
+        dilim_saniye = Config.QUERY_ISTATISTIK_DILIM_DAKIKA * 60
+        dilim = int(time.time() // dilim_saniye) * dilim_saniye
+        iz_id, metin = parmak_izi(statement)
+        anahtar = (dilim, iz_id, endpoint or '')
+
+        with cls._lock:
+            toplam = cls._toplamlar.get(anahtar)
+            if toplam is None:
+                if len(cls._toplamlar) >= MAX_ANAHTAR:
+                    return
+                toplam = cls._toplamlar[anahtar] = _Toplam(metin)
+            toplam.ekle(sure)
+
+    @classmethod
+    def _baslat(cls, engine) -> None:
+        """Fork sonrası process'e ait toplam ve flush thread'i kurulur"""
+        with cls._lock:
+            if cls._pid == os.getpid():
+                return
+            # Master'dan kopyalanan toplamlar bu worker'ın sorguları değil
+            cls._toplamlar = {}
+            cls._engine = engine
+            cls._pid = os.getpid()
+            cls._yazici = threading.Thread(target=cls._flush_dongusu, name='sorgu-istatistik-flush', daemon=True)
+            cls._yazici.start()
+
+    @classmethod
+    def _flush_dongusu(cls) -> None:
+        pid = os.getpid()
+        while cls._pid == pid:
+            time.sleep(Config.QUERY_ISTATISTIK_FLUSH_ARALIGI)
+            cls.flush()
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Biriken toplamları query_istatistikleri'ne yazar.
+
+        Returns:
+            int: Yazılan anahtar sayısı
+        """
+        with cls._lock:
+            toplamlar, cls._toplamlar = cls._toplamlar, {}
+        if not toplamlar or cls._engine is None:
+            return 0
+
+        satirlar = [
+            {
+                'dilim': dilim,
+                'parmak_izi': iz_id,
+                'endpoint': endpoint[:255],
+                'sorgu_metni': toplam.metin,
+                'sayi': toplam.sayi,
+                'toplam_sure': toplam.toplam_sure,
+                'max_sure': toplam.max_sure,
+                'yavas_sayi': toplam.yavas_sayi,
+                'cok_yavas_sayi': toplam.cok_yavas_sayi,
+                'kovalar': json.dumps(toplam.kovalar)
+            }
+            for (dilim, iz_id, endpoint), toplam in sorted(toplamlar.items(), key=lambda t: t[0])
+        ]
+
+        cls._yazici_thread.aktif = True
+        try:
+            with cls._engine.begin() as conn:
+                conn.execute(_UPSERT_SQL, satirlar)
+            return len(satirlar)
+        except Exception as e:
+            logger.warning(f"Sorgu istatistikleri yazılamadı ({len(satirlar)} kayıt): {str(e)}")
+            return 0
+        finally:
+            cls._yazici_thread.aktif = False
+
+
+def _kapanista_flush():
+    """Worker kapanırken son toplamlar yazılır"""
+    if SorguIstatistikleri._pid == os.getpid():
+        SorguIstatistikleri.flush()
+
+
+atexit.register(_kapanista_flush)
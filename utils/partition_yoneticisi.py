@@ -0,0 +1,290 @@
+"""
+Partition Yöneticisi - Log/Metrik Tablolarının Zaman Bazlı Partition Bakımı
+
+query_logs (günlük), ml_metrics, sistem_loglari, hata_loglari ve audit_logs
+(aylık) tabloları PostgreSQL native RANGE partition'lıdır (bkz. migration
+20261017_log_partitions). Retention satır satır DELETE yerine süresi dolan
+partition'ın tamamen düşürülmesiyle yapılır: WAL/bloat üretmez, VACUUM
+gerektirmez. Zaman aralıklı sorgular partition pruning ile sadece ilgili
+partition'ları tarar.
+
+- Partition adları deterministiktir: <tablo>_p20261017 (gün), <tablo>_p202610 (ay).
+  Sınırlar PARTITION_SAAT_DILIMI'nde gece yarısıdır.
+- Her tablonun bir DEFAULT partition'ı (<tablo>_default) vardır; bakım
+  gecikse bile insert'ler kaybolmaz. Yeni partition oluşturulurken
+  default'ta o aralığa düşmüş satırlar yeni partition'a taşınır.
+- Tablo partition'lı değilse (migration henüz uygulanmadıysa) retention
+  eski yöntemle, parça parça DELETE ile yapılır.
+
+Kullanım:
+    from utils.partition_yoneticisi import PartitionYoneticisi
+
+    PartitionYoneticisi.ileri_partitionlari_olustur()       # Tüm tablolar
+    PartitionYoneticisi.temizle('query_logs', gun=7)
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from models import db, get_kktc_now
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SAAT_DILIMI = 'Europe/Nicosia'
+
+# tablo -> tarih kolonu, partition aralığı ve retention ayarı (config anahtarı, varsayılan gün; 0 = sınırsız)
+PARTITION_TABLOLARI = {
+    'query_logs': {'kolon': 'timestamp', 'aralik': 'gun', 'retention': ('QUERY_LOGS_DAILY_RETENTION_DAYS', 7)},
+    'ml_metrics': {'kolon': 'timestamp', 'aralik': 'ay', 'retention': ('ML_METRICS_RETENTION_DAYS', 90)},
+    'sistem_loglari': {'kolon': 'islem_tarihi', 'aralik': 'ay', 'retention': ('SISTEM_LOGLARI_RETENTION_DAYS', 0)},
+    'hata_loglari': {'kolon': 'olusturma_tarihi', 'aralik': 'ay', 'retention': ('HATA_LOGLARI_RETENTION_DAYS', 30)},
+    'audit_logs': {'kolon': 'islem_tarihi', 'aralik': 'ay', 'retention': ('AUDIT_LOGS_RETENTION_DAYS', 180)},
+}
+
+# Partition'lı olmayan tablolarda DELETE parça boyutu
+SILME_PARCASI = 50000
+
+
+def donem_baslangici(aralik, gun):
+    """Verilen günü içeren partition döneminin ilk günü"""
+    return gun if aralik == 'gun' else gun.replace(day=1)
+
+
+def sonraki_donem(aralik, baslangic):
+    if aralik == 'gun':
+        return baslangic + timedelta(days=1)
+    return (baslangic.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_adi(tablo, aralik, baslangic):
+    return f"{tablo}_p{baslangic.strftime('%Y%m%d' if aralik == 'gun' else '%Y%m')}"
+
+
+def sinir_degeri(gun):
+    """Partition sınırı için timestamptz literal'i (saat dilimi açık, session'dan bağımsız)"""
+    return f"'{gun.isoformat()} 00:00:00 {PARTITION_SAAT_DILIMI}'"
+
+
+class PartitionYoneticisi:
+    """Zaman bazlı partition oluşturma ve retention servisi"""
+
+    @staticmethod
+    def _ayar(anahtar, varsayilan):
+        from flask import current_app
+        try:
+            return int(current_app.config.get(anahtar, varsayilan))
+        except (RuntimeError, TypeError, ValueError):
+            return varsayilan
+
+    @staticmethod
+    def ileri_donem_sayisi(aralik):
+        """Bugünden sonra hazır tutulacak partition sayısı"""
+        if aralik == 'gun':
+            return PartitionYoneticisi._ayar('PARTITION_ILERI_GUN', 7)
+        return PartitionYoneticisi._ayar('PARTITION_ILERI_AY', 2)
+
+    # ------------------------------------------------------------------
+    # Katalog
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def partitionli_mi(tablo):
+        return bool(db.session.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tablo))"
+        ), {'tablo': tablo}).scalar())
+
+    @staticmethod
+    def partitionlar(tablo):
+        """
+        Tablonun adlandırma düzenine uyan partition'ları
+
+        Returns:
+            list: [(ad, baslangic: date), ...] başlangıca göre sıralı
+        """
+        aralik = PARTITION_TABLOLARI[tablo]['aralik']
+        format_ = '%Y%m%d' if aralik == 'gun' else '%Y%m'
+        onek = f'{tablo}_p'
+
+        adlar = db.session.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:tablo)
+        """), {'tablo': tablo}).scalars().all()
+
+        sonuc = []
+        for ad in adlar:
+            if not ad.startswith(onek):
+                continue
+            try:
+                sonuc.append((ad, datetime.strptime(ad[len(onek):], format_).date()))
+            except ValueError:
+                continue
+        return sorted(sonuc, key=lambda p: p[1])
+
+    # ------------------------------------------------------------------
+    # Oluşturma
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def partition_olustur(tablo, baslangic):
+        """
+        baslangic'la başlayan dönemin partition'ını oluşturur (varsa dokunmaz).
+        Default partition'a düşmüş o döneme ait satırlar aynı transaction'da taşınır.
+
+        Returns:
+            bool: Yeni partition oluşturulduysa True
+        """
+        ayar = PARTITION_TABLOLARI[tablo]
+        kolon = ayar['kolon']
+        ad = partition_adi(tablo, ayar['aralik'], baslangic)
+        alt = sinir_degeri(baslangic)
+        ust = sinir_degeri(sonraki_donem(ayar['aralik'], baslangic))
+
+        if db.session.execute(text("SELECT to_regclass(:ad) IS NOT NULL"), {'ad': ad}).scalar():
+            return False
+
+        try:
+            db.session.execute(text("SET LOCAL lock_timeout = '10s'"))
+            db.session.execute(text(
+                f'CREATE TABLE {ad} (LIKE {tablo} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            ))
+            varsayilan = f'{tablo}_default'
+            if db.session.execute(text("SELECT to_regclass(:ad) IS NOT NULL"), {'ad': varsayilan}).scalar():
+                kosul = f'"{kolon}" >= {alt} AND "{kolon}" < {ust}'
+                tasinan = db.session.execute(text(
+                    f'WITH tasinan AS (DELETE FROM {varsayilan} WHERE {kosul} RETURNING *) '
+                    f'INSERT INTO {ad} SELECT * FROM tasinan'
+                )).rowcount
+                if tasinan:
+                    logger.warning(f"⚠️ {varsayilan}: {tasinan} satır {ad} partition'ına taşındı")
+            db.session.execute(text(
+                f'ALTER TABLE {tablo} ATTACH PARTITION {ad} FOR VALUES FROM ({alt}) TO ({ust})'
+            ))
+            db.session.commit()
+            logger.info(f"🧩 Partition oluşturuldu: {ad}")
+            return True
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def ileri_partitionlari_olustur(tablolar=None):
+        """
+        Bugünün ve sonraki dönemlerin partition'larını hazırlar.
+
+        Returns:
+            dict: {tablo: [oluşturulan partition adları] | 'hata mesajı'}
+        """
+        bugun = get_kktc_now().date()
+        sonuc = {}
+
+        for tablo in (tablolar or PARTITION_TABLOLARI):
+            aralik = PARTITION_TABLOLARI[tablo]['aralik']
+            try:
+                if not PartitionYoneticisi.partitionli_mi(tablo):
+                    sonuc[tablo] = []
+                    continue
+
+                olusturulan = []
+                baslangic = donem_baslangici(aralik, bugun)
+                for _ in range(PartitionYoneticisi.ileri_donem_sayisi(aralik) + 1):
+                    if PartitionYoneticisi.partition_olustur(tablo, baslangic):
+                        olusturulan.append(partition_adi(tablo, aralik, baslangic))
+                    baslangic = sonraki_donem(aralik, baslangic)
+                sonuc[tablo] = olusturulan
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"❌ {tablo} partition oluşturma hatası: {str(e)}")
+                sonuc[tablo] = f'Hata: {str(e)}'
+
+        return sonuc
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def temizle(tablo, gun=None):
+        """
+        Retention süresi dolmuş verileri siler.
+
+        Partition'lı tabloda tamamı sınırın gerisinde kalan partition'lar
+        DETACH + DROP edilir (aylık partition'da veri en fazla bir ay fazla
+        tutulur); default partition'daki eski satırlar DELETE edilir.
+        Partition'lı değilse parça parça DELETE yapılır.
+
+        Args:
+            tablo: PARTITION_TABLOLARI'ndaki tablo
+            gun: Saklama süresi (None ise config'deki retention ayarı, 0 = sınırsız)
+
+        Returns:
+            dict: {'tablo', 'partitionli', 'dusurulen_partitionlar', 'silinen'}
+        """
+        ayar = PARTITION_TABLOLARI[tablo]
+        if gun is None:
+            gun = PartitionYoneticisi._ayar(*ayar['retention'])
+
+        sonuc = {'tablo': tablo, 'partitionli': False, 'dusurulen_partitionlar': [], 'silinen': 0}
+        if not gun or gun <= 0:
+            return sonuc
+
+        sinir = get_kktc_now().date() - timedelta(days=gun)
+
+        if not PartitionYoneticisi.partitionli_mi(tablo):
+            sonuc['silinen'] = PartitionYoneticisi._parca_parca_sil(tablo, ayar['kolon'], sinir)
+            return sonuc
+
+        sonuc['partitionli'] = True
+        for ad, baslangic in PartitionYoneticisi.partitionlar(tablo):
+            if sonraki_donem(ayar['aralik'], baslangic) > sinir:
+                break
+            try:
+                tahmini = db.session.execute(text(
+                    "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass(:ad)"
+                ), {'ad': ad}).scalar() or 0
+                db.session.execute(text("SET LOCAL lock_timeout = '10s'"))
+                db.session.execute(text(f'ALTER TABLE {tablo} DETACH PARTITION {ad}'))
+                db.session.execute(text(f'DROP TABLE {ad}'))
+                db.session.commit()
+                sonuc['dusurulen_partitionlar'].append(ad)
+                sonuc['silinen'] += tahmini
+                logger.info(f"🗑️ Partition düşürüldü: {ad} (~{tahmini} satır)")
+            except Exception as e:
+                # Kilit alınamadıysa bir sonraki bakımda tekrar denenir
+                db.session.rollback()
+                logger.warning(f"⚠️ {ad} düşürülemedi: {str(e)}")
+                break
+
+        varsayilan = f'{tablo}_default'
+        if db.session.execute(text("SELECT to_regclass(:ad) IS NOT NULL"), {'ad': varsayilan}).scalar():
+            sonuc['silinen'] += db.session.execute(text(
+                f'DELETE FROM {varsayilan} WHERE "{ayar["kolon"]}" < {sinir_degeri(sinir)}'
+            )).rowcount
+            db.session.commit()
+
+        return sonuc
+
+    @staticmethod
+    def _parca_parca_sil(tablo, kolon, sinir):
+        """Partition'sız tablo için eski yöntem: SILME_PARCASI'lık DELETE'ler"""
+        toplam = 0
+        while True:
+            silinen = db.session.execute(text(f"""
+                DELETE FROM {tablo}
+                WHERE id IN (
+                    SELECT id FROM {tablo}
+                    WHERE "{kolon}" < {sinir_degeri(sinir)}
+                    LIMIT {SILME_PARCASI}
+                )
+            """)).rowcount
+            db.session.commit()
+            if not silinen:
+                break
+            toplam += silinen
+            # Parçalar arası kısa bekleme (DB yükünü azaltmak için)
+            time.sleep(0.5)
+        return toplam
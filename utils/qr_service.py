@@ -4,13 +4,63 @@ Oda QR kodlarının oluşturulması, doğrulanması ve yönetimi
 """
 
 import qrcode
-import qrcode.image.svg
 import secrets
 import random
 from flask import request
 from datetime import datetime
 from models import db, Oda, QRKodOkutmaLog
 
+# Dosya adları ve PDF standart fontları için Türkçe karakter dönüşümü
+TURKCE_ASCII = str.maketrans('ıİğĞüÜşŞöÖçÇ', 'iIgGuUsSoOcC')
+
+# Kaydedilen SVG'nin piksel boyutu
+QR_SVG_BOYUT = 800
+
+
+def qr_svg_olustur(url, boyut=QR_SVG_BOYUT):
+    """
+    URL için kompakt, sadece path içeren SVG üretir (doğrudan hedef boyutta).
+    
+    Modül matrisinden her satırdaki ardışık koyu modüller tek dikdörtgen
+    olarak yazılır; viewBox modül sayısıdır, width/height hedef boyuttur.
+    Modül seviyesinde olduğu için process pool'da da kullanılabilir.
+    
+    Args:
+        url (str): QR koda encode edilecek URL
+        boyut (int): SVG genişlik/yükseklik (px)
+    Returns:
+        str: SVG string
+    """
+    qr = qrcode.QRCode(
+        version=None,  # Otomatik boyutlandırma
+        error_correction=qrcode.constants.ERROR_CORRECT_L,  # En düşük hata düzeltme (%7) - daha basit
+        border=0,  # Kenarsız - maksimum alan kullanımı
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    
+    matris = qr.get_matrix()
+    n = len(matris)
+    parcalar = []
+    for y, satir in enumerate(matris):
+        x = 0
+        while x < n:
+            if not satir[x]:
+                x += 1
+                continue
+            baslangic = x
+            while x < n and satir[x]:
+                x += 1
+            uzunluk = x - baslangic
+            parcalar.append(f'M{baslangic} {y}h{uzunluk}v1h-{uzunluk}z')
+    
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{boyut}" height="{boyut}" '
+        f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(parcalar)}"/></svg>'
+    )
+
 
 class QRKodService:
     """QR kod oluşturma ve doğrulama servisi"""
@@ -52,37 +102,61 @@ class QRKodService:
             str: SVG HTML string (direkt embed edilebilir)
         """
         try:
-            import re
-            
-            # QR kod oluştur - basit ve büyük (800x800)
-            qr = qrcode.QRCode(
-                version=1,  # Otomatik boyutlandırma
-                error_correction=qrcode.constants.ERROR_CORRECT_L,  # En düşük hata düzeltme (%7) - daha basit
-                box_size=2,  # Her kutu 2 birim - düşük yoğunluk
-                border=0,  # Kenarsız - maksimum alan kullanımı
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            
-            # SVG factory ile görsel oluştur
-            factory = qrcode.image.svg.SvgPathImage
-            img = qr.make_image(image_factory=factory, fill_color="black", back_color="white")
-            
-            # SVG string'e çevir
-            svg_str = img.to_string(encoding='unicode')
+            return qr_svg_olustur(url)
+        except Exception as e:
+            raise Exception(f"QR görsel oluşturma hatası: {str(e)}")
+    
+    @staticmethod
+    def kat_qr_sayfasi_pdf(baslik, odalar):
+        """
+        Kat için baskıya hazır QR sayfası oluştur (A4, sayfa başına 3x4 oda)
+        Args:
+            baslik (str): Sayfa başlığı (Otel - Kat)
+            odalar (list): [(oda_no, qr_url), ...]
+        Returns:
+            bytes: PDF içeriği
+        """
+        from io import BytesIO
+        from reportlab.graphics import renderPDF
+        from reportlab.graphics.barcode.qr import QrCodeWidget
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.pdfgen import canvas
+        
+        sutun, satir = 3, 4
+        qr_boyut = 5 * cm
+        genislik, yukseklik = A4
+        hucre_genislik = (genislik - 2 * cm) / sutun
+        hucre_yukseklik = (yukseklik - 4 * cm) / satir
+        baslik = baslik.translate(TURKCE_ASCII)
+        
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        
+        for i, (oda_no, url) in enumerate(odalar):
+            sira = i % (sutun * satir)
+            if sira == 0:
+                if i:
+                    pdf.showPage()
+                pdf.setFont('Helvetica-Bold', 14)
+                pdf.drawCentredString(genislik / 2, yukseklik - 2 * cm, baslik)
             
-            # SVG tag'ini bul ve width/height ekle (800x800 büyük boyut)
-            if '<svg' in svg_str and 'width=' not in svg_str:
-                svg_str = svg_str.replace('<svg', '<svg width="800" height="800"', 1)
-            elif '<svg' in svg_str:
-                # Mevcut width/height varsa değiştir
-                svg_str = re.sub(r'width="[^"]*"', 'width="800"', svg_str)
-                svg_str = re.sub(r'height="[^"]*"', 'height="800"', svg_str)
+            x = 1 * cm + (sira % sutun) * hucre_genislik
+            y = yukseklik - 3 * cm - (sira // sutun + 1) * hucre_yukseklik
             
-            return svg_str
+            # Vektörel QR (baskıda bulanıklaşmaz)
+            widget = QrCodeWidget(url)
+            x1, y1, x2, y2 = widget.getBounds()
+            cizim = Drawing(qr_boyut, qr_boyut, transform=[qr_boyut / (x2 - x1), 0, 0, qr_boyut / (y2 - y1), 0, 0])
+            cizim.add(widget)
+            renderPDF.draw(cizim, pdf, x + (hucre_genislik - qr_boyut) / 2, y + 1 * cm)
             
-        except Exception as e:
-            raise Exception(f"QR görsel oluşturma hatası: {str(e)}")
+            pdf.setFont('Helvetica', 12)
+            pdf.drawCentredString(x + hucre_genislik / 2, y + 0.4 * cm, f'Oda {oda_no}'.translate(TURKCE_ASCII))
+        
+        pdf.save()
+        return buffer.getvalue()
     
     @staticmethod
     def create_qr_for_oda(oda):
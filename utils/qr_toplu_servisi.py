@@ -0,0 +1,348 @@
+"""
+QR Toplu Servisi - Arka Plan Toplu QR Oluşturma
+
+/admin/toplu-qr-olustur isteği sadece bir BackgroundJob oluşturup Celery'ye
+iş bırakır; token üretimi, SVG render ve veritabanı yazımı worker'da yapılır.
+
+- Token'lar tek seferde, mevcut token'larla çakışmayacak şekilde üretilir.
+- SVG render CPU işidir; QR_TOPLU_ISLEM_SAYISI > 1 ise ProcessPoolExecutor
+  ile paralel yapılır. Celery prefork çocukları daemon olduğundan alt process
+  açamayabilir; bu durumda render aynı process'te seri devam eder.
+- Yazım QR_TOPLU_PARCA odalık parçalar halinde tek executemany UPDATE ile
+  yapılır; her parçanın ilerlemesi job_metadata'ya aynı transaction'da yazılır.
+
+Fonksiyonlar:
+- kuyruga_al: Job oluşturur ve Celery'ye gönderir (broker yoksa senkron işler)
+- isle: Job'ı sahiplenir, odaları parça parça işler, sonucu yazar
+- ilerleme_getir: Durum endpoint'i için job ilerlemesi
+
+Kullanım:
+    from utils.qr_toplu_servisi import QRTopluServisi
+
+    QRTopluServisi.kuyruga_al('qrsiz', user_id, request.url_root)
+"""
+
+import logging
+import random
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from models import db, BackgroundJob, Oda, get_kktc_now
+from utils.qr_service import qr_svg_olustur
+
+logger = logging.getLogger(__name__)
+
+JOB_ADI = 'qr_toplu_olustur'
+
+
+def _guvenli_svg(url):
+    """Tek URL'in hatası tüm parçayı düşürmesin (process pool'da çalışır)"""
+    try:
+        return qr_svg_olustur(url)
+    except Exception:
+        return None
+
+
+class QRTopluServisi:
+    """Odalar için toplu QR kodunu arka planda oluşturan servis"""
+
+    @staticmethod
+    def _ayar(anahtar, varsayilan):
+        try:
+            return current_app.config.get(anahtar, varsayilan)
+        except RuntimeError:
+            return varsayilan
+
+    # ------------------------------------------------------------------
+    # Kuyruğa alma
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _aktif_job():
+        """Heartbeat'i taze, bekleyen veya çalışan toplu QR job'ı (yoksa None)"""
+        eski_sinir = get_kktc_now() - timedelta(
+            seconds=QRTopluServisi._ayar('QR_TOPLU_STALE_SECONDS', 600)
+        )
+        jobs = BackgroundJob.query.filter(
+            BackgroundJob.job_name == JOB_ADI,
+            BackgroundJob.status.in_(['pending', 'running'])
+        ).order_by(BackgroundJob.id.desc()).all()
+
+        for job in jobs:
+            son = (job.job_metadata or {}).get('heartbeat')
+            if son and datetime.fromisoformat(son) > eski_sinir:
+                return job
+        return None
+
+    @staticmethod
+    def kuyruga_al(mod, user_id, base_url):
+        """
+        Toplu QR oluşturma için job oluşturur ve Celery'ye gönderir.
+        Devam eden bir toplu QR job'ı varsa yenisi açılmaz, o döndürülür.
+
+        Args:
+            mod: 'tumu' (tüm aktif odalar) veya 'qrsiz' (QR'ı olmayanlar)
+            user_id: İşlemi başlatan kullanıcı
+            base_url: QR URL'lerinin kökü (request.url_root)
+
+        Returns:
+            dict: {'success': bool, 'job_id': str, 'kuyrukta': bool, 'message': str, ...}
+        """
+        mevcut = QRTopluServisi._aktif_job()
+        if mevcut:
+            return {
+                'success': True,
+                'job_id': mevcut.job_id,
+                'kuyrukta': True,
+                'message': 'Devam eden bir toplu QR oluşturma işlemi var'
+            }
+
+        job_id = f'qr-toplu-{uuid.uuid4().hex[:12]}'
+        job = BackgroundJob(
+            job_id=job_id,
+            job_name=JOB_ADI,
+            status='pending',
+            job_metadata={
+                'mod': mod,
+                'user_id': user_id,
+                'base_url': base_url.rstrip('/'),
+                'islenen': 0,
+                'toplam': None,
+                'yuzde': 0,
+                'basarili': 0,
+                'basarisiz': 0,
+                'heartbeat': get_kktc_now().isoformat()
+            }
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        try:
+            from celery_app import qr_toplu_olustur_task
+            qr_toplu_olustur_task.delay(job_id)
+            return {
+                'success': True,
+                'job_id': job_id,
+                'kuyrukta': True,
+                'message': 'QR oluşturma kuyruğa alındı'
+            }
+        except Exception as e:
+            # Broker erişilemiyorsa istek içinde işlenir; web process'inde
+            # (thread'li gunicorn worker) fork yapılmaz, render seri olur
+            logger.warning(f"⚠️ Toplu QR kuyruğa alınamadı, senkron işleniyor: {str(e)}")
+            sonuc = QRTopluServisi.isle(job_id, paralel=False)
+            sonuc.update({'job_id': job_id, 'kuyrukta': False})
+            return sonuc
+
+    # ------------------------------------------------------------------
+    # İşleme
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _sahiplen(job_id):
+        """pending job'ı satır kilidi altında running'e çeker (tekrar teslimde iki kez işlenmez)"""
+        job = BackgroundJob.query.filter_by(job_id=job_id).with_for_update().first()
+        if not job or job.status != 'pending':
+            db.session.rollback()
+            return None
+
+        meta = dict(job.job_metadata or {})
+        meta['heartbeat'] = get_kktc_now().isoformat()
+        job.job_metadata = meta
+        job.status = 'running'
+        job.started_at = get_kktc_now()
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def _benzersiz_tokenlar(adet, haric):
+        """
+        Mevcut token'larla ve birbirleriyle çakışmayan 6 haneli token'lar.
+        Yeniden üretilen odaların eski token'ları da hariç tutulur; eski
+        basılı QR yanlışlıkla başka bir odaya yönlenmez.
+        """
+        if adet > 900000 - len(haric):
+            raise ValueError('Benzersiz QR token alanı yetersiz')
+
+        kullanilan = set(haric)
+        tokenlar = []
+        while len(tokenlar) < adet:
+            token = str(random.randint(100000, 999999))
+            if token not in kullanilan:
+                kullanilan.add(token)
+                tokenlar.append(token)
+        return tokenlar
+
+    @staticmethod
+    def _havuz_olustur(paralel):
+        islem_sayisi = QRTopluServisi._ayar('QR_TOPLU_ISLEM_SAYISI', 1)
+        if not paralel or islem_sayisi <= 1:
+            return None
+        return ProcessPoolExecutor(max_workers=islem_sayisi)
+
+    @staticmethod
+    def _render(havuz, urls):
+        """
+        URL listesini SVG'ye çevirir.
+
+        Returns:
+            tuple: (svg listesi, havuz) - havuz kullanılamadıysa None döner
+        """
+        if havuz is not None:
+            try:
+                chunksize = max(1, len(urls) // (QRTopluServisi._ayar('QR_TOPLU_ISLEM_SAYISI', 1) * 4))
+                return list(havuz.map(_guvenli_svg, urls, chunksize=chunksize)), havuz
+            except (AssertionError, OSError, BrokenProcessPool) as e:
+                # Daemon process (Celery prefork) alt process açamaz
+                logger.warning(f"⚠️ QR process pool kullanılamadı, seri render: {str(e)}")
+                havuz.shutdown(wait=False, cancel_futures=True)
+                havuz = None
+        return [_guvenli_svg(url) for url in urls], havuz
+
+    @staticmethod
+    def isle(job_id, paralel=True):
+        """
+        Job'ı işler. Celery task'ı ve senkron yedek yol tarafından çağrılır.
+
+        Returns:
+            dict: {'success': bool, 'message': str, 'basarili': int, 'basarisiz': int, 'toplam': int}
+        """
+        job = QRTopluServisi._sahiplen(job_id)
+        if not job:
+            return {'success': False, 'message': 'Job bulunamadı veya zaten işleniyor'}
+
+        meta = dict(job.job_metadata)
+        basarili = basarisiz = 0
+        havuz = None
+
+        try:
+            sorgu = db.session.query(Oda.id).filter(Oda.aktif == True)
+            if meta.get('mod') != 'tumu':
+                sorgu = sorgu.filter(Oda.qr_kod_token.is_(None))
+            oda_idleri = [oda_id for (oda_id,) in sorgu.order_by(Oda.id)]
+            toplam = len(oda_idleri)
+
+            mevcut_tokenlar = {
+                token for (token,) in
+                db.session.query(Oda.qr_kod_token).filter(Oda.qr_kod_token.isnot(None))
+            }
+            tokenlar = QRTopluServisi._benzersiz_tokenlar(toplam, mevcut_tokenlar)
+            del mevcut_tokenlar
+
+            parca = QRTopluServisi._ayar('QR_TOPLU_PARCA', 200)
+            havuz = QRTopluServisi._havuz_olustur(paralel and toplam > parca)
+
+            for bas in range(0, toplam, parca):
+                parca_idleri = oda_idleri[bas:bas + parca]
+                parca_tokenlari = tokenlar[bas:bas + parca]
+                svgler, havuz = QRTopluServisi._render(
+                    havuz, [f"{meta['base_url']}/qr/{token}" for token in parca_tokenlari]
+                )
+
+                simdi = get_kktc_now()
+                satirlar = [
+                    {
+                        'id': oda_id,
+                        'qr_kod_token': token,
+                        'qr_kod_gorsel': svg,
+                        'qr_kod_olusturma_tarihi': simdi
+                    }
+                    for oda_id, token, svg in zip(parca_idleri, parca_tokenlari, svgler)
+                    if svg is not None
+                ]
+                if satirlar:
+                    db.session.execute(update(Oda), satirlar)
+                basarili += len(satirlar)
+                basarisiz += len(parca_idleri) - len(satirlar)
+
+                islenen = bas + len(parca_idleri)
+                job = BackgroundJob.query.filter_by(job_id=job_id).first()
+                meta = dict(job.job_metadata or {})
+                meta.update({
+                    'islenen': islenen,
+                    'toplam': toplam,
+                    'yuzde': round(islenen * 100 / toplam),
+                    'basarili': basarili,
+                    'basarisiz': basarisiz,
+                    'heartbeat': get_kktc_now().isoformat()
+                })
+                job.job_metadata = meta
+                db.session.commit()
+
+            QRTopluServisi._bitir(job_id, toplam=toplam)
+            return {
+                'success': True,
+                'message': f'Toplu QR oluşturma tamamlandı. Başarılı: {basarili}, Başarısız: {basarisiz}',
+                'basarili': basarili,
+                'basarisiz': basarisiz,
+                'toplam': toplam
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Toplu QR oluşturma hatası ({job_id}): {str(e)}")
+            QRTopluServisi._bitir(job_id, hata=str(e), stack_trace=traceback.format_exc())
+            return {
+                'success': False,
+                'message': 'Toplu QR oluşturma sırasında hata oluştu',
+                'basarili': basarili,
+                'basarisiz': basarisiz
+            }
+        finally:
+            if havuz is not None:
+                havuz.shutdown(wait=True)
+
+    @staticmethod
+    def _bitir(job_id, toplam=None, hata=None, stack_trace=None):
+        """Job'ı completed/failed olarak kapatır"""
+        try:
+            job = BackgroundJob.query.filter_by(job_id=job_id).first()
+            if not job:
+                return
+
+            simdi = get_kktc_now()
+            job.completed_at = simdi
+            job.status = 'failed' if hata else 'completed'
+            job.error_message = hata
+            job.stack_trace = stack_trace
+            if job.started_at:
+                job.duration = (simdi - job.started_at).total_seconds()
+            if not hata:
+                meta = dict(job.job_metadata or {})
+                meta.update({'yuzde': 100, 'toplam': toplam})
+                job.job_metadata = meta
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Toplu QR job kapatma hatası: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Durum
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def ilerleme_getir(job_id):
+        """
+        Returns:
+            dict | None: {'job_durum', 'yuzde', 'islenen', 'toplam', 'basarili', 'basarisiz', 'hata'}
+        """
+        job = BackgroundJob.query.filter_by(job_id=job_id, job_name=JOB_ADI).first()
+        if not job:
+            return None
+
+        meta = job.job_metadata or {}
+        return {
+            'job_durum': job.status,
+            'yuzde': meta.get('yuzde', 0),
+            'islenen': meta.get('islenen', 0),
+            'toplam': meta.get('toplam'),
+            'basarili': meta.get('basarili', 0),
+            'basarisiz': meta.get('basarisiz', 0),
+            'hata': job.error_message
+        }
@@ -8,6 +8,7 @@ from models import (
     db, PersonelZimmet, PersonelZimmetDetay, MinibarIslem, MinibarIslemDetay,
     StokHareket, Urun, Kullanici, Oda, Kat, UrunGrup
 )
+from models._models import stok_hareket_net_etkisi, stok_bakiye_uygula
 import logging
 
 logger = logging.getLogger(__name__)
@@ -228,6 +229,16 @@ def bulk_insert_stok_hareketleri(hareket_data_list, session):
         
         # Bulk insert kullan
         session.bulk_insert_mappings(StokHareket, hareket_data_list)
+        
+        # bulk_insert_mappings mapper event'lerini tetiklemez - bakiyeyi aynı transaction'da güncelle
+        bakiye_farklari = {}
+        for data in hareket_data_list:
+            fark = stok_hareket_net_etkisi(data.get('hareket_tipi'), data.get('miktar'))
+            bakiye_farklari[data['urun_id']] = bakiye_farklari.get(data['urun_id'], 0) + fark
+        connection = session.connection()
+        for urun_id, fark in bakiye_farklari.items():
+            stok_bakiye_uygula(connection, urun_id, fark)
+        
         session.commit()
         
         logger.info(f"✅ {len(hareket_data_list)} stok hareketi toplu eklendi")
@@ -311,84 +322,11 @@ def get_minibar_durumlari_optimized(kat_id=None, oda_id=None):
                 aktif=True
             ).order_by(Oda.oda_no).all()
         
-        # Minibar bilgisi
+        # Minibar bilgisi (oda_minibar_durumlari - işlem geçmişi dolaşılmaz)
         minibar_bilgisi = None
         if oda_id:
-            # Son minibar işlemini getir (eager loading ile)
-            son_islem = MinibarIslem.query.options(
-                joinedload(MinibarIslem.oda).joinedload(Oda.kat),
-                joinedload(MinibarIslem.personel),
-                subqueryload(MinibarIslem.detaylar).joinedload(MinibarIslemDetay.urun).joinedload(Urun.grup)
-            ).filter_by(
-                oda_id=oda_id
-            ).order_by(
-                MinibarIslem.islem_tarihi.desc()
-            ).first()
-            
-            if son_islem:
-                # Tüm işlemleri getir (eager loading ile)
-                tum_islemler = MinibarIslem.query.options(
-                    subqueryload(MinibarIslem.detaylar).joinedload(MinibarIslemDetay.urun)
-                ).filter_by(
-                    oda_id=oda_id
-                ).order_by(
-                    MinibarIslem.islem_tarihi.asc()
-                ).all()
-                
-                # Ürün toplamlarını hesapla
-                urun_toplam = {}
-                ilk_dolum_yapildi = set()
-                
-                for islem in tum_islemler:
-                    for detay in islem.detaylar:
-                        urun_id = detay.urun_id
-                        if urun_id not in urun_toplam:
-                            urun_toplam[urun_id] = {
-                                'urun': detay.urun,
-                                'toplam_eklenen_ilk_dolum': 0,
-                                'toplam_eklenen_doldurma': 0,
-                                'toplam_tuketim': 0,
-                                'ilk_baslangic': detay.baslangic_stok,
-                                'son_bitis': detay.bitis_stok
-                            }
-                        
-                        if islem.islem_tipi == 'ilk_dolum' and urun_id not in ilk_dolum_yapildi:
-                            urun_toplam[urun_id]['toplam_eklenen_ilk_dolum'] += detay.eklenen_miktar
-                            ilk_dolum_yapildi.add(urun_id)
-                        elif islem.islem_tipi in ['doldurma', 'kontrol']:
-                            urun_toplam[urun_id]['toplam_eklenen_doldurma'] += detay.eklenen_miktar
-                            urun_toplam[urun_id]['toplam_tuketim'] += detay.eklenen_miktar
-                        
-                        urun_toplam[urun_id]['son_bitis'] = detay.bitis_stok
-                
-                # Minibar ürünlerini hazırla
-                minibar_urunler = []
-                for detay in son_islem.detaylar:
-                    urun_id = detay.urun_id
-                    urun_data = urun_toplam.get(urun_id, {})
-                    
-                    ilk_dolum_eklenen = urun_data.get('toplam_eklenen_ilk_dolum', 0)
-                    doldurma_eklenen = urun_data.get('toplam_eklenen_doldurma', 0)
-                    toplam_eklenen = ilk_dolum_eklenen + doldurma_eklenen
-                    toplam_tuketim = urun_data.get('toplam_tuketim', 0)
-                    mevcut_miktar = urun_data.get('son_bitis', 0)
-                    
-                    minibar_urunler.append({
-                        'urun': detay.urun,
-                        'baslangic_stok': urun_data.get('ilk_baslangic', 0),
-                        'bitis_stok': urun_data.get('son_bitis', 0),
-                        'eklenen_miktar': toplam_eklenen,
-                        'tuketim': toplam_tuketim,
-                        'mevcut_miktar': mevcut_miktar
-                    })
-                
-                minibar_bilgisi = {
-                    'oda': son_islem.oda,
-                    'son_islem': son_islem,
-                    'urunler': minibar_urunler,
-                    'toplam_urun': len(minibar_urunler),
-                    'toplam_miktar': sum(u['mevcut_miktar'] for u in minibar_urunler)
-                }
+            from utils.minibar_durum_servisleri import MinibarDurumServisi
+            minibar_bilgisi = MinibarDurumServisi.oda_minibar_bilgisi(oda_id)
         
         return {
             'katlar': katlar,
@@ -1,10 +1,13 @@
 """
 Rapor Cache Service
 Yavaş rapor endpoint'leri için cache yönetimi
+
+Invalidation etiket tabanlıdır (utils.cache_tags); raporlar 'otel:{id}'
+ve gün sonu raporları ayrıca 'kullanici:{personel_id}' etiketlerini taşır.
 """
 
 import logging
-from utils.cache_helper import cache_get, cache_set, cache_delete_pattern
+from utils.cache_helper import cache_get, cache_set, cache_invalidate_tags
 
 logger = logging.getLogger(__name__)
 
@@ -46,17 +49,22 @@ class RaporCacheService:
         cache_key = RaporCacheService.get_gun_sonu_raporu_cache_key(
             otel_id, personel_ids, baslangic_tarihi, bitis_tarihi
         )
-        return cache_set(cache_key, data, RaporCacheService.GUN_SONU_RAPORU_TTL)
+        etiketler = [
+            f"{RaporCacheService.CACHE_PREFIX}:gun_sonu",
+            f"{RaporCacheService.CACHE_PREFIX}:gun_sonu:otel:{otel_id}",
+            f"otel:{otel_id}"
+        ]
+        etiketler += [f"kullanici:{p}" for p in (personel_ids or [])]
+        return cache_set(cache_key, data, RaporCacheService.GUN_SONU_RAPORU_TTL, tags=etiketler)
     
     @staticmethod
     def invalidate_gun_sonu_raporu(otel_id: int = None):
         """Gün sonu raporu cache'ini temizle"""
         if otel_id:
-            pattern = f"{RaporCacheService.CACHE_PREFIX}:gun_sonu:{otel_id}:*"
+            deleted = cache_invalidate_tags(f"{RaporCacheService.CACHE_PREFIX}:gun_sonu:otel:{otel_id}")
         else:
-            pattern = f"{RaporCacheService.CACHE_PREFIX}:gun_sonu:*"
+            deleted = cache_invalidate_tags(f"{RaporCacheService.CACHE_PREFIX}:gun_sonu")
         
-        deleted = cache_delete_pattern(pattern)
         logger.info(f"Gün sonu raporu cache temizlendi: {deleted} key")
         return deleted
     
@@ -77,16 +85,24 @@ class RaporCacheService:
     def set_zimmet_stok_raporu(data: dict, otel_id: int = None):
         """Zimmet stok raporunu cache'le"""
         cache_key = RaporCacheService.get_zimmet_stok_raporu_cache_key(otel_id)
-        return cache_set(cache_key, data, RaporCacheService.ZIMMET_STOK_RAPORU_TTL)
+        etiketler = [f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok"]
+        if otel_id:
+            etiketler += [f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok:otel:{otel_id}", f"otel:{otel_id}"]
+        else:
+            etiketler.append(f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok:tum_oteller")
+        return cache_set(cache_key, data, RaporCacheService.ZIMMET_STOK_RAPORU_TTL, tags=etiketler)
     
     @staticmethod
     def invalidate_zimmet_stok_raporu(otel_id: int = None):
         """Zimmet stok raporu cache'ini temizle"""
+        # Otel verilse de tüm oteller raporu o otelin verisini içerdiği için temizlenir
         if otel_id:
-            pattern = f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok:{otel_id}"
+            deleted = cache_invalidate_tags(
+                f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok:otel:{otel_id}",
+                f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok:tum_oteller"
+            )
         else:
-            pattern = f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok:*"
+            deleted = cache_invalidate_tags(f"{RaporCacheService.CACHE_PREFIX}:zimmet_stok")
         
-        deleted = cache_delete_pattern(pattern)
         logger.info(f"Zimmet stok raporu cache temizlendi: {deleted} key")
         return deleted
@@ -0,0 +1,199 @@
+"""
+Scheduler Lideri - APScheduler Görevleri için Tek Lider Seçimi
+
+Web scheduler (ENABLE_WEB_SCHEDULER=true) her gunicorn worker'ında başlar;
+lider seçimi olmadan her zamanlanmış görev worker sayısı kadar çalışır.
+Bu modül Redis üzerinde süreli bir kira (lease) ile deployment genelinde
+tek bir lider process seçer; görevler sadece liderde çalışır.
+
+- Kira: SET key token NX PX <lease>. Lider kirayı lease/3 aralıkla yeniler
+  (token karşılaştırmalı Lua), başka process'in kirasına dokunmaz.
+- Failover: Lider worker max_requests ile yeniden başlatılırsa kapanışta
+  kira bırakılır; process çökerse kira en geç SCHEDULER_LIDER_LEASE saniye
+  sonra düşer ve bekleyen adaylardan biri lider olur.
+- Redis'e ulaşılamazsa lider, kirası dolmadan önce kendini liderlikten
+  düşürür; aynı anda iki lider oluşmaz, en kötü durumda görev atlanır.
+
+Kullanım:
+    from utils.scheduler_lideri import scheduler_lideri, lider_gorevi
+
+    scheduler_lideri.baslat()
+    scheduler.add_job(func=lider_gorevi(gorev), ...)
+"""
+
+import atexit
+import functools
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+LIDER_KEY = 'minibar:scheduler:lider'
+
+# Kira hâlâ bizdeyse süresini uzatır
+_YENILE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Kira hâlâ bizdeyse siler
+_BIRAK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SchedulerLideri:
+    """Redis kirası ile process başına lider seçimi (fork güvenli)"""
+
+    def __init__(self, anahtar=LIDER_KEY, lease=None):
+        self.anahtar = anahtar
+        self.lease = int(lease or Config.SCHEDULER_LIDER_LEASE)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._token = None
+        self._redis = None
+        self._thread = None
+        self._durdur = None
+        self._lider = False
+        self._gecerlilik_sonu = 0.0
+        self.lider_olma_sayisi = 0
+
+    # ------------------------------------------------------------------
+    # Başlatma
+    # ------------------------------------------------------------------
+
+    def _client(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(
+                Config.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+        return self._redis
+
+    def baslat(self):
+        """Seçim thread'ini bu process için başlatır (fork sonrası yeniden kurulur)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+
+            if self._pid != os.getpid():
+                # Master'dan kopyalanan liderlik ve bağlantı bu process'e ait değil
+                self._redis = None
+                self._lider = False
+                self._gecerlilik_sonu = 0.0
+                self._token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+                self._durdur = threading.Event()
+                self._pid = os.getpid()
+
+            self._thread = threading.Thread(target=self._calistir, name='scheduler-lideri', daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Seçim döngüsü
+    # ------------------------------------------------------------------
+
+    def _calistir(self):
+        aralik = max(1.0, self.lease / 3.0)
+        while not self._durdur.is_set():
+            self._dene()
+            self._durdur.wait(aralik)
+
+    def _dene(self):
+        """Kirayı almayı veya yenilemeyi dener"""
+        lease_ms = self.lease * 1000
+        baslangic = time.monotonic()
+        try:
+            client = self._client()
+            if self._lider:
+                alindi = bool(client.eval(_YENILE_LUA, 1, self.anahtar, self._token, lease_ms))
+            else:
+                alindi = bool(client.set(self.anahtar, self._token, nx=True, px=lease_ms))
+        except Exception as e:
+            logger.warning(f"Scheduler lider kirası yenilenemedi: {str(e)}")
+            alindi = False
+
+        if alindi:
+            if not self._lider:
+                self.lider_olma_sayisi += 1
+                logger.info(f"👑 Scheduler lideri bu process (pid: {os.getpid()})")
+            self._lider = True
+            # İstek süresi ve saat kayması için kiranın son %20'si kullanılmaz
+            self._gecerlilik_sonu = baslangic + self.lease * 0.8
+        elif self._lider:
+            logger.warning(f"⚠️ Scheduler liderliği kaybedildi (pid: {os.getpid()})")
+            self._lider = False
+            self._gecerlilik_sonu = 0.0
+
+    def birak(self):
+        """Liderlik bizdeyse kirayı bırakır (kapanışta failover'ı hızlandırır)"""
+        if self._pid != os.getpid() or not self._lider:
+            return
+
+        if self._durdur is not None:
+            self._durdur.set()
+        self._lider = False
+        self._gecerlilik_sonu = 0.0
+        try:
+            self._client().eval(_BIRAK_LUA, 1, self.anahtar, self._token)
+            logger.info(f"Scheduler liderliği bırakıldı (pid: {os.getpid()})")
+        except Exception as e:
+            logger.warning(f"Scheduler lider kirası bırakılamadı: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Sorgu
+    # ------------------------------------------------------------------
+
+    def lider_mi(self):
+        return (
+            self._pid == os.getpid()
+            and self._lider
+            and time.monotonic() < self._gecerlilik_sonu
+        )
+
+    def durum(self):
+        """İzleme için lider bilgisi"""
+        try:
+            mevcut_lider = self._client().get(self.anahtar)
+        except Exception:
+            mevcut_lider = None
+        return {
+            'lider_mi': self.lider_mi(),
+            'token': self._token,
+            'mevcut_lider': mevcut_lider,
+            'lease': self.lease,
+            'lider_olma_sayisi': self.lider_olma_sayisi
+        }
+
+
+scheduler_lideri = SchedulerLideri()
+
+
+def lider_gorevi(func):
+    """Zamanlanmış görevi sadece lider process'te çalıştıran sarmalayıcı"""
+    @functools.wraps(func)
+    def sarmalayici(*args, **kwargs):
+        if Config.SCHEDULER_LIDER_ENABLED and not scheduler_lideri.lider_mi():
+            logger.debug(f"Scheduler görevi atlandı, lider değil: {func.__name__}")
+            return None
+        return func(*args, **kwargs)
+    return sarmalayici
+
+
+atexit.register(scheduler_lideri.birak)
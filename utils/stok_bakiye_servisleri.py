@@ -0,0 +1,185 @@
+"""
+Stok Bakiye Servisleri
+
+urun_stok_bakiyeleri tablosu, stok_hareketleri defterinin ürün bazlı anlık
+özetidir. Bakiye, StokHareket mapper event'leri ile aynı transaction içinde
+güncellenir (bkz. models._models.stok_bakiye_uygula). Bu modül okuma,
+mutabakat (drift kontrolü) ve yeniden oluşturma işlemlerini içerir.
+
+Fonksiyonlar:
+- bakiyeleri_getir: Ürün bakiyelerini tek sorguda getirir (O(ürün))
+- gecmisten_hesapla: Bakiyeleri hareket geçmişinden hesaplar (O(geçmiş))
+- mutabakat: Defter ile bakiye tablosunu karşılaştırır, sapmaları düzeltir
+- yeniden_olustur: Bakiye tablosunu geçmişten sıfırdan oluşturur
+
+Kullanım:
+    from utils.stok_bakiye_servisleri import StokBakiyeServisi
+
+    stoklar = StokBakiyeServisi.bakiyeleri_getir([1, 2, 3])
+    rapor = StokBakiyeServisi.mutabakat(duzelt=True)
+"""
+
+import logging
+
+from sqlalchemy import case, text
+
+from models import (
+    db, StokHareket, UrunStokBakiye, get_kktc_now
+)
+from models._models import STOK_ARTIRAN_HAREKETLER, STOK_AZALTAN_HAREKETLER
+
+logger = logging.getLogger(__name__)
+
+
+class StokBakiyeServisi:
+    """Materyalize stok bakiyesi servisi"""
+
+    @staticmethod
+    def bakiyeleri_getir(urun_ids=None):
+        """
+        Ürün bakiyelerini bakiye tablosundan getirir.
+
+        Args:
+            urun_ids: Ürün ID listesi (None ise tüm ürünler)
+
+        Returns:
+            dict: {urun_id: bakiye, ...} - istenen ama kaydı olmayan ürünler 0
+        """
+        query = db.session.query(UrunStokBakiye.urun_id, UrunStokBakiye.bakiye)
+
+        if urun_ids:
+            query = query.filter(UrunStokBakiye.urun_id.in_(urun_ids))
+
+        stoklar = {row.urun_id: int(row.bakiye or 0) for row in query}
+
+        if urun_ids:
+            for uid in urun_ids:
+                stoklar.setdefault(uid, 0)
+
+        return stoklar
+
+    @staticmethod
+    def gecmisten_hesapla(urun_ids=None):
+        """
+        Bakiyeleri stok_hareketleri geçmişinin tamamını toplayarak hesaplar.
+        Sadece mutabakat ve yeniden oluşturma için kullanılmalıdır.
+
+        Returns:
+            dict: {urun_id: net_miktar, ...}
+        """
+        net_miktar = db.func.sum(
+            case(
+                (StokHareket.hareket_tipi.in_(STOK_ARTIRAN_HAREKETLER), StokHareket.miktar),
+                (StokHareket.hareket_tipi.in_(STOK_AZALTAN_HAREKETLER), -StokHareket.miktar),
+                else_=0
+            )
+        )
+
+        query = db.session.query(StokHareket.urun_id, net_miktar.label('net'))
+
+        if urun_ids:
+            query = query.filter(StokHareket.urun_id.in_(urun_ids))
+
+        return {row.urun_id: int(row.net or 0) for row in query.group_by(StokHareket.urun_id)}
+
+    @staticmethod
+    def mutabakat(duzelt=True):
+        """
+        Bakiye tablosunu hareket geçmişi ile karşılaştırır.
+
+        Karşılaştırma sırasında stok_hareketleri SHARE modunda kilitlenir;
+        böylece mutabakat sürerken yeni hareket yazılıp yanlış sapma
+        raporlanmaz. Okumalar engellenmez, yazmalar sorgu süresince bekler.
+
+        Args:
+            duzelt: True ise sapan bakiyeler geçmişteki değere çekilir
+
+        Returns:
+            dict: {'success': bool, 'kontrol_edilen': int, 'sapma_sayisi': int,
+                   'sapmalar': [{'urun_id', 'bakiye', 'beklenen', 'fark'}], 'duzeltildi': bool}
+        """
+        try:
+            db.session.execute(text('LOCK TABLE stok_hareketleri IN SHARE MODE'))
+
+            beklenen = StokBakiyeServisi.gecmisten_hesapla()
+            mevcut = {
+                row.urun_id: int(row.bakiye or 0)
+                for row in db.session.query(UrunStokBakiye.urun_id, UrunStokBakiye.bakiye)
+            }
+
+            sapmalar = []
+            for urun_id in set(beklenen) | set(mevcut):
+                olmasi_gereken = beklenen.get(urun_id, 0)
+                kayitli = mevcut.get(urun_id, 0)
+                if kayitli != olmasi_gereken:
+                    sapmalar.append({
+                        'urun_id': urun_id,
+                        'bakiye': kayitli,
+                        'beklenen': olmasi_gereken,
+                        'fark': olmasi_gereken - kayitli
+                    })
+
+            if sapmalar and duzelt:
+                simdi = get_kktc_now()
+                for sapma in sapmalar:
+                    kayit = db.session.get(UrunStokBakiye, sapma['urun_id'])
+                    if not kayit:
+                        kayit = UrunStokBakiye(urun_id=sapma['urun_id'])
+                        db.session.add(kayit)
+                    kayit.bakiye = sapma['beklenen']
+                    kayit.son_guncelleme = simdi
+
+            # Düzeltme yapılmasa da SHARE kilidini bırakmak için transaction kapatılır
+            db.session.commit()
+
+            if sapmalar:
+                logger.warning(
+                    f"⚠️ Stok bakiye mutabakatı: {len(sapmalar)} üründe sapma "
+                    f"({'düzeltildi' if duzelt else 'sadece raporlandı'})"
+                )
+
+            return {
+                'success': True,
+                'kontrol_edilen': len(set(beklenen) | set(mevcut)),
+                'sapma_sayisi': len(sapmalar),
+                'sapmalar': sapmalar,
+                'duzeltildi': bool(sapmalar) and duzelt
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Stok bakiye mutabakat hatası: {str(e)}")
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def yeniden_olustur():
+        """
+        Bakiye tablosunu hareket geçmişinden sıfırdan oluşturur.
+
+        Returns:
+            dict: {'success': bool, 'urun_sayisi': int}
+        """
+        try:
+            db.session.execute(text('LOCK TABLE stok_hareketleri IN SHARE MODE'))
+            db.session.execute(text('DELETE FROM urun_stok_bakiyeleri'))
+            sonuc = db.session.execute(text("""
+                INSERT INTO urun_stok_bakiyeleri (urun_id, bakiye, son_hareket_id, son_guncelleme)
+                SELECT urun_id,
+                       COALESCE(SUM(CASE
+                           WHEN hareket_tipi IN ('giris', 'devir', 'sayim') THEN miktar
+                           WHEN hareket_tipi = 'cikis' THEN -miktar
+                           ELSE 0 END), 0),
+                       MAX(id),
+                       NOW()
+                FROM stok_hareketleri
+                GROUP BY urun_id
+            """))
+            db.session.commit()
+
+            logger.info(f"✅ Stok bakiyeleri yeniden oluşturuldu: {sonuc.rowcount} ürün")
+            return {'success': True, 'urun_sayisi': sonuc.rowcount}
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Stok bakiye yeniden oluşturma hatası: {str(e)}")
+            return {'success': False, 'message': str(e)}
@@ -0,0 +1,93 @@
+"""
+Zip Akışı - Bellekte Tamamını Tutmadan ZIP Üretimi
+
+zipfile, seek/tell desteklemeyen bir hedefe yazarken her dosyanın
+boyut/CRC bilgisini dosyadan sonra (data descriptor) yazar; böylece
+arşiv baştan sona sıralı üretilebilir. ZipAkisi her eklenen dosyadan
+sonra o ana kadar üretilen baytları döndürür; bellekte en fazla tek
+dosyanın sıkıştırılmış hali ve central directory kayıtları tutulur.
+dosya_akisi ile büyük dosyalar da parça parça sıkıştırılarak eklenebilir.
+
+Kullanım:
+    from utils.zip_akisi import ZipAkisi
+
+    def uret():
+        zip_akisi = ZipAkisi()
+        for ad, veri in dosyalar:
+            yield zip_akisi.dosya_ekle(ad, veri)
+        yield zip_akisi.kapat()
+
+    return Response(stream_with_context(uret()), mimetype='application/zip')
+"""
+
+import zipfile
+
+
+class _AkisTamponu:
+    """ZipFile'ın yazdığı baytları toplar (tell/seek yok: zipfile akış moduna geçer)"""
+
+    def __init__(self):
+        self._parcalar = []
+
+    def write(self, veri):
+        self._parcalar.append(bytes(veri))
+        return len(veri)
+
+    def flush(self):
+        pass
+
+    def bosalt(self):
+        veri = b''.join(self._parcalar)
+        self._parcalar = []
+        return veri
+
+
+class ZipAkisi:
+    """Sıralı (streaming) ZIP yazıcı"""
+
+    def __init__(self, compression=zipfile.ZIP_DEFLATED):
+        self._tampon = _AkisTamponu()
+        self._zip = zipfile.ZipFile(self._tampon, 'w', compression)
+        self.dosya_sayisi = 0
+
+    def dosya_ekle(self, ad, veri):
+        """
+        Dosyayı sıkıştırıp arşive ekler.
+
+        Returns:
+            bytes: İstemciye gönderilecek yeni ZIP baytları
+        """
+        if isinstance(veri, str):
+            veri = veri.encode('utf-8')
+        self._zip.writestr(ad, veri)
+        self.dosya_sayisi += 1
+        return self._tampon.bosalt()
+
+    def dosya_akisi(self, ad, parcalar):
+        """
+        Dosyayı parça parça sıkıştırarak arşive ekler; dosyanın tamamı
+        bellekte tutulmaz.
+
+        Yields:
+            bytes: İstemciye gönderilecek yeni ZIP baytları
+        """
+        with self._zip.open(ad, 'w') as hedef:
+            for parca in parcalar:
+                if isinstance(parca, str):
+                    parca = parca.encode('utf-8')
+                hedef.write(parca)
+                veri = self._tampon.bosalt()
+                if veri:
+                    yield veri
+        self.dosya_sayisi += 1
+        yield self._tampon.bosalt()
+
+    def kapat(self):
+        """
+        Central directory'yi yazıp arşivi kapatır.
+
+        Returns:
+            bytes: Arşivin son baytları
+        """
+        self._zip.close()
+        return self._tampon.bosalt()